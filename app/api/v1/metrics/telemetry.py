@@ -1,4 +1,11 @@
-from prometheus_client import Counter, Gauge
+import contextlib
+import functools
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from opentelemetry import trace
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 from app.core.config.constants import (
     Continent,
@@ -6,6 +13,14 @@ from app.core.config.constants import (
 )
 from app.core.config.constants.generic import RETRYABLE
 
+# Spans are no-ops until an OpenTelemetry SDK/exporter is configured for the
+# process; the Prometheus series below are always recorded.
+tracer = trace.get_tracer("riot_api_ecosystem.pipelines")
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+BATCH_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
 rate_limiter_location_rate = Gauge(
     "rate_limiter_location_rate",
     "Current rate limiter usage (calls/sec) per location",
@@ -18,6 +33,77 @@ api_http_error_codes = Counter(
     ["http_error_code", "category"],
 )
 
+pipeline_stage_seconds = Histogram(
+    "pipeline_stage_seconds",
+    "Wall time per pipeline stage (claim, fetch, insert, resolve, queries)",
+    ["pipeline", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+pipeline_queue_depth = Gauge(
+    "pipeline_queue_depth",
+    "Work waiting between pipeline stages",
+    ["pipeline", "queue"],
+)
+
+clickhouse_inserted_rows = Counter(
+    "clickhouse_inserted_rows_total",
+    "Rows inserted into ClickHouse per table",
+    ["table"],
+)
+
+clickhouse_inserted_bytes = Counter(
+    "clickhouse_inserted_bytes_total",
+    "Bytes ClickHouse reported written per table",
+    ["table"],
+)
+
+# Fed from system.query_log by database/clickhouse/operations/query_log.py;
+# stage is the ``stage`` tag of the queries' log_comment.
+clickhouse_query_count = Counter(
+    "clickhouse_queries_total",
+    "Tagged ClickHouse queries per stage, by outcome",
+    ["stage", "outcome"],
+)
+
+clickhouse_query_read_rows = Counter(
+    "clickhouse_query_read_rows_total",
+    "Rows read by tagged ClickHouse queries per stage",
+    ["stage"],
+)
+
+clickhouse_query_read_bytes = Counter(
+    "clickhouse_query_read_bytes_total",
+    "Bytes read by tagged ClickHouse queries per stage",
+    ["stage"],
+)
+
+clickhouse_query_seconds = Counter(
+    "clickhouse_query_seconds_total",
+    "Server-side duration of tagged ClickHouse queries per stage",
+    ["stage"],
+)
+
+clickhouse_query_peak_memory = Gauge(
+    "clickhouse_query_peak_memory_bytes",
+    "Peak memory of one tagged ClickHouse query per stage in the last collection",
+    ["stage"],
+)
+
+matchdata_parse_seconds = Histogram(
+    "matchdata_parse_seconds",
+    "Parse time per match payload",
+    ["stream"],
+    buckets=PARSE_BUCKETS,
+)
+
+matchdata_claim_to_resolution_seconds = Histogram(
+    "matchdata_claim_to_resolution_seconds",
+    "Time from claiming a matchdata batch to resolving it in the queue",
+    ["pipeline"],
+    buckets=BATCH_BUCKETS,
+)
+
 
 def classify_http_code(code: int) -> tuple[str, str]:
     if code in RETRYABLE:
@@ -39,3 +125,114 @@ def export_location_event(*, location: Continent | Region, rate: float) -> None:
     rate_limiter_location_rate.labels(
         location=location.value,
     ).set(rate)
+
+
+_served_ports: set[int] = set()
+
+
+def serve_metrics(port: int) -> None:
+    """Expose the default registry over HTTP once per process."""
+    if port and port not in _served_ports:
+        start_http_server(port)
+        _served_ports.add(port)
+
+
+def export_stage_seconds(*, pipeline: str, stage: str, seconds: float) -> None:
+    pipeline_stage_seconds.labels(pipeline=pipeline, stage=stage).observe(seconds)
+
+
+def export_queue_depth(*, pipeline: str, queue: str, depth: int) -> None:
+    pipeline_queue_depth.labels(pipeline=pipeline, queue=queue).set(depth)
+
+
+def export_insert(*, table: str, rows: int, written_bytes: int) -> None:
+    clickhouse_inserted_rows.labels(table=table).inc(rows)
+    clickhouse_inserted_bytes.labels(table=table).inc(written_bytes)
+
+
+def export_query_stats(
+    *,
+    stage: str,
+    queries: int,
+    failed: int,
+    read_rows: int,
+    read_bytes: int,
+    peak_memory_bytes: int,
+    seconds: float,
+) -> None:
+    clickhouse_query_count.labels(stage=stage, outcome="ok").inc(queries - failed)
+    clickhouse_query_count.labels(stage=stage, outcome="failed").inc(failed)
+    clickhouse_query_read_rows.labels(stage=stage).inc(read_rows)
+    clickhouse_query_read_bytes.labels(stage=stage).inc(read_bytes)
+    clickhouse_query_seconds.labels(stage=stage).inc(seconds)
+    clickhouse_query_peak_memory.labels(stage=stage).set(peak_memory_bytes)
+
+
+def export_parse_ns(*, stream: str, elapsed_ns: int) -> None:
+    matchdata_parse_seconds.labels(stream=stream).observe(elapsed_ns / 1e9)
+
+
+@contextlib.contextmanager
+def observe_stage(pipeline: str, stage: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Time a stage into ``pipeline_stage_seconds`` inside a child span."""
+    started = time.perf_counter()
+    with tracer.start_as_current_span(
+        f"{pipeline}.{stage}",
+        attributes={"pipeline": pipeline, **attributes},
+    ) as span:
+        try:
+            yield span
+        finally:
+            export_stage_seconds(
+                pipeline=pipeline, stage=stage, seconds=time.perf_counter() - started
+            )
+
+
+def timed_stage[**P, R](
+    pipeline: str, stage: str
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator form of ``observe_stage`` for synchronous functions."""
+
+    def decorate(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with observe_stage(pipeline, stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class BatchTrace:
+    """Root span of one claimed batch, from claim to queue resolution.
+
+    The span is not made current on creation: a batch crosses tasks (claimed
+    by the fetcher, resolved by the saver), so each side wraps its own work in
+    ``activate()`` to parent its stage spans under the batch.
+    """
+
+    def __init__(self, pipeline: str, run_id: object) -> None:
+        self.pipeline = pipeline
+        self.started = time.perf_counter()
+        self.span = tracer.start_span(
+            f"{pipeline}.batch",
+            attributes={"pipeline": pipeline, "run_id": str(run_id)},
+        )
+        self._ended = False
+
+    def activate(self) -> contextlib.AbstractContextManager[trace.Span]:
+        return trace.use_span(self.span, end_on_exit=False)
+
+    def resolved(self, **attributes: int) -> None:
+        """The batch's queue rows are resolved: record latency and end the span."""
+        matchdata_claim_to_resolution_seconds.labels(pipeline=self.pipeline).observe(
+            time.perf_counter() - self.started
+        )
+        self.span.set_attributes(attributes)
+        self.end()
+
+    def end(self) -> None:
+        if not self._ended:
+            self._ended = True
+            self.span.end()
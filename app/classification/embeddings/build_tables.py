@@ -42,6 +42,11 @@ from app.classification.embeddings import temporal as T
 from app.core.utils.common import sql_literal
 from app.core.utils.smoothing import build_group_sql
 from database.clickhouse.client import get_client
+from database.clickhouse.query_tags import (
+    query_context,
+    tagged_settings,
+    tagged_stage,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -205,7 +210,8 @@ SELECT arr[idx] FROM (
         SELECT DISTINCT matchid AS m FROM {FINAL_PARTICIPANT_STATS_TABLE} ORDER BY m
     )
 ) ARRAY JOIN arrayMap(i -> toUInt32(intDiv(length(arr) * i, {k})), range(1, {k})) AS idx
-"""
+""",
+        settings=tagged_settings(),
     ).result_rows
     return tuple(str(r[0]) for r in rows)
 
@@ -452,7 +458,7 @@ LEFT JOIN (
 
 
 def _cmd(client, sql: str) -> None:
-    client.command(sql)
+    client.command(sql, settings=tagged_settings())
 
 
 def _recreate(client, table: str, ddl: str) -> None:
@@ -460,6 +466,7 @@ def _recreate(client, table: str, ddl: str) -> None:
     _cmd(client, ddl)
 
 
+@tagged_stage("classification.build_tables")
 def build_classification_tables(*, include_context: bool = True) -> None:
     """(Re)materialise the full-game sufficient-statistic tables for every split."""
     client = get_client()
@@ -482,31 +489,33 @@ def build_classification_tables(*, include_context: bool = True) -> None:
             _recreate(client, table, ddl)
 
     for split in SPLITS:
-        logger.info("Building identity/final base for split=%s", split)
-        _cmd(client, _identity_insert(split))
-        for shard in range(K_SHARDS):
-            _cmd(client, _final_insert(split, shard))
-        _cmd(client, _final_combine(split))
-        _cmd(client, f"TRUNCATE TABLE {_FINAL_STAGE}")
-        if include_context:
-            logger.info("Building context base for split=%s", split)
+        with query_context(batch=split):
+            logger.info("Building identity/final base for split=%s", split)
+            _cmd(client, _identity_insert(split))
             for shard in range(K_SHARDS):
-                team_sql, _ = team_share_query(split, K_SHARDS, shard)
-                matchup_sql, _ = matchup_query(split, K_SHARDS, shard)
-                _cmd(client, _context_stage_insert(_TEAM_STAGE, team_sql, TEAM_FEATURE_NAMES, split))
-                _cmd(
-                    client,
-                    _context_stage_insert(_MATCHUP_STAGE, matchup_sql, MATCHUP_FEATURE_NAMES, split),
-                )
-            _cmd(client, _context_combine(split))
-            _cmd(client, f"TRUNCATE TABLE {_TEAM_STAGE}")
-            _cmd(client, f"TRUNCATE TABLE {_MATCHUP_STAGE}")
+                _cmd(client, _final_insert(split, shard))
+            _cmd(client, _final_combine(split))
+            _cmd(client, f"TRUNCATE TABLE {_FINAL_STAGE}")
+            if include_context:
+                logger.info("Building context base for split=%s", split)
+                for shard in range(K_SHARDS):
+                    team_sql, _ = team_share_query(split, K_SHARDS, shard)
+                    matchup_sql, _ = matchup_query(split, K_SHARDS, shard)
+                    _cmd(client, _context_stage_insert(_TEAM_STAGE, team_sql, TEAM_FEATURE_NAMES, split))
+                    _cmd(
+                        client,
+                        _context_stage_insert(_MATCHUP_STAGE, matchup_sql, MATCHUP_FEATURE_NAMES, split),
+                    )
+                _cmd(client, _context_combine(split))
+                _cmd(client, f"TRUNCATE TABLE {_TEAM_STAGE}")
+                _cmd(client, f"TRUNCATE TABLE {_MATCHUP_STAGE}")
 
     _cmd(client, f"TRUNCATE TABLE {META_TABLE}")
     _cmd(client, f"INSERT INTO {META_TABLE} (catalogue_hash) VALUES ({sql_literal(catalogue_hash())})")
     logger.info("Built classification base tables")
 
 
+@tagged_stage("classification.build_temporal_table")
 def build_temporal_table() -> None:
     """(Re)materialise temporal_identity_bins via staged, sharded scans."""
     client = get_client()
@@ -518,13 +527,14 @@ def build_temporal_table() -> None:
         _recreate(client, table, ddl)
     bounds = _matchid_bounds(client, K_SHARDS)
     for split in SPLITS:
-        logger.info("Building temporal bins for split=%s", split)
-        for shard in range(K_SHARDS):
-            _cmd(client, _temporal_stat_insert(split, shard, bounds))
-            _cmd(client, _temporal_ev_insert(split, shard, bounds))
-        _cmd(client, _temporal_combine(split))
-        _cmd(client, f"TRUNCATE TABLE {_STAT_STAGE}")
-        _cmd(client, f"TRUNCATE TABLE {_EV_STAGE}")
+        with query_context(batch=split):
+            logger.info("Building temporal bins for split=%s", split)
+            for shard in range(K_SHARDS):
+                _cmd(client, _temporal_stat_insert(split, shard, bounds))
+                _cmd(client, _temporal_ev_insert(split, shard, bounds))
+            _cmd(client, _temporal_combine(split))
+            _cmd(client, f"TRUNCATE TABLE {_STAT_STAGE}")
+            _cmd(client, f"TRUNCATE TABLE {_EV_STAGE}")
     logger.info("Built %s", T.BINS_TABLE)
 
 
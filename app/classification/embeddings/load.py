@@ -23,7 +23,6 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Sequence
 
 import numpy as np
 
@@ -48,6 +47,7 @@ from app.classification.embeddings.registry import RAW_SPECS, Source
 from app.core.utils.common import sql_literal
 from app.core.utils.smoothing import sibling_build_sql
 from database.clickhouse.client import get_client
+from database.clickhouse.operations.utils import read_columns
 
 logger = logging.getLogger(__name__)
 
@@ -75,32 +75,28 @@ class LevelRows:
         return LevelRows(self.level, self.key_columns, merged, self.n)
 
 
-def _columns_to_arrays(
-    rows: Sequence[Sequence[object]], col_names: tuple[str, ...]
-) -> dict[str, np.ndarray]:
-    n = len(rows)
-    arrays: dict[str, np.ndarray] = {}
-    for i, name in enumerate(col_names):
-        col = [r[i] for r in rows]
+def _column_schema(col_names: tuple[str, ...]) -> dict[str, type]:
+    schema: dict[str, type] = {}
+    for name in col_names:
         if name == "championid":
-            arrays[name] = np.asarray(col, dtype=np.int32)
+            schema[name] = np.int32
         elif name == "sum_w_timeplayed":
-            arrays[name] = np.asarray(col, dtype=np.float64)
+            schema[name] = np.float64
         elif name == "matchups" or name in _NUMERIC_FLOAT32:
-            arrays[name] = np.asarray(col, dtype=np.float32)
+            schema[name] = np.float32
         else:
-            arrays[name] = np.asarray(col, dtype=object)
-    assert all(arr.shape == (n,) for arr in arrays.values())
-    return arrays
+            schema[name] = object
+    return schema
 
 
 def _query_to_level(
     *, level: IdentityType, query: str, col_names: tuple[str, ...]
 ) -> LevelRows:
-    rows = get_client().query(query).result_rows
-    arrays = _columns_to_arrays(rows, col_names)
-    logger.info("Loaded %s: %d rows", level.value, len(rows))
-    return LevelRows(level, LEVEL_KEY[level], arrays, len(rows))
+    arrays = read_columns(query, _column_schema(col_names), client=get_client())
+    n = len(arrays[col_names[0]])
+    assert all(arr.shape == (n,) for arr in arrays.values())
+    logger.info("Loaded %s: %d rows", level.value, n)
+    return LevelRows(level, LEVEL_KEY[level], arrays, n)
 
 
 def _metric_expr(metric: str, *, rollup: bool) -> str:
@@ -33,6 +33,7 @@ import numpy as np
 from app.classification.embeddings.config import EmbeddingConfig
 from app.core.utils.common import median_mad_standardise, sql_literal
 from database.clickhouse.client import get_client
+from database.clickhouse.operations.utils import read_columns
 
 logger = logging.getLogger(__name__)
 
@@ -128,37 +129,53 @@ class TemporalTensors:
 
 def _load_bins(split: str) -> tuple[list[tuple], np.ndarray, np.ndarray]:
     """Read the prepared table -> (keys, sums (n,B,M), frames (n,B))."""
-    select_cols = ", ".join(
-        ["championid", "teamposition", "build", "bucket", "frames"]
-        + [f"sum_{m}" for m in TEMPORAL_METRICS]
-        + [f"ev_{m}" for m in EVENT_METRICS]
-    )
+    metric_cols = [f"sum_{m}" for m in TEMPORAL_METRICS] + [
+        f"ev_{m}" for m in EVENT_METRICS
+    ]
+    schema = {
+        "championid": np.int64,
+        "teamposition": object,
+        "build": object,
+        "bucket": np.int64,
+        "frames": np.float64,
+        **dict.fromkeys(metric_cols, np.float64),
+    }
     sql = (
-        f"SELECT {select_cols} FROM {BINS_TABLE}"
+        f"SELECT {', '.join(schema)} FROM {BINS_TABLE}"
         f" WHERE split = {sql_literal(split)}"
     )
-    rows = get_client().query(sql).result_rows
-    n_metric = len(METRIC_NAMES)
-    index: dict[tuple, int] = {}
-    sum_rows: list[np.ndarray] = []
-    cnt_rows: list[np.ndarray] = []
-    for row in rows:
-        key = (int(row[0]), str(row[1]), str(row[2]))
-        idx = index.get(key)
-        if idx is None:
-            idx = len(sum_rows)
-            index[key] = idx
-            sum_rows.append(np.zeros((N_BUCKETS, n_metric), dtype=np.float64))
-            cnt_rows.append(np.zeros(N_BUCKETS, dtype=np.float64))
-        bucket = int(row[3])
-        cnt_rows[idx][bucket] = float(row[4] or 0.0)
-        sum_rows[idx][bucket, :] = [float(v or 0.0) for v in row[5:]]
-    keys = list(index)
-    if not keys:
+    cols = read_columns(sql, schema, client=get_client())
+    if not len(cols["bucket"]):
         raise RuntimeError(
             f"{BINS_TABLE} has no rows for split={split!r}; run build_temporal_table()"
         )
-    return keys, np.stack(sum_rows), np.stack(cnt_rows)
+
+    # Identity index per row, keys in first-appearance order.
+    codes = [
+        np.unique(cols[name], return_inverse=True)[1].astype(np.int64)
+        for name in ("championid", "teamposition", "build")
+    ]
+    code = np.ravel_multi_index(codes, [int(c.max()) + 1 for c in codes])
+    _, first, inverse = np.unique(code, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    row_idx = rank[inverse]
+    head = first[order]
+    keys = list(
+        zip(
+            cols["championid"][head].tolist(),
+            cols["teamposition"][head].tolist(),
+            cols["build"][head].tolist(),
+        )
+    )
+
+    bucket = cols["bucket"]
+    sums = np.zeros((len(keys), N_BUCKETS, len(METRIC_NAMES)), dtype=np.float64)
+    cnt = np.zeros((len(keys), N_BUCKETS), dtype=np.float64)
+    cnt[row_idx, bucket] = cols["frames"]
+    sums[row_idx, bucket, :] = np.stack([cols[c] for c in metric_cols], axis=1)
+    return keys, sums, cnt
 
 
 def _shrink(sums: np.ndarray, counts: np.ndarray, keys: list[tuple]) -> np.ndarray:
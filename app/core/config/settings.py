@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from pydantic import PositiveInt, SecretStr
+from pydantic import NonNegativeInt, PositiveFloat, PositiveInt, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
@@ -25,6 +25,66 @@ class Settings(BaseSettings):
     clickhouse_user: str
     clickhouse_password: SecretStr
     clickhouse_send_receive_timeout: PositiveInt = 1800
+    # Query profiles (database/clickhouse/client.py). Each runs on its own
+    # executor of this many threads, so light queue work never waits behind a
+    # heavy build; both share one HTTP connection pool. Zero limits leave the
+    # server default, so every limit is opt-in; max_execution_time is the
+    # server-side query timeout.
+    clickhouse_max_concurrency: PositiveInt = 8
+    clickhouse_light_max_threads: NonNegativeInt = 0
+    clickhouse_light_max_memory_usage: NonNegativeInt = 0
+    clickhouse_light_max_execution_time_s: NonNegativeInt = 0
+    clickhouse_heavy_max_concurrency: PositiveInt = 2
+    clickhouse_heavy_max_threads: NonNegativeInt = 0
+    clickhouse_heavy_max_memory_usage: NonNegativeInt = 0
+    clickhouse_heavy_max_execution_time_s: NonNegativeInt = 0
+    # Matchdata inserts go through the server's async insert buffer, which
+    # coalesces small per-table flushes into one part. Without wait, non-anchor
+    # inserts return once buffered and the buffer is flushed before anchors.
+    clickhouse_async_insert: bool = False
+    clickhouse_async_insert_wait: bool = True
+    clickhouse_async_insert_busy_timeout_ms: PositiveInt = 1_000
+    clickhouse_async_insert_max_data_size: PositiveInt = 10 * 1024 * 1024
+
+    # Fully-qualified game_data tables to skip parsing/inserting, e.g.
+    # MATCHDATA_DISABLED_TABLES='["game_data.tl_ward_placed"]'.
+    matchdata_disabled_tables: frozenset[str] = frozenset()
+    # Fetch timelines as raw bytes and parse them frame by frame instead of
+    # decoding and validating the whole document at once.
+    matchdata_stream_timeline: bool = False
+    # Keep every fetched matchdata payload (zstd JSON) under this directory so
+    # scripts/reparse_matchdata.py can rebuild tables without the Riot API.
+    matchdata_archive_dir: Path | None = None
+    # Write-ahead log of fetch results per claimed batch (zstd, one file per
+    # batch); batches left by a crash are replayed on start without refetching.
+    matchdata_wal_dir: Path | None = None
+    # Claimed batches fetched ahead of the saver (0 = strict claim/fetch/save).
+    matchdata_prefetch_batches: NonNegativeInt = 0
+    # Stage each batch in game_data_staging and promote complete matches in one
+    # step (schema D10); needs 3190_matchdata_staging_schema.sql applied.
+    matchdata_staging: bool = False
+    # Stamp game_month on every raw row for the partitioned layout (schema D14);
+    # needs migrations/2026-10-19_d14_partition_raw_by_game_month.sh applied.
+    matchdata_partitioned: bool = False
+    # Several drainers: lease claims for this many seconds (0 = single drainer,
+    # no leases; needs 3003_matchdata_leases_schema.sql), heartbeated while held.
+    matchdata_lease_ttl_s: NonNegativeInt = 0
+    # Lease owner shown in game_data.matchdata_leases; defaults to host:pid.
+    matchdata_drainer_id: str = ""
+    # Optional static split of the queue: drainer i of n claims only
+    # shuffle_key % n == i. Works with or without leases.
+    matchdata_shard_count: PositiveInt = 1
+    matchdata_shard_index: NonNegativeInt = 0
+    # Size claims from observed fetch throughput (aiming at target_batch_s per
+    # batch) and flush each table by bytes and insert latency, within a memory
+    # budget and a parts-per-second cap, instead of the fixed sizes.
+    matchdata_adaptive_batching: bool = False
+    matchdata_target_batch_s: PositiveInt = 600
+    matchdata_flush_memory_mib: PositiveInt = 512
+    matchdata_max_parts_per_s: PositiveFloat = 1.0
+    # Serve the worker's Prometheus metrics (stage latencies, queue depths,
+    # rows/bytes per table) on this port; 0 disables the endpoint.
+    metrics_port: NonNegativeInt = 0
 
     model_config = SettingsConfigDict(
         env_file=PROJECT_ROOT / ".env",
@@ -26,7 +26,9 @@ from app.ml.patch_features import feature_metadata, write_patch_feature_arrays
 from app.core.utils.smoothing import smooth_rate_by_mode
 from clickhouse_connect.driver.exceptions import StreamFailureError
 
-from database.clickhouse.client import _local, get_client
+from database.clickhouse.client import _local, bind_query_profile, get_client
+from database.clickhouse.operations.utils import stream_column_blocks
+from database.clickhouse.query_tags import tagged_settings
 
 SPLIT_ORDER = ("train", "test")
 
@@ -146,15 +148,16 @@ def _remove_stale_sidecar_arrays(cache_dir: Path) -> None:
         path.unlink(missing_ok=True)
 
 
-# Outer-SELECT columns of _CHUNK_QUERY_TEMPLATE, by position (matchid trails them).
-_RAW_COLUMNS = (
-    "blue_win",
-    "p1_raw",
-    "p1_cnt",
-    "champion_id",
-    "build_id",
-    "pl_raw",
-)
+# Outer-SELECT columns of _CHUNK_QUERY_TEMPLATE read per block; the Array(10)
+# columns arrive as (rows, 10).
+_RAW_SCHEMA = {
+    "blue_win": np.float64,
+    "p1_raw": np.float64,
+    "p1_cnt": np.float64,
+    "champion_id": np.int16,
+    "build_id": np.int16,
+    "matchid": object,
+}
 
 _CHUNK_SIZE = 50_000
 
@@ -204,26 +207,14 @@ def _smoothed_features(
     }
 
 
-def _fetch_chunk_rows(query: str, attempts: int = 4) -> list:
-    """Run a chunk query, retrying on the intermittent ClickHouse StreamFailureError.
-    A stream failure can leave the thread-local connection unusable, so drop it and
-    reconnect before each retry."""
-    for attempt in range(1, attempts + 1):
+def _reset_client() -> None:
+    """A stream failure can leave the thread-local connection unusable; drop it."""
+    client = getattr(_local, "client", None)
+    if client is not None:
         try:
-            return list(get_client().query(query).result_rows)
-        except StreamFailureError:
-            if attempt == attempts:
-                raise
-            logger.warning(
-                "StreamFailureError on chunk fetch (attempt %d), reconnecting", attempt
-            )
-            client = getattr(_local, "client", None)
-            if client is not None:
-                try:
-                    client.close()
-                finally:
-                    _local.client = None
-    return []
+            client.close()
+        finally:
+            _local.client = None
 
 
 def _stream_split(
@@ -234,10 +225,16 @@ def _stream_split(
     build_vocab_sql: str,
     n_builds: int,
     key_build_expr: str,
+    attempts: int = 4,
 ) -> Iterable[dict[str, np.ndarray]]:
-    """Yield raw prior columns in chunks, keyset-paginated on matchid (no OFFSET cost)."""
+    """Yield raw prior columns per Arrow block, keyset-paginated on matchid (no OFFSET cost).
+
+    An intermittent ClickHouse StreamFailureError reconnects and resumes after the
+    last matchid already yielded, so no game is read twice.
+    """
     remaining = int(limit)
     last_matchid = ""
+    failures = 0
     while remaining > 0:
         chunk = min(_CHUNK_SIZE, remaining)
         query = _CHUNK_QUERY_TEMPLATE.format(
@@ -250,16 +247,29 @@ def _stream_split(
             n_builds=n_builds,
             key_build_expr=key_build_expr,
         )
-        rows = _fetch_chunk_rows(query)
-        if not rows:
-            return
-        yield {
-            name: np.asarray([r[i] for r in rows], dtype=np.float64)
-            for i, name in enumerate(_RAW_COLUMNS)
-        }
-        remaining -= len(rows)
-        last_matchid = str(rows[-1][len(_RAW_COLUMNS)])
-        if len(rows) < chunk:
+        read = 0
+        try:
+            for block in stream_column_blocks(
+                query,
+                _RAW_SCHEMA,
+                settings=tagged_settings("ml.build_dataset.chunk", batch=split),
+            ):
+                matchid = block.pop("matchid")
+                yield block
+                read += len(matchid)
+                remaining -= len(matchid)
+                last_matchid = str(matchid[-1])
+                failures = 0
+        except StreamFailureError:
+            failures += 1
+            if failures == attempts:
+                raise
+            logger.warning(
+                "StreamFailureError on chunk stream (attempt %d), reconnecting", failures
+            )
+            _reset_client()
+            continue
+        if read < chunk:
             return
 
 
@@ -438,6 +448,7 @@ def _parse_args() -> DatasetConfig:
 
 
 def main() -> None:
+    bind_query_profile("heavy")
     build(_parse_args())
 
 
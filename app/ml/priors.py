@@ -20,7 +20,7 @@ from dataclasses import dataclass
 
 import numpy as np
 
-from database.clickhouse.client import get_client
+from database.clickhouse.operations.utils import read_columns
 
 DEFAULT_WIN_RATE = 0.5
 DEFAULT_MATCHUPS = 0
@@ -43,17 +43,27 @@ class PriorTables:
         return wr, cnt
 
 
-def load_priors() -> PriorTables:
-    client = get_client()
+_P1_SCHEMA = {
+    "championid": np.int64,
+    "teamposition": object,
+    "build": object,
+    "win_rate": np.float64,
+    "matchups": np.int64,
+}
+
 
-    p1_rows = client.query(
+def load_priors() -> PriorTables:
+    cols = read_columns(
         """
         SELECT championid, teamposition, build, win_rate, matchups
         FROM game_data_filtered.synergy_1vx
         WHERE split = 'train'
-        """
-    ).result_rows
-    p1 = {(int(c), str(p), str(b)): (float(w), int(m)) for c, p, b, w, m in p1_rows}
+        """,
+        _P1_SCHEMA,
+    )
+    keys = zip(cols["championid"].tolist(), cols["teamposition"], cols["build"])
+    values = zip(cols["win_rate"].tolist(), cols["matchups"].tolist())
+    p1 = dict(zip(keys, values))
 
     return PriorTables(p1=p1)
 
@@ -48,7 +48,8 @@ class FetchOutcome(StrEnum):
 
 @dataclass(frozen=True)
 class FetchJSONResult:
-    data: JSON | JSONList | None
+    # bytes only when the caller asked for the undecoded body (raw_body=True).
+    data: JSON | JSONList | bytes | None
     outcome: FetchOutcome
     status: int | None = None
 
@@ -165,6 +166,7 @@ class RiotAPI:
         *,
         url: str,
         location: Region | Continent,
+        raw_body: bool = False,
     ) -> FetchJSONResult:
         """
         Fetch JSON from Riot API with:
@@ -172,6 +174,9 @@ class RiotAPI:
         - on 429: advances the limiter to now+Retry-After so all workers on
           this continent pause until the rolling window has headroom again
         - on 5xx/connection errors: standard exponential backoff retry
+
+        ``raw_body=True`` returns the undecoded body bytes so large payloads can
+        be decoded incrementally by the caller.
         """
         if self._session is None or self._session.closed:
             raise RuntimeError(
@@ -183,7 +188,11 @@ class RiotAPI:
 
         async with limiter:
             return await self._http_request(
-                url=url, location=location, session=self._session, limiter=limiter
+                url=url,
+                location=location,
+                session=self._session,
+                limiter=limiter,
+                raw_body=raw_body,
             )
 
     async def _http_request(
@@ -193,6 +202,7 @@ class RiotAPI:
         location: Region | Continent,
         session: aiohttp.ClientSession,
         limiter: TelemetryLimiter,
+        raw_body: bool = False,
     ) -> FetchJSONResult:
         """Single HTTP call. Raises retryable exceptions for fetch_json_detailed's @retry."""
         headers = {"X-Riot-Token": self.api_key}
@@ -248,6 +258,12 @@ class RiotAPI:
                         outcome=FetchOutcome.HTTP_NON_RETRYABLE,
                         status=status,
                     )
+                if raw_body:
+                    return FetchJSONResult(
+                        data=await resp.read(),
+                        outcome=FetchOutcome.OK,
+                        status=status,
+                    )
                 try:
                     return FetchJSONResult(
                         data=await resp.json(),
@@ -29,7 +29,8 @@ class MatchWork(NamedTuple):
 @dataclass(frozen=True)
 class MatchFetchResult:
     match_id: str
-    data: dict[str, Any] | None
+    # Undecoded body bytes when streamed with raw_body=True.
+    data: dict[str, Any] | bytes | None
     status: int | None
 
 
@@ -37,6 +38,8 @@ async def stream_match_data(
     matchids: list[str],
     endpoint_type: MatchEndpointType,
     riot_api: RiotAPI,
+    *,
+    raw_body: bool = False,
 ) -> AsyncIterator[MatchFetchResult]:
     endpoint = ENDPOINTS["match"][endpoint_type]
 
@@ -67,8 +70,9 @@ async def stream_match_data(
                 matchId=work.match_id,
             ),
             location=work.continent,
+            raw_body=raw_body,
         )
-        data = result.data if isinstance(result.data, dict) else None
+        data = result.data if isinstance(result.data, dict | bytes) else None
         return MatchFetchResult(
             match_id=work.match_id,
             data=data,
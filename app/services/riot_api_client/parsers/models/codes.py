@@ -0,0 +1,147 @@
+"""Versioned dictionaries for repeated enum-like strings in match payloads.
+
+Parsers emit the integer code instead of the raw string, and the matching raw
+columns are declared as ``Enum8`` with exactly these name/value pairs, so the
+insert path sends one byte per value and ClickHouse never re-encodes strings.
+
+Codes are append-only: never renumber or reuse a value, add new names at the
+end and bump ``CODE_TABLES_VERSION``. ``0`` is always ``UNKNOWN`` and absorbs
+values Riot introduces before the table catches up (logged once per value).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+CODE_TABLES_VERSION = 1
+UNKNOWN_CODE = 0
+
+
+@dataclass(frozen=True)
+class CodeTable:
+    name: str
+    names: tuple[str, ...]
+    codes: Mapping[str, int] = field(init=False, repr=False)
+    _warned: set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.names[UNKNOWN_CODE] != "UNKNOWN":
+            raise ValueError(f"Code table {self.name!r} must start with 'UNKNOWN'")
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Code table {self.name!r} has duplicate names")
+        if len(self.names) > 128:
+            raise ValueError(f"Code table {self.name!r} does not fit in Enum8")
+        codes = MappingProxyType({name: code for code, name in enumerate(self.names)})
+        object.__setattr__(self, "codes", codes)
+
+    def encode(self, value: str | None) -> int:
+        code = self.codes.get(value) if value is not None else None
+        if code is not None:
+            return code
+        if value and value not in self._warned:
+            self._warned.add(value)
+            logger.warning(
+                "UnknownCode table=%s value=%r version=%s",
+                self.name,
+                value,
+                CODE_TABLES_VERSION,
+            )
+        return UNKNOWN_CODE
+
+    def decode(self, code: int) -> str:
+        return self.names[code]
+
+    def enum8_sql(self) -> str:
+        """Column type matching this table, as written in the 3xxx schema files."""
+        members = ", ".join(f"'{name}' = {code}" for code, name in enumerate(self.names))
+        return f"Enum8 ({members})"
+
+
+EVENT_TYPE = CodeTable(
+    "event_type",
+    (
+        "UNKNOWN",
+        "ITEM_PURCHASED",
+        "ITEM_UNDO",
+        "SKILL_LEVEL_UP",
+        "WARD_KILL",
+        "WARD_PLACED",
+        "LEVEL_UP",
+        "GAME_END",
+        "ITEM_DESTROYED",
+        "ITEM_SOLD",
+        "PAUSE_END",
+        "CHAMPION_KILL",
+        "CHAMPION_SPECIAL_KILL",
+        "DRAGON_SOUL_GIVEN",
+        "ELITE_MONSTER_KILL",
+        "TURRET_PLATE_DESTROYED",
+        "BUILDING_KILL",
+        "OBJECTIVE_BOUNTY_PRESTART",
+        "OBJECTIVE_BOUNTY_FINISH",
+        "FEAT_UPDATE",
+        "CHAMPION_TRANSFORM",
+    ),
+)
+
+BUILDING_TYPE = CodeTable(
+    "building_type",
+    ("UNKNOWN", "TOWER_BUILDING", "INHIBITOR_BUILDING"),
+)
+
+LANE_TYPE = CodeTable(
+    "lane_type",
+    ("UNKNOWN", "TOP_LANE", "MID_LANE", "BOT_LANE"),
+)
+
+MONSTER_TYPE = CodeTable(
+    "monster_type",
+    ("UNKNOWN", "DRAGON", "BARON_NASHOR", "RIFTHERALD", "HORDE", "ATAKHAN"),
+)
+
+WARD_TYPE = CodeTable(
+    "ward_type",
+    (
+        "UNKNOWN",
+        "UNDEFINED",
+        "YELLOW_TRINKET",
+        "CONTROL_WARD",
+        "SIGHT_WARD",
+        "BLUE_TRINKET",
+        "TEEMO_MUSHROOM",
+    ),
+)
+
+KILL_TYPE = CodeTable(
+    "kill_type",
+    ("UNKNOWN", "KILL_FIRST_BLOOD", "KILL_MULTI", "KILL_ACE"),
+)
+
+# Matches the pre-existing participant_stats.teamposition Enum8; Riot sends ""
+# for remakes and non-positional modes, which lands on UNKNOWN.
+TEAM_POSITION = CodeTable(
+    "team_position",
+    ("UNKNOWN", "TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"),
+)
+
+# raw table -> column -> code table; the schema and migration must agree.
+CODED_COLUMNS: Mapping[str, Mapping[str, CodeTable]] = {
+    "participant_stats": {"teamposition": TEAM_POSITION},
+    "tl_building_kill": {
+        "type": EVENT_TYPE,
+        "buildingtype": BUILDING_TYPE,
+        "lanetype": LANE_TYPE,
+    },
+    "tl_champion_kill": {"type": EVENT_TYPE},
+    "tl_champion_special_kill": {"type": EVENT_TYPE, "killtype": KILL_TYPE},
+    "tl_dragon_soul_given": {"type": EVENT_TYPE},
+    "tl_elite_monster_kill": {"type": EVENT_TYPE, "monstertype": MONSTER_TYPE},
+    "tl_turret_plate_destroyed": {"type": EVENT_TYPE, "lanetype": LANE_TYPE},
+    "tl_ward_placed": {"wardtype": WARD_TYPE},
+    "tl_ward_kill": {"wardtype": WARD_TYPE},
+}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass, field, fields
 from datetime import UTC, datetime
 from typing import Any, TypedDict, cast
@@ -12,6 +12,7 @@ from app.services.riot_api_client.parsers.base_parsers import (
     InfoParser,
     ParticipantParser,
 )
+from app.services.riot_api_client.parsers.models import codes
 from app.services.riot_api_client.parsers.models.non_timeline import (
     CHALLENGE_FIELDS,
     CHALLENGE_LIST_FIELDS,
@@ -26,6 +27,9 @@ from app.services.riot_api_client.parsers.schema_drift import (
 
 logger = logging.getLogger(__name__)
 
+# Anchor field marking a complete non-timeline stream; it can never be deselected.
+NON_TIMELINE_ANCHOR_FIELD = "game_info"
+
 
 def is_abort_payload(raw: dict[str, Any]) -> bool:
     info = raw.get("info")
@@ -258,7 +262,7 @@ class TabulatedParticipantStats(MatchIdRow):
     champLevel: NonNegativeInt
     champExperience: NonNegativeInt
 
-    teamPosition: str
+    teamPosition: int
     positionAssignedByMatchmaking: str | None
     selectedRolePreferences: str | None
 
@@ -454,6 +458,7 @@ class ParticipantStatsParser:
                 else None
             )
             data["matchId"] = matchId
+            data["teamPosition"] = codes.TEAM_POSITION.encode(data.get("teamPosition"))
             for field_name in self._UINT8_CLAMP_FIELDS:
                 value = data.get(field_name)
                 if value is not None and value > 255:
@@ -697,6 +702,24 @@ class MatchDataNonTimelineParsingOrchestrator:
         default_factory=ParticipantPerkIdsParser
     )
 
+    # NonTimelineTables field names to materialise; None parses every table.
+    tables: frozenset[str] | None = None
+
+    def __post_init__(self) -> None:
+        if self.tables is None:
+            return
+        known = {f.name for f in fields(NonTimelineTables)}
+        unknown = self.tables - known
+        if unknown:
+            raise ValueError(f"Unknown non-timeline tables: {sorted(unknown)}")
+        if NON_TIMELINE_ANCHOR_FIELD not in self.tables:
+            raise ValueError(
+                f"Non-timeline anchor table {NON_TIMELINE_ANCHOR_FIELD!r} cannot be disabled"
+            )
+
+    def _is_enabled(self, table: str) -> bool:
+        return self.tables is None or table in self.tables
+
     @staticmethod
     def _drift_date(raw: dict[str, Any]) -> str:
         try:
@@ -773,20 +796,30 @@ class MatchDataNonTimelineParsingOrchestrator:
             participants: list[Participant] = info.participants
             matchId = metadata.matchId
 
-            tables = NonTimelineTables(
-                metadata=self.metadata.parse(metadata, matchId),
-                game_info=self.gameInfo.parse(info, matchId),
-                bans=self.bans.parse(info, matchId),
-                feats=self.feats.parse(info, matchId),
-                objectives=self.objectives.parse(info, matchId),
-                participant_stats=self.participantStats.parse(participants, matchId),
-                participant_challenges=self.participantChallenges.parse(
+            table_parsers: dict[str, Callable[[], list[Any]]] = {
+                "metadata": lambda: self.metadata.parse(metadata, matchId),
+                "game_info": lambda: self.gameInfo.parse(info, matchId),
+                "bans": lambda: self.bans.parse(info, matchId),
+                "feats": lambda: self.feats.parse(info, matchId),
+                "objectives": lambda: self.objectives.parse(info, matchId),
+                "participant_stats": lambda: self.participantStats.parse(
                     participants, matchId
                 ),
-                participant_perk_values=self.participantPerkValues.parse(
+                "participant_challenges": lambda: self.participantChallenges.parse(
                     participants, matchId
                 ),
-                participant_perk_ids=self.participantPerkIds.parse(participants, matchId),
+                "participant_perk_values": lambda: self.participantPerkValues.parse(
+                    participants, matchId
+                ),
+                "participant_perk_ids": lambda: self.participantPerkIds.parse(
+                    participants, matchId
+                ),
+            }
+            tables = NonTimelineTables(
+                **{
+                    name: parse() if self._is_enabled(name) else []
+                    for name, parse in table_parsers.items()
+                }
             )
         except ValidationError as e:
             errs = e.errors(include_input=True)
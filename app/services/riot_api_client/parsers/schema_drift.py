@@ -281,44 +281,55 @@ def timeline(raw: Any, *, match_id: str = "unknown", drift_date: str = "unknown"
         )
 
     for frame_idx, frame in enumerate(frames):
-        events = frame.get("events") if isinstance(frame, dict) else None
-        if not isinstance(events, list):
-            _fail(
-                stream="timeline",
-                match_id=match_id,
-                drift_date=drift_date,
-                checked_object="events",
-                path=f"$.info.frames[{frame_idx}].events",
-                expected_schema="list[Event]",
-                actual_schema=_shape(events),
-                differences=[{"type": "expected_list"}],
-            )
+        timeline_frame(frame, frame_idx=frame_idx, match_id=match_id, drift_date=drift_date)
 
-        for event_idx, event in enumerate(events):
-            path = f"$.info.frames[{frame_idx}].events[{event_idx}]"
-            event_type = event.get("type") if isinstance(event, dict) else None
-            if not isinstance(event_type, str) or event_type not in TIMELINE_EVENTS:
-                _fail(
-                    stream="timeline",
-                    match_id=match_id,
-                    drift_date=drift_date,
-                    checked_object="event",
-                    path=path,
-                    expected_schema=sorted(TIMELINE_EVENTS),
-                    actual_schema=_shape(event),
-                    differences=[{"type": "unknown_event_type", "event_type": event_type}],
-                )
-
-            model = TIMELINE_EVENTS[event_type]
-            expected_schema, expected_keys, required_keys = _typed_dict_schema(model)
-            _check(
+
+def timeline_frame(
+    frame: Any,
+    *,
+    frame_idx: int,
+    match_id: str = "unknown",
+    drift_date: str = "unknown",
+) -> None:
+    """Drift-check one raw frame; lets the streaming parser check frame by frame."""
+    events = frame.get("events") if isinstance(frame, dict) else None
+    if not isinstance(events, list):
+        _fail(
+            stream="timeline",
+            match_id=match_id,
+            drift_date=drift_date,
+            checked_object="events",
+            path=f"$.info.frames[{frame_idx}].events",
+            expected_schema="list[Event]",
+            actual_schema=_shape(events),
+            differences=[{"type": "expected_list"}],
+        )
+
+    for event_idx, event in enumerate(events):
+        path = f"$.info.frames[{frame_idx}].events[{event_idx}]"
+        event_type = event.get("type") if isinstance(event, dict) else None
+        if not isinstance(event_type, str) or event_type not in TIMELINE_EVENTS:
+            _fail(
                 stream="timeline",
                 match_id=match_id,
                 drift_date=drift_date,
-                checked_object=f"event:{event_type}",
+                checked_object="event",
                 path=path,
-                expected_schema=expected_schema,
-                expected_keys=expected_keys,
-                required_keys=required_keys,
-                actual=event,
+                expected_schema=sorted(TIMELINE_EVENTS),
+                actual_schema=_shape(event),
+                differences=[{"type": "unknown_event_type", "event_type": event_type}],
             )
+
+        model = TIMELINE_EVENTS[event_type]
+        expected_schema, expected_keys, required_keys = _typed_dict_schema(model)
+        _check(
+            stream="timeline",
+            match_id=match_id,
+            drift_date=drift_date,
+            checked_object=f"event:{event_type}",
+            path=path,
+            expected_schema=expected_schema,
+            expected_keys=expected_keys,
+            required_keys=required_keys,
+            actual=event,
+        )
@@ -3,10 +3,12 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass, field, fields
 from datetime import UTC, datetime
+from itertools import chain
 from typing import (
     Any,
     ClassVar,
     Literal,
+    NoReturn,
     TypedDict,
     cast,
 )
@@ -17,6 +19,7 @@ from pydantic import (
 )
 
 from app.services.riot_api_client.parsers.base_parsers import EventParser
+from app.services.riot_api_client.parsers.models import codes
 from app.services.riot_api_client.parsers.models.timeline import (
     DamageInstance,
     EventChampionKill,
@@ -26,10 +29,16 @@ from app.services.riot_api_client.parsers.models.timeline import (
 from app.services.riot_api_client.parsers.schema_drift import (
     timeline as timeline_drift,
 )
+from app.services.riot_api_client.parsers.schema_drift import (
+    timeline_frame as timeline_frame_drift,
+)
+from app.services.riot_api_client.parsers.timeline_stream import TimelineFrameStream
 
 logger = logging.getLogger(__name__)
 
 FRAME_TIMESTAMP_BUCKET_MS = 60_000
+# Anchor field marking a complete timeline stream; it can never be deselected.
+TIMELINE_ANCHOR_FIELD = "gameEnd"
 
 
 def nearest_frame_timestamp(timestamp_ms: int) -> int:
@@ -165,12 +174,12 @@ class TimelineEventRowBase(MatchIdentityRow):
 
 
 class BuildingKillRow(TimelineEventRowBase):
-    type: Literal["BUILDING_KILL"]
+    type: int
     bounty: NonNegativeInt
-    buildingType: str
+    buildingType: int
     assistingParticipantIds: list[int]
     killerId: int
-    laneType: str
+    laneType: int
     position_x: int
     position_y: int
     teamId: NonNegativeInt
@@ -178,7 +187,7 @@ class BuildingKillRow(TimelineEventRowBase):
 
 
 class ChampionKillRow(TimelineEventRowBase):
-    type: Literal["CHAMPION_KILL"]
+    type: int
     champion_kill_event_id: str
     assistingParticipantIds: list[int]
     killerId: int
@@ -199,8 +208,8 @@ class ChampionKillDamageInstanceRow(DamageInstance, MatchIdentityRow):
 
 
 class ChampionSpecialKillRow(TimelineEventRowBase):
-    type: Literal["CHAMPION_SPECIAL_KILL"]
-    killType: str
+    type: int
+    killType: int
     killerId: int
     position_x: int
     position_y: int
@@ -208,31 +217,31 @@ class ChampionSpecialKillRow(TimelineEventRowBase):
 
 
 class DragonSoulGivenRow(TimelineEventRowBase):
-    type: Literal["DRAGON_SOUL_GIVEN"]
+    type: int
     name: str
     teamId: int
 
 
 class EliteMonsterKillRow(TimelineEventRowBase):
-    type: Literal["ELITE_MONSTER_KILL"]
+    type: int
     assistingParticipantIds: list[int]
     bounty: int
     killerId: int
     killerTeamId: int
     monsterSubType: str | None
-    monsterType: str
+    monsterType: int
     position_x: int
     position_y: int
 
 
 class WardPlacedRow(TimelineEventRowBase):
     creatorId: NonNegativeInt
-    wardType: str
+    wardType: int
 
 
 class WardKillRow(TimelineEventRowBase):
     killerId: int
-    wardType: str
+    wardType: int
 
 
 class ItemPurchasedRow(TimelineEventRowBase):
@@ -299,9 +308,9 @@ class ChampionTransformRow(TimelineEventRowBase):
 
 
 class TurretPlateDestroyedRow(TimelineEventRowBase):
-    type: Literal["TURRET_PLATE_DESTROYED"]
+    type: int
     killerId: int
-    laneType: str
+    laneType: int
     position_x: int
     position_y: int
     teamId: int
@@ -314,6 +323,8 @@ class EventTypeParser[RowT]:
     DEFAULTS: ClassVar[dict[str, Any]] = {}
     # Keys normalised to [] when missing or falsy.
     EMPTY_LIST_FIELDS: ClassVar[tuple[str, ...]] = ()
+    # Keys replaced by their Enum8 code (see parsers/models/codes.py).
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {}
 
     def _build_row(
         self, e: dict[str, Any], frame_timestamp: int, matchId: str | int
@@ -330,6 +341,8 @@ class EventTypeParser[RowT]:
         for key in self.EMPTY_LIST_FIELDS:
             if not row.get(key):
                 row[key] = []
+        for key, table in self.CODED_FIELDS.items():
+            row[key] = table.encode(row.get(key))
         _flatten_position(row)
         return row
 
@@ -350,6 +363,7 @@ class EventTypeParser[RowT]:
 
 class ChampionKillParser(EventTypeParser[ChampionKillRow]):
     EVENT_TYPE = "CHAMPION_KILL"
+    TYPE_CODE = codes.EVENT_TYPE.codes[EVENT_TYPE]
 
     def parse(self, frames: list[Frame], matchId: str | int) -> list[ChampionKillRow]:
         rows: list[ChampionKillRow] = []
@@ -369,6 +383,7 @@ class ChampionKillParser(EventTypeParser[ChampionKillRow]):
 
                 row: dict[str, Any] = {
                     **e2,
+                    "type": self.TYPE_CODE,
                     "frame_timestamp": frame_ts,
                     "matchId": matchId,
                     "champion_kill_event_id": champion_kill_event_id(
@@ -452,11 +467,16 @@ class ChampionSpecialKillParser(EventTypeParser[ChampionSpecialKillRow]):
     EVENT_TYPE = "CHAMPION_SPECIAL_KILL"
     INCLUDE_TYPE = True
     DEFAULTS = {"multiKillLength": None}
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {
+        "type": codes.EVENT_TYPE,
+        "killType": codes.KILL_TYPE,
+    }
 
 
 class DragonSoulGivenParser(EventTypeParser[DragonSoulGivenRow]):
     EVENT_TYPE = "DRAGON_SOUL_GIVEN"
     INCLUDE_TYPE = True
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {"type": codes.EVENT_TYPE}
 
 
 class EliteMonsterKillParser(EventTypeParser[EliteMonsterKillRow]):
@@ -464,14 +484,20 @@ class EliteMonsterKillParser(EventTypeParser[EliteMonsterKillRow]):
     INCLUDE_TYPE = True
     DEFAULTS = {"monsterSubType": None}
     EMPTY_LIST_FIELDS = ("assistingParticipantIds",)
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {
+        "type": codes.EVENT_TYPE,
+        "monsterType": codes.MONSTER_TYPE,
+    }
 
 
 class WardPlacedParser(EventTypeParser[WardPlacedRow]):
     EVENT_TYPE = "WARD_PLACED"
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {"wardType": codes.WARD_TYPE}
 
 
 class WardKillParser(EventTypeParser[WardKillRow]):
     EVENT_TYPE = "WARD_KILL"
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {"wardType": codes.WARD_TYPE}
 
 
 class ItemPurchasedParser(EventTypeParser[ItemPurchasedRow]):
@@ -526,6 +552,10 @@ class ChampionTransformParser(EventTypeParser[ChampionTransformRow]):
 class TurretPlateDestroyedParser(EventTypeParser[TurretPlateDestroyedRow]):
     EVENT_TYPE = "TURRET_PLATE_DESTROYED"
     INCLUDE_TYPE = True
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {
+        "type": codes.EVENT_TYPE,
+        "laneType": codes.LANE_TYPE,
+    }
 
 
 class BuildingKillParser(EventTypeParser[BuildingKillRow]):
@@ -533,6 +563,11 @@ class BuildingKillParser(EventTypeParser[BuildingKillRow]):
     INCLUDE_TYPE = True
     DEFAULTS = {"towerType": None}
     EMPTY_LIST_FIELDS = ("assistingParticipantIds",)
+    CODED_FIELDS: ClassVar[dict[str, codes.CodeTable]] = {
+        "type": codes.EVENT_TYPE,
+        "buildingType": codes.BUILDING_TYPE,
+        "laneType": codes.LANE_TYPE,
+    }
 
 
 @dataclass
@@ -647,6 +682,24 @@ class MatchDataTimelineParsingOrchestrator:
         list[Frame], list[ChampionKillDamageInstanceRow]
     ] = field(default_factory=VictimDamageReceivedParser)
 
+    # TimelineTables field names to materialise; None parses every table.
+    tables: frozenset[str] | None = None
+
+    def __post_init__(self) -> None:
+        if self.tables is None:
+            return
+        known = {f.name for f in fields(TimelineTables)}
+        unknown = self.tables - known
+        if unknown:
+            raise ValueError(f"Unknown timeline tables: {sorted(unknown)}")
+        if TIMELINE_ANCHOR_FIELD not in self.tables:
+            raise ValueError(
+                f"Timeline anchor table {TIMELINE_ANCHOR_FIELD!r} cannot be disabled"
+            )
+
+    def _is_enabled(self, table: str) -> bool:
+        return self.tables is None or table in self.tables
+
     @staticmethod
     def _drift_date() -> str:
         return datetime.now(tz=UTC).date().isoformat()
@@ -657,10 +710,14 @@ class MatchDataTimelineParsingOrchestrator:
         if not isinstance(info, dict):
             return False
 
-        end_of_game_result = info.get("endOfGameResult")
         frames = info.get("frames")
         first_frame = frames[0] if isinstance(frames, list) and frames else None
+        return MatchDataTimelineParsingOrchestrator._is_abort(
+            info.get("endOfGameResult"), first_frame
+        )
 
+    @staticmethod
+    def _is_abort(end_of_game_result: Any, first_frame: Any) -> bool:
         return (
             isinstance(end_of_game_result, str)
             and end_of_game_result.startswith("Abort")
@@ -678,14 +735,21 @@ class MatchDataTimelineParsingOrchestrator:
         participants = metadata.get("participants") if isinstance(metadata, dict) else None
         return isinstance(participants, list) and 0 < len(participants) < 5
 
-    def run(self, raw: dict[str, Any]) -> TimelineTables:
+    @staticmethod
+    def _match_id(raw: dict[str, Any]) -> str:
         metadata_raw = raw.get("metadata", {})
-        match_id = (
+        return (
             metadata_raw.get("matchId", "unknown")
             if isinstance(metadata_raw, dict)
             else "unknown"
         )
 
+    def run(self, raw: dict[str, Any] | bytes | str) -> TimelineTables:
+        if not isinstance(raw, dict):
+            return self.run_stream(raw)
+
+        match_id = self._match_id(raw)
+
         if self._is_unsupported_game_mode(raw):
             logger.info(
                 "TimelineSkip match_id=%s reason=unsupported_game_mode (participant_count<5)",
@@ -717,55 +781,94 @@ class MatchDataTimelineParsingOrchestrator:
             matchId = metadata.matchId
 
             tables = TimelineTables(
-                participantStats=self.participantStats.parse(frames, matchId),
-                buildingKill=self.buildingKill.parse(frames, matchId),
-                championKill=self.championKill.parse(frames, matchId),
-                championSpecialKill=self.championSpecialKill.parse(frames, matchId),
-                dragonSoulGiven=self.dragonSoulGiven.parse(frames, matchId),
-                eliteMonsterKill=self.eliteMonsterKill.parse(frames, matchId),
-                wardPlaced=self.wardPlaced.parse(frames, matchId),
-                wardKill=self.wardKill.parse(frames, matchId),
-                itemPurchased=self.itemPurchased.parse(frames, matchId),
-                itemSold=self.itemSold.parse(frames, matchId),
-                itemDestroyed=self.itemDestroyed.parse(frames, matchId),
-                itemUndo=self.itemUndo.parse(frames, matchId),
-                levelUp=self.levelUp.parse(frames, matchId),
-                skillLevelUp=self.skillLevelUp.parse(frames, matchId),
-                pauseEnd=self.pauseEnd.parse(frames, matchId),
-                gameEnd=self.gameEnd.parse(frames, matchId),
-                objectiveBountyPrestart=self.objectiveBountyPrestart.parse(
-                    frames, matchId
-                ),
-                objectiveBountyFinish=self.objectiveBountyFinish.parse(
-                    frames, matchId
-                ),
-                featUpdate=self.featUpdate.parse(frames, matchId),
-                championTransform=self.championTransform.parse(frames, matchId),
-                turretPlateDestroyed=self.turretPlateDestroyed.parse(frames, matchId),
-                championKillVictimDamageDealt=self.championKillVictimDamageDealt.parse(
-                    frames, matchId
-                ),
-                championKillVictimDamageReceived=self.championKillVictimDamageReceived.parse(
-                    frames, matchId
-                ),
+                **{
+                    f.name: (
+                        getattr(self, f.name).parse(frames, matchId)
+                        if self._is_enabled(f.name)
+                        else []
+                    )
+                    for f in fields(TimelineTables)
+                }
             )
         except ValidationError as e:
-            errs = e.errors(include_input=True)
-            logger.warning(
-                "SchemaValidation timeline match_id=%s date=%s errors=%s",
+            self._raise_validation_failure(e, match_id=match_id, drift_date=drift_date)
+        return tables
+
+    def run_stream(self, payload: bytes | str) -> TimelineTables:
+        """Parse an undecoded timeline payload one frame at a time.
+
+        Same output as ``run(json.loads(payload))``, but only the envelope and the
+        current frame are decoded and validated at any point, so peak memory per
+        in-flight timeline tracks frame size rather than document size.
+        """
+        stream = TimelineFrameStream(payload)
+        envelope = stream.envelope
+        match_id = self._match_id(envelope)
+
+        if self._is_unsupported_game_mode(envelope):
+            logger.info(
+                "TimelineSkip match_id=%s reason=unsupported_game_mode (participant_count<5)",
                 match_id,
-                drift_date,
-                e.errors(include_input=False),
-            )
-            logger.warning(
-                "SchemaValidation timeline value=%r",
-                errs[-1].get("input") if errs else None,
             )
+            return TimelineTables.empty()
+
+        drift_date = self._drift_date()
+        timeline_drift(envelope, match_id=match_id, drift_date=drift_date)
+
+        frames = enumerate(stream.frames())
+        first = next(frames, None)
+        frames = chain([first], frames) if first is not None else frames
+        info = envelope.get("info")
+        end_of_game_result = info.get("endOfGameResult") if isinstance(info, dict) else None
+
+        if self._is_abort(end_of_game_result, first[1] if first is not None else None):
+            # Drain so every frame is still drift-checked, as in run().
+            for frame_idx, frame_raw in frames:
+                timeline_frame_drift(
+                    frame_raw, frame_idx=frame_idx, match_id=match_id, drift_date=drift_date
+                )
             logger.warning(
-                "Aborting timeline payload for match_id=%s due to validation errors.",
+                "TimelineAbort match_id=%s date=%s endOfGameResult=%s; emitting empty timeline tables.",
                 match_id,
+                drift_date,
+                end_of_game_result if isinstance(info, dict) else "unknown",
             )
-            raise ValueError(
-                f"Schema validation failed for timeline payload match_id={match_id}"
-            ) from e
-        return tables
+            return TimelineTables.empty()
+
+        enabled = [f.name for f in fields(TimelineTables) if self._is_enabled(f.name)]
+        rows: dict[str, list[Any]] = {f.name: [] for f in fields(TimelineTables)}
+        try:
+            matchId = Timeline.model_validate(envelope).metadata.matchId
+            for frame_idx, frame_raw in frames:
+                timeline_frame_drift(
+                    frame_raw, frame_idx=frame_idx, match_id=match_id, drift_date=drift_date
+                )
+                frame = [Frame.model_validate(frame_raw)]
+                for name in enabled:
+                    rows[name].extend(getattr(self, name).parse(frame, matchId))
+        except ValidationError as e:
+            self._raise_validation_failure(e, match_id=match_id, drift_date=drift_date)
+        return TimelineTables(**rows)
+
+    @staticmethod
+    def _raise_validation_failure(
+        e: ValidationError, *, match_id: str, drift_date: str
+    ) -> NoReturn:
+        errs = e.errors(include_input=True)
+        logger.warning(
+            "SchemaValidation timeline match_id=%s date=%s errors=%s",
+            match_id,
+            drift_date,
+            e.errors(include_input=False),
+        )
+        logger.warning(
+            "SchemaValidation timeline value=%r",
+            errs[-1].get("input") if errs else None,
+        )
+        logger.warning(
+            "Aborting timeline payload for match_id=%s due to validation errors.",
+            match_id,
+        )
+        raise ValueError(
+            f"Schema validation failed for timeline payload match_id={match_id}"
+        ) from e
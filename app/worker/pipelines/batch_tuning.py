@@ -0,0 +1,143 @@
+"""Adaptive claim and flush sizing for the matchdata pipeline.
+
+``ClaimSizer`` turns observed fetch throughput (matches per second, dominated by
+the Riot rate limit) into a claim size that keeps each batch near a target
+duration. ``FlushTuner`` sizes each table's flush threshold in bytes from the
+observed insert throughput so every insert takes about ``target_insert_s``,
+defers size-triggered flushes that would exceed a parts-per-second budget, and
+forces the largest buffers out when the total crosses a memory budget. Both
+are plain in-process state; nothing is persisted between runs.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+MIB = 1024 * 1024
+
+CLAIM_MIN_SIZE = 25
+CLAIM_MAX_SIZE = 1_000
+FLUSH_TARGET_INSERT_S = 2.0
+FLUSH_MIN_BYTES = 1 * MIB
+FLUSH_MAX_BYTES = 128 * MIB
+FLUSH_INITIAL_ROW_BYTES = 256
+# Weight of the newest observation in every moving average.
+SMOOTHING = 0.3
+
+
+def _ewma(previous: float | None, value: float) -> float:
+    return value if previous is None else previous + SMOOTHING * (value - previous)
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+@dataclass
+class ClaimSizer:
+    initial: int
+    target_batch_s: float
+    minimum: int = CLAIM_MIN_SIZE
+    maximum: int = CLAIM_MAX_SIZE
+    size: int = field(init=False)
+    rate: float | None = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        if not 0 < self.minimum <= self.maximum:
+            raise ValueError("claim size bounds must satisfy 0 < minimum <= maximum")
+        self.size = int(_clamp(self.initial, self.minimum, self.maximum))
+
+    def observe(self, matches: int, elapsed_s: float) -> int:
+        """Fold one batch (``matches`` fetched in ``elapsed_s``) into the size."""
+        if matches > 0 and elapsed_s > 0:
+            self.rate = _ewma(self.rate, matches / elapsed_s)
+            self.size = int(
+                _clamp(round(self.rate * self.target_batch_s), self.minimum, self.maximum)
+            )
+        return self.size
+
+
+@dataclass
+class _TableStats:
+    row_bytes: float = FLUSH_INITIAL_ROW_BYTES
+    threshold_bytes: float = FLUSH_MIN_BYTES
+    last_flush: float | None = None
+    inserts: int = 0
+
+
+@dataclass
+class FlushTuner:
+    memory_budget_bytes: int
+    max_parts_per_s: float
+    target_insert_s: float = FLUSH_TARGET_INSERT_S
+    min_bytes: int = FLUSH_MIN_BYTES
+    max_bytes: int = FLUSH_MAX_BYTES
+    _tables: dict[str, _TableStats] = field(default_factory=dict, init=False)
+
+    def _stats(self, table: str) -> _TableStats:
+        stats = self._tables.get(table)
+        if stats is None:
+            stats = self._tables[table] = _TableStats(threshold_bytes=self.min_bytes)
+        return stats
+
+    def estimated_bytes(self, table: str, rows: int) -> int:
+        return int(rows * self._stats(table).row_bytes)
+
+    def threshold_bytes(self, table: str) -> int:
+        return int(self._stats(table).threshold_bytes)
+
+    def min_flush_interval_s(self) -> float:
+        # Size-triggered parts are spread over every table seen so far.
+        return max(1, len(self._tables)) / self.max_parts_per_s
+
+    def should_flush(self, table: str, rows: int, now: float | None = None) -> bool:
+        stats = self._stats(table)
+        if self.estimated_bytes(table, rows) < stats.threshold_bytes:
+            return False
+        if stats.last_flush is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - stats.last_flush >= self.min_flush_interval_s()
+
+    def over_budget(self, buffered_rows: Mapping[str, int]) -> list[str]:
+        """Largest buffers to flush, in order, to get back under the memory budget."""
+        sizes = {
+            table: self.estimated_bytes(table, rows)
+            for table, rows in buffered_rows.items()
+            if rows
+        }
+        total = sum(sizes.values())
+        forced: list[str] = []
+        for table, size in sorted(sizes.items(), key=lambda kv: kv[1], reverse=True):
+            if total < self.memory_budget_bytes:
+                break
+            forced.append(table)
+            total -= size
+        return forced
+
+    def observe(
+        self,
+        table: str,
+        *,
+        rows: int,
+        written_bytes: int,
+        elapsed_s: float,
+        now: float | None = None,
+    ) -> None:
+        """Fold one insert into the table's row size and flush threshold."""
+        stats = self._stats(table)
+        stats.last_flush = time.monotonic() if now is None else now
+        stats.inserts += 1
+        if rows <= 0:
+            return
+        if written_bytes > 0:
+            stats.row_bytes = _ewma(stats.row_bytes, written_bytes / rows)
+        if elapsed_s > 0:
+            throughput = rows * stats.row_bytes / elapsed_s
+            stats.threshold_bytes = _clamp(
+                _ewma(stats.threshold_bytes, throughput * self.target_insert_s),
+                self.min_bytes,
+                self.max_bytes,
+            )
@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import time
 from collections import defaultdict
-from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Collection, Iterable
 from dataclasses import dataclass
 from operator import attrgetter
+from pathlib import Path
 from typing import Any, Literal
 from uuid import UUID, uuid4
 
+from clickhouse_connect.driver.exceptions import ClickHouseError
 from tenacity import before_sleep_log, retry, stop_after_attempt, wait_exponential
 
+from app.api.v1.metrics.telemetry import (
+    BatchTrace,
+    export_parse_ns,
+    export_queue_depth,
+    export_stage_seconds,
+    observe_stage,
+)
 from app.core.config.constants.generic import RETRYABLE
 from app.core.config.settings import settings
 from app.services.riot_api_client.base import RiotAPI
@@ -52,6 +62,8 @@ from app.services.riot_api_client.parsers.timeline import (
     WardKillRow,
     WardPlacedRow,
 )
+from app.worker.pipelines.batch_tuning import ClaimSizer, FlushTuner
+from app.worker.pipelines.matchdata_wal import BatchLog, LoggedBatch, MatchDataWal
 from app.worker.pipelines.orchestrator import (
     Collector,
     Loader,
@@ -59,19 +71,43 @@ from app.worker.pipelines.orchestrator import (
     Orchestrator,
     Saver,
 )
+from app.worker.pipelines.payload_archive import archive_payload
 from app.worker.pipelines.recovery_utils import RETRY_MAX_ATTEMPTS, run_sync_with_retry
 from app.worker.pipelines.stop_flag import raise_if_stop_requested
+from database.clickhouse.client import async_insert_settings, run_clickhouse
 from database.clickhouse.operations.matchdata import (
+    TOMBSTONE_ALL_STREAMS,
     delete_by_matchids,
     load_stream_anchor_matchids,
-    load_table_matchids,
+    load_stream_matchid_runs,
+    load_table_matchid_runs,
+    tombstone_matchid_runs,
+)
+from database.clickhouse.operations.partitions import (
+    GAME_MONTH_COLUMN,
+    game_month,
+    load_game_months,
 )
-from database.clickhouse.operations.utils import persist_data
+from database.clickhouse.operations.staging import (
+    commit_staged_batch,
+    discard_staged_batch,
+    recover_staged_batches,
+    staging_table,
+)
+from database.clickhouse.operations.utils import flush_async_insert_queue, persist_data
 from database.clickhouse.operations.work_state import (
+    acquire_matchid_leases,
     claim_pending_matchids,
+    extend_matchid_leases,
+    load_held_matchids,
+    load_live_lease_ids,
+    load_pending_matchids,
     mark_matchids_finished,
+    read_back_matchid_leases,
+    release_matchid_leases,
     seed_from_matchids,
 )
+from database.clickhouse.query_tags import query_context
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +120,18 @@ MATCHDATA_FLUSH_WINDOW_CALLS = 250
 MATCHDATA_MIN_FLUSH_INTERVAL_S = 60.0
 MATCHDATA_MAX_FLUSH_INTERVAL_S = 5_000.0
 MATCHDATA_FLUSH_INTERVAL_MULTIPLIER = 6.0
+# Multi-drainer leases: the winners are read back until this drainer's own lease
+# rows are visible, waiting a growing multiple of this between attempts.
+MATCHDATA_LEASE_READ_BACK_ATTEMPTS = 5
+MATCHDATA_LEASE_READ_BACK_RETRY_S = 0.1
+# A concurrent claimer can stamp an earlier ``acquired`` but commit after our
+# read-back. Once this long has passed (well above an insert's latency), the
+# holders are read again and only ids still held are fetched.
+MATCHDATA_LEASE_CONFIRM_S = 0.5
+MATCHDATA_LEASE_HEARTBEATS_PER_TTL = 3
+MATCHDATA_LEASE_MAX_CLAIM_ATTEMPTS = 5
+# Pipeline label for every matchdata span and stage metric.
+MATCHDATA_TELEMETRY_PIPELINE = "match_data"
 
 
 def _flush_interval_from_rate_limit() -> float:
@@ -121,6 +169,7 @@ class TableSpec:
     table: str
     columns: tuple[str, ...]
     getter: Callable[[Any], Iterable[dict[str, Any]]]
+    attr: str
 
 
 def _table_spec(table: str, row_type: type[Any], attr: str) -> TableSpec:
@@ -128,6 +177,7 @@ def _table_spec(table: str, row_type: type[Any], attr: str) -> TableSpec:
         table=table,
         columns=columns_from_typed_dict(row_type),
         getter=attrgetter(attr),
+        attr=attr,
     )
 
 
@@ -233,6 +283,42 @@ STREAM_TABLE_SPECS: dict[StreamName, tuple[TableSpec, ...]] = {
     "non_timeline": NON_TIMELINE_TABLE_SPECS,
     "timeline": TIMELINE_TABLE_SPECS,
 }
+# Stream anchors flush last and mark a stream complete; they cannot be disabled.
+ANCHOR_TABLES = frozenset(specs[-1].table for specs in STREAM_TABLE_SPECS.values())
+# Staged batches promote every other table before either anchor, so a match is
+# never anchored in game_data while some of its rows are still staged.
+STAGING_PROMOTION_ORDER = (
+    *(table for table in ALL_DELETE_TABLES if table not in ANCHOR_TABLES),
+    *(specs[-1].table for specs in STREAM_TABLE_SPECS.values()),
+)
+
+
+def select_table_specs(
+    specs: tuple[TableSpec, ...],
+    disabled_tables: Collection[str],
+) -> tuple[TableSpec, ...]:
+    disabled = set(disabled_tables)
+    unknown = disabled - set(ALL_DELETE_TABLES)
+    if unknown:
+        raise ValueError(f"Unknown matchdata tables: {sorted(unknown)}")
+    anchors = disabled & ANCHOR_TABLES
+    if anchors:
+        raise ValueError(f"Matchdata anchor tables cannot be disabled: {sorted(anchors)}")
+    return tuple(spec for spec in specs if spec.table not in disabled)
+
+
+def enabled_table_attrs(
+    stream: StreamName,
+    disabled_tables: Collection[str],
+) -> frozenset[str]:
+    """Parser-side table names (``*Tables`` field names) left enabled for a stream."""
+    specs = select_table_specs(STREAM_TABLE_SPECS[stream], disabled_tables)
+    return frozenset(spec.attr for spec in specs)
+
+
+def timeline_game_month(parsed: Any) -> int:
+    """Fallback game_month for a timeline whose match has no info row: its end."""
+    return game_month(max((row["realTimestamp"] for row in parsed.gameEnd), default=0))
 
 
 @dataclass(frozen=True)
@@ -249,6 +335,145 @@ class _Done:
 type QueueMsg = StreamItem | _Done
 
 
+class _PrefetchedBatch:
+    """A claimed batch whose fetch results are buffered ahead of the saver.
+
+    The fetcher pushes every item as it arrives, then either ``_END`` or the
+    exception that ended the fetch, which the saver re-raises inside ``save``
+    so the usual per-batch failure cleanup still runs.
+    """
+
+    _END = object()
+
+    def __init__(
+        self,
+        ctx: OrchestrationContext,
+        state: MatchDataCollectorState,
+        trace: BatchTrace,
+    ) -> None:
+        self.ctx = ctx
+        self.state = state
+        self.trace = trace
+        self._items: asyncio.Queue[Any] = asyncio.Queue()
+        self.closed = False
+
+    def put(self, item: StreamItem) -> None:
+        self._items.put_nowait(item)
+
+    def close(self, exc: BaseException | None = None) -> None:
+        self.closed = True
+        self._items.put_nowait(self._END if exc is None else exc)
+
+    async def items(self) -> AsyncIterator[StreamItem]:
+        while True:
+            msg = await self._items.get()
+            if msg is self._END:
+                return
+            if isinstance(msg, BaseException):
+                raise msg
+            yield msg
+
+
+class MatchDataLeases:
+    """Lease-based claims so several drainer processes can share the queue.
+
+    Each claimed batch holds a lease per matchid keyed by its ``run_id``; the
+    orchestrator heartbeats every held lease while it runs, the saver checks the
+    leases are still held before committing and releases them afterwards.
+    A drainer that dies simply stops heartbeating and its matches become
+    claimable again once ``ttl_s`` passes.
+    """
+
+    def __init__(
+        self,
+        *,
+        owner: str,
+        ttl_s: float,
+        retry_s: float = MATCHDATA_LEASE_READ_BACK_RETRY_S,
+        confirm_s: float = MATCHDATA_LEASE_CONFIRM_S,
+    ) -> None:
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be > 0")
+        self.owner = owner
+        self.ttl_s = ttl_s
+        self.retry_s = retry_s
+        self.confirm_s = confirm_s
+        self._held: dict[UUID, list[str]] = {}
+
+    def acquire(self, run_id: UUID, match_ids: list[str]) -> list[str]:
+        """Lease ``match_ids`` for ``run_id`` and return the ones this drainer won."""
+        if not match_ids:
+            return []
+        acquire_matchid_leases(
+            match_ids, lease_id=run_id, owner=self.owner, ttl_s=self.ttl_s
+        )
+        held = self._read_back(run_id, match_ids)
+        if held:
+            # Confirm once the insert has settled: a row stamped earlier than
+            # ours that lands late takes the match from us here, not at finish.
+            # Inserts slower than confirm_s can still slip through; the saver's
+            # held() check before finishing is the last guard.
+            time.sleep(self.confirm_s)
+            confirmed, _ = read_back_matchid_leases(list(held), lease_id=run_id)
+            held = held & confirmed
+        won = [mid for mid in match_ids if mid in held]
+        lost = [mid for mid in match_ids if mid not in held]
+        if lost:
+            logger.info(
+                "MatchData lease contention owner=%s run_id=%s won=%d lost=%d",
+                self.owner,
+                run_id,
+                len(won),
+                len(lost),
+            )
+            release_matchid_leases(run_id, lost)
+        if won:
+            self._held[run_id] = won
+        return won
+
+    def _read_back(self, run_id: UUID, match_ids: list[str]) -> set[str]:
+        # Ids whose own row never shows up count as lost and are released.
+        held: set[str] = set()
+        visible: set[str] = set()
+        for attempt in range(MATCHDATA_LEASE_READ_BACK_ATTEMPTS):
+            if attempt:
+                time.sleep(self.retry_s * attempt)
+            held, visible = read_back_matchid_leases(match_ids, lease_id=run_id)
+            if visible.issuperset(match_ids):
+                return held
+        logger.warning(
+            "MatchData lease rows not visible owner=%s run_id=%s missing=%d",
+            self.owner,
+            run_id,
+            len(set(match_ids) - visible),
+        )
+        return held
+
+    def held(self, run_id: UUID, match_ids: list[str]) -> set[str]:
+        return load_held_matchids(match_ids, lease_id=run_id)
+
+    def release(self, run_id: UUID) -> None:
+        if self._held.pop(run_id, None) is not None:
+            release_matchid_leases(run_id)
+
+    def heartbeat(self) -> None:
+        if self._held:
+            extend_matchid_leases(tuple(self._held), ttl_s=self.ttl_s)
+
+    def live_lease_ids(self) -> set[UUID]:
+        return load_live_lease_ids()
+
+    async def keep_alive(self) -> None:
+        interval = self.ttl_s / MATCHDATA_LEASE_HEARTBEATS_PER_TTL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_clickhouse(self.heartbeat)
+            except (ClickHouseError, OSError) as exc:
+                # A missed beat is survivable; a lost lease is caught at commit.
+                logger.warning("MatchData lease heartbeat failed owner=%s: %s", self.owner, exc)
+
+
 @dataclass(frozen=True)
 class MatchDataCollectorState:
     matchids: list[str]
@@ -273,9 +498,25 @@ class MatchDataOrchestrator(Orchestrator):
         non_timeline_collector: Collector,
         timeline_collector: Collector,
         saver: Saver,
+        prefetch_batches: int = 0,
+        leases: MatchDataLeases | None = None,
+        claim_sizer: ClaimSizer | None = None,
+        wal: MatchDataWal | None = None,
     ) -> None:
         super().__init__(pipeline, loader, non_timeline_collector, saver)
         self.timeline_collector = timeline_collector
+        # When set, each claim is sized from the fetch throughput of earlier
+        # batches instead of the loader's fixed batch_size.
+        self.claim_sizer = claim_sizer
+        # Shared with the saver, which writes it; replayed here before claiming.
+        self.wal = wal
+        # Shared with the loader and saver; heartbeated here for the whole run.
+        self.leases = leases
+        if prefetch_batches < 0:
+            raise ValueError("prefetch_batches must be >= 0")
+        # 0 keeps the strict claim -> fetch -> save sequence; N > 0 lets up to N
+        # claimed batches be fetched while the saver is still on an earlier one.
+        self.prefetch_batches = prefetch_batches
 
     async def combine_streams(
         self,
@@ -310,32 +551,115 @@ class MatchDataOrchestrator(Orchestrator):
     async def run(self) -> None:
         # RECOVERY-SYSTEM: run in small claimed batches until no pending work remains.
         ts = int(time.time())
-        batch_number = 0
-
-        while True:
-            raise_if_stop_requested(stage="match_data:batch-start")
+        heartbeat = (
+            asyncio.create_task(self.leases.keep_alive())
+            if self.leases is not None
+            else None
+        )
+        try:
+            await self._replay_wal(ts)
+            if self.prefetch_batches:
+                await self._run_pipelined(ts)
+            else:
+                await self._run_sequential(ts)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await heartbeat
+
+    async def _replay_wal(self, ts: int) -> None:
+        if self.wal is None:
+            return
+        logged_batches = await asyncio.to_thread(self.wal.pending)
+        if not logged_batches:
+            return
+        # Staging recovery must settle the queue before logged ids are checked.
+        await run_clickhouse(self.loader.prepare, profile="heavy")
+        for logged in logged_batches:
             ctx = OrchestrationContext(ts=ts, run_id=uuid4(), pipeline=self.pipeline)
-            state: MatchDataCollectorState = self.loader.load(ctx)
-            if not state.matchids:
-                logger.info(
-                    "MatchData no pending matchids remain; exiting pipeline=%s",
-                    self.pipeline,
-                )
-                return
-
-            batch_number += 1
             logger.info(
-                "MatchData batch start pipeline=%s batch=%d run_id=%s size=%d",
+                "MatchData WAL replay pipeline=%s logged_run_id=%s run_id=%s fetches=%d",
                 self.pipeline,
-                batch_number,
+                logged.run_id,
                 ctx.run_id,
-                len(state.matchids),
+                len(logged.fetches),
             )
+            try:
+                await self.saver.replay(logged, ctx)
+            except Exception:
+                # Replayed once only: the matches stay pending and are refetched.
+                logger.exception("MatchData WAL replay failed logged_run_id=%s", logged.run_id)
+            finally:
+                logged.path.unlink(missing_ok=True)
 
-            non_timeline_raw = self.collector.collect(state, ctx)
-            timeline_raw = self.timeline_collector.collect(state, ctx)
-            items = self.combine_streams(non_timeline_raw, timeline_raw)
-            await self.saver.save(items, state, ctx)
+    def _load(self, ctx: OrchestrationContext, **kwargs: Any) -> MatchDataCollectorState:
+        if self.claim_sizer is not None:
+            kwargs["batch_size"] = self.claim_sizer.size
+        return self.loader.load(ctx, **kwargs)
+
+    def _observe_batch(self, state: MatchDataCollectorState, started: float) -> None:
+        if self.claim_sizer is None:
+            return
+        previous = self.claim_sizer.size
+        size = self.claim_sizer.observe(len(state.matchids), time.monotonic() - started)
+        if size != previous:
+            logger.info(
+                "MatchData claim size %d -> %d rate=%.3f/s pipeline=%s",
+                previous,
+                size,
+                self.claim_sizer.rate or 0.0,
+                self.pipeline,
+            )
+
+    @staticmethod
+    def _export_queue_depths(ready: asyncio.Queue[Any], in_flight: set[str]) -> None:
+        export_queue_depth(
+            pipeline=MATCHDATA_TELEMETRY_PIPELINE,
+            queue="prefetched_batches",
+            depth=ready.qsize(),
+        )
+        export_queue_depth(
+            pipeline=MATCHDATA_TELEMETRY_PIPELINE,
+            queue="in_flight_matchids",
+            depth=len(in_flight),
+        )
+
+    async def _run_sequential(self, ts: int) -> None:
+        batch_number = 0
+
+        while True:
+            raise_if_stop_requested(stage="match_data:batch-start")
+            ctx = OrchestrationContext(ts=ts, run_id=uuid4(), pipeline=self.pipeline)
+            trace = BatchTrace(MATCHDATA_TELEMETRY_PIPELINE, ctx.run_id)
+            try:
+                with trace.activate():
+                    state: MatchDataCollectorState = self._load(ctx)
+                    if not state.matchids:
+                        logger.info(
+                            "MatchData no pending matchids remain; exiting pipeline=%s",
+                            self.pipeline,
+                        )
+                        return
+
+                    batch_number += 1
+                    logger.info(
+                        "MatchData batch start pipeline=%s batch=%d run_id=%s size=%d",
+                        self.pipeline,
+                        batch_number,
+                        ctx.run_id,
+                        len(state.matchids),
+                    )
+
+                    started = time.monotonic()
+                    non_timeline_raw = self.collector.collect(state, ctx)
+                    timeline_raw = self.timeline_collector.collect(state, ctx)
+                    items = self.combine_streams(non_timeline_raw, timeline_raw)
+                    await self.saver.save(items, state, ctx)
+                trace.resolved(matches=len(state.matchids))
+            finally:
+                trace.end()
+            self._observe_batch(state, started)
 
             logger.info(
                 "MatchData batch complete pipeline=%s batch=%d run_id=%s",
@@ -344,26 +668,151 @@ class MatchDataOrchestrator(Orchestrator):
                 ctx.run_id,
             )
 
+    async def _run_pipelined(self, ts: int) -> None:
+        # Claims run in a worker thread and exclude ids still in flight, so the
+        # queue never hands the same match to two unresolved batches. Memory is
+        # bounded to the batch being saved plus ``prefetch_batches`` fetched ones.
+        ready: asyncio.Queue[_PrefetchedBatch | BaseException | None] = asyncio.Queue(
+            maxsize=self.prefetch_batches
+        )
+        in_flight: set[str] = set()
+        resolved = asyncio.Event()
+
+        async def fetch_batches() -> None:
+            batch: _PrefetchedBatch | None = None
+            try:
+                while True:
+                    raise_if_stop_requested(stage="match_data:batch-start")
+                    ctx = OrchestrationContext(ts=ts, run_id=uuid4(), pipeline=self.pipeline)
+                    resolved.clear()
+                    trace = BatchTrace(MATCHDATA_TELEMETRY_PIPELINE, ctx.run_id)
+                    with trace.activate(), query_context(run_id=ctx.run_id):
+                        state: MatchDataCollectorState = await run_clickhouse(
+                            self._load, ctx, exclude=frozenset(in_flight)
+                        )
+                    if not state.matchids:
+                        trace.end()
+                        if not in_flight:
+                            await ready.put(None)
+                            return
+                        # Requeued ids of an in-flight batch may become claimable.
+                        await resolved.wait()
+                        continue
+
+                    in_flight.update(state.matchids)
+                    batch = _PrefetchedBatch(ctx, state, trace)
+                    await ready.put(batch)
+                    self._export_queue_depths(ready, in_flight)
+                    started = time.monotonic()
+                    with trace.activate():
+                        items = self.combine_streams(
+                            self.collector.collect(state, ctx),
+                            self.timeline_collector.collect(state, ctx),
+                        )
+                        async for item in items:
+                            batch.put(item)
+                    batch.close()
+                    self._observe_batch(state, started)
+            except Exception as exc:
+                # Hand the error to the saver, which raises it; the task's own
+                # copy is reaped below.
+                if batch is not None and not batch.closed:
+                    batch.close(exc)
+                else:
+                    await ready.put(exc)
+                raise
+
+        async def save_batches() -> None:
+            batch_number = 0
+            while True:
+                batch = await ready.get()
+                if batch is None:
+                    logger.info(
+                        "MatchData no pending matchids remain; exiting pipeline=%s",
+                        self.pipeline,
+                    )
+                    return
+                if isinstance(batch, BaseException):
+                    raise batch
+
+                batch_number += 1
+                logger.info(
+                    "MatchData batch start pipeline=%s batch=%d run_id=%s size=%d prefetched=%d",
+                    self.pipeline,
+                    batch_number,
+                    batch.ctx.run_id,
+                    len(batch.state.matchids),
+                    ready.qsize(),
+                )
+                self._export_queue_depths(ready, in_flight)
+                try:
+                    with batch.trace.activate():
+                        await self.saver.save(batch.items(), batch.state, batch.ctx)
+                    batch.trace.resolved(matches=len(batch.state.matchids))
+                finally:
+                    batch.trace.end()
+                in_flight.difference_update(batch.state.matchids)
+                self._export_queue_depths(ready, in_flight)
+                resolved.set()
+                logger.info(
+                    "MatchData batch complete pipeline=%s batch=%d run_id=%s",
+                    self.pipeline,
+                    batch_number,
+                    batch.ctx.run_id,
+                )
+
+        # fetch_batches hands its errors to the saver, so saver exceptions stay
+        # unwrapped, as in sequential mode; the fetcher's outcome is only reaped.
+        fetcher = asyncio.create_task(fetch_batches())
+        try:
+            await save_batches()
+        finally:
+            fetcher.cancel()
+            await asyncio.gather(fetcher, return_exceptions=True)
+
 
 class MatchDataLoader(Loader):
     def __init__(
         self,
         *,
         batch_size: int = MATCHDATA_CLAIM_BATCH_SIZE,
+        staging: bool = False,
+        leases: MatchDataLeases | None = None,
+        shard: tuple[int, int] = (0, 1),
     ) -> None:
+        shard_index, shard_count = shard
+        if not 0 <= shard_index < shard_count:
+            raise ValueError("shard index must be in [0, shard count)")
         self.batch_size = batch_size
+        self.leases = leases
+        # (index, count): claim only shuffle_key % count == index.
+        self.shard = shard
+        # Staged batches reach game_data only complete, so there are no
+        # partially-anchored matches to look up before fetching.
+        self.staging = staging
         self._initialized = False
 
-    def load(self, ctx: OrchestrationContext) -> MatchDataCollectorState:
-        _ = ctx
-        if not self._initialized:
-            seeded_pending = seed_from_matchids()
-            if seeded_pending:
-                logger.info("MatchData loader seeded pending=%d", seeded_pending)
-            self._initialized = True
-
-        claimed = claim_pending_matchids(batch_size=self.batch_size)
-        non_timeline_done, timeline_done = load_stream_anchor_matchids(claimed)
+    def load(
+        self,
+        ctx: OrchestrationContext,
+        *,
+        exclude: Collection[str] = (),
+        batch_size: int | None = None,
+    ) -> MatchDataCollectorState:
+        self.prepare()
+        with observe_stage(MATCHDATA_TELEMETRY_PIPELINE, "claim") as span:
+            claimed = self._claim(ctx, exclude, batch_size or self.batch_size)
+            span.set_attribute("matches", len(claimed))
+        if self.staging:
+            logger.info(
+                "MatchData loader source=%s size=%d staging=true",
+                "state_queue" if claimed else "none",
+                len(claimed),
+            )
+            return MatchDataCollectorState(matchids=claimed)
+
+        with observe_stage(MATCHDATA_TELEMETRY_PIPELINE, "anchor_lookup"):
+            non_timeline_done, timeline_done = load_stream_anchor_matchids(claimed)
         non_timeline_ids = [mid for mid in claimed if mid not in non_timeline_done]
         timeline_ids = [mid for mid in claimed if mid not in timeline_done]
         logger.info(
@@ -379,11 +828,61 @@ class MatchDataLoader(Loader):
             timeline_matchids=timeline_ids,
         )
 
+    def prepare(self) -> None:
+        """One-time start-up work (staging recovery, seeding); ``load`` runs it too."""
+        if self._initialized:
+            return
+        if self.staging:
+            # Batches of other live drainers are still being committed.
+            live = self.leases.live_lease_ids() if self.leases is not None else ()
+            replayed = recover_staged_batches(STAGING_PROMOTION_ORDER, skip_run_ids=live)
+            if replayed:
+                logger.info("MatchData loader replayed staged commits=%d", replayed)
+        seeded_pending = seed_from_matchids()
+        if seeded_pending:
+            logger.info("MatchData loader seeded pending=%d", seeded_pending)
+        self._initialized = True
+
+    def _claim(
+        self,
+        ctx: OrchestrationContext,
+        exclude: Collection[str],
+        batch_size: int,
+    ) -> list[str]:
+        for _ in range(MATCHDATA_LEASE_MAX_CLAIM_ATTEMPTS):
+            candidates = claim_pending_matchids(
+                batch_size=batch_size,
+                exclude=exclude,
+                shard=self.shard,
+                skip_leased=self.leases is not None,
+            )
+            if self.leases is None or not candidates:
+                return candidates
+            # Lost candidates now carry another drainer's live lease and are
+            # skipped by the next claim, so every retry makes progress.
+            won = self.leases.acquire(ctx.run_id, candidates)
+            if won:
+                return won
+        logger.warning(
+            "MatchData loader lost every lease after %d claims run_id=%s",
+            MATCHDATA_LEASE_MAX_CLAIM_ATTEMPTS,
+            ctx.run_id,
+        )
+        return []
+
 
 class MatchDataStreamCollector(Collector):
-    def __init__(self, riot_api: RiotAPI, *, stream: StreamName) -> None:
+    def __init__(
+        self,
+        riot_api: RiotAPI,
+        *,
+        stream: StreamName,
+        raw_body: bool = False,
+    ) -> None:
         self.riot_api = riot_api
         self.stream: StreamName = stream
+        # Hand the saver undecoded bytes so the parser can stream frames.
+        self.raw_body = raw_body
 
     async def collect(
         self, state: MatchDataCollectorState, ctx: OrchestrationContext
@@ -400,12 +899,22 @@ class MatchDataStreamCollector(Collector):
             matchids,
             endpoint_type=endpoint_type,
             riot_api=self.riot_api,
+            raw_body=self.raw_body,
         )
 
         raise_if_stop_requested(stage=f"match_data:{self.stream}:start")
-        async for raw in iterator:
-            raise_if_stop_requested(stage=f"match_data:{self.stream}:collect")
-            yield raw
+        # Fetch wall time, including time the consumer held the stream back.
+        started = time.perf_counter()
+        try:
+            async for raw in iterator:
+                raise_if_stop_requested(stage=f"match_data:{self.stream}:collect")
+                yield raw
+        finally:
+            export_stage_seconds(
+                pipeline=MATCHDATA_TELEMETRY_PIPELINE,
+                stage=f"fetch_{self.stream}",
+                seconds=time.perf_counter() - started,
+            )
 
 
 class MatchDataSaver(Saver):
@@ -414,17 +923,54 @@ class MatchDataSaver(Saver):
         *,
         non_timeline_parser: Any,
         timeline_parser: Any,
+        disabled_tables: Collection[str] = (),
+        archive_dir: Path | None = None,
+        staging: bool = False,
+        leases: MatchDataLeases | None = None,
+        flush_tuner: FlushTuner | None = None,
+        wal: MatchDataWal | None = None,
+        async_insert: bool = False,
+        async_insert_wait: bool = True,
+        partitioned: bool = False,
     ) -> None:
         self.non_timeline_parser = non_timeline_parser
         self.timeline_parser = timeline_parser
+        # Raw payloads are kept here for scripts/reparse_matchdata.py.
+        self.archive_dir = archive_dir
+        # Insert into game_data_staging and promote complete matches per batch
+        # (D10) instead of writing game_data directly and tombstoning failures.
+        self.staging = staging
+        self.leases = leases
+        # When set, tables flush by tuned byte thresholds and a memory budget
+        # (one insert per flush) instead of row counts and the flush interval.
+        self.flush_tuner = flush_tuner
+        # Every fetch result is logged here until its batch resolves, so a crash
+        # loses no fetched payloads (see matchdata_wal).
+        self.wal = wal
+        # Inserts use the server's async insert buffer; non-anchor tables flush
+        # concurrently and, without wait, are settled before any anchor insert.
+        self.async_insert = async_insert
+        self.async_insert_wait = async_insert_wait
+        self._anchor_targets = ANCHOR_TABLES | {staging_table(t) for t in ANCHOR_TABLES}
+        # Disabled tables are never buffered or inserted; tombstones are per
+        # (matchid, run_id) and the purge pass covers every table, so rows written
+        # before a config change are still cleaned.
+        self.stream_specs: dict[StreamName, tuple[TableSpec, ...]] = {
+            stream: select_table_specs(specs, disabled_tables)
+            for stream, specs in STREAM_TABLE_SPECS.items()
+        }
 
         self.batch_size = MATCHDATA_INSERT_BATCH_SIZE
         self.flush_interval_s = min(
             MATCHDATA_MAX_FLUSH_INTERVAL_S,
             _flush_interval_from_rate_limit() * MATCHDATA_FLUSH_INTERVAL_MULTIPLIER,
         )
+        # Every row carries game_month, the partition key of the D14 layout. A
+        # match's timeline rows wait for its info row so both streams agree.
+        self.partitioned = partitioned
+        extra_columns = (GAME_MONTH_COLUMN,) if partitioned else ()
         self._table_columns: dict[str, tuple[str, ...]] = {
-            spec.table: spec.columns for spec in ALL_TABLE_SPECS
+            spec.table: (*spec.columns, *extra_columns) for spec in ALL_TABLE_SPECS
         }
 
     async def save(
@@ -436,7 +982,9 @@ class MatchDataSaver(Saver):
         if not state.matchids:
             return
 
-        await self.delete_unanchored_residue(state)
+        if not self.staging:
+            await self.tombstone_unanchored_residue(state)
+        log = await self._open_log(state, ctx)
 
         stream_successes: dict[str, set[StreamName]] = defaultdict(set)
         stream_terminals: dict[str, set[StreamName]] = defaultdict(set)
@@ -453,17 +1001,26 @@ class MatchDataSaver(Saver):
                 if mid not in pending:
                     stream_successes[mid].add(stream)
 
-        parsers: dict[StreamName, tuple[Any, tuple[TableSpec, ...]]] = {
-            "non_timeline": (self.non_timeline_parser, NON_TIMELINE_TABLE_SPECS),
-            "timeline": (self.timeline_parser, TIMELINE_TABLE_SPECS),
+        parsers: dict[StreamName, Any] = {
+            "non_timeline": self.non_timeline_parser,
+            "timeline": self.timeline_parser,
         }
+        # match_id -> game_month, and parsed timelines still waiting for theirs.
+        game_months: dict[str, int] = {}
+        deferred: dict[str, Any] = {}
 
         try:
+            if self.partitioned:
+                game_months = await self._load_game_months(state)
             async for item in items:
-                raise_if_stop_requested(stage="match_data:save")
                 fetch: MatchFetchResult = item.raw
                 stream: StreamName = item.stream
                 match_id = fetch.match_id
+                if log is not None:
+                    await asyncio.to_thread(
+                        log.append, stream, match_id, fetch.status, fetch.data
+                    )
+                raise_if_stop_requested(stage="match_data:save")
 
                 if fetch.data is None:
                     if fetch.status is not None and fetch.status not in RETRYABLE:
@@ -481,108 +1038,288 @@ class MatchDataSaver(Saver):
                     logger.info("MatchDataAbort match_id=%s; retiring.", match_id)
                     continue
 
-                parser, specs = parsers[stream]
+                if self.archive_dir is not None:
+                    await self._archive(stream, match_id, fetch.data)
+
+                parser = parsers[stream]
+                parse_started = time.perf_counter_ns()
                 parsed = await asyncio.to_thread(parser.run, fetch.data)
+                export_parse_ns(
+                    stream=stream, elapsed_ns=time.perf_counter_ns() - parse_started
+                )
                 self._attach_match_id(parsed, match_id)
                 stream_successes[match_id].add(stream)
-                await self._buffer_inserts(specs, parsed, buffers, ctx.run_id)
+                ready: list[tuple[StreamName, Any]] = [(stream, parsed)]
+                if self.partitioned:
+                    ready = self._stamp_game_month(
+                        stream, match_id, parsed, game_months, deferred
+                    )
+                for ready_stream, ready_parsed in ready:
+                    await self._buffer_parsed(
+                        ready_stream, ready_parsed, buffers, ctx.run_id
+                    )
 
                 now = time.monotonic()
-                if (now - last_flush) >= self.flush_interval_s:
+                if self.flush_tuner is None and (now - last_flush) >= self.flush_interval_s:
                     await self._flush_all_buffers(buffers, ctx.run_id)
                     last_flush = now
+                self._export_buffered_rows(buffers)
 
-            await self._flush_all_buffers(buffers, ctx.run_id)
+            for parsed in deferred.values():
+                # No info row for these in this batch or before it; date the
+                # timeline by its own end instead.
+                self._set_game_month(parsed, timeline_game_month(parsed))
+                await self._buffer_parsed("timeline", parsed, buffers, ctx.run_id)
+            deferred.clear()
 
-            both: set[StreamName] = {"non_timeline", "timeline"}
-            finished: list[str] = []
-            retired: list[str] = list(aborted_match_ids)
-            requeued: list[str] = []
-            for mid in state.matchids:
-                if mid in aborted_match_ids:
-                    continue
-                successes = stream_successes.get(mid, set())
-                terminals = stream_terminals.get(mid, set())
-                if successes == both:
-                    finished.append(mid)
-                elif successes | terminals == both and terminals:
-                    retired.append(mid)
+            await self._flush_all_buffers(buffers, ctx.run_id)
+            self._export_buffered_rows(buffers)
+
+            with observe_stage(MATCHDATA_TELEMETRY_PIPELINE, "resolve"):
+                lost = await self._lost_leases(state, ctx.run_id)
+                both: set[StreamName] = {"non_timeline", "timeline"}
+                finished: list[str] = []
+                retired: list[str] = [mid for mid in aborted_match_ids if mid not in lost]
+                requeued: list[str] = []
+                for mid in state.matchids:
+                    if mid in aborted_match_ids or mid in lost:
+                        continue
+                    successes = stream_successes.get(mid, set())
+                    terminals = stream_terminals.get(mid, set())
+                    if successes == both:
+                        finished.append(mid)
+                    elif successes | terminals == both and terminals:
+                        retired.append(mid)
+                    else:
+                        requeued.append(mid)
+
+                if requeued:
+                    logger.warning(
+                        "MatchData retryable failure run_id=%s count=%d sample=%s; %s",
+                        ctx.run_id,
+                        len(requeued),
+                        requeued[:20],
+                        "dropping staged rows"
+                        if self.staging
+                        else "keeping partial rows for anchor retry",
+                    )
+
+                if lost and not self.staging:
+                    # Another drainer owns these now; void what this batch wrote.
+                    await self.tombstone_failed_matchids(lost, ctx.run_id)
+
+                if retired:
+                    logger.warning(
+                        "MatchData retired run_id=%s count=%d aborts=%d sample=%s",
+                        ctx.run_id,
+                        len(retired),
+                        len(aborted_match_ids),
+                        retired[:20],
+                    )
+
+                if self.staging:
+                    await self.commit_staged_batch(ctx.run_id, finished, retired)
                 else:
-                    requeued.append(mid)
+                    if retired:
+                        await self.tombstone_retired_matchids(retired, ctx.run_id)
+                        await self.delete_source_matchids(retired)
+                    if finished or retired:
+                        await self.mark_finished_matchids([*finished, *retired])
 
-            if requeued:
-                logger.warning(
-                    "MatchData retryable failure run_id=%s count=%d sample=%s; keeping partial rows for anchor retry",
+                logger.info(
+                    "MatchData done run_id=%s total=%d ok=%d retired=%d requeued=%d lost=%d",
                     ctx.run_id,
+                    len(state.matchids),
+                    len(finished),
+                    len(retired),
                     len(requeued),
-                    requeued[:20],
+                    len(lost),
                 )
+            if log is not None:
+                log.discard()
+
+        except Exception:
+            if log is not None:
+                # Keep the fetched payloads for replay on the next start.
+                log.close()
+            if self.staging:
+                await self.discard_staged_batch(ctx.run_id)
+            else:
+                await self.tombstone_failed_matchids(state.matchids, ctx.run_id)
+            logger.exception("MatchData batch exception run_id=%s", ctx.run_id)
+            raise
+        finally:
+            if self.leases is not None:
+                await run_clickhouse(self.leases.release, ctx.run_id)
 
-            if retired:
-                logger.warning(
-                    "MatchData retired run_id=%s count=%d aborts=%d sample=%s",
-                    ctx.run_id,
-                    len(retired),
-                    len(aborted_match_ids),
-                    retired[:20],
+    async def _open_log(
+        self, state: MatchDataCollectorState, ctx: OrchestrationContext
+    ) -> BatchLog | None:
+        if self.wal is None:
+            return None
+        return await asyncio.to_thread(
+            self.wal.open,
+            ctx.run_id,
+            matchids=state.matchids,
+            non_timeline_matchids=state.non_timeline_matchids,
+            timeline_matchids=state.timeline_matchids,
+        )
+
+    async def replay(self, logged: LoggedBatch, ctx: OrchestrationContext) -> None:
+        """Re-save a batch from its WAL under ``ctx`` without fetching again.
+
+        Only ids still pending in the queue (and, with leases, won by this
+        drainer) are replayed; whatever the logged run already wrote for them is
+        voided first, so the replay writes every row exactly once.
+        """
+        pending = await run_clickhouse(load_pending_matchids, logged.matchids)
+        ids = [mid for mid in logged.matchids if mid in pending]
+        if ids and self.leases is not None:
+            ids = await run_clickhouse(self.leases.acquire, ctx.run_id, ids)
+        if not ids:
+            return
+        keep = set(ids)
+
+        if self.staging:
+            await self.discard_staged_batch(logged.run_id)
+        else:
+            await self.tombstone_failed_matchids(ids, logged.run_id)
+
+        def restrict(values: list[str] | None) -> list[str] | None:
+            return None if values is None else [mid for mid in values if mid in keep]
+
+        state = MatchDataCollectorState(
+            matchids=ids,
+            non_timeline_matchids=restrict(logged.non_timeline_matchids),
+            timeline_matchids=restrict(logged.timeline_matchids),
+        )
+        # A match fetched twice within the batch (e.g. after a retry) keeps the
+        # last result, as the live saver would have.
+        latest: dict[tuple[str, str], StreamItem] = {}
+        for fetched in logged.fetches:
+            if fetched.match_id in keep:
+                latest[(fetched.stream, fetched.match_id)] = StreamItem(
+                    fetched.stream,
+                    MatchFetchResult(fetched.match_id, fetched.data, fetched.status),
                 )
-                await self.delete_failed_matchids(retired)
-                await self.delete_source_matchids(retired)
 
-            if finished or retired:
-                await self.mark_finished_matchids([*finished, *retired])
+        async def logged_items() -> AsyncIterator[StreamItem]:
+            for item in latest.values():
+                yield item
 
-            logger.info(
-                "MatchData done run_id=%s total=%d ok=%d retired=%d requeued=%d",
-                ctx.run_id,
-                len(state.matchids),
-                len(finished),
-                len(retired),
-                len(requeued),
+        await self.save(logged_items(), state, ctx)
+
+    async def _lost_leases(self, state: MatchDataCollectorState, run_id: UUID) -> list[str]:
+        if self.leases is None:
+            return []
+        held = await run_clickhouse(self.leases.held, run_id, state.matchids)
+        lost = [mid for mid in state.matchids if mid not in held]
+        if lost:
+            logger.warning(
+                "MatchData leases expired run_id=%s count=%d sample=%s; not committing them",
+                run_id,
+                len(lost),
+                lost[:20],
             )
+        return lost
 
-        except Exception as exc:
-            await self.delete_failed_matchids(state.matchids)
-            logger.exception(
-                "MatchData batch exception run_id=%s: %s",
-                ctx.run_id,
+    async def _archive(self, stream: StreamName, match_id: str, data: Any) -> None:
+        assert self.archive_dir is not None
+        try:
+            await asyncio.to_thread(
+                archive_payload, self.archive_dir, stream, match_id, data
+            )
+        except OSError as exc:
+            # The archive is a re-parse convenience; never fail ingestion over it.
+            logger.warning(
+                "MatchDataArchive failed match_id=%s stream=%s: %s",
+                match_id,
+                stream,
                 exc,
             )
-            raise
 
-    async def delete_failed_matchids(self, match_ids: list[str]) -> None:
-        await self.delete_stream_matchids(ALL_TABLE_SPECS, match_ids)
+    async def tombstone_failed_matchids(self, match_ids: list[str], run_id: UUID) -> None:
+        # Only this batch wrote rows under run_id; streams anchored by earlier
+        # runs stay live, so the retry fetches just the missing streams.
+        await self.tombstone_rows(
+            [(mid, run_id) for mid in match_ids], TOMBSTONE_ALL_STREAMS
+        )
 
-    async def delete_stream_matchids(
-        self,
-        specs: tuple[TableSpec, ...],
-        match_ids: list[str],
-    ) -> None:
-        for spec in specs:
-            await run_sync_with_retry(
-                logger=logger,
-                component="MatchData",
-                op_name=f"delete_by_matchids:{spec.table}",
-                func=delete_by_matchids,
-                args=(spec.table, match_ids),
+    async def tombstone_retired_matchids(self, match_ids: list[str], run_id: UUID) -> None:
+        await self.tombstone_failed_matchids(match_ids, run_id)
+        for stream, specs in STREAM_TABLE_SPECS.items():
+            # A stream anchored by an earlier run is retired with the match.
+            anchored = await run_clickhouse(
+                load_table_matchid_runs, specs[-1].table, match_ids, stream=stream
             )
+            if anchored:
+                await self.tombstone_rows(anchored, stream)
 
-    async def delete_unanchored_residue(self, state: MatchDataCollectorState) -> None:
-        for stream, specs in STREAM_TABLE_SPECS.items():
+    async def tombstone_unanchored_residue(self, state: MatchDataCollectorState) -> None:
+        for stream in STREAM_TABLE_SPECS:
             ids = state.stream_matchids(stream)
             if not ids:
                 continue
-            residue = await asyncio.to_thread(load_table_matchids, specs[0].table, ids)
+            # A crashed run may have flushed any subset of the stream's tables,
+            # including ones disabled since, so every table is searched.
+            tables = [spec.table for spec in STREAM_TABLE_SPECS[stream]]
+            residue = await run_clickhouse(
+                load_stream_matchid_runs, tables, ids, stream=stream
+            )
             if not residue:
                 continue
-            residue_ids = [mid for mid in ids if mid in residue]
             logger.warning(
-                "MatchData unanchored residue stream=%s count=%d sample=%s; deleting before retry",
+                "MatchData unanchored residue stream=%s count=%d sample=%s; tombstoning before retry",
                 stream,
-                len(residue_ids),
-                residue_ids[:20],
+                len(residue),
+                [mid for mid, _ in residue[:20]],
+            )
+            await self.tombstone_rows(residue, stream)
+
+    async def tombstone_rows(
+        self,
+        rows: list[tuple[str, UUID]],
+        stream: str,
+    ) -> None:
+        if not rows:
+            return
+        await run_sync_with_retry(
+            logger=logger,
+            component="MatchData",
+            op_name=f"tombstone_matchid_runs:{stream}",
+            func=tombstone_matchid_runs,
+            args=(rows,),
+            kwargs={"stream": stream},
+        )
+
+    async def commit_staged_batch(
+        self,
+        run_id: UUID,
+        finished: list[str],
+        retired: list[str],
+    ) -> None:
+        await run_sync_with_retry(
+            logger=logger,
+            component="MatchData",
+            op_name="commit_staged_batch",
+            func=commit_staged_batch,
+            args=(run_id,),
+            kwargs={
+                "promote": finished,
+                "finish_only": retired,
+                "tables": STAGING_PROMOTION_ORDER,
+            },
+        )
+
+    async def discard_staged_batch(self, run_id: UUID) -> None:
+        discarded = await run_clickhouse(
+            discard_staged_batch, run_id, STAGING_PROMOTION_ORDER
+        )
+        if not discarded:
+            logger.warning(
+                "MatchData staged commit interrupted run_id=%s; replayed on next start",
+                run_id,
             )
-            await self.delete_stream_matchids(specs, residue_ids)
 
     async def mark_finished_matchids(self, match_ids: list[str]) -> None:
         await run_sync_with_retry(
@@ -608,6 +1345,62 @@ class MatchDataSaver(Saver):
             for row in rows:
                 row["matchId"] = match_id
 
+    @staticmethod
+    def _set_game_month(parsed: Any, month: int) -> None:
+        for rows in vars(parsed).values():
+            for row in rows:
+                row[GAME_MONTH_COLUMN] = month
+
+    def _stamp_game_month(
+        self,
+        stream: StreamName,
+        match_id: str,
+        parsed: Any,
+        game_months: dict[str, int],
+        deferred: dict[str, Any],
+    ) -> list[tuple[StreamName, Any]]:
+        """Stamp game_month from ``info.gameCreation``; returns what can be buffered now."""
+        ready: list[tuple[StreamName, Any]] = [(stream, parsed)]
+        if stream == "non_timeline":
+            created = max((row["gameCreation"] for row in parsed.game_info), default=0)
+            if not created:
+                # No info row (e.g. SWARM parses to empty tables): a held
+                # timeline stays deferred and is dated by its own end.
+                self._set_game_month(parsed, game_month(created))
+                return ready
+            game_months[match_id] = game_month(created)
+            if match_id in deferred:
+                ready.append(("timeline", deferred.pop(match_id)))
+        elif match_id not in game_months:
+            deferred[match_id] = parsed
+            return []
+        for _, stamped in ready:
+            self._set_game_month(stamped, game_months[match_id])
+        return ready
+
+    async def _load_game_months(self, state: MatchDataCollectorState) -> dict[str, int]:
+        # Matches fetching only their timeline were dated by an earlier run.
+        pending = set(state.stream_matchids("non_timeline"))
+        ids = [mid for mid in state.stream_matchids("timeline") if mid not in pending]
+        if not ids:
+            return {}
+        return await run_clickhouse(load_game_months, ids)
+
+    async def _buffer_parsed(
+        self,
+        stream: StreamName,
+        parsed: Any,
+        buffers: dict[str, list[dict[str, Any]]],
+        run_id: UUID,
+    ) -> None:
+        started = time.perf_counter()
+        await self._buffer_inserts(self.stream_specs[stream], parsed, buffers, run_id)
+        export_stage_seconds(
+            pipeline=MATCHDATA_TELEMETRY_PIPELINE,
+            stage="buffer",
+            seconds=time.perf_counter() - started,
+        )
+
     @retry(
         stop=stop_after_attempt(RETRY_MAX_ATTEMPTS),
         wait=wait_exponential(multiplier=1, min=1, max=10),
@@ -620,20 +1413,22 @@ class MatchDataSaver(Saver):
         cols: tuple[str, ...],
         items: list[dict[str, Any]],
         run_id: UUID,
-    ) -> None:
+    ) -> int:
         if not items:
-            return
+            return 0
+        batch_size = len(items) if self.flush_tuner is not None else self.batch_size
         try:
-            await asyncio.to_thread(
-                persist_data, table, cols, items, run_id, self.batch_size
-            )
-        except Exception as e:
-            logger.exception(
-                "Error inserting into %s run_id=%s: %s",
+            return await run_clickhouse(
+                persist_data,
                 table,
+                cols,
+                items,
                 run_id,
-                e,
+                batch_size,
+                settings=self._insert_settings(table),
             )
+        except Exception:
+            logger.exception("Error inserting into %s run_id=%s", table, run_id)
             raise
 
     async def _buffer_inserts(
@@ -648,8 +1443,30 @@ class MatchDataSaver(Saver):
             if not items:
                 continue
             buffers[spec.table].extend(items)
-            if len(buffers[spec.table]) >= self.batch_size:
+            if self._buffer_full(spec.table, len(buffers[spec.table])):
                 await self._flush_table_buffer(spec.table, buffers, run_id)
+        if self.flush_tuner is not None:
+            buffered = {
+                table: len(rows)
+                for table, rows in buffers.items()
+                if table not in ANCHOR_TABLES
+            }
+            for table in self.flush_tuner.over_budget(buffered):
+                await self._flush_table_buffer(table, buffers, run_id)
+
+    @staticmethod
+    def _export_buffered_rows(buffers: dict[str, list[dict[str, Any]]]) -> None:
+        export_queue_depth(
+            pipeline=MATCHDATA_TELEMETRY_PIPELINE,
+            queue="buffered_rows",
+            depth=sum(len(rows) for rows in buffers.values()),
+        )
+
+    def _buffer_full(self, table: str, rows: int) -> bool:
+        if self.flush_tuner is None:
+            return rows >= self.batch_size
+        # Anchors only flush with the rest of the batch, after every other table.
+        return table not in ANCHOR_TABLES and self.flush_tuner.should_flush(table, rows)
 
     async def _flush_table_buffer(
         self,
@@ -662,12 +1479,58 @@ class MatchDataSaver(Saver):
             return
         cols = self._table_columns[table]
         buffers[table] = []
-        await self._insert_one(table, cols, items, run_id)
+        target = staging_table(table) if self.staging else table
+        if table in ANCHOR_TABLES:
+            await self._settle_async_inserts()
+        started = time.monotonic()
+        with observe_stage(
+            MATCHDATA_TELEMETRY_PIPELINE, "insert", table=table, rows=len(items)
+        ):
+            written = await self._insert_one(target, cols, items, run_id)
+        if self.flush_tuner is not None:
+            self.flush_tuner.observe(
+                table,
+                rows=len(items),
+                written_bytes=written or 0,
+                elapsed_s=time.monotonic() - started,
+            )
 
     async def _flush_all_buffers(
         self,
         buffers: dict[str, list[dict[str, Any]]],
         run_id: UUID,
     ) -> None:
-        for table in tuple(buffers.keys()):
+        tables = [table for table in buffers if table not in ANCHOR_TABLES]
+        anchors = [table for table in buffers if table in ANCHOR_TABLES]
+        if self.async_insert:
+            # Concurrent inserts land in the same server-side buffer flush.
+            results = await asyncio.gather(
+                *(self._flush_table_buffer(table, buffers, run_id) for table in tables),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        else:
+            for table in tables:
+                await self._flush_table_buffer(table, buffers, run_id)
+        for table in anchors:
             await self._flush_table_buffer(table, buffers, run_id)
+        await self._settle_async_inserts()
+
+    def _insert_settings(self, table: str) -> dict[str, Any] | None:
+        if not self.async_insert:
+            return None
+        # Anchors always wait: an anchor row must never outlive a failed insert.
+        wait = self.async_insert_wait or table in self._anchor_targets
+        return async_insert_settings(wait=wait)
+
+    async def _settle_async_inserts(self) -> None:
+        if not self.async_insert or self.async_insert_wait:
+            return
+        await run_sync_with_retry(
+            logger=logger,
+            component="MatchData",
+            op_name="flush_async_insert_queue",
+            func=flush_async_insert_queue,
+        )
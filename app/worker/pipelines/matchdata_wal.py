@@ -0,0 +1,196 @@
+"""Local write-ahead log of matchdata fetch results, one file per claimed batch.
+
+The saver appends every fetch result (payload, or the terminal status) before
+acting on it and deletes the file once the batch is resolved in ClickHouse. A
+file left behind by a crash or a stop request therefore holds every payload
+the batch had fetched; the orchestrator replays it through the saver on the
+next start instead of fetching those matches again.
+
+File layout under the WAL root, ``<run_id>.wal``: a sequence of records, each
+``<u32 length><zstd frame>``. The frame holds ``<u32 header length><JSON
+header><payload bytes>``. The first record describes the batch, the rest are
+fetch results. A torn trailing record (crash mid-write) is ignored on read.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO
+from uuid import UUID
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+WAL_SUFFIX = ".wal"
+WAL_ZSTD_LEVEL = 3
+_LENGTH = struct.Struct("<I")
+
+
+@dataclass(frozen=True)
+class LoggedFetch:
+    stream: str
+    match_id: str
+    status: int | None
+    data: dict[str, Any] | bytes | None
+
+
+@dataclass(frozen=True)
+class LoggedBatch:
+    path: Path
+    run_id: UUID
+    matchids: list[str]
+    non_timeline_matchids: list[str] | None
+    timeline_matchids: list[str] | None
+    fetches: list[LoggedFetch]
+
+
+def _encode(header: dict[str, Any], payload: bytes = b"") -> bytes:
+    head = json.dumps(header, separators=(",", ":")).encode()
+    frame = zstandard.ZstdCompressor(level=WAL_ZSTD_LEVEL).compress(
+        _LENGTH.pack(len(head)) + head + payload
+    )
+    return _LENGTH.pack(len(frame)) + frame
+
+
+def _decode(frame: bytes) -> tuple[dict[str, Any], bytes]:
+    body = zstandard.ZstdDecompressor().decompress(frame)
+    (head_len,) = _LENGTH.unpack_from(body)
+    start = _LENGTH.size
+    return json.loads(body[start : start + head_len]), body[start + head_len :]
+
+
+def _read_records(path: Path) -> list[tuple[dict[str, Any], bytes]]:
+    records: list[tuple[dict[str, Any], bytes]] = []
+    data = path.read_bytes()
+    pos = 0
+    while pos + _LENGTH.size <= len(data):
+        (size,) = _LENGTH.unpack_from(data, pos)
+        frame = data[pos + _LENGTH.size : pos + _LENGTH.size + size]
+        if len(frame) < size:
+            break
+        try:
+            records.append(_decode(frame))
+        except (zstandard.ZstdError, ValueError, struct.error):
+            break
+        pos += _LENGTH.size + size
+    return records
+
+
+class BatchLog:
+    """Append handle for one batch's WAL file."""
+
+    def __init__(self, path: Path, fh: BinaryIO, *, fsync: bool) -> None:
+        self.path = path
+        self._fh = fh
+        self._fsync = fsync
+
+    def _write(self, record: bytes) -> None:
+        self._fh.write(record)
+        self._fh.flush()
+        if self._fsync:
+            os.fsync(self._fh.fileno())
+
+    def append(
+        self,
+        stream: str,
+        match_id: str,
+        status: int | None,
+        data: dict[str, Any] | bytes | None,
+    ) -> None:
+        if data is None:
+            encoding, payload = "none", b""
+        elif isinstance(data, bytes | bytearray):
+            encoding, payload = "raw", bytes(data)
+        else:
+            encoding, payload = "json", json.dumps(data).encode()
+        header = {
+            "kind": "fetch",
+            "stream": stream,
+            "match_id": match_id,
+            "status": status,
+            "encoding": encoding,
+        }
+        self._write(_encode(header, payload))
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def discard(self) -> None:
+        """The batch is resolved: drop its log."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class MatchDataWal:
+    def __init__(self, root: Path, *, fsync: bool = True) -> None:
+        self.root = root
+        self.fsync = fsync
+
+    def open(
+        self,
+        run_id: UUID,
+        *,
+        matchids: list[str],
+        non_timeline_matchids: list[str] | None,
+        timeline_matchids: list[str] | None,
+    ) -> BatchLog:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{run_id}{WAL_SUFFIX}"
+        log = BatchLog(path, path.open("ab"), fsync=self.fsync)
+        log._write(
+            _encode(
+                {
+                    "kind": "batch",
+                    "run_id": str(run_id),
+                    "matchids": matchids,
+                    "non_timeline_matchids": non_timeline_matchids,
+                    "timeline_matchids": timeline_matchids,
+                }
+            )
+        )
+        return log
+
+    def pending(self) -> list[LoggedBatch]:
+        """Batches left unresolved by an earlier process, oldest first."""
+        if not self.root.is_dir():
+            return []
+        paths = sorted(self.root.glob(f"*{WAL_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+        batches: list[LoggedBatch] = []
+        for path in paths:
+            records = _read_records(path)
+            if not records or records[0][0].get("kind") != "batch":
+                logger.warning("MatchDataWal unreadable batch header path=%s; removing", path)
+                path.unlink(missing_ok=True)
+                continue
+            header = records[0][0]
+            fetches: list[LoggedFetch] = []
+            for meta, payload in records[1:]:
+                encoding = meta["encoding"]
+                data: dict[str, Any] | bytes | None
+                if encoding == "json":
+                    data = json.loads(payload)
+                elif encoding == "raw":
+                    data = payload
+                else:
+                    data = None
+                fetches.append(
+                    LoggedFetch(meta["stream"], meta["match_id"], meta["status"], data)
+                )
+            batches.append(
+                LoggedBatch(
+                    path=path,
+                    run_id=UUID(header["run_id"]),
+                    matchids=header["matchids"],
+                    non_timeline_matchids=header["non_timeline_matchids"],
+                    timeline_matchids=header["timeline_matchids"],
+                    fetches=fetches,
+                )
+            )
+        return batches
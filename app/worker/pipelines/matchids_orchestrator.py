@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
 import time
@@ -27,6 +26,7 @@ from app.worker.pipelines.orchestrator import (
 )
 from app.worker.pipelines.recovery_utils import run_sync_with_retry
 from app.worker.pipelines.stop_flag import raise_if_stop_requested
+from database.clickhouse.client import run_clickhouse
 from database.clickhouse.operations.matchids import (
     delete_failed_puuid_timestamp,
     delete_matchid_puuids,
@@ -274,12 +274,12 @@ class MatchIDSaver:
                     f"Match ID crawl failed for {len(state.failed_player_keys)} "
                     "player keys"
                 )
-            await asyncio.to_thread(
+            await run_clickhouse(
                 insert_puuids_in_batches,
                 successful_player_keys,
                 ctx.run_id,
             )
-            await asyncio.to_thread(
+            await run_clickhouse(
                 upsert_puuid_timestamp,
                 state.ts,
                 ctx.run_id,
@@ -0,0 +1,101 @@
+"""Local archive of raw matchdata payloads for offline re-parsing.
+
+Layout under the archive root, one zstd-compressed JSON document per stream:
+
+    <root>/<YYYY-MM-DD>/<match_id>.non_timeline.json.zst
+    <root>/<YYYY-MM-DD>/<match_id>.timeline.json.zst
+
+Uncompressed ``.json`` files are read too, and any directory nesting is
+accepted, so hand-collected payloads can be dropped in as-is. When a match was
+archived more than once the lexically last path (latest date) wins.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Literal
+
+import zstandard
+
+type ArchiveStream = Literal["non_timeline", "timeline"]
+
+ARCHIVE_STREAMS: tuple[ArchiveStream, ...] = ("non_timeline", "timeline")
+ARCHIVE_ZSTD_LEVEL = 3
+
+
+@dataclass(frozen=True)
+class ArchivedMatch:
+    match_id: str
+    non_timeline: Path | None = None
+    timeline: Path | None = None
+
+    def path(self, stream: ArchiveStream) -> Path | None:
+        return self.non_timeline if stream == "non_timeline" else self.timeline
+
+
+def archive_path(root: Path, stream: ArchiveStream, match_id: str) -> Path:
+    day = datetime.now(tz=UTC).date().isoformat()
+    return root / day / f"{match_id}.{stream}.json.zst"
+
+
+def archive_payload(
+    root: Path,
+    stream: ArchiveStream,
+    match_id: str,
+    data: dict[str, Any] | bytes,
+) -> Path:
+    """Write one payload atomically (tmp file + rename) and return its path."""
+    body = data if isinstance(data, bytes) else json.dumps(data).encode()
+    path = archive_path(root, stream, match_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(body))
+    tmp.replace(path)
+    return path
+
+
+def _split_name(name: str) -> tuple[str, ArchiveStream] | None:
+    for stream in ARCHIVE_STREAMS:
+        for suffix in (f".{stream}.json", f".{stream}.json.zst"):
+            if name.endswith(suffix):
+                return name[: -len(suffix)], stream
+    return None
+
+
+def scan_archive(root: Path) -> list[ArchivedMatch]:
+    """Index every archived payload under ``root``, one entry per match id."""
+    found: dict[str, dict[ArchiveStream, Path]] = {}
+    for path in sorted(root.rglob("*.json*")):
+        split = _split_name(path.name)
+        if split is None:
+            continue
+        match_id, stream = split
+        found.setdefault(match_id, {})[stream] = path
+    return [
+        ArchivedMatch(match_id=match_id, **streams)
+        for match_id, streams in sorted(found.items())
+    ]
+
+
+def read_payload_bytes(path: Path) -> bytes:
+    data = path.read_bytes()
+    if path.suffix == ".zst":
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def read_payload(path: Path) -> dict[str, Any]:
+    return json.loads(read_payload_bytes(path))
+
+
+def filter_streams(
+    matches: Iterable[ArchivedMatch], streams: Iterable[ArchiveStream]
+) -> list[ArchivedMatch]:
+    """Matches with a payload for at least one of ``streams``."""
+    wanted = tuple(streams)
+    return [m for m in matches if any(m.path(stream) for stream in wanted)]
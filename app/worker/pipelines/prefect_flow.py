@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import logging
+import os
+import socket
 import time
 from dataclasses import dataclass
 from collections.abc import Awaitable, Callable, Sequence
 
 from prefect import flow
 
+from app.api.v1.metrics.telemetry import export_stage_seconds, serve_metrics
+from app.core.config.settings import settings
 from app.core.logging import setup_logging_config
 from app.services.riot_api_client.base import RiotAPI, get_riot_api
 from app.services.riot_api_client.parsers.non_timeline import (
@@ -15,12 +19,17 @@ from app.services.riot_api_client.parsers.non_timeline import (
 from app.services.riot_api_client.parsers.timeline import (
     MatchDataTimelineParsingOrchestrator,
 )
+from app.worker.pipelines.batch_tuning import MIB, ClaimSizer, FlushTuner
 from app.worker.pipelines.matchdata_orchestrator import (
+    MATCHDATA_CLAIM_BATCH_SIZE,
+    MatchDataLeases,
     MatchDataLoader,
     MatchDataOrchestrator,
     MatchDataSaver,
     MatchDataStreamCollector,
+    enabled_table_attrs,
 )
+from app.worker.pipelines.matchdata_wal import MatchDataWal
 from app.worker.pipelines.matchids_orchestrator import (
     MatchIDCollector,
     MatchIDLoader,
@@ -71,10 +80,31 @@ def _build_steps(
     )
 
 
+def _build_match_data_leases() -> MatchDataLeases | None:
+    if not settings.matchdata_lease_ttl_s:
+        return None
+    return MatchDataLeases(
+        owner=settings.matchdata_drainer_id or f"{socket.gethostname()}:{os.getpid()}",
+        ttl_s=settings.matchdata_lease_ttl_s,
+    )
+
+
 def _build_match_data_step(riot_api: RiotAPI) -> PipelineStep:
+    disabled_tables = settings.matchdata_disabled_tables
+    leases = _build_match_data_leases()
+    adaptive = settings.matchdata_adaptive_batching
+    wal = (
+        MatchDataWal(settings.matchdata_wal_dir)
+        if settings.matchdata_wal_dir is not None
+        else None
+    )
     match_data = MatchDataOrchestrator(
         pipeline="match_data",
-        loader=MatchDataLoader(),
+        loader=MatchDataLoader(
+            staging=settings.matchdata_staging,
+            leases=leases,
+            shard=(settings.matchdata_shard_index, settings.matchdata_shard_count),
+        ),
         non_timeline_collector=MatchDataStreamCollector(
             riot_api=riot_api,
             stream="non_timeline",
@@ -82,11 +112,39 @@ def _build_match_data_step(riot_api: RiotAPI) -> PipelineStep:
         timeline_collector=MatchDataStreamCollector(
             riot_api=riot_api,
             stream="timeline",
+            raw_body=settings.matchdata_stream_timeline,
         ),
         saver=MatchDataSaver(
-            non_timeline_parser=MatchDataNonTimelineParsingOrchestrator(),
-            timeline_parser=MatchDataTimelineParsingOrchestrator(),
+            non_timeline_parser=MatchDataNonTimelineParsingOrchestrator(
+                tables=enabled_table_attrs("non_timeline", disabled_tables),
+            ),
+            timeline_parser=MatchDataTimelineParsingOrchestrator(
+                tables=enabled_table_attrs("timeline", disabled_tables),
+            ),
+            disabled_tables=disabled_tables,
+            archive_dir=settings.matchdata_archive_dir,
+            staging=settings.matchdata_staging,
+            leases=leases,
+            flush_tuner=FlushTuner(
+                memory_budget_bytes=settings.matchdata_flush_memory_mib * MIB,
+                max_parts_per_s=settings.matchdata_max_parts_per_s,
+            )
+            if adaptive
+            else None,
+            wal=wal,
+            async_insert=settings.clickhouse_async_insert,
+            async_insert_wait=settings.clickhouse_async_insert_wait,
+            partitioned=settings.matchdata_partitioned,
         ),
+        prefetch_batches=settings.matchdata_prefetch_batches,
+        leases=leases,
+        claim_sizer=ClaimSizer(
+            initial=MATCHDATA_CLAIM_BATCH_SIZE,
+            target_batch_s=settings.matchdata_target_batch_s,
+        )
+        if adaptive
+        else None,
+        wal=wal,
     )
     return PipelineStep("match_data", match_data.run)
 
@@ -97,7 +155,9 @@ async def _run_cycle(steps: Sequence[PipelineStep]) -> None:
         logger.info("Step start: %s", step.name)
         start = time.monotonic()
         await step.run()
-        logger.info("Step done: %s (%.2fs)", step.name, time.monotonic() - start)
+        elapsed = time.monotonic() - start
+        export_stage_seconds(pipeline=step.name, stage="step", seconds=elapsed)
+        logger.info("Step done: %s (%.2fs)", step.name, elapsed)
 
 
 @flow(name="riot-pipeline")
@@ -108,6 +168,7 @@ async def riot_pipeline(matchdata_only: bool = False) -> None:
     Repetition is handled by Prefect Automation (run again on completion).
     """
     logger.info("Pipeline run start matchdata_only=%s", matchdata_only)
+    serve_metrics(settings.metrics_port)
     start = time.monotonic()
 
     async with get_riot_api() as riot_api:
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Any
 from collections.abc import Callable, Mapping
 
 from tenacity import before_sleep_log, retry, stop_after_attempt, wait_exponential
 
+from database.clickhouse.client import run_clickhouse
+
 _logger = logging.getLogger(__name__)
 
 # RECOVERY-SYSTEM: shared retry attempt ceiling. The per-call-site wait curves
@@ -33,7 +34,7 @@ async def run_sync_with_retry(
 ) -> None:
     try:
         call_kwargs = dict(kwargs or {})
-        await asyncio.to_thread(func, *args, **call_kwargs)
+        await run_clickhouse(func, *args, **call_kwargs)
     except Exception as exc:
         logger.exception("%s %s failed: %s", component, op_name, exc)
         raise
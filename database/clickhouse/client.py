@@ -1,20 +1,74 @@
+import asyncio
+import contextvars
+import functools
 import logging
 import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Literal
 
 import clickhouse_connect
+from clickhouse_connect.driver import httputil
 
 from app.core.config.settings import settings
 from app.core.logging.logger import setup_logging_config
+from database.clickhouse.query_tags import log_comment
 
 setup_logging_config()
 logger = logging.getLogger(__name__)
 
 _local = threading.local()
 
+# "light": queue claims, leases, lookups and row inserts from the pipelines.
+# "heavy": analytics builds and full-table rebuilds.
+type QueryProfile = Literal["light", "heavy"]
+
+# One HTTP pool for every thread's client, sized for both executors at once.
+_pool_mgr = httputil.get_pool_manager(
+    maxsize=settings.clickhouse_max_concurrency + settings.clickhouse_heavy_max_concurrency,
+    num_pools=2,
+)
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def query_settings(profile: QueryProfile) -> dict[str, Any]:
+    """Server settings of a query profile; zero limits are left to the server."""
+    if profile == "light":
+        limits = {
+            "max_threads": settings.clickhouse_light_max_threads,
+            "max_memory_usage": settings.clickhouse_light_max_memory_usage,
+            "max_execution_time": settings.clickhouse_light_max_execution_time_s,
+        }
+    elif profile == "heavy":
+        limits = {
+            "max_threads": settings.clickhouse_heavy_max_threads,
+            "max_memory_usage": settings.clickhouse_heavy_max_memory_usage,
+            "max_execution_time": settings.clickhouse_heavy_max_execution_time_s,
+        }
+    else:
+        raise ValueError(f"Unknown ClickHouse query profile {profile!r}")
+    return {name: value for name, value in limits.items() if value}
+
+
+def bind_query_profile(profile: QueryProfile | None) -> None:
+    """Run this thread's queries under ``profile`` (None: server defaults).
+
+    Used as the initializer of ClickHouse worker threads; a client cached under
+    another profile is dropped so the next ``get_client`` picks up the settings.
+    """
+    if profile is not None:
+        query_settings(profile)
+    if getattr(_local, "profile", None) != profile:
+        _local.profile = profile
+        _local.client = None
+
 
 def get_client():
+    """This thread's client, tagged with the current ``query_context``."""
     client = getattr(_local, "client", None)
     if client is None:
+        profile = getattr(_local, "profile", None)
         client = clickhouse_connect.get_client(
             host=settings.clickhouse_host,
             port=settings.clickhouse_port,
@@ -25,10 +79,71 @@ def get_client():
             # Disabling auto-session avoids "concurrent queries within the same session"
             # when work is fanned out across multiple threads.
             autogenerate_session_id=False,
+            # Sent with every query; per-query settings still override them.
+            settings=query_settings(profile) if profile else None,
+            pool_mgr=_pool_mgr,
         )
 
         # Force connection/auth/protocol negotiation for this thread-local session.
         client.command("SELECT 1")
         _local.client = client
 
+    # Tag every query with the caller's stage/run/batch for system.query_log.
+    client.set_client_setting("log_comment", log_comment())
     return client
+
+
+def clickhouse_executor(profile: QueryProfile = "light") -> ThreadPoolExecutor:
+    """Dedicated worker threads for one query profile, created on first use.
+
+    Its size bounds the profile's concurrent queries in this process, and
+    profiles never share threads, so a claim is not queued behind a build.
+    """
+    with _executors_lock:
+        executor = _executors.get(profile)
+        if executor is None:
+            query_settings(profile)  # rejects unknown profiles
+            workers = (
+                settings.clickhouse_heavy_max_concurrency
+                if profile == "heavy"
+                else settings.clickhouse_max_concurrency
+            )
+            executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix=f"clickhouse-{profile}",
+                initializer=bind_query_profile,
+                initargs=(profile,),
+            )
+            _executors[profile] = executor
+    return executor
+
+
+async def run_clickhouse[R](
+    func: Callable[..., R],
+    /,
+    *args: Any,
+    profile: QueryProfile = "light",
+    **kwargs: Any,
+) -> R:
+    """``asyncio.to_thread`` for ClickHouse I/O: runs ``func`` on the profile's
+    executor, carrying the caller's context (trace spans) like ``to_thread``."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(clickhouse_executor(profile), call)
+
+
+def async_insert_settings(*, wait: bool) -> dict[str, Any]:
+    """Per-insert settings that hand rows to the server's async insert buffer.
+
+    ClickHouse merges concurrent small inserts into one part per flush (after
+    ``busy_timeout_ms`` or ``max_data_size`` bytes). With ``wait`` the insert
+    returns once its rows are in a part, so errors still surface; without it the
+    insert returns as soon as the rows are buffered.
+    """
+    return {
+        "async_insert": 1,
+        "wait_for_async_insert": int(wait),
+        "async_insert_busy_timeout_ms": settings.clickhouse_async_insert_busy_timeout_ms,
+        "async_insert_max_data_size": settings.clickhouse_async_insert_max_data_size,
+    }
@@ -0,0 +1,27 @@
+#!/usr/bin/env bash
+#
+# D10 migration: create game_data_staging (per-batch staging copies of the raw
+# matchdata tables) and enable insert-token dedup on the raw tables. See
+# database/clickhouse/schema/README.md (D10).
+#
+# Prereq: none for normal mode — the objects are unused until MATCHDATA_STAGING
+# is enabled. Before enabling staging on a live queue, drain partially anchored
+# matches (see RECOVERY_SYSTEM.md, "Staging Mode"). Every statement is
+# CREATE ... IF NOT EXISTS or MODIFY SETTING, so it is safe to re-run.
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../.." && pwd)"
+SCHEMA_FILE="${REPO_ROOT}/database/clickhouse/schema/3190_matchdata_staging_schema.sql"
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --multiquery --query "$1"
+}
+
+echo "=== game_data_staging ==="
+ch "$(cat "$SCHEMA_FILE")"
+
+echo "  staging tables: $(ch "SELECT count() FROM system.tables WHERE database = 'game_data_staging'")"
@@ -0,0 +1,43 @@
+#!/usr/bin/env bash
+#
+# D13 migration: matchid lookup projection + bloom_filter index on
+# game_data.matchids. See database/clickhouse/schema/README.md (D13).
+#
+# Optional. Prereq: none; both mutations run in the background and the table
+# stays readable and writable. The projection roughly doubles the table's disk
+# footprint. Safe to re-run (ADD ... IF NOT EXISTS; re-materializing is a no-op
+# rewrite). Benchmark before and after with scripts/bench_matchid_lookups.py.
+#
+# Rollback:
+#   ALTER TABLE game_data.matchids DROP PROJECTION IF EXISTS matchids_by_matchid
+#   ALTER TABLE game_data.matchids DROP INDEX IF EXISTS matchid_bf
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../.." && pwd)"
+SCHEMA_FILE="${REPO_ROOT}/database/clickhouse/schema/2002_matchids_lookup_indexes_schema.sql"
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --multiquery --query "$1"
+}
+
+echo "=== game_data.matchids ==="
+ch "$(cat "$SCHEMA_FILE")"
+
+echo "  materializing index on existing parts..."
+ch "ALTER TABLE game_data.matchids MATERIALIZE INDEX matchid_bf SETTINGS mutations_sync = 2"
+
+echo "  materializing projection on existing parts..."
+ch "ALTER TABLE game_data.matchids MATERIALIZE PROJECTION matchids_by_matchid SETTINGS mutations_sync = 2"
+
+echo "  parts with projection: $(ch "
+  SELECT countDistinct(parent_name)
+  FROM system.projection_parts
+  WHERE database = 'game_data' AND table = 'matchids' AND active")"
+echo "  active parts: $(ch "
+  SELECT count()
+  FROM system.parts
+  WHERE database = 'game_data' AND table = 'matchids' AND active")"
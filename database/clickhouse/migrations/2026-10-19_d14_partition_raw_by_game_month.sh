@@ -0,0 +1,127 @@
+#!/usr/bin/env bash
+#
+# D14 migration: partition the raw matchdata tables by game_month (YYYYMM of
+# info.gamecreation, UTC). See database/clickhouse/schema/README.md (D14).
+#
+# Opt-in. Prereq: ingestion pipeline stopped (./stop_pipeline_safely.sh) so no
+# writes are in flight, and MATCHDATA_PARTITIONED=true set before it restarts —
+# the saver must stamp game_month once the tables carry it. Per table: build a
+# shadow with the same columns (+ game_month last), sort key and settings, PARTITION
+# BY game_month; copy all rows with their month from game_data.info (0 when the
+# match has no info row); verify row-count parity, then atomically EXCHANGE. Old
+# data lands in <t>__new after the swap and is only dropped when DROP_OLD=1.
+# Tables already partitioned by game_month are skipped, so it is safe to re-run.
+#
+# Staging copies (D10) and game_data.participant_stats_corrected are created
+# AS their raw table, so they only gain the column (ADD COLUMN ... IF NOT EXISTS).
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+DROP_OLD="${DROP_OLD:-0}"   # set to 1 to drop the old (post-swap <t>__new) tables
+
+# Same expression as database/clickhouse/operations/partitions.py GAME_MONTH_SQL.
+GAME_MONTH_SQL="toUInt32(toYYYYMM(toDateTime(intDiv(gamecreation, 1000), 'UTC')))"
+
+RAW_TABLES=(
+  metadata info bans feats objectives
+  participant_stats participant_challenges participant_perk_values participant_perk_ids
+  tl_participant_stats tl_building_kill tl_champion_kill tl_champion_special_kill
+  tl_dragon_soul_given tl_elite_monster_kill tl_turret_plate_destroyed
+  tl_ck_victim_damage_dealt tl_ck_victim_damage_received tl_ward_placed tl_ward_kill
+  tl_item_purchased tl_item_sold tl_item_destroyed tl_item_undo tl_level_up
+  tl_skill_level_up tl_pause_end tl_game_end tl_objective_bounty_prestart
+  tl_objective_bounty_finish tl_feat_update tl_champion_transform
+)
+# Partitioned too, so 5003 can refresh one month with REPLACE PARTITION.
+PARTITIONED=("${RAW_TABLES[@]/#/game_data.}" game_data_filtered.participant_stats)
+COLUMN_ONLY=(
+  "${RAW_TABLES[@]/#/game_data_staging.}"
+  game_data.participant_stats_corrected
+)
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --query "$1"
+}
+
+table_attr() {
+  ch "SELECT $2 FROM system.tables WHERE database = '${1%%.*}' AND name = '${1#*.}'"
+}
+
+count() { ch "SELECT count() FROM $1"; }
+
+for t in "${PARTITIONED[@]}"; do
+  new="${t}__new"
+  echo "=== ${t} -> PARTITION BY game_month ==="
+
+  if [ -z "$(table_attr "$t" name)" ]; then
+    echo "  missing; skipped"
+    continue
+  fi
+  if [ "$(table_attr "$t" partition_key)" = "game_month" ]; then
+    echo "  already partitioned; skipped"
+    continue
+  fi
+
+  order_by="$(table_attr "$t" sorting_key)"
+  settings="$(table_attr "$t" "extract(engine_full, 'SETTINGS (.*)$')")"
+  columns="$(ch "
+    SELECT arrayStringConcat(groupArray(
+      concat(backQuote(name), ' ', type, if(compression_codec = '', '', concat(' ', compression_codec)))
+    ), ', ')
+    FROM (
+      SELECT name, type, compression_codec
+      FROM system.columns
+      WHERE database = '${t%%.*}' AND table = '${t#*.}'
+      ORDER BY position
+    )")"
+
+  ch "DROP TABLE IF EXISTS ${new}"
+  ch "CREATE TABLE ${new} (${columns}, game_month UInt32)
+      ENGINE = MergeTree
+      PARTITION BY game_month
+      ORDER BY (${order_by})
+      ${settings:+SETTINGS ${settings}}"
+
+  echo "  copying rows..."
+  ch "INSERT INTO ${new}
+      SELECT t.*, m.game_month
+      FROM ${t} AS t
+      LEFT JOIN (
+          SELECT matchid, any(${GAME_MONTH_SQL}) AS game_month
+          FROM game_data.info
+          GROUP BY matchid
+      ) AS m ON t.matchid = m.matchid
+      SETTINGS max_partitions_per_insert_block = 1000"
+
+  src="$(count "${t}")"
+  dst="$(count "${new}")"
+  if [ "$src" != "$dst" ]; then
+    echo "  ROW COUNT MISMATCH src=${src} dst=${dst}; aborting (dropping ${new})" >&2
+    ch "DROP TABLE ${new}"
+    exit 1
+  fi
+  echo "  row-count parity ok (${src}); undated rows: $(ch "SELECT count() FROM ${new} WHERE game_month = 0")"
+
+  ch "EXCHANGE TABLES ${t} AND ${new}"
+  echo "  swapped"
+
+  if [ "$DROP_OLD" = "1" ]; then
+    ch "DROP TABLE ${new}"
+    echo "  dropped old ${new}"
+  else
+    echo "  kept old data as ${new} (set DROP_OLD=1 to reclaim space)"
+  fi
+done
+
+for t in "${COLUMN_ONLY[@]}"; do
+  if [ -n "$(table_attr "$t" name)" ]; then
+    ch "ALTER TABLE ${t} ADD COLUMN IF NOT EXISTS game_month UInt32"
+    echo "=== ${t}: game_month column ok ==="
+  fi
+done
+
+echo "Done. Set MATCHDATA_PARTITIONED=true before restarting ingestion. Verify:"
+echo "  SELECT database, name, partition_key FROM system.tables WHERE partition_key = 'game_month';"
@@ -0,0 +1,55 @@
+#!/usr/bin/env bash
+#
+# D5 migration: convert coded tl_* columns (type, buildingtype, lanetype, monstertype,
+# wardtype, killtype) to Enum8. See database/clickhouse/schema/README.md (D5).
+#
+# Prereq: ingestion pipeline stopped (./stop_pipeline_safely.sh) — once parsers emit
+# integer codes, inserts into a not-yet-migrated String column would store "1", "2", ...
+# Column types come straight from the parser code tables
+# (app/services/riot_api_client/parsers/models/codes.py) so they cannot drift from
+# the 3xxx schema files. Per column: skip if already migrated, abort if any stored
+# value has no code (extend the code table first), then MODIFY COLUMN synchronously.
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+DB="${DB:-game_data}"
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../.." && pwd)"
+
+# table|column|Enum8 type|SQL tuple of member names
+COLUMNS="$(cd "$REPO_ROOT" && python3 - <<'PY'
+from app.services.riot_api_client.parsers.models.codes import CODED_COLUMNS
+
+for table, columns in CODED_COLUMNS.items():
+    for column, code_table in columns.items():
+        names = ", ".join(f"'{name}'" for name in code_table.names)
+        print(f"{table}|{column}|{code_table.enum8_sql()}|({names})")
+PY
+)"
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --query "$1"
+}
+
+normalize() { tr -d ' \n' <<<"$1"; }
+
+while IFS='|' read -r t col enum_type names; do
+  echo "=== ${t}.${col} -> Enum8 ==="
+
+  current="$(ch "SELECT type FROM system.columns WHERE database = '${DB}' AND table = '${t}' AND name = '${col}'")"
+  if [ "$(normalize "$current")" = "$(normalize "$enum_type")" ]; then
+    echo "  already ${current}; skipping"
+    continue
+  fi
+
+  unknown="$(ch "SELECT groupUniqArray(100)(toString(${col})) FROM ${DB}.${t} WHERE toString(${col}) NOT IN ${names}")"
+  if [ "$unknown" != "[]" ]; then
+    echo "  values missing from the code table: ${unknown}; aborting" >&2
+    exit 1
+  fi
+
+  ch "ALTER TABLE ${DB}.${t} MODIFY COLUMN ${col} ${enum_type} SETTINGS mutations_sync = 2"
+  echo "  converted (was ${current})"
+done <<<"$COLUMNS"
@@ -0,0 +1,61 @@
+#!/usr/bin/env bash
+#
+# D6 migration: turn game_data.matchdata_matchids into an append-only status queue
+# (ReplacingMergeTree(version) with status/version columns). See
+# database/clickhouse/schema/README.md (D6) and RECOVERY_SYSTEM.md.
+#
+# Prereq: ingestion pipeline stopped (./stop_pipeline_safely.sh). The engine
+# version argument cannot be altered in place, so: build a shadow from the 3000
+# schema file, copy every existing row as pending, verify row-count parity, then
+# atomically EXCHANGE. Old data lands in matchdata_matchids__new after the swap
+# and is only dropped when DROP_OLD=1.
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+DB="${DB:-game_data}"
+DROP_OLD="${DROP_OLD:-0}"   # set to 1 to drop the old (post-swap <t>__new) table
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../.." && pwd)"
+SCHEMA_FILE="${REPO_ROOT}/database/clickhouse/schema/3000_matchdata_matchids_schema.sql"
+
+t="matchdata_matchids"
+new="${t}__new"
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --query "$1"
+}
+
+echo "=== ${t} -> ReplacingMergeTree(version) status queue ==="
+
+if [ "$(ch "SELECT count() FROM system.columns WHERE database = '${DB}' AND table = '${t}' AND name = 'status'")" != "0" ]; then
+  echo "  already migrated; skipping"
+  exit 0
+fi
+
+ch "DROP TABLE IF EXISTS ${DB}.${new}"
+ch "$(sed "s/game_data\.${t}/${DB}.${new}/" "$SCHEMA_FILE")"
+
+echo "  copying rows..."
+# Pre-migration rows are pending by definition (finished rows were deleted).
+ch "INSERT INTO ${DB}.${new} (run_id, matchid, status, version) SELECT run_id, matchid, 'pending', 0 FROM ${DB}.${t}"
+
+src="$(ch "SELECT count() FROM ${DB}.${t}")"
+dst="$(ch "SELECT count() FROM ${DB}.${new}")"
+if [ "$src" != "$dst" ]; then
+  echo "  ROW COUNT MISMATCH src=${src} dst=${dst}; aborting (dropping ${new})" >&2
+  ch "DROP TABLE ${DB}.${new}"
+  exit 1
+fi
+echo "  row-count parity ok (${src})"
+
+ch "EXCHANGE TABLES ${DB}.${t} AND ${DB}.${new}"
+echo "  swapped"
+
+if [ "$DROP_OLD" = "1" ]; then
+  ch "DROP TABLE ${DB}.${new}"
+  echo "  dropped old ${new}"
+else
+  echo "  kept old data as ${DB}.${new} (set DROP_OLD=1 to reclaim space)"
+fi
@@ -0,0 +1,61 @@
+#!/usr/bin/env bash
+#
+# D7 migration: add the known-matchids Set (+ feeding materialized view) used by
+# incremental queue seeding. See database/clickhouse/schema/README.md (D7).
+#
+# Prereq: D6 applied and ingestion pipeline stopped (./stop_pipeline_safely.sh).
+# Creates the objects from the 3001 schema file, then backfills the Set with every
+# queued matchid and every legacy completed matchid (present in both info and
+# tl_game_end). If the latest matchids run was already seeded by the old full
+# anti-join, every run in game_data.matchids is recorded as seeded so the first
+# incremental pass does not re-read the history. Safe to re-run (Set dedups).
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../.." && pwd)"
+SCHEMA_FILE="${REPO_ROOT}/database/clickhouse/schema/3001_matchdata_known_matchids_schema.sql"
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --multiquery --query "$1"
+}
+
+echo "=== game_data.matchdata_known_matchids ==="
+ch "$(cat "$SCHEMA_FILE")"
+
+echo "  backfilling queued matchids..."
+ch "INSERT INTO game_data.matchdata_known_matchids SELECT DISTINCT matchid FROM game_data.matchdata_matchids"
+
+echo "  backfilling legacy completed matchids..."
+ch "INSERT INTO game_data.matchdata_known_matchids
+    SELECT DISTINCT matchid
+    FROM game_data.info
+    WHERE matchid != ''
+      AND matchid IN (SELECT matchid FROM game_data.tl_game_end)"
+
+latest_seeded="$(ch "
+  SELECT count()
+  FROM game_data.data_timestamps
+  WHERE name = 'matchdata_seeded_available_matchids_run'
+    AND run_id = (
+      SELECT argMax(run_id, stored_at)
+      FROM game_data.data_timestamps
+      WHERE name = 'matchids_puuids_ts'
+    )")"
+if [ "$latest_seeded" != "0" ]; then
+  ch "INSERT INTO game_data.data_timestamps (name, run_id, stored_at)
+      SELECT 'matchdata_seeded_available_matchids_run', run_id, toUInt32(now())
+      FROM (SELECT DISTINCT run_id FROM game_data.matchids)
+      WHERE run_id NOT IN (
+        SELECT run_id
+        FROM game_data.data_timestamps
+        WHERE name = 'matchdata_seeded_available_matchids_run'
+      )"
+  echo "  recorded existing matchids runs as seeded"
+else
+  echo "  latest matchids run not seeded yet; next seed reads every unseeded run once"
+fi
+
+echo "  known matchids: $(ch "SELECT count() FROM game_data.matchdata_known_matchids")"
@@ -0,0 +1,63 @@
+#!/usr/bin/env bash
+#
+# D8 migration: add MATERIALIZED continent/shuffle_key columns to
+# game_data.matchdata_matchids and re-sort it by (continent, shuffle_key, matchid)
+# so claims read a bounded range per continent. See
+# database/clickhouse/schema/README.md (D8).
+#
+# Prereq: D6 and D7 applied and ingestion pipeline stopped
+# (./stop_pipeline_safely.sh). ORDER BY cannot be changed in place, so: build a
+# shadow from the 3000 schema file (continent/shuffle_key are computed on insert),
+# copy every row with its status/version, verify row-count parity, then atomically
+# EXCHANGE. The known-matchids materialized view reads by table name, so it follows
+# the swap. Old data lands in matchdata_matchids__new and is only dropped when
+# DROP_OLD=1.
+
+set -euo pipefail
+
+CLICKHOUSE_CONTAINER="${CLICKHOUSE_CONTAINER:-clickhouse}"
+DB="${DB:-game_data}"
+DROP_OLD="${DROP_OLD:-0}"   # set to 1 to drop the old (post-swap <t>__new) table
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../.." && pwd)"
+SCHEMA_FILE="${REPO_ROOT}/database/clickhouse/schema/3000_matchdata_matchids_schema.sql"
+
+t="matchdata_matchids"
+new="${t}__new"
+
+ch() {
+  docker exec "$CLICKHOUSE_CONTAINER" clickhouse-client \
+    --connect_timeout=30 --receive_timeout=7200 --send_timeout=7200 \
+    --query "$1"
+}
+
+echo "=== ${t} -> ORDER BY (continent, shuffle_key, matchid) ==="
+
+if [ "$(ch "SELECT count() FROM system.columns WHERE database = '${DB}' AND table = '${t}' AND name = 'shuffle_key'")" != "0" ]; then
+  echo "  already migrated; skipping"
+  exit 0
+fi
+
+ch "DROP TABLE IF EXISTS ${DB}.${new}"
+ch "$(sed "s/game_data\.${t}/${DB}.${new}/" "$SCHEMA_FILE")"
+
+echo "  copying rows..."
+ch "INSERT INTO ${DB}.${new} (run_id, matchid, status, version) SELECT run_id, matchid, status, version FROM ${DB}.${t}"
+
+src="$(ch "SELECT count() FROM ${DB}.${t}")"
+dst="$(ch "SELECT count() FROM ${DB}.${new}")"
+if [ "$src" != "$dst" ]; then
+  echo "  ROW COUNT MISMATCH src=${src} dst=${dst}; aborting (dropping ${new})" >&2
+  ch "DROP TABLE ${DB}.${new}"
+  exit 1
+fi
+echo "  row-count parity ok (${src})"
+
+ch "EXCHANGE TABLES ${DB}.${t} AND ${DB}.${new}"
+echo "  swapped"
+
+if [ "$DROP_OLD" = "1" ]; then
+  ch "DROP TABLE ${DB}.${new}"
+  echo "  dropped old ${new}"
+else
+  echo "  kept old data as ${DB}.${new} (set DROP_OLD=1 to reclaim space)"
+fi
@@ -0,0 +1,381 @@
+"""Dependency-ordered, cached runs of the derived ``*_build.sql`` files.
+
+Each build file is parsed for the tables it writes (``INSERT INTO``,
+``TRUNCATE``, ``CREATE``/``DROP``/``ALTER``/``EXCHANGE``, ``SYSTEM RELOAD
+DICTIONARY``) and the qualified ``game_data*`` tables it reads. A dictionary
+reload also reads whatever the ``SOURCE`` of its sibling ``*_dict_schema.sql``
+reads. A build depends on every other selected build that writes a table it
+reads, and on earlier-numbered builds writing the same table. Builds whose
+dependencies are done run concurrently, e.g. every 60xx aggregation once
+6900 has rebuilt the pivot.
+
+A build is skipped when its fingerprint matches the last recorded one. The
+fingerprint covers the SQL text plus the active-part row count and latest part
+modification time of every table it reads and writes. It is recorded in
+``data_timestamps`` (``name = 'build:<file stem>'``, ``run_id`` = fingerprint)
+after a successful run. Input state is taken before the build, so rows landing
+while it runs trigger a rebuild next time. Output state is taken after it, so
+re-running a ``*_schema.sql`` (which empties the output) does too. Schema files
+are not part of the DAG; run them first as in ``commands.md``.
+
+Stages with their own incremental logic are procedure nodes: ``5003_filtered_db``
+runs ``filtered_db.build_filtered_db(mode="auto")`` in place of the full 5001 +
+5003 copy. Its reads, writes and SQL hash come from both the full and the
+incremental files. The pair aggregations 6000, 6004 and 6020-6023 are
+refreshed by ``6901_ml_aggregate_incremental_build`` from the pivot delta.
+
+Builds that run ``SYSTEM STOP MERGES`` stop merges server-wide, so they run
+alone: nothing else is started while one runs, and one waits for the running
+builds to finish. If such a file fails partway, merges are restarted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+from uuid import UUID
+
+from app.api.v1.metrics.telemetry import export_stage_seconds
+from database.clickhouse.client import bind_query_profile, get_client
+from database.clickhouse.operations.filtered_db import (
+    FULL_BUILD_FILES,
+    INCREMENTAL_BUILD_FILES,
+    build_filtered_db,
+)
+from database.clickhouse.operations.sql_files import (
+    SqlFileStats,
+    run_sql_file,
+    split_sql_statements,
+    stops_merges,
+)
+from database.clickhouse.operations.utils import DATA_TIMESTAMPS_TABLE, record_timestamp
+from database.clickhouse.query_tags import query_context
+
+logger = logging.getLogger(__name__)
+
+type BuildStatus = Literal["ran", "skipped", "failed", "blocked"]
+type TableState = dict[str, tuple[int, int]]
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema"
+BUILD_CACHE_PREFIX = "build:"
+BUILD_TELEMETRY_PIPELINE = "clickhouse_build"
+DEFAULT_MAX_WORKERS = 4
+
+FILTERED_DB_BUILD = "5003_filtered_db"
+
+# The standard rebuild of commands.md, from corrected participant stats to the
+# ML prior dictionaries, with the incremental filtered-db build and 6901
+# refresh in place of the full 5001/5003 and 6000/6004/6020-6023 builds.
+# Order here does not matter; the DAG decides it.
+STANDARD_BUILDS = (
+    "3139_participant_stats_corrected_build",
+    "4000_filter_build",
+    FILTERED_DB_BUILD,
+    "5132_participant_item_value_totals_build",
+    "5900_ml_game_split_build",
+    "6900_ml_game_player_pivot_build",
+    "6901_ml_aggregate_incremental_build",
+    "6003_1vx_aggregations_build",
+    "6024_2vx_build_group_aggregations_build",
+    "7004_synergy_1vx_dict_build",
+    "7005_matchup_1v1_dict_build",
+    "7006_synergy_2vx_dict_build",
+    "7010_matchup_1v1_nobuild_dict_build",
+    "7011_matchup_1v1_champ_dict_build",
+    "7012_synergy_2vx_nobuild_dict_build",
+    "7013_synergy_2vx_champ_dict_build",
+    "7014_synergy_2vx_build_group_dict_build",
+)
+
+_TABLE = r"'?(game_data\w*\.\w+)'?"
+_TABLE_RE = re.compile(_TABLE)
+_WRITE_RES = (
+    re.compile(
+        r"\b(?:INSERT\s+INTO|TRUNCATE\s+TABLE|ALTER\s+TABLE|RELOAD\s+DICTIONARY"
+        r"|CREATE\s+(?:TABLE|DICTIONARY)(?:\s+IF\s+NOT\s+EXISTS)?"
+        r"|DROP\s+(?:TABLE|DICTIONARY)(?:\s+IF\s+EXISTS)?)\s+" + _TABLE,
+        re.IGNORECASE,
+    ),
+    re.compile(r"\bEXCHANGE\s+TABLES\s+" + _TABLE + r"\s+AND\s+" + _TABLE, re.IGNORECASE),
+)
+
+
+@dataclass(frozen=True)
+class BuildSpec:
+    name: str
+    path: Path
+    reads: frozenset[str]
+    writes: frozenset[str]
+    sql_hash: str
+    stops_merges: bool = False
+    # Procedure nodes run this with the schema directory (``path``) instead
+    # of running ``path`` as a SQL file.
+    procedure: Callable[[Path], SqlFileStats] | None = None
+
+
+@dataclass(frozen=True)
+class BuildRun:
+    name: str
+    status: BuildStatus
+    duration_s: float = 0.0
+    read_rows: int = 0
+    read_bytes: int = 0
+    written_rows: int = 0
+    error: str | None = None
+
+
+def _tables(text: str) -> tuple[set[str], set[str]]:
+    sql = "\n".join(split_sql_statements(text))
+    writes: set[str] = set()
+    for pattern in _WRITE_RES:
+        for match in pattern.finditer(sql):
+            writes.update(group for group in match.groups() if group)
+    return set(_TABLE_RE.findall(sql)) - writes, writes
+
+
+def load_build(path: Path) -> BuildSpec:
+    text = path.read_text()
+    reads, writes = _tables(text)
+    dict_schema = path.with_name(path.name.replace("_build.sql", "_schema.sql"))
+    if dict_schema != path and dict_schema.is_file():
+        schema_text = dict_schema.read_text()
+        if re.search(r"\bCREATE\s+DICTIONARY\b", schema_text, re.IGNORECASE):
+            text += schema_text
+            schema_reads, schema_writes = _tables(schema_text)
+            reads |= schema_reads - schema_writes - writes
+    return BuildSpec(
+        name=path.name.removesuffix(".sql"),
+        path=path,
+        reads=frozenset(reads),
+        writes=frozenset(writes),
+        sql_hash=hashlib.sha256(text.encode()).hexdigest(),
+        stops_merges=stops_merges(split_sql_statements(text)),
+    )
+
+
+def _run_filtered_db(schema_dir: Path) -> SqlFileStats:
+    return build_filtered_db("auto", schema_dir=schema_dir).stats
+
+
+# Procedure node -> (the SQL files it may run, entry point).
+PROCEDURE_BUILDS: dict[str, tuple[tuple[str, ...], Callable[[Path], SqlFileStats]]] = {
+    FILTERED_DB_BUILD: (FULL_BUILD_FILES + INCREMENTAL_BUILD_FILES, _run_filtered_db),
+}
+
+
+def load_procedure(name: str, schema_dir: Path = SCHEMA_DIR) -> BuildSpec:
+    files, procedure = PROCEDURE_BUILDS[name]
+    specs = [load_build(schema_dir / file) for file in files]
+    writes = frozenset().union(*(spec.writes for spec in specs))
+    digest = hashlib.sha256()
+    for spec in specs:
+        digest.update(spec.sql_hash.encode())
+    return BuildSpec(
+        name=name,
+        path=schema_dir,
+        reads=frozenset().union(*(spec.reads for spec in specs)) - writes,
+        writes=writes,
+        sql_hash=digest.hexdigest(),
+        stops_merges=any(spec.stops_merges for spec in specs),
+        procedure=procedure,
+    )
+
+
+def load_builds(
+    names: Iterable[str] = STANDARD_BUILDS, *, schema_dir: Path = SCHEMA_DIR
+) -> dict[str, BuildSpec]:
+    specs = {}
+    for name in names:
+        stem = name.removesuffix(".sql")
+        if stem in PROCEDURE_BUILDS:
+            specs[stem] = load_procedure(stem, schema_dir)
+            continue
+        path = schema_dir / f"{stem}.sql"
+        if not path.is_file():
+            raise FileNotFoundError(f"build file not found: {path}")
+        specs[stem] = load_build(path)
+    return specs
+
+
+def build_graph(specs: Mapping[str, BuildSpec]) -> dict[str, set[str]]:
+    """Map each build to the builds it must wait for; raise on a cycle."""
+    writers: dict[str, list[str]] = {}
+    for name in sorted(specs):
+        for table in specs[name].writes:
+            writers.setdefault(table, []).append(name)
+
+    deps: dict[str, set[str]] = {name: set() for name in specs}
+    for name, spec in specs.items():
+        for table in spec.reads:
+            deps[name].update(writers.get(table, ()))
+        for table in spec.writes:
+            deps[name].update(w for w in writers[table] if w < name)
+        deps[name].discard(name)
+
+    plan_levels(deps)
+    return deps
+
+
+def plan_levels(deps: Mapping[str, set[str]]) -> list[list[str]]:
+    """Builds grouped into waves that can run together, in dependency order."""
+    remaining = {name: set(names) for name, names in deps.items()}
+    levels: list[list[str]] = []
+    while remaining:
+        ready = sorted(name for name, names in remaining.items() if not names)
+        if not ready:
+            raise ValueError(f"build dependency cycle among: {sorted(remaining)}")
+        levels.append(ready)
+        for name in ready:
+            del remaining[name]
+        for names in remaining.values():
+            names.difference_update(ready)
+    return levels
+
+
+def _table_state(client, tables: Iterable[str]) -> TableState:
+    tables = sorted(tables)
+    if not tables:
+        return {}
+    rows = client.query(
+        """
+        SELECT
+            concat(database, '.', table) AS name,
+            sum(rows),
+            toUInt32(max(modification_time))
+        FROM system.parts
+        WHERE active
+          AND concat(database, '.', table) IN %(tables)s
+        GROUP BY name
+        """,
+        parameters={"tables": tables},
+    ).result_rows
+    return {name: (int(count), int(modified)) for name, count, modified in rows}
+
+
+def build_fingerprint(spec: BuildSpec, inputs: TableState, outputs: TableState) -> UUID:
+    digest = hashlib.sha256(spec.sql_hash.encode())
+    for label, state in (("in", inputs), ("out", outputs)):
+        for table, (count, modified) in sorted(state.items()):
+            digest.update(f"{label}:{table}:{count}:{modified};".encode())
+    return UUID(bytes=digest.digest()[:16])
+
+
+def load_fingerprints(client=None) -> dict[str, UUID]:
+    client = client or get_client()
+    rows = client.query(
+        f"""
+        SELECT name, argMax(run_id, stored_at)
+        FROM {DATA_TIMESTAMPS_TABLE}
+        WHERE startsWith(name, %(prefix)s)
+        GROUP BY name
+        """,
+        parameters={"prefix": BUILD_CACHE_PREFIX},
+    ).result_rows
+    return {
+        name.removeprefix(BUILD_CACHE_PREFIX): UUID(str(run_id)) for name, run_id in rows
+    }
+
+
+def _execute(spec: BuildSpec, cached: UUID | None, *, force: bool) -> BuildRun:
+    with query_context(stage=f"build.{spec.name}"):
+        client = get_client()
+        inputs = _table_state(client, spec.reads)
+        if not force and cached == build_fingerprint(
+            spec, inputs, _table_state(client, spec.writes)
+        ):
+            logger.info("Build unchanged; skipping build=%s", spec.name)
+            return BuildRun(spec.name, "skipped")
+
+        started = time.perf_counter()
+        if spec.procedure is not None:
+            stats = spec.procedure(spec.path)
+        else:
+            stats = run_sql_file(spec.path, client=client)
+        duration_s = time.perf_counter() - started
+        fingerprint = build_fingerprint(spec, inputs, _table_state(client, spec.writes))
+        record_timestamp(BUILD_CACHE_PREFIX + spec.name, fingerprint, int(time.time()))
+        export_stage_seconds(
+            pipeline=BUILD_TELEMETRY_PIPELINE, stage=spec.name, seconds=duration_s
+        )
+        logger.info(
+            "Build done build=%s duration_s=%.1f read_rows=%d read_bytes=%d written_rows=%d",
+            spec.name,
+            duration_s,
+            stats.read_rows,
+            stats.read_bytes,
+            stats.written_rows,
+        )
+        return BuildRun(
+            spec.name,
+            "ran",
+            duration_s=duration_s,
+            read_rows=stats.read_rows,
+            read_bytes=stats.read_bytes,
+            written_rows=stats.written_rows,
+        )
+
+
+def run_builds(
+    names: Sequence[str] = STANDARD_BUILDS,
+    *,
+    schema_dir: Path = SCHEMA_DIR,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    force: bool = False,
+) -> list[BuildRun]:
+    """Run the selected builds in dependency order, up to ``max_workers`` at once.
+
+    Workers run under the ``heavy`` query profile. A failed build blocks its
+    dependents; unrelated builds still run. Builds that stop merges run alone.
+    Results are returned in completion order.
+    """
+    specs = load_builds(names, schema_dir=schema_dir)
+    pending = build_graph(specs)
+    cached = {} if force else load_fingerprints()
+    results: dict[str, BuildRun] = {}
+    running: dict[Future[BuildRun], str] = {}
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix="build",
+        initializer=bind_query_profile,
+        initargs=("heavy",),
+    ) as pool:
+        while pending or running:
+            for name in sorted(pending):
+                failed = sorted(
+                    dep
+                    for dep in pending[name]
+                    if dep in results and results[dep].status in ("failed", "blocked")
+                )
+                if failed:
+                    results[name] = BuildRun(name, "blocked", error=f"after {failed[0]}")
+                    del pending[name]
+                elif all(dep in results for dep in pending[name]):
+                    if running and (
+                        specs[name].stops_merges
+                        or any(specs[other].stops_merges for other in running.values())
+                    ):
+                        continue
+                    future = pool.submit(
+                        _execute, specs[name], cached.get(name), force=force
+                    )
+                    running[future] = name
+                    del pending[name]
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    logger.exception("Build failed build=%s", name)
+                    results[name] = BuildRun(name, "failed", error=str(exc))
+    return list(results.values())
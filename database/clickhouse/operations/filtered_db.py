@@ -0,0 +1,237 @@
+"""Full or incremental rebuilds of ``game_data_filtered`` (valid ids + participant_stats).
+
+A full build (``5001_valid_game_ids_build.sql`` + ``5003_filtered_tables_build.sql``)
+truncates and recopies every valid match with merges stopped. The incremental
+build (``5003_filtered_tables_incremental_build.sql``) only applies the
+valid-id delta since the previous build, so it is the default once a build has
+been recorded.
+
+Every build records a ``data_timestamps`` watermark: ``name`` is
+``FILTERED_DB_BUILD_NAME``, ``run_id`` is the filter catalogue hash (the
+filter and filtered-table SQL files, folded into a UUID) and ``stored_at`` the
+build time. A missing watermark, or one recorded under a different catalogue
+hash, means the filter or copy definitions changed: the delta would then touch
+most of the pool (or miss a changed copy), so a full build runs instead.
+
+With the game_month layout (D14) ``refresh_filtered_months`` recopies single
+months with ``REPLACE PARTITION``: the id delta cannot see raw rows rewritten in
+place (a reparse or a month repair), and a full build would recopy every month.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+from uuid import UUID
+
+from database.clickhouse.client import get_client
+from database.clickhouse.operations.matchdata import (
+    TOMBSTONE_ALL_STREAMS,
+    TOMBSTONE_TABLE,
+)
+from database.clickhouse.operations.partitions import (
+    GAME_MONTH_COLUMN,
+    is_partitioned,
+    replace_game_month,
+    validate_game_month,
+)
+from database.clickhouse.operations.sql_files import SqlFileStats, run_sql_file
+from database.clickhouse.operations.utils import DATA_TIMESTAMPS_TABLE, record_timestamp
+
+logger = logging.getLogger(__name__)
+
+type BuildMode = Literal["auto", "full", "incremental"]
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schema"
+FILTERED_DB_BUILD_NAME = "filtered_db_build"
+VALID_GAME_IDS_DELTA_TABLE = "game_data_filtered.valid_game_ids_delta"
+
+# Files whose contents define which matches are valid, the filtered tables'
+# layout and how rows are copied, on either path. Editing any of them changes
+# the catalogue hash and forces a full build.
+FILTER_CATALOGUE_FILES = (
+    "4000_filter_build.sql",
+    "5000_create_filtered_db_schema.sql",
+    "5001_valid_game_ids_schema.sql",
+    "5001_valid_game_ids_build.sql",
+    "5003_filtered_tables_build.sql",
+    "5003_filtered_tables_incremental_build.sql",
+)
+# Filtered copy -> raw source, refreshed per month by refresh_filtered_months().
+FILTERED_MONTH_TABLES = {
+    "game_data_filtered.participant_stats": "game_data.participant_stats",
+}
+# Tombstone stream of those raw sources (all from the non-timeline parser).
+FILTERED_SOURCE_STREAM = "non_timeline"
+VALID_GAME_IDS_TABLE = "game_data_filtered.valid_game_ids"
+FULL_BUILD_FILES = ("5001_valid_game_ids_build.sql", "5003_filtered_tables_build.sql")
+INCREMENTAL_BUILD_FILES = ("5003_filtered_tables_incremental_build.sql",)
+
+
+@dataclass(frozen=True)
+class FilteredBuildWatermark:
+    catalogue_hash: UUID
+    stored_at: int
+
+
+@dataclass(frozen=True)
+class FilteredBuildResult:
+    mode: Literal["full", "incremental"]
+    catalogue_hash: UUID
+    added: int | None = None
+    removed: int | None = None
+    stats: SqlFileStats = field(default_factory=SqlFileStats)
+
+
+def filter_catalogue_hash(schema_dir: Path = SCHEMA_DIR) -> UUID:
+    digest = hashlib.sha256()
+    for name in FILTER_CATALOGUE_FILES:
+        digest.update(name.encode())
+        digest.update(b"\0")
+        digest.update((schema_dir / name).read_bytes())
+    return UUID(bytes=digest.digest()[:16])
+
+
+def load_watermark(client=None) -> FilteredBuildWatermark | None:
+    client = client or get_client()
+    rows = client.query(
+        f"""
+        SELECT argMax(run_id, stored_at), max(stored_at)
+        FROM {DATA_TIMESTAMPS_TABLE}
+        WHERE name = %(name)s
+        HAVING count() > 0
+        """,
+        parameters={"name": FILTERED_DB_BUILD_NAME},
+    ).result_rows
+    if not rows:
+        return None
+    run_id, stored_at = rows[0]
+    return FilteredBuildWatermark(UUID(str(run_id)), int(stored_at))
+
+
+def resolve_mode(
+    requested: BuildMode,
+    watermark: FilteredBuildWatermark | None,
+    catalogue_hash: UUID,
+) -> Literal["full", "incremental"]:
+    unchanged = watermark is not None and watermark.catalogue_hash == catalogue_hash
+    if requested == "incremental" and not unchanged:
+        raise ValueError(
+            "incremental filtered-db build needs a watermark for the current filter "
+            "catalogue; run a full build first"
+        )
+    if requested == "auto":
+        return "incremental" if unchanged else "full"
+    return requested
+
+
+def _delta_counts(client) -> tuple[int, int]:
+    rows = client.query(
+        f"""
+        SELECT countIf(sign > 0), countIf(sign < 0)
+        FROM {VALID_GAME_IDS_DELTA_TABLE}
+        """
+    ).result_rows
+    added, removed = rows[0] if rows else (0, 0)
+    return int(added), int(removed)
+
+
+def _run_files(client, schema_dir: Path, names: Sequence[str]) -> SqlFileStats:
+    stats = SqlFileStats()
+    for name in names:
+        logger.info("Running filtered-db build file=%s", name)
+        stats.merge(run_sql_file(schema_dir / name, client=client))
+    return stats
+
+
+def build_filtered_db(
+    mode: BuildMode = "auto", *, schema_dir: Path = SCHEMA_DIR
+) -> FilteredBuildResult:
+    """Bring valid_game_ids and participant_stats up to date with the filter stage.
+
+    Run after ``4000_filter_build.sql``. ``auto`` picks an incremental build
+    when the last watermark carries the current catalogue hash, else a full one.
+    """
+    client = get_client()
+    catalogue_hash = filter_catalogue_hash(schema_dir)
+    watermark = load_watermark(client)
+    resolved = resolve_mode(mode, watermark, catalogue_hash)
+    if resolved == "full":
+        if watermark is not None and watermark.catalogue_hash != catalogue_hash:
+            logger.info(
+                "Filter catalogue changed previous=%s current=%s; full rebuild",
+                watermark.catalogue_hash,
+                catalogue_hash,
+            )
+        # run_sql_file restarts merges if 5003 fails after stopping them.
+        stats = _run_files(client, schema_dir, FULL_BUILD_FILES)
+        result = FilteredBuildResult("full", catalogue_hash, stats=stats)
+    else:
+        stats = _run_files(client, schema_dir, INCREMENTAL_BUILD_FILES)
+        added, removed = _delta_counts(client)
+        result = FilteredBuildResult(
+            "incremental", catalogue_hash, added, removed, stats=stats
+        )
+
+    record_timestamp(FILTERED_DB_BUILD_NAME, catalogue_hash, int(time.time()))
+    logger.info(
+        "Filtered-db build done mode=%s catalogue=%s added=%s removed=%s",
+        result.mode,
+        catalogue_hash,
+        result.added,
+        result.removed,
+    )
+    return result
+
+
+def refresh_filtered_months(months: Sequence[int]) -> dict[str, int]:
+    """Recopy the valid rows of ``months`` into the filtered tables, one partition each.
+
+    Every month is built in a scratch copy of the target and swapped in with
+    ``REPLACE PARTITION``, so readers never see it half-filled. Uses the current
+    ``valid_game_ids`` and, like 5003, skips rows of tombstoned runs; run after a
+    filtered-db build. Returns rows per target.
+    """
+    client = get_client()
+    for target in FILTERED_MONTH_TABLES:
+        if not is_partitioned(client, target):
+            raise ValueError(
+                f"{target} is not partitioned by {GAME_MONTH_COLUMN}; "
+                "apply the D14 migration first"
+            )
+    copied: dict[str, int] = {}
+    for target, source in FILTERED_MONTH_TABLES.items():
+        scratch = f"{target}__month"
+        copied[target] = 0
+        for month in map(validate_game_month, months):
+            client.command(f"DROP TABLE IF EXISTS {scratch}")
+            client.command(f"CREATE TABLE {scratch} AS {target}")
+            try:
+                client.command(
+                    f"""
+                    INSERT INTO {scratch}
+                    SELECT t.*
+                    FROM {source} AS t
+                    WHERE t.{GAME_MONTH_COLUMN} = {month}
+                      AND t.matchid IN (SELECT matchid FROM {VALID_GAME_IDS_TABLE})
+                      AND (t.matchid, t.run_id) NOT IN (
+                        SELECT matchid, run_id
+                        FROM {TOMBSTONE_TABLE}
+                        WHERE stream IN ('{TOMBSTONE_ALL_STREAMS}', '{FILTERED_SOURCE_STREAM}')
+                      )
+                    """
+                )
+                rows = int(client.query(f"SELECT count() FROM {scratch}").result_rows[0][0])
+                replace_game_month(client, source=scratch, target=target, month=month)
+            finally:
+                client.command(f"DROP TABLE IF EXISTS {scratch}")
+            logger.info(
+                "Filtered month refreshed table=%s month=%d rows=%d", target, month, rows
+            )
+            copied[target] += rows
+    return copied
@@ -1,6 +1,7 @@
 import logging
 import time
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping, Sequence
+from uuid import UUID
 
 from database.clickhouse.client import get_client
 from database.clickhouse.operations.utils import dedupe_matchids
@@ -12,6 +13,12 @@ MUTATION_PROGRESS_LOG_INTERVAL_S = 60.0
 NON_TIMELINE_ANCHOR_TABLE = "game_data.info"
 TIMELINE_ANCHOR_TABLE = "game_data.tl_game_end"
 
+# Rows written by (matchid, run_id) for a stream ("all" = both) are void: readers
+# skip them and purge_tombstoned_rows() removes them in one batched pass.
+TOMBSTONE_TABLE = "game_data.matchdata_tombstones"
+TOMBSTONE_ALL_STREAMS = "all"
+TOMBSTONE_COLUMNS = ("matchid", "run_id", "stream")
+
 
 def _split_table_name(table: str) -> tuple[str, str]:
     parts = table.split(".", 1)
@@ -34,36 +41,111 @@ def _latest_mutation_sequence(client, *, database: str, table: str) -> int:
     return int(value or 0)
 
 
-def _has_matching_rows(client, *, table: str, match_ids: list[str]) -> bool:
-    rows = client.query(
-        f"""
+def _has_matching_rows_sql(table: str) -> str:
+    return f"""
         SELECT 1
         FROM {table}
-        WHERE has(%(match_ids)s, matchid)
+        WHERE matchid IN %(match_ids)s
         LIMIT 1
-        """,
+    """
+
+
+def _has_matching_rows(client, *, table: str, match_ids: list[str]) -> bool:
+    rows = client.query(
+        _has_matching_rows_sql(table),
         parameters={"match_ids": match_ids},
     ).result_rows
     return bool(rows)
 
 
-def _load_matching_matchids(client, *, table: str, match_ids: list[str]) -> set[str]:
-    rows = client.query(
-        f"""
+def _live_rows_clause(stream: str) -> str:
+    return f"""(matchid, run_id) NOT IN (
+            SELECT matchid, run_id
+            FROM {TOMBSTONE_TABLE}
+            WHERE matchid IN %(match_ids)s
+              AND stream IN ('{TOMBSTONE_ALL_STREAMS}', '{stream}')
+        )"""
+
+
+def _matching_matchids_sql(table: str, stream: str | None) -> str:
+    live = "" if stream is None else f"AND {_live_rows_clause(stream)}"
+    return f"""
         SELECT DISTINCT matchid
         FROM {table}
         WHERE matchid IN %(match_ids)s
-        """,
+          {live}
+    """
+
+
+def _matchid_runs_sql(table: str, stream: str) -> str:
+    return f"""
+        SELECT DISTINCT matchid, run_id
+        FROM {table}
+        WHERE matchid IN %(match_ids)s
+          AND {_live_rows_clause(stream)}
+    """
+
+
+def _load_matching_matchids(
+    client,
+    *,
+    table: str,
+    match_ids: list[str],
+    stream: str | None = None,
+) -> set[str]:
+    rows = client.query(
+        _matching_matchids_sql(table, stream),
         parameters={"match_ids": match_ids},
     ).result_rows
     return {row[0] for row in rows}
 
 
-def load_table_matchids(table: str, match_ids: Iterable[str]) -> set[str]:
+def load_table_matchids(
+    table: str,
+    match_ids: Iterable[str],
+    *,
+    stream: str | None = None,
+) -> set[str]:
+    """Match ids with rows in ``table``; with ``stream``, tombstoned rows are skipped."""
     ids = dedupe_matchids(match_ids)
     if not ids:
         return set()
-    return _load_matching_matchids(get_client(), table=table, match_ids=ids)
+    return _load_matching_matchids(get_client(), table=table, match_ids=ids, stream=stream)
+
+
+def load_table_matchid_runs(
+    table: str,
+    match_ids: Iterable[str],
+    *,
+    stream: str,
+) -> list[tuple[str, UUID]]:
+    """Live (matchid, run_id) writers of ``table`` for ``match_ids``."""
+    ids = dedupe_matchids(match_ids)
+    if not ids:
+        return []
+    rows = get_client().query(
+        _matchid_runs_sql(table, stream),
+        parameters={"match_ids": ids},
+    ).result_rows
+    return [(row[0], row[1]) for row in rows]
+
+
+def load_stream_matchid_runs(
+    tables: Sequence[str],
+    match_ids: Iterable[str],
+    *,
+    stream: str,
+) -> list[tuple[str, UUID]]:
+    """Live (matchid, run_id) writers of any of ``tables``, in one query."""
+    ids = dedupe_matchids(match_ids)
+    if not tables or not ids:
+        return []
+    union = "\nUNION DISTINCT\n".join(_matchid_runs_sql(table, stream) for table in tables)
+    rows = get_client().query(
+        f"SELECT matchid, run_id FROM ({union}) ORDER BY matchid, run_id",
+        parameters={"match_ids": ids},
+    ).result_rows
+    return [(row[0], row[1]) for row in rows]
 
 
 def load_stream_anchor_matchids(match_ids: Iterable[str]) -> tuple[set[str], set[str]]:
@@ -72,11 +154,21 @@ def load_stream_anchor_matchids(match_ids: Iterable[str]) -> tuple[set[str], set
         return set(), set()
 
     return (
-        load_table_matchids(NON_TIMELINE_ANCHOR_TABLE, ids),
-        load_table_matchids(TIMELINE_ANCHOR_TABLE, ids),
+        load_table_matchids(NON_TIMELINE_ANCHOR_TABLE, ids, stream="non_timeline"),
+        load_table_matchids(TIMELINE_ANCHOR_TABLE, ids, stream="timeline"),
     )
 
 
+def tombstone_matchid_runs(rows: Iterable[tuple[str, UUID]], *, stream: str) -> int:
+    """Void the rows each (matchid, run_id) wrote for ``stream``: one small insert."""
+    data = [(matchid, run_id, stream) for matchid, run_id in dict.fromkeys(rows)]
+    if not data:
+        return 0
+    get_client().insert(TOMBSTONE_TABLE, data, column_names=TOMBSTONE_COLUMNS)
+    logger.debug("Tombstoned matchdata rows stream=%s pairs=%d", stream, len(data))
+    return len(data)
+
+
 def _wait_for_mutations_after(
     client,
     *,
@@ -157,7 +249,7 @@ def delete_by_matchids(
         f"""
         ALTER TABLE {table}
         DELETE
-        WHERE has(%(match_ids)s, matchid)
+        WHERE matchid IN %(match_ids)s
         SETTINGS mutations_sync = 0
         """,
         parameters={"match_ids": ids},
@@ -168,3 +260,97 @@ def delete_by_matchids(
         table=table_name,
         after_sequence=after_sequence,
     )
+
+
+def purge_tombstoned_rows(
+    tables_by_stream: Mapping[str, Sequence[str]],
+    *,
+    apply: bool = True,
+) -> dict[str, int]:
+    """Physically delete tombstoned rows: one mutation per table that has any.
+
+    Tombstones are snapshotted below a server-clock cutoff, so ones written while
+    the pass runs are kept for the next pass. The mutations select the
+    ``(matchid, run_id)`` pairs from the tombstone table itself rather than
+    inlining them, so the statement stays small however many runs were
+    tombstoned. Returns matching rows per table.
+    """
+    client = get_client()
+    cutoff = int(client.query("SELECT toUInt32(now()) - 1").result_rows[0][0])
+    tombstones_by_stream = dict(
+        client.query(
+            f"""
+            SELECT stream, count()
+            FROM {TOMBSTONE_TABLE}
+            WHERE tombstoned_at <= toDateTime(%(cutoff)s)
+            GROUP BY stream
+            """,
+            parameters={"cutoff": cutoff},
+        ).result_rows
+    )
+    if not tombstones_by_stream:
+        return {}
+
+    where = f"""
+        (matchid, run_id) IN (
+            SELECT matchid, run_id
+            FROM {TOMBSTONE_TABLE}
+            WHERE tombstoned_at <= toDateTime(%(cutoff)s)
+              AND stream IN ('{TOMBSTONE_ALL_STREAMS}', %(stream)s)
+        )
+    """
+    counts: dict[str, int] = {}
+    for stream, tables in tables_by_stream.items():
+        if not (
+            tombstones_by_stream.get(TOMBSTONE_ALL_STREAMS)
+            or tombstones_by_stream.get(stream)
+        ):
+            continue
+        parameters = {"cutoff": cutoff, "stream": stream}
+        for table in tables:
+            rows = client.query(
+                f"SELECT count() FROM {table} WHERE {where}",
+                parameters=parameters,
+            ).result_rows
+            counts[table] = int(rows[0][0]) if rows else 0
+            if not apply or not counts[table]:
+                continue
+
+            database, table_name = _split_table_name(table)
+            after_sequence = _latest_mutation_sequence(
+                client, database=database, table=table_name
+            )
+            client.command(
+                f"""
+                ALTER TABLE {table}
+                DELETE
+                WHERE {where}
+                SETTINGS mutations_sync = 0
+                """,
+                parameters=parameters,
+            )
+            _wait_for_mutations_after(
+                client,
+                database=database,
+                table=table_name,
+                after_sequence=after_sequence,
+            )
+
+    if apply:
+        client.command(
+            f"""
+            ALTER TABLE {TOMBSTONE_TABLE}
+            DELETE
+            WHERE tombstoned_at <= toDateTime(%(cutoff)s)
+            SETTINGS mutations_sync = 2
+            """,
+            parameters={"cutoff": cutoff},
+        )
+    logger.info(
+        "Purged tombstoned matchdata tombstones=%d tables=%d rows=%d apply=%s",
+        sum(tombstones_by_stream.values()),
+        sum(1 for count in counts.values() if count),
+        sum(counts.values()),
+        apply,
+    )
+    return counts
@@ -1,18 +1,19 @@
-import asyncio
 import logging
 from collections.abc import AsyncIterator, Iterable
 from uuid import UUID
 
-from database.clickhouse.client import get_client
+from database.clickhouse.client import get_client, run_clickhouse
 from database.clickhouse.operations.utils import (
+    DATA_TIMESTAMPS_TABLE,
     _as_text,
     delete_timestamp_for_run,
-    delete_timestamps_except_run,
     insert_rows_in_batches,
     record_timestamp,
 )
 
 PUUID_DATA_TIMESTAMP_NAME = "matchids_puuids_ts"
+# Recorded by the matchdata queue seed for every matchids run it has read.
+MATCHDATA_AVAILABLE_SEEDED_NAME = "matchdata_seeded_available_matchids_run"
 MATCHIDS_INSERT_BATCH_SIZE = 20_000
 logger = logging.getLogger(__name__)
 
@@ -47,10 +48,10 @@ async def insert_matchids_stream_in_batches(
             if len(batch) >= batch_size:
                 rows = batch
                 batch = []
-                await asyncio.to_thread(_insert_matchids_rows, rows)
+                await run_clickhouse(_insert_matchids_rows, rows)
 
     if batch:
-        await asyncio.to_thread(_insert_matchids_rows, batch)
+        await run_clickhouse(_insert_matchids_rows, batch)
 
 
 def load_matchid_puuid_ts() -> int:
@@ -95,8 +96,27 @@ def delete_failed_puuid_timestamp(run_id: UUID) -> None:
 
 
 def delete_old_puuid_timestamps(run_id: UUID) -> None:
-    delete_timestamps_except_run(PUUID_DATA_TIMESTAMP_NAME, run_id)
-    logger.debug("Deleted old puuid timestamps excluding run_id=%s", run_id)
+    # The matchdata seed finds unseeded runs by these watermarks, so an older
+    # run's row is only deleted once the seed has recorded it.
+    get_client().command(
+        f"""
+        ALTER TABLE {DATA_TIMESTAMPS_TABLE}
+        DELETE
+        WHERE name = %(name)s
+          AND run_id != %(run_id)s
+          AND run_id IN (
+              SELECT run_id
+              FROM {DATA_TIMESTAMPS_TABLE}
+              WHERE name = %(seeded_name)s
+          )
+        """,
+        parameters={
+            "name": PUUID_DATA_TIMESTAMP_NAME,
+            "run_id": run_id,
+            "seeded_name": MATCHDATA_AVAILABLE_SEEDED_NAME,
+        },
+    )
+    logger.debug("Deleted old seeded puuid timestamps excluding run_id=%s", run_id)
 
 
 def delete_matchid_puuids(run_id: UUID) -> None:
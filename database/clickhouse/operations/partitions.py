@@ -0,0 +1,106 @@
+"""Game-month partitions of the raw matchdata tables (D14).
+
+With the partitioned layout every raw ``game_data`` row carries
+``game_month UInt32`` (``YYYYMM`` of ``info.gamecreation``, UTC), stamped by the
+saver at parse time, and the tables are ``PARTITION BY game_month``. Retention,
+repairs and season-scoped rebuilds then drop, copy or replace whole partitions
+instead of rewriting every part of every table.
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from database.clickhouse.client import get_client
+from database.clickhouse.operations.matchdata import (
+    NON_TIMELINE_ANCHOR_TABLE,
+    _split_table_name,
+)
+from database.clickhouse.operations.utils import dedupe_matchids
+
+logger = logging.getLogger(__name__)
+
+GAME_MONTH_COLUMN = "game_month"
+# Unknown game start (no info row to date the match); kept in its own partition.
+UNKNOWN_GAME_MONTH = 0
+# SQL twin of game_month(), for backfills from game_data.info.
+GAME_MONTH_SQL = "toUInt32(toYYYYMM(toDateTime(intDiv(gamecreation, 1000), 'UTC')))"
+
+
+def game_month(epoch_ms: int) -> int:
+    """``YYYYMM`` (UTC) of a Riot epoch-ms timestamp; 0 when unknown."""
+    if epoch_ms <= 0:
+        return UNKNOWN_GAME_MONTH
+    moment = datetime.fromtimestamp(epoch_ms / 1000, tz=UTC)
+    return moment.year * 100 + moment.month
+
+
+def validate_game_month(value: int) -> int:
+    """Reject anything that is not a ``YYYYMM`` partition id before it reaches SQL."""
+    year, month = divmod(int(value), 100)
+    if value != UNKNOWN_GAME_MONTH and not (2009 <= year <= 9999 and 1 <= month <= 12):
+        raise ValueError(f"Expected a YYYYMM game month, got {value!r}")
+    return int(value)
+
+
+def load_game_months(match_ids: Iterable[str]) -> dict[str, int]:
+    """Game month of matches whose ``info`` row is already stored."""
+    ids = dedupe_matchids(match_ids)
+    if not ids:
+        return {}
+    rows = get_client().query(
+        f"""
+        SELECT matchid, any({GAME_MONTH_SQL})
+        FROM {NON_TIMELINE_ANCHOR_TABLE}
+        WHERE matchid IN %(match_ids)s
+        GROUP BY matchid
+        """,
+        parameters={"match_ids": ids},
+    ).result_rows
+    return {row[0]: int(row[1]) for row in rows}
+
+
+def is_partitioned(client, table: str) -> bool:
+    database, name = _split_table_name(table)
+    rows = client.query(
+        """
+        SELECT partition_key
+        FROM system.tables
+        WHERE database = %(database)s AND name = %(name)s
+        """,
+        parameters={"database": database, "name": name},
+    ).result_rows
+    return bool(rows) and rows[0][0] == GAME_MONTH_COLUMN
+
+
+def load_partition_months(client, table: str) -> list[int]:
+    """Game months with active parts in ``table``, oldest first."""
+    database, name = _split_table_name(table)
+    rows = client.query(
+        """
+        SELECT DISTINCT toUInt32(partition)
+        FROM system.parts
+        WHERE database = %(database)s AND table = %(name)s AND active
+        ORDER BY 1
+        """,
+        parameters={"database": database, "name": name},
+    ).result_rows
+    return [int(row[0]) for row in rows]
+
+
+def drop_game_month(client, table: str, month: int) -> None:
+    client.command(f"ALTER TABLE {table} DROP PARTITION {validate_game_month(month)}")
+
+
+def copy_game_month(client, *, source: str, target: str, month: int) -> None:
+    """Hard-link one partition of ``source`` into ``target`` (same structure and key)."""
+    client.command(
+        f"ALTER TABLE {target} ATTACH PARTITION {validate_game_month(month)} FROM {source}"
+    )
+
+
+def replace_game_month(client, *, source: str, target: str, month: int) -> None:
+    """Swap ``target``'s partition for ``source``'s in one metadata operation."""
+    client.command(
+        f"ALTER TABLE {target} REPLACE PARTITION {validate_game_month(month)} FROM {source}"
+    )
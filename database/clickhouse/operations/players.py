@@ -1,15 +1,14 @@
 import time
-import asyncio
 import logging
 from typing import NamedTuple
 from collections.abc import AsyncIterator
 from uuid import UUID
 from app.models.riot.league import MinifiedLeagueEntryDTO
-from database.clickhouse.client import get_client
+from database.clickhouse.client import get_client, run_clickhouse
 from database.clickhouse.operations.utils import (
-    _as_text,
     delete_timestamp_for_run,
     delete_timestamps_except_run,
+    read_columns,
     record_timestamp,
 )
 
@@ -38,6 +37,9 @@ class PlayerKeyRow(NamedTuple):
     region: str
 
 
+PLAYER_KEY_SCHEMA = dict.fromkeys(PlayerKeyRow._fields, object)
+
+
 def _insert_rows(rows: list[tuple]) -> None:
     if not rows:
         return
@@ -57,7 +59,6 @@ async def insert_players_stream_in_batches(
     batch_size: int = PLAYERS_INSERT_BATCH_SIZE,
     flush_interval_s: float = 5.0,
 ) -> None:
-    loop = asyncio.get_running_loop()
     batch: list[tuple] = []
     last_flush = time.monotonic()
 
@@ -82,11 +83,11 @@ async def insert_players_stream_in_batches(
         ):
             rows = batch
             batch = []
-            await loop.run_in_executor(None, _insert_rows, rows)
+            await run_clickhouse(_insert_rows, rows)
             last_flush = time.monotonic()
 
     if batch:
-        await loop.run_in_executor(None, _insert_rows, batch)
+        await run_clickhouse(_insert_rows, batch)
 
 
 def delete_partial_players_run(run_id: UUID) -> None:
@@ -126,16 +127,13 @@ def load_players() -> list[PlayerKeyRow]:
     WHERE run_id = (SELECT run_id FROM latest)
     """
 
-    result = get_client().query(
+    columns = read_columns(
         query,
+        PLAYER_KEY_SCHEMA,
         parameters={"timestamp_name": PLAYERS_SNAPSHOT_TIMESTAMP_NAME},
+        client=get_client(),
     )
 
-    return [
-        PlayerKeyRow(
-            puuid=_as_text(row[0]),
-            queue_type=_as_text(row[1]),
-            region=_as_text(row[2]),
-        )
-        for row in result.result_rows
-    ]
+    return list(
+        map(PlayerKeyRow._make, zip(*(columns[name] for name in PLAYER_KEY_SCHEMA)))
+    )
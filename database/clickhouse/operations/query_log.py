@@ -0,0 +1,116 @@
+"""Per-stage query accounting from ``system.query_log``.
+
+Queries are tagged with a JSON ``log_comment`` (``app``, ``stage`` and, when
+known, ``run_id`` / ``batch``) by ``get_client`` and ``tagged_settings`` (see
+``database.clickhouse.query_tags``). ``collect_query_stats`` joins the log back
+to those tags and sums rows, bytes, peak memory and duration per stage, run and
+batch.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from app.api.v1.metrics.telemetry import export_query_stats
+from database.clickhouse.client import get_client
+from database.clickhouse.query_tags import QUERY_LOG_APP
+
+QUERY_LOG_TABLE = "system.query_log"
+
+
+@dataclass(frozen=True)
+class StageQueryStats:
+    stage: str
+    run_id: str
+    batch: str
+    queries: int
+    failed: int
+    read_rows: int
+    read_bytes: int
+    written_rows: int
+    peak_memory_bytes: int
+    duration_ms: int
+
+
+def collect_query_stats(
+    since: datetime,
+    until: datetime | None = None,
+    *,
+    client=None,
+    flush: bool = True,
+) -> list[StageQueryStats]:
+    """Tagged queries that ended in ``[since, until)``, summed per stage/run/batch.
+
+    ``flush`` writes the server's buffered log entries first (SYSTEM FLUSH
+    LOGS); without it the last few seconds may be missing.
+    """
+    client = client or get_client()
+    if flush:
+        client.command("SYSTEM FLUSH LOGS")
+    rows = client.query(
+        f"""
+        SELECT
+            JSONExtractString(log_comment, 'stage') AS stage,
+            JSONExtractString(log_comment, 'run_id') AS run_id,
+            JSONExtractString(log_comment, 'batch') AS batch,
+            count() AS queries,
+            countIf(type != 'QueryFinish') AS failed,
+            sum(read_rows),
+            sum(read_bytes),
+            sum(written_rows),
+            max(memory_usage),
+            sum(query_duration_ms)
+        FROM {QUERY_LOG_TABLE}
+        WHERE event_time >= toDateTime(%(since)s)
+          AND event_time < toDateTime(%(until)s)
+          AND type IN ('QueryFinish', 'ExceptionWhileProcessing')
+          AND isValidJSON(log_comment)
+          AND JSONExtractString(log_comment, 'app') = %(app)s
+        GROUP BY stage, run_id, batch
+        ORDER BY stage, run_id, batch
+        """,
+        parameters={
+            "since": int(since.timestamp()),
+            "until": int((until or datetime.now(since.tzinfo)).timestamp()),
+            "app": QUERY_LOG_APP,
+        },
+    ).result_rows
+    return [
+        StageQueryStats(str(row[0]), str(row[1]), str(row[2]), *map(int, row[3:]))
+        for row in rows
+    ]
+
+
+def export_stage_stats(stats: list[StageQueryStats]) -> None:
+    """Add the groups to the ``clickhouse_query_*`` Prometheus series by stage."""
+    by_stage: dict[str, list[StageQueryStats]] = {}
+    for row in stats:
+        by_stage.setdefault(row.stage, []).append(row)
+    for stage, rows in by_stage.items():
+        export_query_stats(
+            stage=stage,
+            queries=sum(row.queries for row in rows),
+            failed=sum(row.failed for row in rows),
+            read_rows=sum(row.read_rows for row in rows),
+            read_bytes=sum(row.read_bytes for row in rows),
+            peak_memory_bytes=max(row.peak_memory_bytes for row in rows),
+            seconds=sum(row.duration_ms for row in rows) / 1000,
+        )
+
+
+def write_report(
+    path: Path,
+    stats: list[StageQueryStats],
+    *,
+    since: datetime,
+    until: datetime,
+) -> None:
+    """Append one JSON line per group, stamped with the collection window."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    window = {"since": since.isoformat(), "until": until.isoformat()}
+    with path.open("a") as handle:
+        for row in stats:
+            handle.write(json.dumps({**window, **asdict(row)}) + "\n")
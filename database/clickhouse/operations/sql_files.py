@@ -0,0 +1,77 @@
+"""Run ``--multiquery`` schema/build files statement by statement over HTTP."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from database.clickhouse.client import get_client
+
+_SET_RE = re.compile(r"^SET\s+(\w+)\s*=\s*(.+)$", re.IGNORECASE | re.DOTALL)
+_STOP_MERGES_RE = re.compile(r"^SYSTEM\s+STOP\s+MERGES\b", re.IGNORECASE)
+
+
+def split_sql_statements(text: str) -> list[str]:
+    """Statements of a ``--multiquery`` file, without full-line comments."""
+    lines = [line for line in text.splitlines() if not line.lstrip().startswith("--")]
+    return [
+        statement.strip()
+        for statement in re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+        if statement.strip()
+    ]
+
+
+def stops_merges(statements: Iterable[str]) -> bool:
+    """Whether any statement is a server-wide ``SYSTEM STOP MERGES``."""
+    return any(_STOP_MERGES_RE.match(statement) for statement in statements)
+
+
+@dataclass
+class SqlFileStats:
+    read_rows: int = 0
+    read_bytes: int = 0
+    written_rows: int = 0
+    written_bytes: int = 0
+
+    def add(self, summary: Mapping[str, Any]) -> None:
+        self.read_rows += int(summary.get("read_rows", 0))
+        self.read_bytes += int(summary.get("read_bytes", 0))
+        self.written_rows += int(summary.get("written_rows", 0))
+        self.written_bytes += int(summary.get("written_bytes", 0))
+
+    def merge(self, other: SqlFileStats) -> None:
+        self.read_rows += other.read_rows
+        self.read_bytes += other.read_bytes
+        self.written_rows += other.written_rows
+        self.written_bytes += other.written_bytes
+
+
+def run_sql_file(path: Path, *, client=None) -> SqlFileStats:
+    """Run a schema/build file statement by statement over HTTP.
+
+    The client does not use sessions, so ``SET name = value`` statements are
+    folded into the settings of every later statement instead of being sent.
+    Returns the summed query summaries (rows/bytes read and written). If a
+    statement fails after ``SYSTEM STOP MERGES``, merges are started again
+    before the error propagates.
+    """
+    client = client or get_client()
+    query_settings: dict[str, Any] = {}
+    stats = SqlFileStats()
+    merges_stopped = False
+    try:
+        for statement in split_sql_statements(path.read_text()):
+            if match := _SET_RE.match(statement):
+                query_settings[match.group(1)] = match.group(2).strip().strip("'")
+                continue
+            merges_stopped = merges_stopped or stops_merges([statement])
+            result = client.command(statement, settings=dict(query_settings) or None)
+            stats.add(getattr(result, "summary", None) or {})
+    except Exception:
+        if merges_stopped:
+            client.command("SYSTEM START MERGES")
+        raise
+    return stats
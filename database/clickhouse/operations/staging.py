@@ -0,0 +1,194 @@
+"""Per-batch staging of matchdata rows (D10).
+
+In staging mode a claimed batch inserts into ``game_data_staging.<table>``
+(partitioned by ``run_id``) instead of ``game_data``. Once the batch resolves,
+``commit_staged_batch`` records the outcome in ``matchdata_promotions``, copies
+complete matches into ``game_data`` with one ``INSERT ... SELECT`` per table,
+marks the queue and drops the batch's partitions. Every step is idempotent —
+promotions carry an ``insert_deduplication_token`` per (run_id, table) — so a
+retry, or ``recover_staged_batches`` after a crash, can replay the whole commit.
+"""
+
+import logging
+from collections.abc import Collection, Iterable, Sequence
+from uuid import UUID
+
+from database.clickhouse.client import get_client
+from database.clickhouse.operations.matchdata import (
+    _split_table_name,
+    delete_by_matchids,
+)
+from database.clickhouse.operations.utils import dedupe_matchids
+from database.clickhouse.operations.work_state import mark_matchids_finished
+
+logger = logging.getLogger(__name__)
+
+STAGING_DATABASE = "game_data_staging"
+PROMOTIONS_TABLE = f"{STAGING_DATABASE}.matchdata_promotions"
+PROMOTION_COLUMNS = ("run_id", "matchid", "promote")
+SOURCE_MATCHIDS_TABLE = "game_data.matchids"
+# The dedup token is suffixed per inserted block, so a replay only dedups if it
+# cuts the same blocks. Read on one thread and squash up to this many rows into
+# a block (no byte threshold): a batch's rows of one table become one block.
+PROMOTE_BLOCK_ROWS = 4_194_304
+PROMOTE_SETTINGS = {
+    "max_threads": 1,
+    "max_insert_threads": 1,
+    "max_insert_block_size": PROMOTE_BLOCK_ROWS,
+    "min_insert_block_size_rows": PROMOTE_BLOCK_ROWS,
+    "min_insert_block_size_bytes": 0,
+}
+
+
+def staging_table(table: str) -> str:
+    _, table_name = _split_table_name(table)
+    return f"{STAGING_DATABASE}.{table_name}"
+
+
+def _dedup_token(run_id: UUID, table: str) -> str:
+    return f"matchdata:{run_id}:{table}"
+
+
+def _drop_run_partition(client, table: str, run_id: UUID) -> None:
+    client.command(
+        f"ALTER TABLE {table} DROP PARTITION toUUID(%(run_id)s)",
+        parameters={"run_id": str(run_id)},
+    )
+
+
+def _record_promotion(
+    client,
+    run_id: UUID,
+    *,
+    promote: Sequence[str],
+    finish_only: Sequence[str],
+) -> None:
+    rows = [(run_id, mid, 1) for mid in promote]
+    rows.extend((run_id, mid, 0) for mid in finish_only)
+    if rows:
+        client.insert(PROMOTIONS_TABLE, rows, column_names=PROMOTION_COLUMNS)
+
+
+def _promote(client, run_id: UUID, match_ids: list[str], tables: Sequence[str]) -> None:
+    for table in tables:
+        client.command(
+            f"""
+            INSERT INTO {table}
+            SELECT *
+            FROM {staging_table(table)}
+            WHERE run_id = %(run_id)s
+              AND matchid IN %(match_ids)s
+            """,
+            parameters={"run_id": run_id, "match_ids": match_ids},
+            settings={
+                **PROMOTE_SETTINGS,
+                "insert_deduplication_token": _dedup_token(run_id, table),
+            },
+        )
+
+
+def discard_staged_batch(run_id: UUID, tables: Sequence[str]) -> bool:
+    """Drop a failed batch's staged rows unless its commit already started.
+
+    Returns False when a promotion manifest exists: the rows are then left for
+    ``recover_staged_batches`` so a half-done promotion is finished, not lost.
+    """
+    client = get_client()
+    recorded = client.query(
+        f"SELECT 1 FROM {PROMOTIONS_TABLE} WHERE run_id = %(run_id)s LIMIT 1",
+        parameters={"run_id": run_id},
+    ).result_rows
+    if recorded:
+        return False
+    for table in tables:
+        _drop_run_partition(client, staging_table(table), run_id)
+    return True
+
+
+def commit_staged_batch(
+    run_id: UUID,
+    *,
+    promote: Iterable[str],
+    finish_only: Iterable[str] = (),
+    tables: Sequence[str],
+) -> None:
+    """Promote ``promote`` into ``tables`` (in order) and finish the batch.
+
+    ``finish_only`` ids (retired matches) are removed from the source list and
+    marked finished without promoting anything. Safe to call repeatedly.
+    """
+    promote_ids = dedupe_matchids(promote)
+    finish_only_ids = [mid for mid in dedupe_matchids(finish_only) if mid not in promote_ids]
+    client = get_client()
+
+    _record_promotion(client, run_id, promote=promote_ids, finish_only=finish_only_ids)
+    if promote_ids:
+        _promote(client, run_id, promote_ids, tables)
+    if finish_only_ids:
+        delete_by_matchids(SOURCE_MATCHIDS_TABLE, finish_only_ids)
+    if promote_ids or finish_only_ids:
+        mark_matchids_finished([*promote_ids, *finish_only_ids])
+
+    for table in (*tables, PROMOTIONS_TABLE):
+        target = table if table == PROMOTIONS_TABLE else staging_table(table)
+        _drop_run_partition(client, target, run_id)
+    logger.debug(
+        "Committed staged matchdata run_id=%s promoted=%d finished_only=%d",
+        run_id,
+        len(promote_ids),
+        len(finish_only_ids),
+    )
+
+
+def _load_staged_run_ids(client, tables: Sequence[str]) -> set[UUID]:
+    union = "\n            UNION DISTINCT\n            ".join(
+        f"SELECT DISTINCT run_id FROM {staging_table(table)}" for table in tables
+    )
+    return {row[0] for row in client.query(union).result_rows}
+
+
+def recover_staged_batches(
+    tables: Sequence[str],
+    *,
+    skip_run_ids: Collection[UUID] = (),
+) -> int:
+    """Replay every recorded commit, then drop staged rows that never got one.
+
+    Call before the first claim: batches without a manifest are still pending
+    in the queue and are simply fetched again. ``skip_run_ids`` (batches another
+    drainer still holds a live lease for) are left alone. Returns the commits
+    replayed.
+    """
+    client = get_client()
+    skip = set(skip_run_ids)
+    rows = client.query(
+        f"""
+        SELECT run_id, matchid, max(promote)
+        FROM {PROMOTIONS_TABLE}
+        GROUP BY run_id, matchid
+        ORDER BY run_id, matchid
+        """
+    ).result_rows
+
+    manifests: dict[UUID, tuple[list[str], list[str]]] = {}
+    for run_id, matchid, promote in rows:
+        if run_id in skip:
+            continue
+        promote_ids, finish_only = manifests.setdefault(run_id, ([], []))
+        (promote_ids if promote else finish_only).append(matchid)
+
+    for run_id, (promote_ids, finish_only) in manifests.items():
+        logger.warning(
+            "Replaying staged matchdata commit run_id=%s promote=%d finish_only=%d",
+            run_id,
+            len(promote_ids),
+            len(finish_only),
+        )
+        commit_staged_batch(
+            run_id, promote=promote_ids, finish_only=finish_only, tables=tables
+        )
+
+    for run_id in sorted(_load_staged_run_ids(client, tables) - skip):
+        for table in tables:
+            _drop_run_partition(client, staging_table(table), run_id)
+    return len(manifests)
@@ -1,12 +1,34 @@
 import logging
+import threading
 from itertools import islice
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import Any
 from uuid import UUID
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from numpy.typing import DTypeLike
+from clickhouse_connect.driver.insert import InsertContext
+
+from app.api.v1.metrics.telemetry import export_insert, observe_stage
 from database.clickhouse.client import get_client
 
 logger = logging.getLogger(__name__)
 
+# One column of a column-oriented insert: a list, array.array or numpy array.
+# Integer numpy arrays are serialised straight from their buffer.
+type ColumnData = Sequence[Any] | np.ndarray
+
+# Typed read schema: result column name -> numpy dtype of the block array.
+# ``object`` columns come back as Python ``str`` (NUL padding stripped).
+type ColumnSchema = Mapping[str, DTypeLike]
+
+# clickhouse-connect DESCRIBEs the table for every insert that names only its
+# columns; column-oriented inserts reuse one context per (table, columns) and
+# thread instead. Types are resolved once per process, so restart after ALTERs.
+_insert_contexts = threading.local()
+
 
 def _batched(iterable: Iterable, batch_size: int):
     it = iter(iterable)
@@ -22,13 +44,172 @@ def insert_rows_in_batches(
     columns: Sequence[str],
     rows: Iterable[tuple],
     batch_size: int,
-) -> None:
+) -> int:
+    """Insert ``rows`` in ``batch_size`` chunks; returns bytes ClickHouse wrote."""
     client = get_client()
     cols = tuple(columns)
+    written = 0
 
     for batch in _batched(rows, batch_size):
         logger.debug("Insert batch table=%s rows=%d", table, len(batch))
-        client.insert(table, batch, cols)
+        with observe_stage("clickhouse", "insert", table=table, rows=len(batch)):
+            summary = client.insert(table, batch, cols)
+        chunk_bytes = summary.written_bytes() if summary is not None else 0
+        export_insert(table=table, rows=len(batch), written_bytes=chunk_bytes)
+        written += chunk_bytes
+    return written
+
+
+def _insert_context(
+    client,
+    table: str,
+    columns: tuple[str, ...],
+    settings: Mapping[str, Any] | None,
+) -> InsertContext:
+    contexts: dict[tuple, InsertContext] | None = getattr(
+        _insert_contexts, "by_table", None
+    )
+    if contexts is None:
+        contexts = _insert_contexts.by_table = {}
+    key = (table, columns, tuple(sorted((settings or {}).items())))
+    context = contexts.get(key)
+    if context is None:
+        context = client.create_insert_context(
+            table,
+            columns,
+            column_oriented=True,
+            settings=dict(settings) if settings else None,
+        )
+        contexts[key] = context
+    return context
+
+
+def insert_columns_in_batches(
+    table: str,
+    columns: Sequence[str],
+    data: Sequence[ColumnData],
+    batch_size: int,
+    *,
+    settings: Mapping[str, Any] | None = None,
+) -> int:
+    """Column-oriented insert of ``data`` (one sequence per column, same order as
+    ``columns``) in ``batch_size`` chunks; returns bytes ClickHouse wrote.
+
+    Nothing is transposed: each column is serialised to a Native block as is.
+    ``settings`` apply to every chunk (e.g. ``async_insert_settings``).
+    """
+    cols = tuple(columns)
+    if len(data) != len(cols):
+        raise ValueError(f"{table}: {len(data)} columns of data for {len(cols)} names")
+    total = len(data[0]) if cols else 0
+    if not total:
+        return 0
+
+    client = get_client()
+    context = _insert_context(client, table, cols, settings)
+    written = 0
+    for start in range(0, total, batch_size):
+        chunk = (
+            data
+            if start == 0 and total <= batch_size
+            else [column[start : start + batch_size] for column in data]
+        )
+        rows = len(chunk[0])
+        logger.debug("Insert columns table=%s rows=%d", table, rows)
+        with observe_stage("clickhouse", "insert", table=table, rows=rows):
+            context.data = chunk
+            summary = client.insert(context=context)
+        chunk_bytes = summary.written_bytes() if summary is not None else 0
+        export_insert(table=table, rows=rows, written_bytes=chunk_bytes)
+        written += chunk_bytes
+    return written
+
+
+def _column_to_numpy(column: pa.Array, dtype: np.dtype, name: str) -> np.ndarray:
+    if pa.types.is_dictionary(column.type):  # LowCardinality
+        column = column.dictionary_decode()
+    if pa.types.is_list(column.type) or pa.types.is_large_list(column.type):
+        # Array(T) of one width per row -> (n, width); ragged arrays are refused.
+        lengths = np.diff(np.asarray(column.offsets))
+        width = int(lengths[0]) if len(lengths) else 0
+        if (lengths != width).any():
+            raise ValueError(f"{name}: ragged Array column cannot be read as a block")
+        flat = _column_to_numpy(column.flatten(), dtype, name)
+        return flat.reshape(len(column), width)
+    if dtype == np.object_:
+        if pa.types.is_fixed_size_binary(column.type):  # FixedString
+            column = column.cast(pa.binary())
+        if pa.types.is_binary(column.type) or pa.types.is_large_binary(column.type):
+            column = column.cast(pa.string())
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            column = pc.utf8_rtrim(column, characters="\x00")
+        return column.to_numpy(zero_copy_only=False).astype(object, copy=False)
+    # Nullable numerics read as 0, as the row readers did with ``or 0``.
+    if column.null_count:
+        column = pc.fill_null(column, 0)
+    return column.to_numpy(zero_copy_only=False).astype(dtype, copy=False)
+
+
+def arrow_block_to_numpy(
+    batch: pa.RecordBatch, schema: ColumnSchema
+) -> dict[str, np.ndarray]:
+    """One Arrow record batch -> ``{name: array}`` typed by ``schema``.
+
+    Columns are looked up by name; ``Array`` columns become ``(n, width)``.
+    """
+    return {
+        name: _column_to_numpy(batch.column(name), np.dtype(dtype), name)
+        for name, dtype in schema.items()
+    }
+
+
+def stream_column_blocks(
+    query: str,
+    schema: ColumnSchema,
+    *,
+    parameters: Mapping[str, Any] | None = None,
+    settings: Mapping[str, Any] | None = None,
+    client=None,
+) -> Iterator[dict[str, np.ndarray]]:
+    """Stream a SELECT as typed numpy column blocks, one per server block.
+
+    Reads ``FORMAT ArrowStream`` so no per-row Python objects are built; every
+    ``schema`` column must be named in the SELECT. Enum columns arrive as their
+    integer codes, so select ``toString(col)`` where the label is wanted.
+    """
+    client = client or get_client()
+    with client.query_arrow_stream(
+        query,
+        parameters=dict(parameters) if parameters else None,
+        settings=dict(settings) if settings else None,
+        use_strings=True,
+    ) as stream:
+        for batch in stream:
+            if batch.num_rows:
+                yield arrow_block_to_numpy(batch, schema)
+
+
+def read_columns(
+    query: str,
+    schema: ColumnSchema,
+    *,
+    parameters: Mapping[str, Any] | None = None,
+    settings: Mapping[str, Any] | None = None,
+    client=None,
+) -> dict[str, np.ndarray]:
+    """``stream_column_blocks`` concatenated into one array per column."""
+    blocks = list(
+        stream_column_blocks(
+            query, schema, parameters=parameters, settings=settings, client=client
+        )
+    )
+    if not blocks:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in schema.items()}
+    if len(blocks) == 1:
+        return blocks[0]
+    return {
+        name: np.concatenate([block[name] for block in blocks]) for name in schema
+    }
 
 
 def persist_data(
@@ -37,19 +218,30 @@ def persist_data(
     items: Iterable[dict],
     run_id: UUID,
     batch_size: int,
-) -> None:
+    *,
+    settings: Mapping[str, Any] | None = None,
+) -> int:
+    """Insert parsed row dicts column-wise, with ``run_id`` as the first column."""
     source_cols = tuple(columns)
     db_cols = tuple(c.lower() for c in source_cols)
-    rows = ((run_id, *(item[c] for c in source_cols)) for item in items)
+    rows = items if isinstance(items, list) else list(items)
+    data: list[ColumnData] = [[run_id] * len(rows)]
+    data.extend([item[c] for item in rows] for c in source_cols)
 
-    insert_rows_in_batches(
+    return insert_columns_in_batches(
         table,
         ("run_id", *db_cols),
-        rows,
+        data,
         batch_size=batch_size,
+        settings=settings,
     )
 
 
+def flush_async_insert_queue() -> None:
+    """Write every buffered async insert to parts before returning."""
+    get_client().command("SYSTEM FLUSH ASYNC INSERT QUEUE")
+
+
 def _as_text(value: object) -> str:
     if isinstance(value, (bytes, bytearray)):
         return value.decode("utf-8").rstrip("\x00")
@@ -2,16 +2,51 @@ from __future__ import annotations
 
 import logging
 import time
-from collections.abc import Iterable
+from collections.abc import Collection, Iterable
+from itertools import zip_longest
 from uuid import UUID
 
+from app.api.v1.metrics.telemetry import timed_stage
 from app.core.config.constants import CONTINENT_TO_REGIONS, Continent, Region
 from database.clickhouse.client import get_client
-from database.clickhouse.operations.matchids import PUUID_DATA_TIMESTAMP_NAME
+from database.clickhouse.operations.matchids import (
+    MATCHDATA_AVAILABLE_SEEDED_NAME,
+    PUUID_DATA_TIMESTAMP_NAME,
+)
 from database.clickhouse.operations.utils import dedupe_matchids, record_timestamp
+from database.clickhouse.query_tags import tagged_settings, tagged_stage
 
 MATCHDATA_STATE_TABLE = "game_data.matchdata_matchids"
-MATCHDATA_AVAILABLE_SEEDED_NAME = "matchdata_seeded_available_matchids_run"
+# Set engine: every matchid ever inserted into the queue (fed by a materialized
+# view), plus legacy completed ids backfilled by the D7 migration.
+MATCHDATA_KNOWN_TABLE = "game_data.matchdata_known_matchids"
+# Queue state is append-only: a newer-version row per matchid replaces the
+# pending one at merge time, and readers collapse with FINAL meanwhile. Versions
+# default to the server clock so seeds, requeues and finishes order consistently.
+# The shuffle_key filter lets the primary index (continent, shuffle_key, matchid)
+# prune granules for a list of matchids.
+MATCHDATA_PENDING_SELECT = (
+    f"SELECT * FROM {MATCHDATA_STATE_TABLE} FINAL WHERE status = 'pending'"
+)
+MATCHDATA_FINISH_SQL = f"""
+    INSERT INTO {MATCHDATA_STATE_TABLE} (run_id, matchid, status)
+    SELECT run_id, matchid, 'finished'
+    FROM {MATCHDATA_STATE_TABLE} FINAL
+    WHERE shuffle_key IN (
+        SELECT cityHash64('matchdata_claim', arrayJoin(%(match_ids)s))
+    )
+      AND has(%(match_ids)s, matchid)
+      AND status = 'pending'
+"""
+# Leases (D11): a matchid is held by the live lease (expires_at in the future,
+# latest version per (matchid, lease_id)) with the smallest acquired stamp, so a
+# later claimer can never displace an earlier one. All clocks are the server's.
+MATCHDATA_LEASE_TABLE = "game_data.matchdata_leases"
+MATCHDATA_LIVE_LEASES = f"""
+    SELECT matchid, lease_id, owner, acquired
+    FROM {MATCHDATA_LEASE_TABLE} FINAL
+    WHERE expires_at > now64(3)
+"""
 CONTINENTS: tuple[str, ...] = tuple(c.value for c in Continent)
 REGIONS: tuple[str, ...] = tuple(r.value for r in Region)
 CONTINENT_SHARDS: tuple[tuple[str, tuple[str, ...]], ...] = tuple(
@@ -30,6 +65,7 @@ def _sql_strings(values: Iterable[str], *, brackets: str = "()") -> str:
 
 
 def _continent_expr(matchid_column: str = "matchid") -> str:
+    # Source of the MATERIALIZED `continent` column in 3000_matchdata_matchids.
     shard = f"lower(splitByChar('_', {matchid_column})[1])"
     cases = ",\n            ".join(
         f"{shard} IN {_sql_strings(shards)}, '{continent}'"
@@ -46,56 +82,68 @@ def _load_latest_run_id(*, client, name: str) -> UUID | None:
         WHERE name = %(name)s
         """,
         parameters={"name": name},
+        settings=tagged_settings(),
     ).result_rows
     return None if not rows or rows[0][0] is None else rows[0][0]
 
 
+def _load_seeded_run_ids(*, client) -> set[UUID]:
+    rows = client.query(
+        """
+        SELECT DISTINCT run_id
+        FROM game_data.data_timestamps
+        WHERE name = %(name)s
+        """,
+        parameters={"name": MATCHDATA_AVAILABLE_SEEDED_NAME},
+        settings=tagged_settings(),
+    ).result_rows
+    return {row[0] for row in rows}
+
+
+def _load_unseeded_run_ids(*, client, seeded: set[UUID]) -> list[UUID]:
+    # Every successful matchids run leaves a watermark that is kept until it is
+    # seeded, so runs skipped by an interrupted cycle are still picked up here.
+    rows = client.query(
+        """
+        SELECT DISTINCT run_id
+        FROM game_data.data_timestamps
+        WHERE name = %(name)s
+        """,
+        parameters={"name": PUUID_DATA_TIMESTAMP_NAME},
+        settings=tagged_settings(),
+    ).result_rows
+    return [row[0] for row in rows if row[0] not in seeded]
+
+
 def _seed_candidates_select() -> str:
+    # Only the unseeded runs are read, and each id is checked against the
+    # in-memory Set of every matchid the queue has ever held, so the cost
+    # follows the new inventory rather than the history.
     return f"""
-        WITH source_matchids AS
-        (
-            SELECT
-                any(run_id) AS run_id,
-                toString(matchid) AS matchid
-            FROM game_data.matchids
-            WHERE matchid != ''
-            GROUP BY matchid
-        ),
-        info_matchids AS
-        (
-            SELECT DISTINCT matchid FROM game_data.info WHERE matchid != ''
-        ),
-        timeline_matchids AS
-        (
-            SELECT DISTINCT matchid FROM game_data.tl_game_end WHERE matchid != ''
-        ),
-        completed_matchids AS
-        (
-            SELECT info_matchids.matchid
-            FROM info_matchids
-            INNER JOIN timeline_matchids USING (matchid)
-        )
-        SELECT DISTINCT
-            source_matchids.run_id AS run_id,
-            source_matchids.matchid AS matchid
-        FROM source_matchids
-        WHERE source_matchids.matchid NOT IN completed_matchids
-          AND source_matchids.matchid NOT IN (
-              SELECT DISTINCT matchid FROM {MATCHDATA_STATE_TABLE}
-          )
+        SELECT
+            any(run_id) AS run_id,
+            toString(matchid) AS matchid
+        FROM game_data.matchids
+        WHERE run_id IN %(run_ids)s
+          AND matchid != ''
+          AND matchid NOT IN {MATCHDATA_KNOWN_TABLE}
+        GROUP BY matchid
     """
 
 
+@timed_stage("work_state", "seed_from_matchids")
+@tagged_stage("work_state.seed_from_matchids")
 def seed_from_matchids() -> int:
     client = get_client()
     latest_run_id = _load_latest_run_id(client=client, name=PUUID_DATA_TIMESTAMP_NAME)
     if latest_run_id is None:
         return 0
 
-    if (
-        _load_latest_run_id(client=client, name=MATCHDATA_AVAILABLE_SEEDED_NAME)
-        == latest_run_id
-    ):
+    # No shortcut on the latest run: an older run left unseeded by an
+    # interrupted cycle is seeded here even when the latest one already was.
+    seeded = _load_seeded_run_ids(client=client)
+    run_ids = _load_unseeded_run_ids(client=client, seeded=seeded)
+    if not run_ids:
         logger.debug(
             "Matchdata seed skipped latest_run_id=%s (available inventory already seeded)",
             latest_run_id,
@@ -103,77 +151,103 @@ def seed_from_matchids() -> int:
         return 0
 
     candidates_select = _seed_candidates_select()
+    parameters = {"run_ids": tuple(run_ids)}
     rows = client.query(
         f"""
         SELECT count()
         FROM ({candidates_select})
-        """
+        """,
+        parameters=parameters,
+        settings=tagged_settings(),
     ).result_rows
     pending = int(rows[0][0]) if rows else 0
-    if pending == 0:
-        record_timestamp(
-            MATCHDATA_AVAILABLE_SEEDED_NAME, latest_run_id, int(time.time())
+
+    if pending:
+        client.command(
+            f"""
+            INSERT INTO {MATCHDATA_STATE_TABLE} (run_id, matchid)
+            {candidates_select}
+            """,
+            parameters=parameters,
+            settings=tagged_settings(),
         )
-        return 0
 
-    client.command(
-        f"""
-        INSERT INTO {MATCHDATA_STATE_TABLE} (run_id, matchid)
-        {candidates_select}
-        """
-    )
-    record_timestamp(MATCHDATA_AVAILABLE_SEEDED_NAME, latest_run_id, int(time.time()))
-    logger.debug(
-        "Seeded matchdata queue rows=%d latest_run_id=%s source=available_matchids",
-        pending,
-        latest_run_id,
-    )
+    # Record the watermark only after the insert: a crash in between re-reads
+    # the same runs, and the known-ids Set already filters what was queued.
+    stored_at = int(time.time())
+    for run_id in run_ids:
+        record_timestamp(MATCHDATA_AVAILABLE_SEEDED_NAME, run_id, stored_at)
+    if pending:
+        logger.debug(
+            "Seeded matchdata queue rows=%d latest_run_id=%s runs=%d source=available_matchids",
+            pending,
+            latest_run_id,
+            len(run_ids),
+        )
     return pending
 
 
-def claim_pending_matchids(*, batch_size: int) -> list[str]:
+@timed_stage("work_state", "claim_pending_matchids")
+def claim_pending_matchids(
+    *,
+    batch_size: int,
+    exclude: Collection[str] = (),
+    shard: tuple[int, int] = (0, 1),
+    skip_leased: bool = False,
+) -> list[str]:
+    """Next queue batch, skipping ``exclude`` (ids already claimed in flight).
+
+    ``shard=(index, count)`` restricts the read to ``shuffle_key % count ==
+    index``; ``skip_leased`` drops ids under a live lease of any drainer. The
+    result is only a candidate list: leased drainers still acquire it.
+    """
     if batch_size <= 0:
         raise ValueError("batch_size must be > 0")
+    shard_index, shard_count = shard
+    if not 0 <= shard_index < shard_count:
+        raise ValueError("shard index must be in [0, shard count)")
+    parameters: dict[str, object] = {"limit": batch_size}
+    clauses: list[str] = []
+    if exclude:
+        parameters["exclude"] = sorted(exclude)
+        clauses.append("AND NOT has(%(exclude)s, matchid)")
+    if shard_count > 1:
+        parameters.update(shard_index=shard_index, shard_count=shard_count)
+        clauses.append("AND modulo(shuffle_key, %(shard_count)s) = %(shard_index)s")
+    if skip_leased:
+        clauses.append(
+            f"AND matchid NOT IN (SELECT matchid FROM ({MATCHDATA_LIVE_LEASES}))"
+        )
+    filters = "\n              ".join(clauses)
+    # continent/shuffle_key are MATERIALIZED columns leading the queue sort key,
+    # so each continent is a bounded in-order range read; the round-robin over
+    # at most len(CONTINENTS) * limit rows is done here instead of a window.
     rows = (
         get_client()
         .query(
             f"""
-            WITH limited AS (
-                SELECT
-                    matchid,
-                    {_continent_expr()} AS continent,
-                    cityHash64('matchdata_claim', matchid) AS shuffle_key
-                FROM {MATCHDATA_STATE_TABLE}
-                ORDER BY continent, shuffle_key, matchid
-                LIMIT %(limit)s BY continent
-            ),
-            ranked AS (
-                SELECT
-                    matchid,
-                    continent,
-                    shuffle_key,
-                    row_number() OVER (
-                        PARTITION BY continent
-                        ORDER BY shuffle_key, matchid
-                    ) AS row_n,
-                    transform(
-                        continent,
-                        {_sql_strings(CONTINENTS, brackets="[]")},
-                        arrayEnumerate({_sql_strings(CONTINENTS, brackets="[]")}),
-                        length({_sql_strings(CONTINENTS, brackets="[]")}) + 1
-                    ) AS continent_order
-                FROM limited
-            )
-            SELECT matchid
-            FROM ranked
-            ORDER BY row_n, continent_order, shuffle_key, matchid
-            LIMIT %(limit)s
+            SELECT matchid, continent
+            FROM {MATCHDATA_STATE_TABLE} FINAL
+            WHERE status = 'pending'
+              {filters}
+            ORDER BY continent, shuffle_key, matchid
+            LIMIT %(limit)s BY continent
             """,
-            parameters={"limit": batch_size},
+            parameters=parameters,
+            settings=tagged_settings("work_state.claim_pending_matchids"),
         )
         .result_rows
     )
-    claimed = dedupe_matchids(row[0] for row in rows)
+    by_continent: dict[str, list[str]] = {}
+    for matchid, continent in rows:
+        by_continent.setdefault(continent, []).append(matchid)
+    continent_order = [
+        *CONTINENTS,
+        *sorted(c for c in by_continent if c not in CONTINENTS),
+    ]
+    rounds = zip_longest(*(by_continent.get(c, ()) for c in continent_order))
+    interleaved = [mid for round_ in rounds for mid in round_ if mid is not None]
+    claimed = dedupe_matchids(interleaved)[:batch_size]
 
     counts: dict[str, int] = {c: 0 for c in CONTINENTS}
     unknown = 0
@@ -196,17 +270,190 @@ def claim_pending_matchids(*, batch_size: int) -> list[str]:
     return claimed
 
 
+@timed_stage("work_state", "mark_matchids_finished")
 def mark_matchids_finished(match_ids: Iterable[str]) -> None:
+    ids = dedupe_matchids(match_ids)
+    if not ids:
+        return
+    get_client().command(
+        MATCHDATA_FINISH_SQL,
+        parameters={"match_ids": ids},
+    )
+    logger.debug("Finished matchdata queue rows=%d", len(ids))
+
+
+@timed_stage("work_state", "acquire_matchid_leases")
+def acquire_matchid_leases(
+    match_ids: Iterable[str],
+    *,
+    lease_id: UUID,
+    owner: str,
+    ttl_s: float,
+) -> None:
+    """Insert a lease row per matchid; whether it won is read back separately."""
     ids = dedupe_matchids(match_ids)
     if not ids:
         return
     get_client().command(
         f"""
-        ALTER TABLE {MATCHDATA_STATE_TABLE}
-        DELETE
-        WHERE has(%(match_ids)s, matchid)
-        SETTINGS mutations_sync = 2
+        INSERT INTO {MATCHDATA_LEASE_TABLE} (matchid, lease_id, owner, acquired, expires_at)
+        SELECT
+            arrayJoin(%(match_ids)s),
+            %(lease_id)s,
+            %(owner)s,
+            toUnixTimestamp64Nano(now64(9)),
+            now64(3) + toIntervalMillisecond(%(ttl_ms)s)
         """,
-        parameters={"match_ids": ids},
+        parameters={
+            "match_ids": ids,
+            "lease_id": lease_id,
+            "owner": owner,
+            "ttl_ms": int(ttl_s * 1000),
+        },
+    )
+
+
+@timed_stage("work_state", "load_held_matchids")
+def load_held_matchids(match_ids: Iterable[str], *, lease_id: UUID) -> set[str]:
+    """The subset of ``match_ids`` whose holding lease is ``lease_id``."""
+    ids = dedupe_matchids(match_ids)
+    if not ids:
+        return set()
+    rows = (
+        get_client()
+        .query(
+            f"""
+            SELECT matchid
+            FROM (
+                SELECT matchid, argMin(lease_id, (acquired, lease_id)) AS holder
+                FROM ({MATCHDATA_LIVE_LEASES})
+                WHERE matchid IN %(match_ids)s
+                GROUP BY matchid
+            )
+            WHERE holder = %(lease_id)s
+            """,
+            parameters={"match_ids": ids, "lease_id": lease_id},
+        )
+        .result_rows
+    )
+    return {row[0] for row in rows}
+
+
+@timed_stage("work_state", "read_back_matchid_leases")
+def read_back_matchid_leases(
+    match_ids: Iterable[str],
+    *,
+    lease_id: UUID,
+) -> tuple[set[str], set[str]]:
+    """The ids ``lease_id`` holds, and the ids whose own lease row was read.
+
+    Reads with ``select_sequential_consistency`` (and ``FINAL``), so a caller
+    can retry until every row it just inserted is visible before trusting the
+    holders.
+    """
+    ids = dedupe_matchids(match_ids)
+    if not ids:
+        return set(), set()
+    rows = (
+        get_client()
+        .query(
+            f"""
+            SELECT
+                matchid,
+                argMin(lease_id, (acquired, lease_id)) = %(lease_id)s AS held,
+                countIf(lease_id = %(lease_id)s) > 0 AS visible
+            FROM ({MATCHDATA_LIVE_LEASES})
+            WHERE matchid IN %(match_ids)s
+            GROUP BY matchid
+            """,
+            parameters={"match_ids": ids, "lease_id": lease_id},
+            settings={"select_sequential_consistency": 1},
+        )
+        .result_rows
+    )
+    held = {matchid for matchid, is_held, _ in rows if is_held}
+    visible = {matchid for matchid, _, is_visible in rows if is_visible}
+    return held, visible
+
+
+def _rewrite_live_leases(
+    *,
+    lease_ids: Collection[UUID],
+    expires_at_sql: str,
+    match_ids: Collection[str] = (),
+    ttl_s: float = 0.0,
+) -> None:
+    # Only live leases are rewritten: an expired lease may already have been
+    # reclaimed, and reviving it would win back the match (older acquired stamp).
+    if not lease_ids:
+        return
+    match_clause = "AND matchid IN %(match_ids)s" if match_ids else ""
+    get_client().command(
+        f"""
+        INSERT INTO {MATCHDATA_LEASE_TABLE} (matchid, lease_id, owner, acquired, expires_at)
+        SELECT matchid, lease_id, owner, acquired, {expires_at_sql}
+        FROM ({MATCHDATA_LIVE_LEASES})
+        WHERE lease_id IN %(lease_ids)s
+          {match_clause}
+        """,
+        parameters={
+            "lease_ids": sorted(lease_ids),
+            "match_ids": sorted(match_ids),
+            "ttl_ms": int(ttl_s * 1000),
+        },
+    )
+
+
+@timed_stage("work_state", "extend_matchid_leases")
+def extend_matchid_leases(lease_ids: Collection[UUID], *, ttl_s: float) -> None:
+    """Heartbeat: push every live row of ``lease_ids`` out to now + ``ttl_s``."""
+    _rewrite_live_leases(
+        lease_ids=lease_ids,
+        expires_at_sql="now64(3) + toIntervalMillisecond(%(ttl_ms)s)",
+        ttl_s=ttl_s,
+    )
+
+
+@timed_stage("work_state", "release_matchid_leases")
+def release_matchid_leases(lease_id: UUID, match_ids: Collection[str] = ()) -> None:
+    """Expire ``lease_id`` (only ``match_ids`` when given) so others can claim."""
+    _rewrite_live_leases(
+        lease_ids=(lease_id,),
+        expires_at_sql="toDateTime64(0, 3)",
+        match_ids=match_ids,
+    )
+
+
+@timed_stage("work_state", "load_live_lease_ids")
+def load_live_lease_ids() -> set[UUID]:
+    rows = (
+        get_client()
+        .query(f"SELECT DISTINCT lease_id FROM ({MATCHDATA_LIVE_LEASES})")
+        .result_rows
+    )
+    return {row[0] for row in rows}
+
+
+@timed_stage("work_state", "load_pending_matchids")
+def load_pending_matchids(match_ids: Iterable[str]) -> set[str]:
+    """The subset of ``match_ids`` whose queue row is still pending."""
+    ids = dedupe_matchids(match_ids)
+    if not ids:
+        return set()
+    rows = (
+        get_client()
+        .query(
+            f"""
+            SELECT matchid
+            FROM {MATCHDATA_STATE_TABLE} FINAL
+            WHERE shuffle_key IN (
+                SELECT cityHash64('matchdata_claim', arrayJoin(%(match_ids)s))
+            )
+              AND has(%(match_ids)s, matchid)
+              AND status = 'pending'
+            """,
+            parameters={"match_ids": ids},
+        )
+        .result_rows
     )
-    logger.debug("Removed matchdata queue rows=%d", len(ids))
+    return {row[0] for row in rows}
@@ -0,0 +1,65 @@
+"""``log_comment`` tags that tie ClickHouse queries to a pipeline stage.
+
+Every client handed out by ``get_client`` carries the JSON ``log_comment`` of
+the context it was fetched in (``app`` plus ``stage``, ``run_id``, ``batch``
+when set), so all its queries land in ``system.query_log`` tagged.
+``query_context`` sets tags for everything issued inside it; ``run_clickhouse``
+carries the context into its worker threads. ``tagged_settings`` adds the tags
+to one query's settings, for a client fetched before the context changed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+from collections.abc import Callable, Iterator, Mapping
+from contextvars import ContextVar
+from typing import Any
+
+QUERY_LOG_APP = "riot_api_ecosystem"
+
+_query_tags: ContextVar[Mapping[str, str]] = ContextVar("clickhouse_query_tags")
+
+
+@contextlib.contextmanager
+def query_context(**tags: object) -> Iterator[None]:
+    """Tag every query issued inside the block (``stage``, ``run_id``, ``batch``)."""
+    merged = {**_query_tags.get({}), **{k: str(v) for k, v in tags.items() if v is not None}}
+    token = _query_tags.set(merged)
+    try:
+        yield
+    finally:
+        _query_tags.reset(token)
+
+
+def tagged_stage[**P, R](stage: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator form of ``query_context(stage=...)``."""
+
+    def decorate(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with query_context(stage=stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def log_comment(stage: str | None = None, **tags: object) -> str:
+    """The JSON ``log_comment`` for the current context plus ``stage``/``tags``."""
+    merged = {"app": QUERY_LOG_APP, **_query_tags.get({})}
+    if stage is not None:
+        merged["stage"] = stage
+    merged.update((k, str(v)) for k, v in tags.items() if v is not None)
+    return json.dumps(merged, sort_keys=True, separators=(",", ":"))
+
+
+def tagged_settings(
+    stage: str | None = None,
+    settings: Mapping[str, Any] | None = None,
+    **tags: object,
+) -> dict[str, Any]:
+    """``settings`` plus the ``log_comment`` that ties the query to its stage."""
+    return {**(settings or {}), "log_comment": log_comment(stage, **tags)}
@@ -0,0 +1,26 @@
+-- noqa: disable=PRS
+--
+-- Matchid lookup pack for game_data.matchids (D13). Its key leads with run_id,
+-- so delete_by_matchids('game_data.matchids', ...) after every resolved batch
+-- otherwise scans the whole table:
+--   * matchids_by_matchid: a projection ordered by matchid, picked for the
+--     "any rows for these matchids?" probe and other matchid IN (...) reads.
+--   * matchid_bf: a bloom_filter skip index, which the ALTER ... DELETE
+--     mutation uses to skip granules (mutations do not read projections).
+--
+-- Every other matchid-filtered game_data table already leads its ORDER BY with
+-- matchid (3000 leads with shuffle_key, a function of matchid), so indexes
+-- there would duplicate the primary index.
+--
+-- New parts get both automatically; existing parts need the MATERIALIZE
+-- mutations in migrations/2026-10-19_d13_matchid_lookup_indexes.sh.
+
+ALTER TABLE game_data.matchids
+    ADD INDEX IF NOT EXISTS matchid_bf matchid TYPE bloom_filter(0.01) GRANULARITY 1;
+
+ALTER TABLE game_data.matchids
+    ADD PROJECTION IF NOT EXISTS matchids_by_matchid
+    (
+        SELECT *
+        ORDER BY matchid
+    );
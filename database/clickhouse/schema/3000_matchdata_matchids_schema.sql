@@ -1,6 +1,16 @@
 CREATE TABLE IF NOT EXISTS game_data.matchdata_matchids (
     run_id UUID,
-    matchid String CODEC (ZSTD(3))
+    matchid String CODEC (ZSTD(3)),
+    status Enum8 ('pending' = 0, 'finished' = 1) DEFAULT 'pending',
+    version UInt64 DEFAULT toUnixTimestamp64Nano(now64(9)),
+    continent LowCardinality (String) MATERIALIZED multiIf(
+            lower(splitByChar('_', matchid)[1]) IN ('br1', 'la1', 'la2', 'na1'), 'americas',
+            lower(splitByChar('_', matchid)[1]) IN ('euw1', 'eun1', 'ru', 'tr1', 'me1'), 'europe',
+            lower(splitByChar('_', matchid)[1]) IN ('jp1', 'kr'), 'asia',
+            lower(splitByChar('_', matchid)[1]) IN ('ph2', 'th2', 'tw2', 'oc1', 'vn2', 'sg2'), 'sea',
+            'unknown'
+        ),
+    shuffle_key UInt64 MATERIALIZED cityHash64('matchdata_claim', matchid)
 )
-ENGINE = ReplacingMergeTree
-ORDER BY (matchid);
+ENGINE = ReplacingMergeTree(version)
+ORDER BY (continent, shuffle_key, matchid);
@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS game_data.matchdata_known_matchids (
+    matchid String
+)
+ENGINE = Set;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS game_data.matchdata_known_matchids_mv
+TO game_data.matchdata_known_matchids
+AS
+SELECT matchid
+FROM game_data.matchdata_matchids;
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS game_data.matchdata_tombstones (
+    matchid String CODEC (ZSTD(3)),
+    run_id UUID,
+    stream LowCardinality (String),
+    tombstoned_at DateTime DEFAULT now()
+)
+ENGINE = ReplacingMergeTree
+ORDER BY (matchid, run_id, stream);
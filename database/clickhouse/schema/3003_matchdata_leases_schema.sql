@@ -0,0 +1,14 @@
+-- Claim leases for multiple matchdata drainers (D11). One row version per
+-- (matchid, lease_id); heartbeats and releases insert a newer version with a new
+-- expires_at. The holder of a matchid is the live lease acquired first.
+CREATE TABLE IF NOT EXISTS game_data.matchdata_leases (
+    matchid String CODEC (ZSTD(3)),
+    lease_id UUID,
+    owner LowCardinality (String),
+    acquired UInt64,
+    expires_at DateTime64 (3),
+    version UInt64 DEFAULT toUnixTimestamp64Nano(now64(9))
+)
+ENGINE = ReplacingMergeTree(version)
+ORDER BY (matchid, lease_id)
+TTL toDateTime(expires_at) + INTERVAL 1 DAY;
@@ -4,7 +4,29 @@ CREATE TABLE IF NOT EXISTS game_data.tl_champion_kill
     matchid String CODEC (ZSTD(3)),
     frame_timestamp UInt32,
     timestamp UInt64,
-    type LowCardinality (String),
+    type Enum8 (
+        'UNKNOWN' = 0,
+        'ITEM_PURCHASED' = 1,
+        'ITEM_UNDO' = 2,
+        'SKILL_LEVEL_UP' = 3,
+        'WARD_KILL' = 4,
+        'WARD_PLACED' = 5,
+        'LEVEL_UP' = 6,
+        'GAME_END' = 7,
+        'ITEM_DESTROYED' = 8,
+        'ITEM_SOLD' = 9,
+        'PAUSE_END' = 10,
+        'CHAMPION_KILL' = 11,
+        'CHAMPION_SPECIAL_KILL' = 12,
+        'DRAGON_SOUL_GIVEN' = 13,
+        'ELITE_MONSTER_KILL' = 14,
+        'TURRET_PLATE_DESTROYED' = 15,
+        'BUILDING_KILL' = 16,
+        'OBJECTIVE_BOUNTY_PRESTART' = 17,
+        'OBJECTIVE_BOUNTY_FINISH' = 18,
+        'FEAT_UPDATE' = 19,
+        'CHAMPION_TRANSFORM' = 20
+    ),
     champion_kill_event_id String,
     assistingparticipantids Array (UInt8),
     killerid Int8,
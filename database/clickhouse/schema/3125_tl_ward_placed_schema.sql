@@ -5,7 +5,15 @@ CREATE TABLE IF NOT EXISTS game_data.tl_ward_placed
     frame_timestamp UInt32,
     timestamp UInt64,
     creatorid UInt8,
-    wardtype LowCardinality (String)
+    wardtype Enum8 (
+        'UNKNOWN' = 0,
+        'UNDEFINED' = 1,
+        'YELLOW_TRINKET' = 2,
+        'CONTROL_WARD' = 3,
+        'SIGHT_WARD' = 4,
+        'BLUE_TRINKET' = 5,
+        'TEEMO_MUSHROOM' = 6
+    )
 )
 ENGINE = MergeTree
 ORDER BY (matchid, frame_timestamp, timestamp, creatorid);
@@ -0,0 +1,244 @@
+-- Per-batch staging for matchdata inserts (D10). Only used when
+-- MATCHDATA_STAGING=true: the saver writes each claimed batch here under its
+-- run_id (one partition per batch) and promotes complete matches into game_data
+-- with INSERT ... SELECT, deduplicated by insert_deduplication_token.
+CREATE DATABASE IF NOT EXISTS game_data_staging;
+
+-- Matches a batch is committing: promote = 1 rows are copied into game_data,
+-- promote = 0 rows (retired) are only marked finished. A run_id left here after
+-- a crash is replayed on the next start with the same dedup tokens.
+CREATE TABLE IF NOT EXISTS game_data_staging.matchdata_promotions (
+    run_id UUID,
+    matchid String CODEC (ZSTD(3)),
+    promote UInt8
+)
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.metadata
+AS game_data.metadata
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.bans
+AS game_data.bans
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.feats
+AS game_data.feats
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.objectives
+AS game_data.objectives
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.participant_stats
+AS game_data.participant_stats
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.participant_challenges
+AS game_data.participant_challenges
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.participant_perk_values
+AS game_data.participant_perk_values
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.participant_perk_ids
+AS game_data.participant_perk_ids
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_participant_stats
+AS game_data.tl_participant_stats
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_building_kill
+AS game_data.tl_building_kill
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_champion_kill
+AS game_data.tl_champion_kill
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_champion_special_kill
+AS game_data.tl_champion_special_kill
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_dragon_soul_given
+AS game_data.tl_dragon_soul_given
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_elite_monster_kill
+AS game_data.tl_elite_monster_kill
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_ward_placed
+AS game_data.tl_ward_placed
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_ward_kill
+AS game_data.tl_ward_kill
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_item_purchased
+AS game_data.tl_item_purchased
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_item_sold
+AS game_data.tl_item_sold
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_item_destroyed
+AS game_data.tl_item_destroyed
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_item_undo
+AS game_data.tl_item_undo
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_level_up
+AS game_data.tl_level_up
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_skill_level_up
+AS game_data.tl_skill_level_up
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_pause_end
+AS game_data.tl_pause_end
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_objective_bounty_prestart
+AS game_data.tl_objective_bounty_prestart
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_objective_bounty_finish
+AS game_data.tl_objective_bounty_finish
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_feat_update
+AS game_data.tl_feat_update
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_champion_transform
+AS game_data.tl_champion_transform
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_turret_plate_destroyed
+AS game_data.tl_turret_plate_destroyed
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_ck_victim_damage_dealt
+AS game_data.tl_ck_victim_damage_dealt
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_ck_victim_damage_received
+AS game_data.tl_ck_victim_damage_received
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.info
+AS game_data.info
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+CREATE TABLE IF NOT EXISTS game_data_staging.tl_game_end
+AS game_data.tl_game_end
+ENGINE = MergeTree
+PARTITION BY run_id
+ORDER BY matchid;
+
+-- Promotion retries only dedup when the target keeps recent insert tokens.
+
+ALTER TABLE game_data.metadata MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.bans MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.feats MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.objectives MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.participant_stats MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.participant_challenges MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.participant_perk_values MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.participant_perk_ids MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_participant_stats MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_building_kill MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_champion_kill MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_champion_special_kill MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_dragon_soul_given MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_elite_monster_kill MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_ward_placed MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_ward_kill MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_item_purchased MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_item_sold MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_item_destroyed MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_item_undo MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_level_up MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_skill_level_up MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_pause_end MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_objective_bounty_prestart MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_objective_bounty_finish MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_feat_update MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_champion_transform MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_turret_plate_destroyed MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_ck_victim_damage_dealt MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_ck_victim_damage_received MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.info MODIFY SETTING non_replicated_deduplication_window = 1000;
+ALTER TABLE game_data.tl_game_end MODIFY SETTING non_replicated_deduplication_window = 1000;
@@ -3,4 +3,17 @@ TRUNCATE TABLE game_data_filtered.valid_game_ids;
 INSERT INTO game_data_filtered.valid_game_ids (matchid)
 SELECT matchid
 FROM game_data.filter_stg_game_flags
-WHERE any_filter_triggered = 0;
+WHERE any_filter_triggered = 0
+  -- Tombstoned rows stay physically present until
+  -- scripts/purge_matchdata_tombstones.py runs. Keep matches whose only info
+  -- rows are tombstoned out; a retry that succeeded under a new run_id still
+  -- has a live anchor and stays valid.
+  AND matchid IN (
+    SELECT matchid
+    FROM game_data.info
+    WHERE (matchid, run_id) NOT IN (
+        SELECT matchid, run_id
+        FROM game_data.matchdata_tombstones
+        WHERE stream IN ('all', 'non_timeline')
+    )
+  );
@@ -4,3 +4,13 @@ CREATE TABLE IF NOT EXISTS game_data_filtered.valid_game_ids
 )
 ENGINE = MergeTree
 ORDER BY matchid;
+
+-- Signed valid-id changes (+1 newly valid, -1 no longer valid) computed by
+-- 5003_filtered_tables_incremental_build.sql; kept until the next refresh.
+CREATE TABLE IF NOT EXISTS game_data_filtered.valid_game_ids_delta
+(
+    matchid String,
+    sign Int8
+)
+ENGINE = MergeTree
+ORDER BY matchid;
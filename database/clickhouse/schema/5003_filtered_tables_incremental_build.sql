@@ -0,0 +1,95 @@
+-- noqa: disable=PRS
+-- Incremental refresh of valid_game_ids and game_data_filtered.participant_stats.
+--
+-- Run after 4000_filter_build.sql, in place of 5001 + 5003, when the filter
+-- catalogue is unchanged since the last filtered-db build (the decision and the
+-- watermark live in database/clickhouse/operations/filtered_db.py). Only the
+-- matches whose validity changed are touched, so merges keep running and the
+-- copy is sized by the new matches rather than the whole pool:
+--
+-- 1. Diff the current valid set (same predicate as 5001) against
+--    valid_game_ids into valid_game_ids_delta: +1 newly valid (new ingests),
+--    -1 no longer valid (no live info anchor left, or flagged by a cross-game
+--    rule such as f03 now that more games are collected).
+-- 2. Delete the -1 matches from participant_stats and valid_game_ids.
+-- 3. Append the +1 matches, minus rows written by tombstoned runs. Rows
+--    already copied by an interrupted run are skipped, so the file can be
+--    re-run as a whole.
+
+TRUNCATE TABLE game_data_filtered.valid_game_ids_delta;
+
+INSERT INTO game_data_filtered.valid_game_ids_delta (matchid, sign)
+WITH current_valid AS (
+    SELECT matchid
+    FROM game_data.filter_stg_game_flags
+    WHERE any_filter_triggered = 0
+      AND matchid IN (
+        SELECT matchid
+        FROM game_data.info
+        WHERE (matchid, run_id) NOT IN (
+            SELECT matchid, run_id
+            FROM game_data.matchdata_tombstones
+            WHERE stream IN ('all', 'non_timeline')
+        )
+      )
+)
+
+SELECT
+    matchid,
+    toInt8(1) AS sign
+FROM current_valid
+WHERE matchid NOT IN (SELECT matchid FROM game_data_filtered.valid_game_ids)
+
+UNION ALL
+
+SELECT
+    matchid,
+    toInt8(-1) AS sign
+FROM game_data_filtered.valid_game_ids
+WHERE matchid NOT IN (SELECT matchid FROM current_valid);
+
+ALTER TABLE game_data_filtered.participant_stats
+DELETE
+WHERE matchid IN (
+    SELECT matchid
+    FROM game_data_filtered.valid_game_ids_delta
+    WHERE sign < 0
+)
+SETTINGS mutations_sync = 2;
+
+ALTER TABLE game_data_filtered.valid_game_ids
+DELETE
+WHERE matchid IN (
+    SELECT matchid
+    FROM game_data_filtered.valid_game_ids_delta
+    WHERE sign < 0
+)
+SETTINGS mutations_sync = 2;
+
+INSERT INTO game_data_filtered.participant_stats
+SELECT t.*
+FROM game_data.participant_stats AS t
+WHERE t.matchid IN (
+    SELECT matchid
+    FROM game_data_filtered.valid_game_ids_delta
+    WHERE sign > 0
+)
+  AND (t.matchid, t.run_id) NOT IN (
+    SELECT matchid, run_id
+    FROM game_data.matchdata_tombstones
+    WHERE stream IN ('all', 'non_timeline')
+  )
+  AND t.matchid NOT IN (
+    SELECT matchid
+    FROM game_data_filtered.participant_stats
+    WHERE matchid IN (
+        SELECT matchid
+        FROM game_data_filtered.valid_game_ids_delta
+        WHERE sign > 0
+    )
+);
+
+INSERT INTO game_data_filtered.valid_game_ids (matchid)
+SELECT matchid
+FROM game_data_filtered.valid_game_ids_delta
+WHERE sign > 0;
@@ -14,7 +14,13 @@ TRUNCATE TABLE game_data_filtered.participant_stats;
 INSERT INTO game_data_filtered.participant_stats
 SELECT t.*
 FROM game_data.participant_stats AS t
-WHERE t.matchid IN (SELECT vgi.matchid FROM game_data_filtered.valid_game_ids AS vgi);
+WHERE t.matchid IN (SELECT vgi.matchid FROM game_data_filtered.valid_game_ids AS vgi)
+  -- Skip rows of tombstoned runs that have not been purged yet.
+  AND (t.matchid, t.run_id) NOT IN (
+    SELECT matchid, run_id
+    FROM game_data.matchdata_tombstones
+    WHERE stream IN ('all', 'non_timeline')
+  );
 
 SYSTEM DROP MARK CACHE;
 SYSTEM DROP UNCOMPRESSED CACHE;
@@ -0,0 +1,525 @@
+-- noqa: disable=AL05,AL09,LT01,LT02,LT05,RF02,RF03,ST09
+--
+-- Incremental refresh of the pivot-derived aggregations: 6000 matchup_1v1,
+-- 6004 synergy_2vx, 6020 matchup_1v1_nobuild, 6021 matchup_1v1_champ,
+-- 6022 synergy_2vx_nobuild and 6023 synergy_2vx_champ. Run after 6900 in place
+-- of those six builds.
+--
+-- Cost: step 1 still anti-joins the whole train pivot against the whole
+-- applied table (both ways), and step 3 rewrites every aggregate table from
+-- its state, so a refresh reads pivot-sized inputs and writes full aggregates.
+-- What it saves is the fan-out: only the changed games are expanded into
+-- pair rows and grouped, instead of every train game.
+--
+-- 6001 and 6005-6008 stay full rebuilds. Nothing on the refresh path reads
+-- them (no dictionary or feature build), and their keys (100 pair-pairs per
+-- game for 2v2/2v1/3v1, near-unique trio and quad keys) would make a state
+-- table about as large as the fan-out, so state plus re-finalise would cost
+-- about a rebuild and double the storage.
+--
+-- 1. Diff the train rows of ml_game_player_pivot against
+--    ml_game_player_applied into ml_game_player_delta (+1 / -1 per game). A
+--    game whose split, outcome or player tuples changed is retracted and
+--    re-added, so boundary games moving from test to train and games dropped
+--    by the filter are handled too.
+-- 2. Fold the delta into each *_state table with the same fan-out as the full
+--    build, weighting every pair by the sign.
+-- 3. Re-finalise each aggregate table from its state (sum per key, drop keys
+--    with no games left) into a *_next copy and EXCHANGE it in, so a
+--    dictionary reload never sees a half-written table.
+-- 4. Commit: ml_game_player_applied becomes applied - retracted + added, and
+--    the delta is cleared.
+--
+-- The file must run to the end. If it stops part-way the delta stays
+-- non-empty and the next run refuses to start: re-run
+-- 6901_ml_aggregate_state_schema.sql and then this file, which folds in the
+-- whole pivot again. Run 6024 afterwards (it reads synergy_2vx) and reload the
+-- 7005, 7006, 7010-7014 dictionaries.
+
+SELECT throwIf(
+    (SELECT count() FROM game_data_filtered.ml_game_player_delta) > 0,
+    'ml_game_player_delta is not empty: a previous incremental refresh did not finish; re-run 6901_ml_aggregate_state_schema.sql first'
+)
+FORMAT Null;
+
+INSERT INTO game_data_filtered.ml_game_player_delta
+WITH current_train AS (
+    SELECT
+        matchid,
+        blue_win,
+        blue_players,
+        red_players,
+        cityHash64(blue_win, blue_players, red_players) AS fingerprint
+    FROM game_data_filtered.ml_game_player_pivot
+    WHERE split = 'train'
+)
+
+SELECT
+    matchid,
+    blue_win,
+    blue_players,
+    red_players,
+    fingerprint,
+    toInt8(1) AS sign
+FROM current_train
+WHERE (matchid, fingerprint) NOT IN (
+    SELECT matchid, fingerprint
+    FROM game_data_filtered.ml_game_player_applied
+)
+
+UNION ALL
+
+SELECT
+    matchid,
+    blue_win,
+    blue_players,
+    red_players,
+    fingerprint,
+    toInt8(-1) AS sign
+FROM game_data_filtered.ml_game_player_applied
+WHERE (matchid, fingerprint) NOT IN (
+    SELECT matchid, fingerprint
+    FROM current_train
+);
+
+-- 6000 matchup_1v1 (canonical left <= right; see 6000 build).
+INSERT INTO game_data_filtered.matchup_1v1_state
+SELECT
+    tupleElement(pair.1, 1) AS left_championid,
+    tupleElement(pair.1, 2) AS left_teamposition,
+    tupleElement(pair.1, 3) AS left_build,
+    tupleElement(pair.2, 1) AS right_championid,
+    tupleElement(pair.2, 2) AS right_teamposition,
+    tupleElement(pair.2, 3) AS right_build,
+    sum(p.sign) AS matchups,
+    sum(p.sign * pair.3) AS left_wins
+FROM game_data_filtered.ml_game_player_delta AS p
+ARRAY JOIN arrayFlatten(arrayMap(
+    b -> arrayMap(
+        r -> if(
+            b <= r,
+            (b, r, p.blue_win),
+            (r, b, toUInt8(1 - p.blue_win))
+        ),
+        p.red_players
+    ),
+    p.blue_players
+)) AS pair
+GROUP BY
+    left_championid, left_teamposition, left_build,
+    right_championid, right_teamposition, right_build;
+
+DROP TABLE IF EXISTS game_data_filtered.matchup_1v1_next;
+
+CREATE TABLE game_data_filtered.matchup_1v1_next AS game_data_filtered.matchup_1v1;
+
+INSERT INTO game_data_filtered.matchup_1v1_next
+SELECT
+    'train' AS split,
+    left_championid,
+    dictGetOrDefault(
+        'game_data.championid_name_map_dict',
+        'name',
+        toString(left_championid),
+        ''
+    ) AS left_championname,
+    left_teamposition,
+    left_build,
+    right_championid,
+    dictGetOrDefault(
+        'game_data.championid_name_map_dict',
+        'name',
+        toString(right_championid),
+        ''
+    ) AS right_championname,
+    right_teamposition,
+    right_build,
+    toUInt64(total_matchups) AS matchups,
+    toUInt64(total_left_wins) AS left_wins,
+    matchups - left_wins AS right_wins,
+    toFloat32(left_wins / matchups) AS left_win_rate,
+    toFloat32(right_wins / matchups) AS right_win_rate
+FROM (
+    SELECT
+        left_championid, left_teamposition, left_build,
+        right_championid, right_teamposition, right_build,
+        sum(matchups) AS total_matchups,
+        sum(left_wins) AS total_left_wins
+    FROM game_data_filtered.matchup_1v1_state
+    GROUP BY
+        left_championid, left_teamposition, left_build,
+        right_championid, right_teamposition, right_build
+    HAVING total_matchups > 0
+);
+
+EXCHANGE TABLES game_data_filtered.matchup_1v1 AND game_data_filtered.matchup_1v1_next;
+
+DROP TABLE game_data_filtered.matchup_1v1_next;
+
+-- 6004 synergy_2vx (canonical smaller tuple in slot 1; see 6004 build).
+INSERT INTO game_data_filtered.synergy_2vx_state
+SELECT
+    tupleElement(p1, 1) AS championid_1,
+    tupleElement(p1, 2) AS teamposition_1,
+    tupleElement(p1, 3) AS build_1,
+    tupleElement(p2, 1) AS championid_2,
+    tupleElement(p2, 2) AS teamposition_2,
+    tupleElement(p2, 3) AS build_2,
+    sum(sign) AS matchups,
+    sum(sign * team_win) AS wins
+FROM (
+    SELECT
+        if(pair.1 <= pair.2, pair.1, pair.2) AS p1,
+        if(pair.1 <= pair.2, pair.2, pair.1) AS p2,
+        pair.3 AS team_win,
+        pair.4 AS sign
+    FROM game_data_filtered.ml_game_player_delta
+    ARRAY JOIN [
+        (blue_players[1], blue_players[2], blue_win, sign),
+        (blue_players[1], blue_players[3], blue_win, sign),
+        (blue_players[1], blue_players[4], blue_win, sign),
+        (blue_players[1], blue_players[5], blue_win, sign),
+        (blue_players[2], blue_players[3], blue_win, sign),
+        (blue_players[2], blue_players[4], blue_win, sign),
+        (blue_players[2], blue_players[5], blue_win, sign),
+        (blue_players[3], blue_players[4], blue_win, sign),
+        (blue_players[3], blue_players[5], blue_win, sign),
+        (blue_players[4], blue_players[5], blue_win, sign),
+        (red_players[1], red_players[2], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[3], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[3], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[3], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[3], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[4], red_players[5], toUInt8(1 - blue_win), sign)
+    ] AS pair
+)
+GROUP BY
+    championid_1, teamposition_1, build_1,
+    championid_2, teamposition_2, build_2;
+
+DROP TABLE IF EXISTS game_data_filtered.synergy_2vx_next;
+
+CREATE TABLE game_data_filtered.synergy_2vx_next AS game_data_filtered.synergy_2vx;
+
+INSERT INTO game_data_filtered.synergy_2vx_next
+SELECT
+    'train' AS split,
+    championid_1,
+    dictGetOrDefault(
+        'game_data.championid_name_map_dict',
+        'name',
+        toString(championid_1),
+        ''
+    ) AS championname_1,
+    teamposition_1,
+    build_1,
+    championid_2,
+    dictGetOrDefault(
+        'game_data.championid_name_map_dict',
+        'name',
+        toString(championid_2),
+        ''
+    ) AS championname_2,
+    teamposition_2,
+    build_2,
+    toUInt64(total_matchups) AS matchups,
+    toUInt64(total_wins) AS wins,
+    matchups - wins AS losses,
+    toFloat32(wins / matchups) AS win_rate
+FROM (
+    SELECT
+        championid_1, teamposition_1, build_1,
+        championid_2, teamposition_2, build_2,
+        sum(matchups) AS total_matchups,
+        sum(wins) AS total_wins
+    FROM game_data_filtered.synergy_2vx_state
+    GROUP BY
+        championid_1, teamposition_1, build_1,
+        championid_2, teamposition_2, build_2
+    HAVING total_matchups > 0
+);
+
+EXCHANGE TABLES game_data_filtered.synergy_2vx AND game_data_filtered.synergy_2vx_next;
+
+DROP TABLE game_data_filtered.synergy_2vx_next;
+
+-- 6020 matchup_1v1_nobuild (blue perspective, not canonicalised).
+INSERT INTO game_data_filtered.matchup_1v1_nobuild_state
+SELECT
+    tupleElement(pair.1, 1) AS blue_championid,
+    tupleElement(pair.1, 2) AS blue_teamposition,
+    tupleElement(pair.2, 1) AS red_championid,
+    tupleElement(pair.2, 2) AS red_teamposition,
+    sum(p.sign) AS matchups,
+    sum(p.sign * pair.3) AS blue_wins
+FROM game_data_filtered.ml_game_player_delta AS p
+ARRAY JOIN arrayFlatten(arrayMap(
+    b -> arrayMap(
+        r -> (
+            (tupleElement(b, 1), tupleElement(b, 2)),
+            (tupleElement(r, 1), tupleElement(r, 2)),
+            p.blue_win
+        ),
+        p.red_players
+    ),
+    p.blue_players
+)) AS pair
+GROUP BY
+    blue_championid, blue_teamposition,
+    red_championid, red_teamposition;
+
+DROP TABLE IF EXISTS game_data_filtered.matchup_1v1_nobuild_next;
+
+CREATE TABLE game_data_filtered.matchup_1v1_nobuild_next AS game_data_filtered.matchup_1v1_nobuild;
+
+INSERT INTO game_data_filtered.matchup_1v1_nobuild_next
+SELECT
+    'train' AS split,
+    blue_championid,
+    blue_teamposition,
+    red_championid,
+    red_teamposition,
+    toUInt64(total_matchups) AS matchups,
+    toFloat32(total_blue_wins / total_matchups) AS blue_win_rate
+FROM (
+    SELECT
+        blue_championid, blue_teamposition,
+        red_championid, red_teamposition,
+        sum(matchups) AS total_matchups,
+        sum(blue_wins) AS total_blue_wins
+    FROM game_data_filtered.matchup_1v1_nobuild_state
+    GROUP BY
+        blue_championid, blue_teamposition,
+        red_championid, red_teamposition
+    HAVING total_matchups > 0
+);
+
+EXCHANGE TABLES game_data_filtered.matchup_1v1_nobuild AND game_data_filtered.matchup_1v1_nobuild_next;
+
+DROP TABLE game_data_filtered.matchup_1v1_nobuild_next;
+
+-- 6021 matchup_1v1_champ (blue perspective, champions only).
+INSERT INTO game_data_filtered.matchup_1v1_champ_state
+SELECT
+    tupleElement(pair.1, 1) AS blue_championid,
+    tupleElement(pair.2, 1) AS red_championid,
+    sum(p.sign) AS matchups,
+    sum(p.sign * pair.3) AS blue_wins
+FROM game_data_filtered.ml_game_player_delta AS p
+ARRAY JOIN arrayFlatten(arrayMap(
+    b -> arrayMap(
+        r -> (b, r, p.blue_win),
+        p.red_players
+    ),
+    p.blue_players
+)) AS pair
+GROUP BY blue_championid, red_championid;
+
+DROP TABLE IF EXISTS game_data_filtered.matchup_1v1_champ_next;
+
+CREATE TABLE game_data_filtered.matchup_1v1_champ_next AS game_data_filtered.matchup_1v1_champ;
+
+INSERT INTO game_data_filtered.matchup_1v1_champ_next
+SELECT
+    'train' AS split,
+    blue_championid,
+    red_championid,
+    toUInt64(total_matchups) AS matchups,
+    toFloat32(total_blue_wins / total_matchups) AS blue_win_rate
+FROM (
+    SELECT
+        blue_championid,
+        red_championid,
+        sum(matchups) AS total_matchups,
+        sum(blue_wins) AS total_blue_wins
+    FROM game_data_filtered.matchup_1v1_champ_state
+    GROUP BY blue_championid, red_championid
+    HAVING total_matchups > 0
+);
+
+EXCHANGE TABLES game_data_filtered.matchup_1v1_champ AND game_data_filtered.matchup_1v1_champ_next;
+
+DROP TABLE game_data_filtered.matchup_1v1_champ_next;
+
+-- 6022 synergy_2vx_nobuild (canonical smaller (champion, role) first).
+INSERT INTO game_data_filtered.synergy_2vx_nobuild_state
+SELECT
+    tupleElement(p1, 1) AS championid_1,
+    tupleElement(p1, 2) AS teamposition_1,
+    tupleElement(p2, 1) AS championid_2,
+    tupleElement(p2, 2) AS teamposition_2,
+    sum(sign) AS matchups,
+    sum(sign * team_win) AS wins
+FROM (
+    SELECT
+        (tupleElement(pair.1, 1), tupleElement(pair.1, 2)) AS a,
+        (tupleElement(pair.2, 1), tupleElement(pair.2, 2)) AS b,
+        if(a <= b, a, b) AS p1,
+        if(a <= b, b, a) AS p2,
+        pair.3 AS team_win,
+        pair.4 AS sign
+    FROM game_data_filtered.ml_game_player_delta
+    ARRAY JOIN [
+        (blue_players[1], blue_players[2], blue_win, sign),
+        (blue_players[1], blue_players[3], blue_win, sign),
+        (blue_players[1], blue_players[4], blue_win, sign),
+        (blue_players[1], blue_players[5], blue_win, sign),
+        (blue_players[2], blue_players[3], blue_win, sign),
+        (blue_players[2], blue_players[4], blue_win, sign),
+        (blue_players[2], blue_players[5], blue_win, sign),
+        (blue_players[3], blue_players[4], blue_win, sign),
+        (blue_players[3], blue_players[5], blue_win, sign),
+        (blue_players[4], blue_players[5], blue_win, sign),
+        (red_players[1], red_players[2], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[3], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[3], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[3], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[3], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[4], red_players[5], toUInt8(1 - blue_win), sign)
+    ] AS pair
+)
+GROUP BY
+    championid_1, teamposition_1,
+    championid_2, teamposition_2;
+
+DROP TABLE IF EXISTS game_data_filtered.synergy_2vx_nobuild_next;
+
+CREATE TABLE game_data_filtered.synergy_2vx_nobuild_next AS game_data_filtered.synergy_2vx_nobuild;
+
+INSERT INTO game_data_filtered.synergy_2vx_nobuild_next
+SELECT
+    'train' AS split,
+    championid_1,
+    teamposition_1,
+    championid_2,
+    teamposition_2,
+    toUInt64(total_matchups) AS matchups,
+    toFloat32(total_wins / total_matchups) AS win_rate
+FROM (
+    SELECT
+        championid_1, teamposition_1,
+        championid_2, teamposition_2,
+        sum(matchups) AS total_matchups,
+        sum(wins) AS total_wins
+    FROM game_data_filtered.synergy_2vx_nobuild_state
+    GROUP BY
+        championid_1, teamposition_1,
+        championid_2, teamposition_2
+    HAVING total_matchups > 0
+);
+
+EXCHANGE TABLES game_data_filtered.synergy_2vx_nobuild AND game_data_filtered.synergy_2vx_nobuild_next;
+
+DROP TABLE game_data_filtered.synergy_2vx_nobuild_next;
+
+-- 6023 synergy_2vx_champ (champions only, least/greatest ordered).
+INSERT INTO game_data_filtered.synergy_2vx_champ_state
+SELECT
+    least(c1, c2) AS championid_1,
+    greatest(c1, c2) AS championid_2,
+    sum(sign) AS matchups,
+    sum(sign * team_win) AS wins
+FROM (
+    SELECT
+        tupleElement(pair.1, 1) AS c1,
+        tupleElement(pair.2, 1) AS c2,
+        pair.3 AS team_win,
+        pair.4 AS sign
+    FROM game_data_filtered.ml_game_player_delta
+    ARRAY JOIN [
+        (blue_players[1], blue_players[2], blue_win, sign),
+        (blue_players[1], blue_players[3], blue_win, sign),
+        (blue_players[1], blue_players[4], blue_win, sign),
+        (blue_players[1], blue_players[5], blue_win, sign),
+        (blue_players[2], blue_players[3], blue_win, sign),
+        (blue_players[2], blue_players[4], blue_win, sign),
+        (blue_players[2], blue_players[5], blue_win, sign),
+        (blue_players[3], blue_players[4], blue_win, sign),
+        (blue_players[3], blue_players[5], blue_win, sign),
+        (blue_players[4], blue_players[5], blue_win, sign),
+        (red_players[1], red_players[2], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[3], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[1], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[3], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[2], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[3], red_players[4], toUInt8(1 - blue_win), sign),
+        (red_players[3], red_players[5], toUInt8(1 - blue_win), sign),
+        (red_players[4], red_players[5], toUInt8(1 - blue_win), sign)
+    ] AS pair
+)
+GROUP BY
+    championid_1, championid_2;
+
+DROP TABLE IF EXISTS game_data_filtered.synergy_2vx_champ_next;
+
+CREATE TABLE game_data_filtered.synergy_2vx_champ_next AS game_data_filtered.synergy_2vx_champ;
+
+INSERT INTO game_data_filtered.synergy_2vx_champ_next
+SELECT
+    'train' AS split,
+    championid_1,
+    championid_2,
+    toUInt64(total_matchups) AS matchups,
+    toFloat32(total_wins / total_matchups) AS win_rate
+FROM (
+    SELECT
+        championid_1,
+        championid_2,
+        sum(matchups) AS total_matchups,
+        sum(wins) AS total_wins
+    FROM game_data_filtered.synergy_2vx_champ_state
+    GROUP BY championid_1, championid_2
+    HAVING total_matchups > 0
+);
+
+EXCHANGE TABLES game_data_filtered.synergy_2vx_champ AND game_data_filtered.synergy_2vx_champ_next;
+
+DROP TABLE game_data_filtered.synergy_2vx_champ_next;
+
+-- Commit: applied - retracted + added, swapped in, then clear the delta.
+DROP TABLE IF EXISTS game_data_filtered.ml_game_player_applied_next;
+
+CREATE TABLE game_data_filtered.ml_game_player_applied_next
+AS game_data_filtered.ml_game_player_applied;
+
+INSERT INTO game_data_filtered.ml_game_player_applied_next
+SELECT
+    matchid,
+    blue_win,
+    blue_players,
+    red_players,
+    fingerprint
+FROM game_data_filtered.ml_game_player_applied
+WHERE (matchid, fingerprint) NOT IN (
+    SELECT matchid, fingerprint
+    FROM game_data_filtered.ml_game_player_delta
+    WHERE sign < 0
+)
+
+UNION ALL
+
+SELECT
+    matchid,
+    blue_win,
+    blue_players,
+    red_players,
+    fingerprint
+FROM game_data_filtered.ml_game_player_delta
+WHERE sign > 0;
+
+EXCHANGE TABLES game_data_filtered.ml_game_player_applied
+AND game_data_filtered.ml_game_player_applied_next;
+
+DROP TABLE game_data_filtered.ml_game_player_applied_next;
+
+TRUNCATE TABLE game_data_filtered.ml_game_player_delta;
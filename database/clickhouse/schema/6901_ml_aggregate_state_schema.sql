@@ -0,0 +1,137 @@
+-- noqa: disable=LT01,LT05,PRS
+--
+-- Incremental maintenance state for the pivot-derived aggregations
+-- (6000, 6004, 6020-6023). Refreshed by 6901_ml_aggregate_incremental_build.sql.
+--
+-- ml_game_player_applied is the set of train pivot rows the *_state tables
+-- currently reflect; ml_game_player_delta holds one refresh's signed changes
+-- (+1 new or changed game, -1 game dropped, re-split or changed). It is empty
+-- between refreshes.
+--
+-- *_state tables are SummingMergeTree over signed Int64 counters: retracted
+-- games subtract, and keys whose counters reach zero disappear on merge.
+-- Readers must still sum() per key. Re-running this file resets the
+-- incremental path; the next refresh then folds the whole pivot in.
+
+DROP TABLE IF EXISTS game_data_filtered.ml_game_player_applied;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.ml_game_player_applied
+(
+    matchid String,
+    blue_win UInt8,
+    blue_players Array(Tuple(Int32, String, String, String)),
+    red_players Array(Tuple(Int32, String, String, String)),
+    fingerprint UInt64
+)
+ENGINE = MergeTree
+ORDER BY matchid;
+
+DROP TABLE IF EXISTS game_data_filtered.ml_game_player_delta;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.ml_game_player_delta
+(
+    matchid String,
+    blue_win UInt8,
+    blue_players Array(Tuple(Int32, String, String, String)),
+    red_players Array(Tuple(Int32, String, String, String)),
+    fingerprint UInt64,
+    sign Int8
+)
+ENGINE = MergeTree
+ORDER BY matchid;
+
+DROP TABLE IF EXISTS game_data_filtered.matchup_1v1_state;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.matchup_1v1_state
+(
+    left_championid Int32,
+    left_teamposition LowCardinality(String),
+    left_build LowCardinality(String),
+    right_championid Int32,
+    right_teamposition LowCardinality(String),
+    right_build LowCardinality(String),
+    matchups Int64,
+    left_wins Int64
+)
+ENGINE = SummingMergeTree
+ORDER BY (
+    left_championid, left_teamposition, left_build,
+    right_championid, right_teamposition, right_build
+);
+
+DROP TABLE IF EXISTS game_data_filtered.synergy_2vx_state;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.synergy_2vx_state
+(
+    championid_1 Int32,
+    teamposition_1 LowCardinality(String),
+    build_1 LowCardinality(String),
+    championid_2 Int32,
+    teamposition_2 LowCardinality(String),
+    build_2 LowCardinality(String),
+    matchups Int64,
+    wins Int64
+)
+ENGINE = SummingMergeTree
+ORDER BY (
+    championid_1, teamposition_1, build_1,
+    championid_2, teamposition_2, build_2
+);
+
+DROP TABLE IF EXISTS game_data_filtered.matchup_1v1_nobuild_state;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.matchup_1v1_nobuild_state
+(
+    blue_championid Int32,
+    blue_teamposition LowCardinality(String),
+    red_championid Int32,
+    red_teamposition LowCardinality(String),
+    matchups Int64,
+    blue_wins Int64
+)
+ENGINE = SummingMergeTree
+ORDER BY (
+    blue_championid, blue_teamposition,
+    red_championid, red_teamposition
+);
+
+DROP TABLE IF EXISTS game_data_filtered.matchup_1v1_champ_state;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.matchup_1v1_champ_state
+(
+    blue_championid Int32,
+    red_championid Int32,
+    matchups Int64,
+    blue_wins Int64
+)
+ENGINE = SummingMergeTree
+ORDER BY (blue_championid, red_championid);
+
+DROP TABLE IF EXISTS game_data_filtered.synergy_2vx_nobuild_state;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.synergy_2vx_nobuild_state
+(
+    championid_1 Int32,
+    teamposition_1 LowCardinality(String),
+    championid_2 Int32,
+    teamposition_2 LowCardinality(String),
+    matchups Int64,
+    wins Int64
+)
+ENGINE = SummingMergeTree
+ORDER BY (
+    championid_1, teamposition_1,
+    championid_2, teamposition_2
+);
+
+DROP TABLE IF EXISTS game_data_filtered.synergy_2vx_champ_state;
+
+CREATE TABLE IF NOT EXISTS game_data_filtered.synergy_2vx_champ_state
+(
+    championid_1 Int32,
+    championid_2 Int32,
+    matchups Int64,
+    wins Int64
+)
+ENGINE = SummingMergeTree
+ORDER BY (championid_1, championid_2);
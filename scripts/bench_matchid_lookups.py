@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Benchmark the matchdata anchor and residue lookups against a live ClickHouse.
+
+Runs the SQL the pipeline issues for a sample of matchids (anchor reads on
+``info`` / ``tl_game_end``, live-writer reads on raw tables, and the
+``game_data.matchids`` probe that precedes every residue delete) and records
+the median server elapsed time, rows read and bytes read from the query
+summaries. ``matchids.probe.has`` is the pre-D13 ``has()`` form of the probe.
+
+    python scripts/bench_matchid_lookups.py --output before.json
+    database/clickhouse/migrations/2026-10-19_d13_matchid_lookup_indexes.sh
+    python scripts/bench_matchid_lookups.py --output after.json --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from database.clickhouse.client import get_client
+from database.clickhouse.operations.matchdata import (
+    NON_TIMELINE_ANCHOR_TABLE,
+    TIMELINE_ANCHOR_TABLE,
+    _has_matching_rows_sql,
+    _matchid_runs_sql,
+    _matching_matchids_sql,
+)
+
+SOURCE_MATCHIDS_TABLE = "game_data.matchids"
+DEFAULT_SAMPLE = 500
+DEFAULT_ROUNDS = 5
+DEFAULT_RESIDUE_TABLES = ("game_data.participant_stats", "game_data.tl_participant_stats")
+
+
+def bench_queries(residue_tables: Sequence[str]) -> dict[str, str]:
+    queries = {
+        "anchor.non_timeline": _matching_matchids_sql(
+            NON_TIMELINE_ANCHOR_TABLE, "non_timeline"
+        ),
+        "anchor.timeline": _matching_matchids_sql(TIMELINE_ANCHOR_TABLE, "timeline"),
+        "matchids.probe": _has_matching_rows_sql(SOURCE_MATCHIDS_TABLE),
+        "matchids.probe.has": f"""
+            SELECT 1
+            FROM {SOURCE_MATCHIDS_TABLE}
+            WHERE has(%(match_ids)s, matchid)
+            LIMIT 1
+        """,
+    }
+    for table in residue_tables:
+        stream = "timeline" if table.split(".")[-1].startswith("tl_") else "non_timeline"
+        queries[f"residue.runs.{table.split('.')[-1]}"] = _matchid_runs_sql(table, stream)
+    return queries
+
+
+def sample_matchids(client, size: int) -> list[str]:
+    # Deterministic spread across the key space, and ids that exist in both the
+    # queue source and the anchors, like a batch being resolved.
+    rows = client.query(
+        f"""
+        SELECT matchid
+        FROM {NON_TIMELINE_ANCHOR_TABLE}
+        ORDER BY cityHash64('bench_matchid_lookups', matchid)
+        LIMIT %(size)s
+        """,
+        parameters={"size": size},
+    ).result_rows
+    return [row[0] for row in rows]
+
+
+def run_query(client, sql: str, match_ids: list[str], rounds: int) -> dict[str, Any]:
+    elapsed_ms: list[float] = []
+    summary: dict[str, Any] = {}
+    for _ in range(rounds):
+        result = client.query(sql, parameters={"match_ids": match_ids})
+        summary = result.summary or {}
+        elapsed_ms.append(int(summary.get("elapsed_ns", 0)) / 1e6)
+    return {
+        "elapsed_ms_median": round(statistics.median(elapsed_ms), 3),
+        "read_rows": int(summary.get("read_rows", 0)),
+        "read_bytes": int(summary.get("read_bytes", 0)),
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> None:
+    print(f"{'query':<40}{'ms':>10}{'rows read':>14}{'bytes read':>14}")
+    for name, now in current["queries"].items():
+        before = baseline["queries"].get(name)
+        if before is None:
+            continue
+        cells = [
+            f"{now[key] / before[key]:.2f}x" if before[key] else "n/a"
+            for key in ("elapsed_ms_median", "read_rows", "read_bytes")
+        ]
+        print(f"{name:<40}{cells[0]:>10}{cells[1]:>14}{cells[2]:>14}")
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument(
+        "--residue-table",
+        action="append",
+        dest="residue_tables",
+        help="Raw table for residue reads (repeatable).",
+    )
+    parser.add_argument("--output", type=Path, help="Write results as JSON.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    client = get_client()
+    match_ids = sample_matchids(client, args.sample)
+    if not match_ids:
+        raise SystemExit(f"No matchids in {NON_TIMELINE_ANCHOR_TABLE} to sample.")
+
+    results: dict[str, Any] = {"sample": len(match_ids), "rounds": args.rounds, "queries": {}}
+    for name, sql in bench_queries(args.residue_tables or DEFAULT_RESIDUE_TABLES).items():
+        stats = run_query(client, sql, match_ids, args.rounds)
+        results["queries"][name] = stats
+        print(
+            f"{name:<40}{stats['elapsed_ms_median']:>10.1f} ms"
+            f"{stats['read_rows']:>14,} rows{stats['read_bytes'] / 1e6:>12.1f} MB"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the matchdata parsers and schema drift checker.
+
+Each stage runs in its own spawned process so peak RSS is attributable to one
+parser. Reports ns per event (timeline: frame events + participant frames;
+non-timeline: participants) and tracemalloc peak bytes per case, and the
+stage's peak RSS growth. The per-case metrics are compared against the stored
+baseline; RSS is a high-water mark over the whole stage, so it is only printed.
+
+    python scripts/bench_parsers.py                    # compare to baseline
+    python scripts/bench_parsers.py --update-baseline  # re-record baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.parser_bench_corpus import BenchCase, build_corpus, load_corpus_dir
+
+BASELINE_PATH = Path(__file__).with_name("bench_parsers_baseline.json")
+STAGES = (
+    "non_timeline.drift",
+    "non_timeline.run",
+    "timeline.drift",
+    "timeline.run",
+    "timeline.stream",
+)
+# Stages fed the undecoded JSON body instead of the decoded dict.
+BYTES_STAGES = frozenset({"timeline.stream"})
+DEFAULT_ROUNDS = 15
+DEFAULT_TOLERANCE = 0.20
+# Per-case metrics compared against the baseline; higher is worse for both.
+COMPARED_METRICS = ("ns_per_event", "alloc_peak_bytes")
+
+
+def _stage_callable(stage: str) -> tuple[Callable[[dict[str, Any]], Any], str]:
+    from app.services.riot_api_client.parsers import schema_drift
+    from app.services.riot_api_client.parsers.non_timeline import (
+        MatchDataNonTimelineParsingOrchestrator,
+    )
+    from app.services.riot_api_client.parsers.timeline import (
+        MatchDataTimelineParsingOrchestrator,
+    )
+
+    funcs: dict[str, Callable[[dict[str, Any]], Any]] = {
+        "non_timeline.drift": schema_drift.non_timeline,
+        "non_timeline.run": MatchDataNonTimelineParsingOrchestrator().run,
+        "timeline.drift": schema_drift.timeline,
+        "timeline.run": MatchDataTimelineParsingOrchestrator().run,
+        "timeline.stream": MatchDataTimelineParsingOrchestrator().run_stream,
+    }
+    if stage not in funcs:
+        raise ValueError(f"Unknown benchmark stage: {stage}")
+    return funcs[stage], stage.partition(".")[0]
+
+
+def _units(case: BenchCase, stream: str) -> int:
+    units = case.timeline_events if stream == "timeline" else case.participants
+    return max(1, units)
+
+
+def _max_rss_kib() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _measure_stage(
+    stage: str,
+    rounds: int,
+    corpus_dir: str | None,
+) -> list[dict[str, Any]]:
+    logging.disable(logging.CRITICAL)
+    cases = list(load_corpus_dir(Path(corpus_dir))) if corpus_dir else list(build_corpus())
+    func, stream = _stage_callable(stage)
+    rss_before = _max_rss_kib()
+    results: list[dict[str, Any]] = []
+
+    for case in cases:
+        raw: Any = case.timeline if stream == "timeline" else case.non_timeline
+        if stage in BYTES_STAGES:
+            raw = json.dumps(raw).encode()
+        units = _units(case, stream)
+        func(raw)  # warm-up: pydantic schema build, drift-schema caches
+
+        samples: list[int] = []
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            func(raw)
+            samples.append(time.perf_counter_ns() - start)
+
+        tracemalloc.start()
+        func(raw)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append(
+            {
+                "stage": stage,
+                "case": case.name,
+                "units": units,
+                "ns_per_event": int(statistics.median(samples) / units),
+                "ns_per_event_min": int(min(samples) / units),
+                "alloc_peak_bytes": peak,
+            }
+        )
+
+    # ru_maxrss only ever rises, so growth cannot be split between cases.
+    rss_growth = max(0, _max_rss_kib() - rss_before)
+    for result in results:
+        result["stage_rss_peak_kib"] = rss_growth
+    return results
+
+
+def run_benchmarks(
+    *,
+    stages: Sequence[str] = STAGES,
+    rounds: int = DEFAULT_ROUNDS,
+    corpus_dir: Path | None = None,
+) -> list[dict[str, Any]]:
+    ctx = multiprocessing.get_context("spawn")
+    results: list[dict[str, Any]] = []
+    for stage in stages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.extend(
+                pool.submit(
+                    _measure_stage,
+                    stage,
+                    rounds,
+                    str(corpus_dir) if corpus_dir else None,
+                ).result()
+            )
+    return results
+
+
+def _result_key(result: dict[str, Any]) -> str:
+    return f"{result['stage']}/{result['case']}"
+
+
+def compare_to_baseline(
+    results: Sequence[dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    *,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """Return one message per metric that regressed beyond ``tolerance``."""
+    regressions: list[str] = []
+    for result in results:
+        key = _result_key(result)
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        for metric in COMPARED_METRICS:
+            base = expected.get(metric)
+            value = result.get(metric)
+            if not base or value is None:
+                continue
+            ratio = value / base
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{key} {metric}: {value} vs baseline {base} ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def _load_baseline(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def _write_baseline(path: Path, results: Sequence[dict[str, Any]]) -> None:
+    payload = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": {
+            _result_key(result): {
+                metric: result[metric] for metric in ("units", *COMPARED_METRICS)
+            }
+            for result in results
+        },
+    }
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _print_results(
+    results: Sequence[dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+) -> None:
+    print(
+        f"{'stage/case':<28} {'units':>6} {'ns/event':>10} {'min':>10} "
+        f"{'alloc_peak':>12} {'stage_rss':>10} {'vs_base':>8}"
+    )
+    for result in results:
+        key = _result_key(result)
+        base = baseline.get(key, {}).get("ns_per_event")
+        delta = f"{result['ns_per_event'] / base:.2f}x" if base else "-"
+        print(
+            f"{key:<28} {result['units']:>6} {result['ns_per_event']:>10} "
+            f"{result['ns_per_event_min']:>10} {result['alloc_peak_bytes']:>12} "
+            f"{result['stage_rss_peak_kib']:>10} {delta:>8}"
+        )
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the matchdata parsers and drift checker."
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=STAGES,
+        help="Benchmark only this stage. Can be provided multiple times.",
+    )
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument(
+        "--corpus-dir",
+        type=Path,
+        help="Directory of <name>.non_timeline.json[.zst] / <name>.timeline.json[.zst] "
+        "pairs to benchmark instead of the synthetic corpus (anonymized on load).",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Overwrite the baseline file with this run's results.",
+    )
+    parser.add_argument("--json-out", type=Path, help="Write raw results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    results = run_benchmarks(
+        stages=tuple(args.stage or STAGES),
+        rounds=args.rounds,
+        corpus_dir=args.corpus_dir,
+    )
+    baseline = _load_baseline(args.baseline)
+    _print_results(results, baseline)
+
+    if args.json_out:
+        args.json_out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.update_baseline:
+        _write_baseline(args.baseline, results)
+        print(f"Baseline written: {args.baseline}")
+        return
+
+    regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+    if regressions:
+        print("Regressions beyond tolerance:")
+        for message in regressions:
+            print(f"  {message}")
+        raise SystemExit(1)
+    print("No regressions beyond tolerance." if baseline else "No baseline recorded.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Refresh game_data_filtered.valid_game_ids and participant_stats.
+
+Run after ``4000_filter_build.sql``. By default only the valid-id delta since
+the previous build is applied; a full rebuild runs when no build has been
+recorded yet or the filter SQL changed since the last one. With the D14
+game_month layout, ``--game-month`` recopies just those months instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from database.clickhouse.client import bind_query_profile
+from database.clickhouse.operations.filtered_db import (
+    build_filtered_db,
+    refresh_filtered_months,
+)
+from database.clickhouse.query_tags import tagged_stage
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the filtered database fully or from the valid-id delta."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=("auto", "full", "incremental"),
+        default="auto",
+        help="auto (default) is incremental unless the filter catalogue changed.",
+    )
+    parser.add_argument(
+        "--game-month",
+        action="append",
+        type=int,
+        default=[],
+        help="Only recopy this YYYYMM partition (repeatable); ignores --mode.",
+    )
+    return parser.parse_args(argv)
+
+
+@tagged_stage("filtered_db.build")
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    bind_query_profile("heavy")
+    if args.game_month:
+        for table, rows in refresh_filtered_months(args.game_month).items():
+            print(f"{table}: {rows} rows across months {args.game_month}.")
+        return
+    result = build_filtered_db(args.mode)
+    if result.mode == "full":
+        print(f"Full rebuild (filter catalogue {result.catalogue_hash}).")
+        return
+    print(
+        f"Incremental build: +{result.added} / -{result.removed} valid matches "
+        f"(filter catalogue {result.catalogue_hash})."
+    )
+
+
+if __name__ == "__main__":
+    main()
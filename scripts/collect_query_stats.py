@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Report per-stage ClickHouse query cost from system.query_log.
+
+Sums read rows, read bytes, peak memory and duration of the queries the
+pipelines tagged with a ``log_comment`` (stage, run_id, batch), per stage, run
+and batch. Each collection appends JSON lines to ``--output``. With
+``--interval`` it keeps collecting consecutive windows and serves the
+``clickhouse_query_*`` series on ``--metrics-port`` for Prometheus.
+
+    python scripts/collect_query_stats.py --since-minutes 120 --output query_stats.jsonl
+    python scripts/collect_query_stats.py --interval 60 --metrics-port 9105
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.api.v1.metrics.telemetry import serve_metrics
+from database.clickhouse.client import get_client
+from database.clickhouse.operations.query_log import (
+    StageQueryStats,
+    collect_query_stats,
+    export_stage_stats,
+    write_report,
+)
+
+# query_log entries are flushed every few seconds; stay this far behind now.
+LOG_LAG = timedelta(seconds=10)
+
+
+def print_stats(stats: list[StageQueryStats]) -> None:
+    print(f"{'stage':<44}{'queries':>9}{'rows read':>15}{'MB read':>11}{'peak MB':>10}{'s':>9}")
+    for row in stats:
+        label = f"{row.stage}[{row.batch}]" if row.batch else row.stage
+        print(
+            f"{label:<44}{row.queries:>9,}{row.read_rows:>15,}"
+            f"{row.read_bytes / 1e6:>11.1f}{row.peak_memory_bytes / 1e6:>10.1f}"
+            f"{row.duration_ms / 1000:>9.1f}"
+        )
+
+
+def collect_window(since: datetime, until: datetime, output: Path | None) -> None:
+    stats = collect_query_stats(since, until, client=get_client())
+    export_stage_stats(stats)
+    if output:
+        write_report(output, stats, since=since, until=until)
+    print_stats(stats)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--since-minutes", type=int, default=60)
+    parser.add_argument("--output", type=Path, help="Append JSON lines here.")
+    parser.add_argument(
+        "--interval", type=int, default=0, help="Seconds between collections (0 = once)."
+    )
+    parser.add_argument("--metrics-port", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    serve_metrics(args.metrics_port)
+    until = datetime.now(UTC) - LOG_LAG
+    since = until - timedelta(minutes=args.since_minutes)
+    while True:
+        collect_window(since, until, args.output)
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+        since, until = until, datetime.now(UTC) - LOG_LAG
+
+
+if __name__ == "__main__":
+    main()
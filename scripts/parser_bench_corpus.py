@@ -0,0 +1,560 @@
+"""Deterministic, anonymized match payload corpus for the parser benchmarks.
+
+Payloads are generated from fixed seeds rather than checked in as raw Riot
+JSON: a long timeline is ~1 MB, and generated ids/names are anonymous by
+construction. Every case passes the drift checker and model validation so the
+benchmarks exercise the same code paths as live payloads. Real archived payloads
+can be benchmarked instead via ``load_corpus_dir`` after ``anonymize_payload``.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.services.riot_api_client.parsers.models.non_timeline import (
+    CHALLENGE_ALIASES,
+    CHALLENGE_FIELDS,
+    CHALLENGE_LIST_FIELDS,
+    Participant,
+)
+from app.worker.pipelines.payload_archive import read_payload, scan_archive
+
+FRAME_INTERVAL_MS = 60_000
+GAME_CREATION_MS = 1_740_000_000_000
+GAME_VERSION = "15.3.654.1234"
+TEAM_POSITIONS = ("TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY")
+WARD_TYPES = ("YELLOW_TRINKET", "CONTROL_WARD", "SIGHT_WARD", "BLUE_TRINKET")
+LANE_TYPES = ("TOP_LANE", "MID_LANE", "BOT_LANE")
+MONSTER_TYPES = ("DRAGON", "HORDE", "RIFTHERALD", "BARON_NASHOR")
+SKILL_LEVEL_UP_TYPES = ("NORMAL", "EVOLVE")
+ITEM_IDS = (1055, 1056, 2003, 2055, 3006, 3031, 3047, 3071, 3089, 3157, 6672)
+
+# Participant fields given realistic values; every other required field is
+# filled from its annotation so new model fields do not break the corpus.
+_PARTICIPANT_OVERRIDES = {
+    "challenges",
+    "missions",
+    "perks",
+    "PlayerBehavior",
+    "puuid",
+    "participantId",
+    "teamId",
+    "teamPosition",
+    "individualPosition",
+    "lane",
+    "role",
+    "championId",
+    "championName",
+    "riotIdGameName",
+    "riotIdTagline",
+    "summonerId",
+    "summonerName",
+    "win",
+}
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    name: str
+    non_timeline: dict[str, Any]
+    timeline: dict[str, Any]
+
+    @property
+    def timeline_events(self) -> int:
+        frames = self.timeline["info"]["frames"]
+        return sum(
+            len(frame["events"]) + len(frame["participantFrames"] or {})
+            for frame in frames
+        )
+
+    @property
+    def participants(self) -> int:
+        return len(self.non_timeline["info"]["participants"])
+
+
+def _anon_puuid(match_id: str, idx: int) -> str:
+    # FixedString(78) in ClickHouse; pad the synthetic id to the real width.
+    return f"anon-{match_id}-{idx:02d}".ljust(78, "0")
+
+
+def _default_for(annotation: Any, rng: random.Random) -> Any:
+    if annotation is bool:
+        return False
+    if annotation is str:
+        return ""
+    return rng.randint(0, 250)
+
+
+def _participant(
+    rng: random.Random,
+    *,
+    match_id: str,
+    idx: int,
+    team_size: int,
+    win_team: int,
+) -> dict[str, Any]:
+    team_id = 100 if idx < team_size else 200
+    position = TEAM_POSITIONS[idx % len(TEAM_POSITIONS)]
+    puuid = _anon_puuid(match_id, idx)
+    row: dict[str, Any] = {
+        name: _default_for(field.annotation, rng)
+        for name, field in Participant.model_fields.items()
+        if field.is_required() and name not in _PARTICIPANT_OVERRIDES
+    }
+    row.update(
+        {
+            "puuid": puuid,
+            "participantId": idx + 1,
+            "teamId": team_id,
+            "teamPosition": position,
+            "individualPosition": position,
+            "lane": position,
+            "role": "SOLO",
+            "championId": rng.randint(1, 950),
+            "championName": f"Champion{idx}",
+            "riotIdGameName": f"anon{idx}",
+            "riotIdTagline": "ANON",
+            "summonerId": f"anon-summoner-{idx}",
+            "summonerName": "",
+            "win": team_id == win_team,
+            "missions": {f"playerScore{i}": 0 for i in range(12)},
+            "PlayerBehavior": {"PlayerBehavior_IsHeroInCombat": rng.randint(0, 1)},
+            "challenges": {
+                CHALLENGE_ALIASES.get(name, name): (
+                    [rng.choice(ITEM_IDS)]
+                    if name in CHALLENGE_LIST_FIELDS
+                    else round(rng.random() * 10, 3)
+                )
+                for name in CHALLENGE_FIELDS
+            },
+            "perks": {
+                "statPerks": {"defense": 5001, "flex": 5008, "offense": 5005},
+                "styles": [
+                    {
+                        "description": "primaryStyle",
+                        "style": 8100,
+                        "selections": [
+                            {"perk": 8112 + i, "var1": rng.randint(0, 900), "var2": 0, "var3": 0}
+                            for i in range(4)
+                        ],
+                    },
+                    {
+                        "description": "subStyle",
+                        "style": 8300,
+                        "selections": [
+                            {"perk": 8304 + i, "var1": rng.randint(0, 90), "var2": 0, "var3": 0}
+                            for i in range(2)
+                        ],
+                    },
+                ],
+            },
+        }
+    )
+    return row
+
+
+def _objective(rng: random.Random) -> dict[str, Any]:
+    return {"first": rng.random() < 0.5, "kills": rng.randint(0, 4)}
+
+
+def _team(rng: random.Random, *, team_id: int, win: bool) -> dict[str, Any]:
+    return {
+        "teamId": team_id,
+        "win": win,
+        "bans": [
+            {"championId": rng.randint(1, 950), "pickTurn": turn}
+            for turn in range(1, 6)
+        ],
+        "feats": {
+            "EPIC_MONSTER_KILL": {"featState": rng.randint(0, 3)},
+            "FIRST_BLOOD": {"featState": rng.randint(0, 1)},
+            "FIRST_TURRET": {"featState": rng.randint(0, 1)},
+        },
+        "objectives": {
+            name: _objective(rng)
+            for name in (
+                "atakhan",
+                "baron",
+                "champion",
+                "dragon",
+                "horde",
+                "inhibitor",
+                "riftHerald",
+                "tower",
+            )
+        },
+    }
+
+
+def _non_timeline(
+    rng: random.Random,
+    *,
+    match_id: str,
+    duration_s: int,
+    team_size: int,
+    game_mode: str,
+    queue_id: int,
+    end_of_game_result: str,
+) -> dict[str, Any]:
+    participant_count = team_size * 2 if game_mode == "CLASSIC" else team_size
+    participants = [
+        _participant(rng, match_id=match_id, idx=idx, team_size=team_size, win_team=100)
+        for idx in range(participant_count)
+    ]
+    return {
+        "metadata": {
+            "dataVersion": "2",
+            "matchId": match_id,
+            "participants": [p["puuid"] for p in participants],
+        },
+        "info": {
+            "endOfGameResult": end_of_game_result,
+            "gameCreation": GAME_CREATION_MS,
+            "gameDuration": duration_s,
+            "gameEndTimestamp": GAME_CREATION_MS + 60_000 + duration_s * 1000,
+            "gameId": int(match_id.split("_", 1)[1]),
+            "gameMode": game_mode,
+            "gameName": "teambuilder-match-anon",
+            "gameStartTimestamp": GAME_CREATION_MS + 60_000,
+            "gameType": "MATCHED_GAME",
+            "gameVersion": GAME_VERSION,
+            "mapId": 11,
+            "participants": participants,
+            "platformId": match_id.split("_", 1)[0],
+            "queueId": queue_id,
+            "teams": [
+                _team(rng, team_id=100, win=True),
+                _team(rng, team_id=200, win=False),
+            ],
+            "tournamentCode": "",
+        },
+    }
+
+
+def _position(rng: random.Random) -> dict[str, int]:
+    return {"x": rng.randint(0, 14_800), "y": rng.randint(0, 14_800)}
+
+
+def _participant_frame(rng: random.Random, pid: int, minute: int) -> dict[str, Any]:
+    return {
+        "participantId": pid,
+        "championStats": {
+            name: rng.randint(0, 400)
+            for name in (
+                "abilityHaste", "abilityPower", "armor", "armorPen",
+                "armorPenPercent", "attackDamage", "attackSpeed",
+                "bonusArmorPenPercent", "bonusMagicPenPercent", "ccReduction",
+                "cooldownReduction", "health", "healthMax", "healthRegen",
+                "lifesteal", "magicPen", "magicPenPercent", "magicResist",
+                "movementSpeed", "omnivamp", "physicalVamp", "power", "powerMax",
+                "powerRegen", "spellVamp",
+            )
+        },
+        "currentGold": rng.randint(0, 3_000),
+        "damageStats": {
+            name: rng.randint(0, 10_000) * minute
+            for name in (
+                "magicDamageDone", "magicDamageDoneToChampions", "magicDamageTaken",
+                "physicalDamageDone", "physicalDamageDoneToChampions",
+                "physicalDamageTaken", "totalDamageDone", "totalDamageDoneToChampions",
+                "totalDamageTaken", "trueDamageDone", "trueDamageDoneToChampions",
+                "trueDamageTaken",
+            )
+        },
+        "goldPerSecond": 0,
+        "jungleMinionsKilled": rng.randint(0, 8) * minute,
+        "level": min(18, 1 + minute // 2),
+        "minionsKilled": rng.randint(0, 10) * minute,
+        "position": _position(rng),
+        "timeEnemySpentControlled": rng.randint(0, 5_000),
+        "totalGold": 500 + rng.randint(300, 500) * minute,
+        "xp": 280 * minute,
+    }
+
+
+def _damage_instances(rng: random.Random, count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "basic": rng.random() < 0.3,
+            "magicDamage": rng.randint(0, 400),
+            "name": f"Champion{rng.randint(0, 9)}",
+            "participantId": rng.randint(1, 10),
+            "physicalDamage": rng.randint(0, 400),
+            "spellName": f"spell{rng.randint(0, 40)}",
+            "spellSlot": rng.randint(0, 3),
+            "trueDamage": rng.randint(0, 50),
+            "type": "OTHER",
+        }
+        for _ in range(count)
+    ]
+
+
+def _frame_events(
+    rng: random.Random, *, ts0: int, participants: int, minute: int
+) -> list[dict[str, Any]]:
+    def ts() -> int:
+        return ts0 + rng.randint(0, FRAME_INTERVAL_MS - 1)
+
+    def pid() -> int:
+        return rng.randint(1, participants)
+
+    events: list[dict[str, Any]] = []
+    for _ in range(rng.randint(4, 9)):
+        events.append(
+            {"type": "ITEM_PURCHASED", "timestamp": ts(), "participantId": pid(), "itemId": rng.choice(ITEM_IDS)}
+        )
+    for _ in range(rng.randint(2, 5)):
+        events.append(
+            {
+                "type": "SKILL_LEVEL_UP",
+                "timestamp": ts(),
+                "participantId": pid(),
+                "skillSlot": rng.randint(1, 4),
+                "levelUpType": rng.choice(SKILL_LEVEL_UP_TYPES),
+            }
+        )
+        events.append({"type": "LEVEL_UP", "timestamp": ts(), "participantId": pid(), "level": min(18, minute + 1)})
+    for _ in range(rng.randint(3, 7)):
+        events.append(
+            {"type": "WARD_PLACED", "timestamp": ts(), "creatorId": pid(), "wardType": rng.choice(WARD_TYPES)}
+        )
+    if minute >= 3:
+        events.append(
+            {"type": "WARD_KILL", "timestamp": ts(), "killerId": pid(), "wardType": rng.choice(WARD_TYPES)}
+        )
+        events.append({"type": "ITEM_DESTROYED", "timestamp": ts(), "participantId": pid(), "itemId": 2003})
+    if rng.random() < 0.2:
+        events.append({"type": "ITEM_SOLD", "timestamp": ts(), "participantId": pid(), "itemId": 1055})
+    if rng.random() < 0.1:
+        events.append(
+            {"type": "ITEM_UNDO", "timestamp": ts(), "participantId": pid(), "beforeId": 1055, "afterId": 0, "goldGain": 450}
+        )
+    for _ in range(rng.randint(0, 3) if minute >= 2 else 0):
+        killer, victim = pid(), pid()
+        events.append(
+            {
+                "type": "CHAMPION_KILL",
+                "timestamp": ts(),
+                "bounty": 300,
+                "killStreakLength": rng.randint(0, 4),
+                "killerId": killer,
+                "victimId": victim,
+                "position": _position(rng),
+                "shutdownBounty": 0,
+                "assistingParticipantIds": [pid() for _ in range(rng.randint(0, 3))],
+                "victimDamageDealt": _damage_instances(rng, rng.randint(2, 8)),
+                "victimDamageReceived": _damage_instances(rng, rng.randint(4, 12)),
+            }
+        )
+        if rng.random() < 0.3:
+            events.append(
+                {
+                    "type": "CHAMPION_SPECIAL_KILL",
+                    "timestamp": ts(),
+                    "killType": "KILL_MULTI",
+                    "killerId": killer,
+                    "multiKillLength": 2,
+                    "position": _position(rng),
+                }
+            )
+    if minute >= 5 and rng.random() < 0.35:
+        events.append(
+            {
+                "type": "ELITE_MONSTER_KILL",
+                "timestamp": ts(),
+                "bounty": 0,
+                "killerId": pid(),
+                "killerTeamId": rng.choice((100, 200)),
+                "monsterType": rng.choice(MONSTER_TYPES),
+                "position": _position(rng),
+                "assistingParticipantIds": [pid()],
+            }
+        )
+    if 4 <= minute < 14 and rng.random() < 0.4:
+        events.append(
+            {
+                "type": "TURRET_PLATE_DESTROYED",
+                "timestamp": ts(),
+                "killerId": pid(),
+                "laneType": rng.choice(LANE_TYPES),
+                "position": _position(rng),
+                "teamId": rng.choice((100, 200)),
+            }
+        )
+    if minute >= 12 and rng.random() < 0.3:
+        events.append(
+            {
+                "type": "BUILDING_KILL",
+                "timestamp": ts(),
+                "bounty": 250,
+                "buildingType": "TOWER_BUILDING",
+                "killerId": pid(),
+                "laneType": rng.choice(LANE_TYPES),
+                "position": _position(rng),
+                "teamId": rng.choice((100, 200)),
+                "towerType": "OUTER_TURRET",
+                "assistingParticipantIds": [],
+            }
+        )
+    if minute in (3, 14):
+        events.append(
+            {"type": "FEAT_UPDATE", "timestamp": ts(), "teamId": 100, "featType": 0, "featValue": 1}
+        )
+    events.sort(key=lambda event: event["timestamp"])
+    return events
+
+
+def _timeline(
+    rng: random.Random,
+    *,
+    match_id: str,
+    duration_s: int,
+    participants: int,
+    end_of_game_result: str,
+    win_team: int,
+) -> dict[str, Any]:
+    frame_count = duration_s // 60 + 2
+    frames: list[dict[str, Any]] = []
+    for minute in range(frame_count):
+        ts0 = minute * FRAME_INTERVAL_MS
+        events = (
+            [{"type": "PAUSE_END", "timestamp": 0, "realTimestamp": GAME_CREATION_MS}]
+            if minute == 0
+            else _frame_events(rng, ts0=ts0 - FRAME_INTERVAL_MS, participants=participants, minute=minute)
+        )
+        if minute == frame_count - 1:
+            events.append(
+                {
+                    "type": "GAME_END",
+                    "timestamp": duration_s * 1000,
+                    "realTimestamp": GAME_CREATION_MS + duration_s * 1000,
+                    "winningTeam": win_team,
+                    "gameId": int(match_id.split("_", 1)[1]),
+                }
+            )
+        frames.append(
+            {
+                "timestamp": min(ts0, duration_s * 1000) + minute,
+                "events": events,
+                "participantFrames": {
+                    str(pid): _participant_frame(rng, pid, minute)
+                    for pid in range(1, participants + 1)
+                },
+            }
+        )
+    return {
+        "metadata": {
+            "dataVersion": "2",
+            "matchId": match_id,
+            "participants": [_anon_puuid(match_id, idx) for idx in range(participants)],
+        },
+        "info": {
+            "endOfGameResult": end_of_game_result,
+            "frameInterval": FRAME_INTERVAL_MS,
+            "frames": frames,
+            "gameId": int(match_id.split("_", 1)[1]),
+            "participants": [
+                {"participantId": idx + 1, "puuid": _anon_puuid(match_id, idx)}
+                for idx in range(participants)
+            ],
+        },
+    }
+
+
+def _case(
+    name: str,
+    *,
+    seed: int,
+    duration_s: int,
+    team_size: int = 5,
+    game_mode: str = "CLASSIC",
+    queue_id: int = 420,
+    end_of_game_result: str = "GameComplete",
+) -> BenchCase:
+    rng = random.Random(seed)
+    match_id = f"EUW1_{7_000_000_000 + seed}"
+    participants = team_size * 2 if game_mode == "CLASSIC" else team_size
+    return BenchCase(
+        name=name,
+        non_timeline=_non_timeline(
+            rng,
+            match_id=match_id,
+            duration_s=duration_s,
+            team_size=team_size,
+            game_mode=game_mode,
+            queue_id=queue_id,
+            end_of_game_result=end_of_game_result,
+        ),
+        timeline=_timeline(
+            rng,
+            match_id=match_id,
+            duration_s=duration_s,
+            participants=participants,
+            end_of_game_result=end_of_game_result,
+            win_team=100,
+        ),
+    )
+
+
+def build_corpus() -> tuple[BenchCase, ...]:
+    return (
+        _case("short", seed=1, duration_s=15 * 60 + 20),
+        _case("long", seed=2, duration_s=45 * 60 + 40),
+        _case("remake", seed=3, duration_s=3 * 60 + 30),
+        _case(
+            "abort",
+            seed=4,
+            duration_s=90,
+            end_of_game_result="Abort_Unexpected",
+        ),
+        _case(
+            "swarm",
+            seed=5,
+            duration_s=20 * 60,
+            team_size=4,
+            game_mode="STRAWBERRY",
+            queue_id=1840,
+        ),
+    )
+
+
+_PII_KEYS = {"riotIdGameName", "riotIdTagline", "summonerId", "summonerName"}
+
+
+def anonymize_payload(raw: dict[str, Any]) -> dict[str, Any]:
+    """Replace puuids and player names in a real payload, in place.
+
+    puuids are remapped consistently across metadata, info.participants and the
+    timeline participant list so both streams stay joinable.
+    """
+    mapping: dict[str, str] = {}
+    match_id = str(raw.get("metadata", {}).get("matchId", "anon"))
+
+    def remap(puuid: str) -> str:
+        return mapping.setdefault(puuid, _anon_puuid(match_id, len(mapping)))
+
+    metadata = raw.get("metadata", {})
+    metadata["participants"] = [remap(p) for p in metadata.get("participants", [])]
+    for participant in raw.get("info", {}).get("participants", []):
+        if "puuid" in participant:
+            participant["puuid"] = remap(participant["puuid"])
+        for key in _PII_KEYS & participant.keys():
+            participant[key] = ""
+    return raw
+
+
+def load_corpus_dir(path: Path) -> Iterator[BenchCase]:
+    """Yield cases for every match with both streams archived under ``path``
+    (see ``app.worker.pipelines.payload_archive`` for the layout)."""
+    for match in scan_archive(path):
+        if match.non_timeline is None or match.timeline is None:
+            continue
+        yield BenchCase(
+            name=match.match_id,
+            non_timeline=anonymize_payload(read_payload(match.non_timeline)),
+            timeline=anonymize_payload(read_payload(match.timeline)),
+        )
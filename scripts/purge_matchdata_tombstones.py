@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Physically remove tombstoned matchdata rows in one batched pass.
+
+Failed, retired and residue rows are only tombstoned by the ingestion pipeline
+(``game_data.matchdata_tombstones``); readers already skip them. Run this
+periodically, e.g. before the filtered-db builds, to reclaim the space: it
+issues at most one ``ALTER ... DELETE`` per raw table, then clears the purged
+tombstones. Without ``--apply`` it only reports matching row counts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.worker.pipelines.matchdata_orchestrator import STREAM_TABLE_SPECS
+from database.clickhouse.operations.matchdata import purge_tombstoned_rows
+
+
+def tables_by_stream() -> dict[str, tuple[str, ...]]:
+    return {
+        stream: tuple(spec.table for spec in specs)
+        for stream, specs in STREAM_TABLE_SPECS.items()
+    }
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Delete tombstoned matchdata rows from every raw table in one pass."
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Run the deletes and clear purged tombstones (default: report only).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    counts = purge_tombstoned_rows(tables_by_stream(), apply=args.apply)
+    if not counts:
+        print("No tombstones to purge.")
+        return
+    for table, count in counts.items():
+        if count:
+            print(f"{table}: {count} rows")
+    verb = "Deleted" if args.apply else "Would delete"
+    print(f"{verb} {sum(counts.values())} rows across {len(counts)} tables.")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,18 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from app.worker.pipelines.matchdata_orchestrator import ALL_DELETE_TABLES
 from database.clickhouse.client import get_client
+from database.clickhouse.operations.partitions import (
+    GAME_MONTH_COLUMN,
+    copy_game_month,
+    drop_game_month,
+    is_partitioned,
+    validate_game_month,
+)
 from database.clickhouse.operations.utils import dedupe_matchids
+from database.clickhouse.operations.work_state import (
+    MATCHDATA_FINISH_SQL,
+    MATCHDATA_PENDING_SELECT,
+)
 
 REPAIR_DATABASE = "game_data_repair"
 QUEUE_TABLE = "game_data.matchdata_matchids"
@@ -149,7 +160,7 @@ def _load_queue_matchids_for_run(client, run_id: str) -> list[str]:
     rows = client.query(
         f"""
         SELECT DISTINCT matchid
-        FROM {QUEUE_TABLE}
+        FROM ({MATCHDATA_PENDING_SELECT})
         WHERE run_id = toUUID(%(run_id)s)
         ORDER BY matchid
         """,
@@ -347,7 +358,7 @@ def _queue_missing_matchids(client, *, matchids: list[str], apply: bool) -> int:
     existing_rows = client.query(
         f"""
         SELECT DISTINCT matchid
-        FROM {QUEUE_TABLE}
+        FROM ({MATCHDATA_PENDING_SELECT})
         WHERE has(%(matchids)s, matchid)
         """,
         parameters={"matchids": ids},
@@ -400,9 +411,15 @@ def _require_metadata_only_targets(client, matchids: list[str]) -> None:
 def _insert_missing_metadata(
     client, *, matchids: list[str], repair_run_id: UUID
 ) -> None:
+    # With the game_month layout (D14) the row joins its match's partition.
+    month_column, month_value = (
+        (f", {GAME_MONTH_COLUMN}", f",\n            any({GAME_MONTH_COLUMN})")
+        if is_partitioned(client, METADATA_TABLE)
+        else ("", "")
+    )
     client.command(
         f"""
-        INSERT INTO {METADATA_TABLE} (run_id, matchid, dataversion, participants)
+        INSERT INTO {METADATA_TABLE} (run_id, matchid, dataversion, participants{month_column})
         SELECT
             toUUID(%(run_id)s) AS run_id,
             matchid,
@@ -413,7 +430,7 @@ def _insert_missing_metadata(
                     item -> tupleElement(item, 1),
                     groupArray((participantid, puuid))
                 )
-            ) AS participants
+            ) AS participants{month_value}
         FROM {PARTICIPANT_STATS_TABLE}
         WHERE has(%(matchids)s, matchid)
           AND matchid NOT IN
@@ -451,18 +468,10 @@ def _validate_metadata_after_insert(client, matchids: list[str]) -> None:
         )
 
 
-def _delete_queue_rows(client, matchids: list[str]) -> None:
+def _finish_queue_rows(client, matchids: list[str]) -> None:
     if not matchids:
         return
-    client.command(
-        f"""
-        ALTER TABLE {QUEUE_TABLE}
-        DELETE
-        WHERE has(%(matchids)s, matchid)
-        SETTINGS mutations_sync = 2
-        """,
-        parameters={"matchids": matchids},
-    )
+    client.command(MATCHDATA_FINISH_SQL, parameters={"match_ids": matchids})
 
 
 def _apply_metadata_only_repair(
@@ -488,7 +497,7 @@ def _apply_metadata_only_repair(
     repair_run_id = uuid4()
     _insert_missing_metadata(client, matchids=ids, repair_run_id=repair_run_id)
     _validate_metadata_after_insert(client, ids)
-    _delete_queue_rows(client, ids)
+    _finish_queue_rows(client, ids)
     return backups, repair_run_id
 
 
@@ -511,6 +520,97 @@ def _apply_full_requeue(
     return backups, missing
 
 
+def _load_game_month_matchids(client, month: int) -> list[str]:
+    rows = client.query(
+        f"""
+        SELECT DISTINCT matchid
+        FROM
+        (
+            SELECT matchid FROM {INFO_TABLE} WHERE {GAME_MONTH_COLUMN} = %(month)s
+            UNION ALL
+            SELECT matchid FROM {TIMELINE_END_TABLE} WHERE {GAME_MONTH_COLUMN} = %(month)s
+        )
+        WHERE matchid != ''
+        ORDER BY matchid
+        """,
+        parameters={"month": month},
+    ).result_rows
+    return dedupe_matchids(row[0] for row in rows)
+
+
+def _count_game_month_rows(client, table: str, month: int) -> int:
+    _assert_qualified_table(table)
+    rows = client.query(
+        f"SELECT count() FROM {table} WHERE {GAME_MONTH_COLUMN} = %(month)s",
+        parameters={"month": month},
+    ).result_rows
+    return int(rows[0][0])
+
+
+def _backup_game_month(
+    client,
+    *,
+    source_table: str,
+    backup_prefix: str,
+    month: int,
+    apply: bool,
+) -> BackupSummary:
+    backup_table = _backup_table_name(source_table, backup_prefix)
+    source_count = _count_game_month_rows(client, source_table, month)
+    if apply:
+        client.command(f"CREATE DATABASE IF NOT EXISTS {REPAIR_DATABASE}")
+        # Same structure and partition key, so the partition's parts are hard-linked.
+        client.command(f"CREATE TABLE {backup_table} AS {source_table}")
+        copy_game_month(client, source=source_table, target=backup_table, month=month)
+        backup_count = _count_game_month_rows(client, backup_table, month)
+        if backup_count != source_count:
+            raise RuntimeError(
+                f"Backup row count mismatch for {source_table} month={month}: "
+                f"source={source_count} backup={backup_count}"
+            )
+    return BackupSummary(
+        source_table=source_table,
+        backup_table=backup_table,
+        row_count=source_count,
+    )
+
+
+def _apply_game_month_rebuild(
+    client,
+    *,
+    month: int,
+    backup_prefix: str,
+    apply: bool,
+) -> tuple[list[BackupSummary], list[str], int]:
+    """Back up, drop and requeue one game month of every raw table (D14 layout).
+
+    Costs one partition per table instead of a mutation over every part; the
+    queued matches are refetched into the same (emptied) partition.
+    """
+    month = validate_game_month(month)
+    unpartitioned = [t for t in ALL_DELETE_TABLES if not is_partitioned(client, t)]
+    if unpartitioned:
+        raise RuntimeError(
+            f"Game-month rebuild needs the D14 layout; not partitioned: {unpartitioned}"
+        )
+    matchids = _load_game_month_matchids(client, month)
+    backups = [
+        _backup_game_month(
+            client,
+            source_table=table,
+            backup_prefix=backup_prefix,
+            month=month,
+            apply=apply,
+        )
+        for table in ALL_DELETE_TABLES
+    ]
+    if apply:
+        for table in ALL_DELETE_TABLES:
+            drop_game_month(client, table, month)
+    missing = _queue_missing_matchids(client, matchids=matchids, apply=apply)
+    return backups, matchids, missing
+
+
 def _print_backups(backups: list[BackupSummary]) -> None:
     for backup in backups:
         print(
@@ -566,6 +666,14 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         action="store_true",
         help="Allow stream-partial matchids to use the old backup-and-requeue path.",
     )
+    parser.add_argument(
+        "--game-month",
+        type=int,
+        help=(
+            "Rebuild one YYYYMM partition (D14 layout): back it up, drop it from "
+            "every raw table and requeue its matches. Skips the gap classes."
+        ),
+    )
     parser.add_argument(
         "--exclude-active-mutation-matchids",
         action="store_true",
@@ -584,9 +692,31 @@ def _candidate_matchids(client, args: argparse.Namespace) -> list[str]:
     return _load_auto_repair_matchids(client)
 
 
+def _run_game_month_rebuild(client, args: argparse.Namespace) -> None:
+    action = "APPLY" if args.apply else "DRY RUN"
+    backups, matchids, queued = _apply_game_month_rebuild(
+        client,
+        month=args.game_month,
+        backup_prefix=f"{args.backup_prefix}_{args.game_month}",
+        apply=args.apply,
+    )
+    print(f"{action}: game month {args.game_month}, {len(matchids)} matchids")
+    _print_backups(backups)
+    if args.apply:
+        print(
+            f"Dropped partition {args.game_month} from {len(backups)} tables; "
+            f"{queued} matchids were newly queued."
+        )
+    else:
+        print(f"Dry run complete; {queued} matchids would be queued.")
+
+
 def main(argv: Sequence[str] | None = None) -> None:
     args = parse_args(argv)
     client = get_client()
+    if args.game_month is not None:
+        _run_game_month_rebuild(client, args)
+        return
     matchids = _candidate_matchids(client, args)
 
     if args.exclude_active_mutation_matchids:
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""Rebuild game_data matchdata tables by re-parsing locally archived payloads.
+
+Reads the payload archive (MATCHDATA_ARCHIVE_DIR, see
+app/worker/pipelines/payload_archive.py), shards matches across worker
+processes and runs only the parsers behind the selected tables. Rows go into
+``<table>__reparse`` shadow tables; rows for matches that were not re-parsed are
+carried over from the live table, then each shadow is swapped in with
+``EXCHANGE TABLES``. The old data stays in ``<table>__reparse`` until --drop-old.
+
+Prereq for --apply: ingestion pipeline stopped (./stop_pipeline_safely.sh) so no
+live writes land between the carry-over and the swap. With --apply only matches
+whose stream anchors are live (not tombstoned) are re-parsed. Without --apply
+the run only parses and reports throughput.
+
+    python scripts/reparse_matchdata.py --table game_data.tl_ward_placed
+    python scripts/reparse_matchdata.py --stream timeline --workers 12 --apply
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID, uuid4
+
+import zstandard
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.worker.pipelines.matchdata_orchestrator import (
+    ALL_TABLE_SPECS,
+    ANCHOR_TABLES,
+    MATCHDATA_INSERT_BATCH_SIZE,
+    STREAM_TABLE_SPECS,
+    StreamName,
+    TableSpec,
+    timeline_game_month,
+)
+from app.worker.pipelines.payload_archive import (
+    ArchivedMatch,
+    filter_streams,
+    read_payload_bytes,
+    scan_archive,
+)
+from database.clickhouse.operations.matchdata import load_table_matchids
+from database.clickhouse.operations.partitions import (
+    GAME_MONTH_COLUMN,
+    game_month,
+    is_partitioned,
+)
+
+logger = logging.getLogger("scripts.reparse_matchdata")
+
+REPAIR_DATABASE = "game_data_repair"
+SHADOW_SUFFIX = "__reparse"
+DEFAULT_CHUNK_SIZE = 50
+# Match ids per anchor lookup; keeps the bound IN lists well under max_query_size.
+LIVE_LOOKUP_CHUNK = 2_000
+STREAMS: tuple[StreamName, ...] = ("non_timeline", "timeline")
+# What one bad archived payload raises: an unreadable file, a corrupt zstd
+# frame, bad JSON or a payload the parser models reject (pydantic's
+# ValidationError is a ValueError). Anything else stops the run.
+PAYLOAD_ERRORS: tuple[type[Exception], ...] = (OSError, zstandard.ZstdError, ValueError)
+
+
+@dataclass(frozen=True)
+class ReparsePlan:
+    tables: tuple[str, ...]
+    run_id: str
+    apply: bool
+    batch_size: int = MATCHDATA_INSERT_BATCH_SIZE
+    # Tables on the game_month layout (D14); their rows are stamped like the saver does.
+    partitioned_tables: frozenset[str] = frozenset()
+
+    def specs(self, stream: StreamName) -> tuple[TableSpec, ...]:
+        return tuple(s for s in STREAM_TABLE_SPECS[stream] if s.table in self.tables)
+
+    @property
+    def streams(self) -> tuple[StreamName, ...]:
+        return tuple(stream for stream in STREAMS if self.specs(stream))
+
+
+@dataclass
+class ChunkStats:
+    matches: int = 0
+    bytes_read: int = 0
+    parse_s: float = 0.0
+    rows: Counter[str] = field(default_factory=Counter)
+    missing: Counter[str] = field(default_factory=Counter)
+    failed: list[str] = field(default_factory=list)
+    # stream -> match ids whose rows now live in the shadow tables.
+    reparsed: dict[str, list[str]] = field(
+        default_factory=lambda: {stream: [] for stream in STREAMS}
+    )
+
+    def merge(self, other: ChunkStats) -> None:
+        self.matches += other.matches
+        self.bytes_read += other.bytes_read
+        self.parse_s += other.parse_s
+        self.rows.update(other.rows)
+        self.missing.update(other.missing)
+        self.failed.extend(other.failed)
+        for stream, ids in other.reparsed.items():
+            self.reparsed[stream].extend(ids)
+
+
+def shadow_table(table: str) -> str:
+    return f"{table}{SHADOW_SUFFIX}"
+
+
+def resolve_tables(tables: Sequence[str], streams: Sequence[str]) -> tuple[str, ...]:
+    known = {spec.table for spec in ALL_TABLE_SPECS}
+    unknown = sorted(set(tables) - known)
+    if unknown:
+        raise ValueError(f"Unknown matchdata tables: {unknown}")
+    selected = set(tables)
+    for stream in streams:
+        selected.update(spec.table for spec in STREAM_TABLE_SPECS[stream])
+    if not selected:
+        raise ValueError("Select at least one --table or --stream")
+    return tuple(spec.table for spec in ALL_TABLE_SPECS if spec.table in selected)
+
+
+def live_matches(
+    matches: Sequence[ArchivedMatch], streams: Sequence[StreamName]
+) -> list[ArchivedMatch]:
+    """Archived matches with a live (untombstoned) anchor in every stream.
+
+    Payloads are archived before they are parsed, so the archive also holds
+    matches that were later requeued, lost, tombstoned or retired. Re-parsing
+    them would write rows under a run_id nothing tombstones; their current rows
+    are carried over instead.
+    """
+    ids = [match.match_id for match in matches]
+    live: set[str] | None = None
+    for stream in streams:
+        anchor = STREAM_TABLE_SPECS[stream][-1].table
+        anchored: set[str] = set()
+        for start in range(0, len(ids), LIVE_LOOKUP_CHUNK):
+            chunk = ids[start : start + LIVE_LOOKUP_CHUNK]
+            anchored |= load_table_matchids(anchor, chunk, stream=stream)
+        live = anchored if live is None else live & anchored
+    return [match for match in matches if match.match_id in (live or set())]
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_PARSERS: dict[StreamName, Any] = {}
+
+
+def _init_worker(plan: ReparsePlan) -> None:
+    from app.services.riot_api_client.parsers.non_timeline import (
+        NON_TIMELINE_ANCHOR_FIELD,
+        MatchDataNonTimelineParsingOrchestrator,
+    )
+    from app.services.riot_api_client.parsers.timeline import (
+        TIMELINE_ANCHOR_FIELD,
+        MatchDataTimelineParsingOrchestrator,
+    )
+
+    logging.basicConfig(level=logging.WARNING)
+    # Parsers refuse to drop their anchor; it is parsed but only written when selected.
+    _PARSERS["non_timeline"] = MatchDataNonTimelineParsingOrchestrator(
+        tables=frozenset(
+            {NON_TIMELINE_ANCHOR_FIELD, *(s.attr for s in plan.specs("non_timeline"))}
+        )
+    )
+    _PARSERS["timeline"] = MatchDataTimelineParsingOrchestrator(
+        tables=frozenset(
+            {TIMELINE_ANCHOR_FIELD, *(s.attr for s in plan.specs("timeline"))}
+        )
+    )
+
+
+def _flush(
+    plan: ReparsePlan,
+    spec: TableSpec,
+    buffers: dict[str, list[dict[str, Any]]],
+) -> None:
+    from database.clickhouse.operations.utils import persist_data
+
+    items = buffers.pop(spec.table, [])
+    if items and plan.apply:
+        persist_data(
+            shadow_table(spec.table),
+            (
+                (*spec.columns, GAME_MONTH_COLUMN)
+                if spec.table in plan.partitioned_tables
+                else spec.columns
+            ),
+            items,
+            UUID(plan.run_id),
+            plan.batch_size,
+        )
+
+
+def _parse_stream(stream: StreamName, match_id: str, body: bytes) -> Any | None:
+    from app.services.riot_api_client.parsers.non_timeline import is_abort_payload
+
+    if stream == "timeline":
+        return _PARSERS[stream].run(body)
+    raw = json.loads(body)
+    if is_abort_payload(raw):
+        # The live pipeline retires aborts without rows; mirror that.
+        return None
+    return _PARSERS[stream].run(raw)
+
+
+def _archived_game_month(match: ArchivedMatch) -> int | None:
+    path = match.path("non_timeline")
+    if path is None:
+        return None
+    try:
+        return game_month(json.loads(read_payload_bytes(path))["info"]["gameCreation"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def reparse_chunk(matches: Sequence[ArchivedMatch], plan: ReparsePlan) -> ChunkStats:
+    """Parse one shard of archived matches and write its rows to the shadows."""
+    if not _PARSERS:
+        _init_worker(plan)
+    stats = ChunkStats()
+    buffers: dict[str, list[dict[str, Any]]] = {}
+
+    for match in matches:
+        stats.matches += 1
+        month: int | None = None
+        for stream in plan.streams:
+            path = match.path(stream)
+            if path is None:
+                stats.missing[stream] += 1
+                continue
+            start = time.perf_counter()
+            try:
+                body = read_payload_bytes(path)
+                stats.bytes_read += len(body)
+                parsed = _parse_stream(stream, match.match_id, body)
+            except PAYLOAD_ERRORS as exc:
+                logger.warning(
+                    "Reparse failed match_id=%s stream=%s: %s", match.match_id, stream, exc
+                )
+                stats.failed.append(f"{match.match_id}:{stream}")
+                continue
+            finally:
+                stats.parse_s += time.perf_counter() - start
+            if parsed is None:
+                continue
+            if plan.partitioned_tables:
+                # Streams run non_timeline first, so a timeline reuses its info month.
+                if stream == "non_timeline":
+                    month = game_month(
+                        max((row["gameCreation"] for row in parsed.game_info), default=0)
+                    )
+                elif month is None:
+                    month = _archived_game_month(match)
+                    if month is None:
+                        month = timeline_game_month(parsed)
+
+            for spec in plan.specs(stream):
+                rows = spec.getter(parsed)
+                stamp = month is not None and spec.table in plan.partitioned_tables
+                for row in rows:
+                    row["matchId"] = match.match_id
+                    if stamp:
+                        row[GAME_MONTH_COLUMN] = month
+                stats.rows[spec.table] += len(rows)
+                buffers.setdefault(spec.table, []).extend(rows)
+                if len(buffers[spec.table]) >= plan.batch_size:
+                    _flush(plan, spec, buffers)
+            stats.reparsed[stream].append(match.match_id)
+
+    for spec in ALL_TABLE_SPECS:
+        if spec.table in buffers:
+            _flush(plan, spec, buffers)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Coordinator side
+# ---------------------------------------------------------------------------
+
+
+def _chunks(matches: Sequence[ArchivedMatch], size: int) -> list[list[ArchivedMatch]]:
+    return [list(matches[i : i + size]) for i in range(0, len(matches), size)]
+
+
+def _progress_line(stats: ChunkStats, total: int, elapsed: float) -> str:
+    rate = stats.matches / elapsed if elapsed else 0.0
+    eta = (total - stats.matches) / rate if rate else 0.0
+    rows = sum(stats.rows.values())
+    return (
+        f"[{stats.matches}/{total}] {rate:.1f} matches/s "
+        f"{rows / elapsed if elapsed else 0.0:,.0f} rows/s "
+        f"{stats.bytes_read / elapsed / 1e6 if elapsed else 0.0:.1f} MB/s "
+        f"failed={len(stats.failed)} eta={eta:.0f}s"
+    )
+
+
+def run_reparse(
+    matches: Sequence[ArchivedMatch],
+    plan: ReparsePlan,
+    *,
+    workers: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    report_every_s: float = 5.0,
+) -> ChunkStats:
+    total = ChunkStats()
+    started = time.monotonic()
+    last_report = started
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(plan,),
+    ) as pool:
+        futures = [
+            pool.submit(reparse_chunk, chunk, plan)
+            for chunk in _chunks(matches, chunk_size)
+        ]
+        for future in as_completed(futures):
+            total.merge(future.result())
+            now = time.monotonic()
+            if now - last_report >= report_every_s:
+                print(_progress_line(total, len(matches), now - started), flush=True)
+                last_report = now
+    print(_progress_line(total, len(matches), time.monotonic() - started), flush=True)
+    return total
+
+
+def _ids_table(run_id: str) -> str:
+    return f"{REPAIR_DATABASE}.reparse_{run_id.replace('-', '')}_matchids"
+
+
+def prepare_shadows(client, tables: Sequence[str]) -> None:
+    for table in tables:
+        shadow = shadow_table(table)
+        client.command(f"DROP TABLE IF EXISTS {shadow}")
+        client.command(f"CREATE TABLE {shadow} AS {table}")
+
+
+def finalize_shadows(
+    client,
+    plan: ReparsePlan,
+    stats: ChunkStats,
+    *,
+    drop_old: bool,
+) -> None:
+    """Carry over rows for matches not re-parsed, verify, then swap each table."""
+    ids_table = _ids_table(plan.run_id)
+    client.command(f"CREATE DATABASE IF NOT EXISTS {REPAIR_DATABASE}")
+    client.command(
+        f"CREATE TABLE IF NOT EXISTS {ids_table} (stream LowCardinality(String), "
+        "matchid String) ENGINE = MergeTree ORDER BY (stream, matchid)"
+    )
+    for stream, ids in stats.reparsed.items():
+        if ids:
+            client.insert(ids_table, [(stream, mid) for mid in ids], ("stream", "matchid"))
+
+    for stream in plan.streams:
+        for spec in plan.specs(stream):
+            table, shadow = spec.table, shadow_table(spec.table)
+            client.command(
+                f"""
+                INSERT INTO {shadow}
+                SELECT * FROM {table}
+                WHERE matchid NOT IN (
+                    SELECT matchid FROM {ids_table} WHERE stream = %(stream)s
+                )
+                """,
+                parameters={"stream": stream},
+            )
+            live = int(client.command(f"SELECT count() FROM {table}"))
+            rebuilt = int(client.command(f"SELECT count() FROM {shadow}"))
+            print(f"  {table}: live={live} rebuilt={rebuilt} delta={rebuilt - live:+d}")
+            client.command(f"EXCHANGE TABLES {table} AND {shadow}")
+            if drop_old:
+                client.command(f"DROP TABLE {shadow}")
+    client.command(f"DROP TABLE IF EXISTS {ids_table}")
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Re-parse archived matchdata payloads into game_data tables."
+    )
+    parser.add_argument(
+        "--archive-dir",
+        type=Path,
+        help="Payload archive root (defaults to MATCHDATA_ARCHIVE_DIR).",
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        default=[],
+        help="Fully-qualified table to rebuild. Can be provided multiple times.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="append",
+        default=[],
+        choices=STREAMS,
+        help="Rebuild every table of this stream. Can be provided multiple times.",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--limit", type=int, help="Re-parse at most this many matches.")
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Write shadow tables and swap them in. Default is a parse-only dry run.",
+    )
+    parser.add_argument(
+        "--drop-old",
+        action="store_true",
+        help="Drop the pre-swap data instead of keeping it as <table>__reparse.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    tables = resolve_tables(args.table, args.stream)
+
+    archive_dir = args.archive_dir
+    if archive_dir is None:
+        from app.core.config.settings import settings
+
+        archive_dir = settings.matchdata_archive_dir
+    if archive_dir is None or not archive_dir.is_dir():
+        raise SystemExit(f"Payload archive not found: {archive_dir}")
+
+    client = None
+    partitioned_tables: frozenset[str] = frozenset()
+    if args.apply:
+        from database.clickhouse.client import get_client
+
+        client = get_client()
+        partitioned_tables = frozenset(
+            table for table in tables if is_partitioned(client, table)
+        )
+
+    plan = ReparsePlan(
+        tables=tables,
+        run_id=str(uuid4()),
+        apply=args.apply,
+        partitioned_tables=partitioned_tables,
+    )
+    matches = filter_streams(scan_archive(archive_dir), plan.streams)
+    if client is not None:
+        archived = len(matches)
+        matches = live_matches(matches, plan.streams)
+        if archived > len(matches):
+            skipped = archived - len(matches)
+            print(f"Skipping {skipped} archived matches without a live anchor.")
+    if args.limit is not None:
+        matches = matches[: args.limit]
+    if not matches:
+        print("No archived payloads for the selected streams.")
+        return
+
+    action = "APPLY" if args.apply else "DRY RUN"
+    print(
+        f"{action}: {len(matches)} matches, {len(tables)} tables, "
+        f"workers={args.workers} run_id={plan.run_id} "
+        f"started={datetime.now(UTC):%Y-%m-%dT%H:%M:%SZ}"
+    )
+    anchors = sorted(set(tables) & ANCHOR_TABLES)
+    if anchors:
+        print(f"Note: rebuilding stream anchors {anchors}")
+
+    if client is not None:
+        prepare_shadows(client, tables)
+
+    stats = run_reparse(
+        matches, plan, workers=args.workers, chunk_size=args.chunk_size
+    )
+
+    for table in tables:
+        print(f"  {table}: {stats.rows[table]} rows parsed")
+    if stats.missing:
+        print(f"Missing payloads: {dict(stats.missing)}")
+    if stats.failed:
+        print(f"Failed payloads: {len(stats.failed)} sample={stats.failed[:10]}")
+    print(
+        f"Parse CPU: {stats.parse_s:.1f}s across workers "
+        f"({stats.parse_s / max(1, stats.matches) * 1e3:.1f} ms/match)"
+    )
+
+    if client is not None:
+        finalize_shadows(client, plan, stats, drop_old=args.drop_old)
+        print("Shadow tables swapped in.")
+
+
+if __name__ == "__main__":
+    main()
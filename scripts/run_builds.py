@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Run the derived ClickHouse builds as a dependency DAG.
+
+Without arguments runs the standard rebuild (3139 through the 70xx prior
+dictionaries), using the incremental filtered-db build (``5003_filtered_db``)
+and the 6901 aggregate refresh. Independent builds run concurrently; builds whose SQL and
+input/output tables are unchanged since their last run are skipped. Prints
+per-build status, duration and bytes read; ``--report`` also appends them as
+JSON lines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Sequence
+from dataclasses import asdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from database.clickhouse.operations.build_dag import (
+    DEFAULT_MAX_WORKERS,
+    STANDARD_BUILDS,
+    build_graph,
+    load_builds,
+    plan_levels,
+    run_builds,
+)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run *_build.sql files in dependency order with caching."
+    )
+    parser.add_argument(
+        "builds",
+        nargs="*",
+        default=list(STANDARD_BUILDS),
+        help="Build file stems or 5003_filtered_db (default: the standard rebuild).",
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument(
+        "--force", action="store_true", help="Run every build even if unchanged."
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the dependency waves and exit."
+    )
+    parser.add_argument("--report", type=Path, help="Append per-build results as JSONL.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.dry_run:
+        levels = plan_levels(build_graph(load_builds(args.builds)))
+        for index, level in enumerate(levels, start=1):
+            print(f"wave {index}: {', '.join(level)}")
+        return
+
+    started = time.time()
+    results = run_builds(args.builds, max_workers=args.workers, force=args.force)
+    for run in results:
+        detail = f"{run.duration_s:8.1f}s {run.read_bytes / 1e9:8.2f} GB read"
+        if run.error:
+            detail = run.error
+        print(f"{run.status:>7}  {run.name}  {detail}")
+    print(f"Finished {len(results)} builds in {time.time() - started:.1f}s.")
+
+    if args.report:
+        with args.report.open("a") as fh:
+            for run in results:
+                fh.write(json.dumps({"started_at": int(started), **asdict(run)}) + "\n")
+    if any(run.status in ("failed", "blocked") for run in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
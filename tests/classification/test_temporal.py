@@ -37,6 +37,33 @@ def test_frame_count_shrinkage_toward_parents() -> None:
     assert smoothed[0, 1, 0] == pytest.approx(5.0, rel=1e-6)
 
 
+def test_load_bins_scatters_column_blocks_in_first_seen_key_order(monkeypatch) -> None:
+    def fake_read_columns(sql, schema, client=None):
+        n_metric = len(T.METRIC_NAMES)
+        cols = {
+            "championid": np.array([7, 1, 7]),
+            "teamposition": np.array(["MID", "TOP", "MID"], dtype=object),
+            "build": np.array(["b", "a", "b"], dtype=object),
+            "bucket": np.array([0, 3, 2]),
+            "frames": np.array([10.0, 4.0, 6.0]),
+        }
+        for j, name in enumerate(list(schema)[5:]):
+            cols[name] = np.array([1.0, 2.0, 3.0]) * (j + 1)
+        assert len(schema) == 5 + n_metric
+        return cols
+
+    monkeypatch.setattr(T, "get_client", lambda: None)
+    monkeypatch.setattr(T, "read_columns", fake_read_columns)
+
+    keys, sums, frames = T._load_bins("train")
+
+    assert keys == [(7, "MID", "b"), (1, "TOP", "a")]
+    assert sums.shape == (2, T.N_BUCKETS, len(T.METRIC_NAMES))
+    assert frames[0, [0, 2]].tolist() == [10.0, 6.0]
+    assert frames[1, 3] == 4.0 and frames.sum() == 20.0
+    assert sums[0, 2, 1] == 6.0 and sums[1, 3, 0] == 2.0
+
+
 def test_standardise_shape_and_finite() -> None:
     rng = np.random.default_rng(0)
     smoothed = rng.normal(size=(20, T.N_BUCKETS, 4))
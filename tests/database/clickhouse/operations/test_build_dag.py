@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from uuid import UUID
+
+import pytest
+
+from database.clickhouse.operations import build_dag, filtered_db
+from database.clickhouse.operations.sql_files import SqlFileStats
+from database.clickhouse.query_tags import log_comment
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class FakeSummary:
+    def __init__(self, **summary) -> None:
+        self.summary = {key: str(value) for key, value in summary.items()}
+
+
+class FakeClient:
+    """Shared across worker threads; ``parts`` is the system.parts state."""
+
+    def __init__(self, parts=None, fail_on: str | None = None):
+        self.parts: dict[str, tuple[int, int]] = parts or {}
+        self._fail_on = fail_on
+        self._lock = threading.Lock()
+        self.commands: list[str] = []
+        self.settings: list[dict | None] = []
+
+    def query(self, sql, parameters=None):
+        tables = parameters["tables"]
+        return FakeResult([(t, *self.parts[t]) for t in tables if t in self.parts])
+
+    def command(self, sql, parameters=None, settings=None):
+        with self._lock:
+            self.commands.append(" ".join(sql.split()))
+            self.settings.append(settings)
+        if self._fail_on and self._fail_on in sql:
+            raise RuntimeError("boom")
+        return FakeSummary(read_rows=10, read_bytes=1000, written_rows=5)
+
+
+@pytest.fixture
+def schema_dir(tmp_path):
+    files = {
+        "5900_split_build.sql": (
+            "TRUNCATE TABLE game_data_filtered.split;\n"
+            "INSERT INTO game_data_filtered.split\n"
+            "SELECT matchid FROM game_data.info;\n"
+        ),
+        "6900_pivot_build.sql": (
+            "-- reads game_data_filtered.unrelated only in a comment\n"
+            "TRUNCATE TABLE game_data_filtered.pivot;\n"
+            "INSERT INTO game_data_filtered.pivot\n"
+            "SELECT * FROM game_data_filtered.split;\n"
+        ),
+        "6000_a_build.sql": (
+            "INSERT INTO game_data_filtered.agg_a\n"
+            "SELECT dictGetOrDefault('game_data.names_dict', 'name', 1, '')\n"
+            "FROM game_data_filtered.pivot;\n"
+        ),
+        "6001_b_build.sql": (
+            "INSERT INTO game_data_filtered.agg_b SELECT * FROM game_data_filtered.pivot;\n"
+        ),
+        "7000_a_dict_build.sql": "SYSTEM RELOAD DICTIONARY game_data_filtered.a_dict;\n",
+        "7000_a_dict_schema.sql": (
+            "DROP DICTIONARY IF EXISTS game_data_filtered.a_dict;\n"
+            "CREATE DICTIONARY IF NOT EXISTS game_data_filtered.a_dict (k Int32)\n"
+            "SOURCE(CLICKHOUSE(QUERY 'SELECT k FROM game_data_filtered.agg_a'))\n"
+            "LIFETIME(0);\n"
+        ),
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_text(text)
+    return tmp_path
+
+
+NAMES = (
+    "5900_split_build",
+    "6900_pivot_build",
+    "6000_a_build",
+    "6001_b_build",
+    "7000_a_dict_build",
+)
+
+
+def _patch(monkeypatch, client, cached=None):
+    recorded = []
+    monkeypatch.setattr(build_dag, "get_client", lambda: client)
+    monkeypatch.setattr(build_dag, "load_fingerprints", lambda: dict(cached or {}))
+    monkeypatch.setattr(
+        build_dag,
+        "record_timestamp",
+        lambda name, run_id, stored_at: recorded.append((name, run_id)),
+    )
+    return recorded
+
+
+def test_load_build_parses_reads_writes_and_dictionary_source(schema_dir) -> None:
+    specs = build_dag.load_builds(NAMES, schema_dir=schema_dir)
+
+    assert specs["6900_pivot_build"].reads == {"game_data_filtered.split"}
+    assert specs["6900_pivot_build"].writes == {"game_data_filtered.pivot"}
+    assert specs["6000_a_build"].reads == {
+        "game_data_filtered.pivot",
+        "game_data.names_dict",
+    }
+    assert specs["7000_a_dict_build"].reads == {"game_data_filtered.agg_a"}
+    assert specs["7000_a_dict_build"].writes == {"game_data_filtered.a_dict"}
+
+
+def test_plan_levels_runs_aggregations_together_after_pivot(schema_dir) -> None:
+    specs = build_dag.load_builds(NAMES, schema_dir=schema_dir)
+
+    assert build_dag.plan_levels(build_dag.build_graph(specs)) == [
+        ["5900_split_build"],
+        ["6900_pivot_build"],
+        ["6000_a_build", "6001_b_build"],
+        ["7000_a_dict_build"],
+    ]
+
+
+def test_build_graph_rejects_cycles(tmp_path) -> None:
+    (tmp_path / "1_build.sql").write_text("INSERT INTO game_data.a SELECT * FROM game_data.b;\n")
+    (tmp_path / "2_build.sql").write_text("INSERT INTO game_data.b SELECT * FROM game_data.a;\n")
+
+    with pytest.raises(ValueError, match="cycle"):
+        build_dag.build_graph(
+            build_dag.load_builds(["1_build", "2_build"], schema_dir=tmp_path)
+        )
+
+
+def test_run_builds_records_fingerprints_and_stats(monkeypatch, schema_dir) -> None:
+    client = FakeClient(parts={"game_data.info": (100, 1)})
+    recorded = _patch(monkeypatch, client)
+
+    results = build_dag.run_builds(NAMES, schema_dir=schema_dir, max_workers=2)
+
+    assert {run.name: run.status for run in results} == dict.fromkeys(NAMES, "ran")
+    split = next(run for run in results if run.name == "5900_split_build")
+    assert (split.read_bytes, split.written_rows) == (2000, 10)
+    assert sorted(name for name, _ in recorded) == sorted(f"build:{n}" for n in NAMES)
+
+
+def test_run_builds_skips_build_with_unchanged_fingerprint(monkeypatch, schema_dir) -> None:
+    client = FakeClient(
+        parts={"game_data.info": (100, 1), "game_data_filtered.split": (100, 2)}
+    )
+    spec = build_dag.load_builds(["5900_split_build"], schema_dir=schema_dir)[
+        "5900_split_build"
+    ]
+    fingerprint = build_dag.build_fingerprint(
+        spec, {"game_data.info": (100, 1)}, {"game_data_filtered.split": (100, 2)}
+    )
+    recorded = _patch(monkeypatch, client, cached={"5900_split_build": fingerprint})
+
+    results = build_dag.run_builds(["5900_split_build"], schema_dir=schema_dir)
+    assert [run.status for run in results] == ["skipped"]
+    assert client.commands == [] and recorded == []
+
+    client.parts["game_data.info"] = (101, 3)
+    results = build_dag.run_builds(["5900_split_build"], schema_dir=schema_dir)
+    assert [run.status for run in results] == ["ran"]
+
+
+def test_failed_build_blocks_dependents_only(monkeypatch, schema_dir) -> None:
+    client = FakeClient(fail_on="INSERT INTO game_data_filtered.agg_a")
+    _patch(monkeypatch, client)
+
+    results = {
+        run.name: run for run in build_dag.run_builds(NAMES, schema_dir=schema_dir)
+    }
+
+    assert results["6000_a_build"].status == "failed"
+    assert results["7000_a_dict_build"].status == "blocked"
+    assert results["6001_b_build"].status == "ran"
+
+
+def test_merge_stopping_build_runs_alone(monkeypatch, schema_dir) -> None:
+    (schema_dir / "5003_copy_build.sql").write_text(
+        "SYSTEM STOP MERGES;\n"
+        "INSERT INTO game_data_filtered.copy SELECT * FROM game_data.other;\n"
+        "SYSTEM START MERGES;\n"
+    )
+    client = FakeClient()
+    command = client.command
+
+    def slow_command(sql, parameters=None, settings=None):
+        time.sleep(0.01)
+        return command(sql, parameters, settings)
+
+    monkeypatch.setattr(client, "command", slow_command)
+    _patch(monkeypatch, client)
+    names = ("5003_copy_build", *NAMES)
+
+    specs = build_dag.load_builds(names, schema_dir=schema_dir)
+    results = build_dag.run_builds(names, schema_dir=schema_dir, max_workers=4)
+
+    assert specs["5003_copy_build"].stops_merges
+    assert not specs["5900_split_build"].stops_merges
+    assert {run.status for run in results} == {"ran"}
+    start = client.commands.index("SYSTEM STOP MERGES")
+    assert client.commands[start : start + 3] == [
+        "SYSTEM STOP MERGES",
+        "INSERT INTO game_data_filtered.copy SELECT * FROM game_data.other",
+        "SYSTEM START MERGES",
+    ]
+
+
+def test_filtered_db_node_runs_build_filtered_db(monkeypatch, schema_dir) -> None:
+    files = {
+        "5001_valid_game_ids_build.sql": (
+            "TRUNCATE TABLE game_data_filtered.valid_game_ids;\n"
+            "INSERT INTO game_data_filtered.valid_game_ids\n"
+            "SELECT matchid FROM game_data.info;\n"
+        ),
+        "5003_filtered_tables_build.sql": (
+            "SYSTEM STOP MERGES;\n"
+            "INSERT INTO game_data_filtered.participant_stats\n"
+            "SELECT * FROM game_data.participant_stats;\n"
+            "SYSTEM START MERGES;\n"
+        ),
+        "5003_filtered_tables_incremental_build.sql": (
+            "INSERT INTO game_data_filtered.valid_game_ids_delta\n"
+            "SELECT matchid FROM game_data.info;\n"
+        ),
+    }
+    for name, text in files.items():
+        (schema_dir / name).write_text(text)
+    calls = []
+
+    def fake_build(mode, *, schema_dir):
+        calls.append((mode, schema_dir, json.loads(log_comment())["stage"]))
+        return filtered_db.FilteredBuildResult(
+            "incremental", UUID(int=1), stats=SqlFileStats(read_rows=7)
+        )
+
+    monkeypatch.setattr(build_dag, "build_filtered_db", fake_build)
+    _patch(monkeypatch, FakeClient())
+    names = (build_dag.FILTERED_DB_BUILD, "5900_split_build")
+
+    spec = build_dag.load_builds(names, schema_dir=schema_dir)[build_dag.FILTERED_DB_BUILD]
+    results = build_dag.run_builds(names, schema_dir=schema_dir)
+
+    assert spec.reads == {"game_data.info", "game_data.participant_stats"}
+    assert spec.writes == {
+        "game_data_filtered.valid_game_ids",
+        "game_data_filtered.valid_game_ids_delta",
+        "game_data_filtered.participant_stats",
+    }
+    assert spec.stops_merges
+    assert calls == [("auto", schema_dir, f"build.{build_dag.FILTERED_DB_BUILD}")]
+    node = next(run for run in results if run.name == build_dag.FILTERED_DB_BUILD)
+    assert (node.status, node.read_rows) == ("ran", 7)
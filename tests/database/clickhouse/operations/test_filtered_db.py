@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import pytest
+
+from database.clickhouse.operations import filtered_db
+
+HASH_A = UUID("11111111-1111-1111-1111-111111111111")
+HASH_B = UUID("22222222-2222-2222-2222-222222222222")
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class FakeClient:
+    def __init__(self, query_results=(), fail_on: str | None = None):
+        self._query_results = iter(query_results)
+        self._fail_on = fail_on
+        self.queries = []
+        self.commands = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append((" ".join(sql.split()), parameters))
+        return FakeResult(next(self._query_results))
+
+    def command(self, sql, parameters=None, settings=None):
+        self.commands.append((" ".join(sql.split()), settings))
+        if self._fail_on and self._fail_on in sql:
+            raise RuntimeError("boom")
+
+
+@pytest.fixture
+def schema_dir(tmp_path):
+    for name in filtered_db.FILTER_CATALOGUE_FILES:
+        (tmp_path / name).write_text(f"SELECT '{name}';\n")
+    (tmp_path / "5003_filtered_tables_build.sql").write_text(
+        "-- header\nSYSTEM STOP MERGES;\nSET max_threads = 2;\n"
+        "INSERT INTO t\nSELECT 1;\nSYSTEM START MERGES;\n"
+    )
+    (tmp_path / "5003_filtered_tables_incremental_build.sql").write_text(
+        "TRUNCATE TABLE d;\nINSERT INTO d SELECT 1;\n"
+    )
+    return tmp_path
+
+
+def _patch(monkeypatch, client):
+    recorded = []
+    monkeypatch.setattr(filtered_db, "get_client", lambda: client)
+    monkeypatch.setattr(
+        filtered_db,
+        "record_timestamp",
+        lambda name, run_id, stored_at: recorded.append((name, run_id)),
+    )
+    return recorded
+
+
+def test_catalogue_hash_changes_with_filter_sql(schema_dir) -> None:
+    before = filtered_db.filter_catalogue_hash(schema_dir)
+    (schema_dir / "4000_filter_build.sql").write_text("SELECT 'f03 >= 90%';\n")
+
+    assert filtered_db.filter_catalogue_hash(schema_dir) != before
+
+
+def test_catalogue_covers_both_build_paths_and_their_schemas() -> None:
+    catalogue = set(filtered_db.FILTER_CATALOGUE_FILES)
+
+    assert catalogue.issuperset(filtered_db.FULL_BUILD_FILES)
+    assert catalogue.issuperset(filtered_db.INCREMENTAL_BUILD_FILES)
+    assert {
+        "5000_create_filtered_db_schema.sql",
+        "5001_valid_game_ids_schema.sql",
+    } <= catalogue
+    for name in catalogue:
+        assert (filtered_db.SCHEMA_DIR / name).is_file()
+
+
+@pytest.mark.parametrize(
+    ("requested", "watermark_hash", "expected"),
+    [
+        ("auto", None, "full"),
+        ("auto", HASH_A, "incremental"),
+        ("auto", HASH_B, "full"),
+        ("full", HASH_A, "full"),
+        ("incremental", HASH_A, "incremental"),
+    ],
+)
+def test_resolve_mode(requested, watermark_hash, expected) -> None:
+    watermark = (
+        None
+        if watermark_hash is None
+        else filtered_db.FilteredBuildWatermark(watermark_hash, 100)
+    )
+
+    assert filtered_db.resolve_mode(requested, watermark, HASH_A) == expected
+
+
+def test_incremental_mode_requires_matching_watermark() -> None:
+    with pytest.raises(ValueError):
+        filtered_db.resolve_mode("incremental", None, HASH_A)
+    with pytest.raises(ValueError):
+        filtered_db.resolve_mode(
+            "incremental", filtered_db.FilteredBuildWatermark(HASH_B, 100), HASH_A
+        )
+
+
+def test_auto_build_applies_delta_when_catalogue_unchanged(monkeypatch, schema_dir) -> None:
+    catalogue_hash = filtered_db.filter_catalogue_hash(schema_dir)
+    client = FakeClient(query_results=[[(str(catalogue_hash), 100)], [(7, 2)]])
+    recorded = _patch(monkeypatch, client)
+
+    result = filtered_db.build_filtered_db(schema_dir=schema_dir)
+
+    assert result == filtered_db.FilteredBuildResult("incremental", catalogue_hash, 7, 2)
+    assert [sql for sql, _ in client.commands] == [
+        "TRUNCATE TABLE d",
+        "INSERT INTO d SELECT 1",
+    ]
+    assert recorded == [(filtered_db.FILTERED_DB_BUILD_NAME, catalogue_hash)]
+
+
+def test_auto_build_runs_full_rebuild_after_catalogue_change(monkeypatch, schema_dir) -> None:
+    client = FakeClient(query_results=[[(str(HASH_B), 100)]])
+    recorded = _patch(monkeypatch, client)
+
+    result = filtered_db.build_filtered_db(schema_dir=schema_dir)
+
+    assert result.mode == "full"
+    assert [sql for sql, _ in client.commands] == [
+        "SELECT '5001_valid_game_ids_build.sql'",
+        "SYSTEM STOP MERGES",
+        "INSERT INTO t SELECT 1",
+        "SYSTEM START MERGES",
+    ]
+    assert recorded == [(filtered_db.FILTERED_DB_BUILD_NAME, result.catalogue_hash)]
+
+
+def test_failed_full_build_restarts_merges_and_records_nothing(monkeypatch, schema_dir) -> None:
+    client = FakeClient(query_results=[[]], fail_on="INSERT INTO t")
+    recorded = _patch(monkeypatch, client)
+
+    with pytest.raises(RuntimeError):
+        filtered_db.build_filtered_db(schema_dir=schema_dir)
+
+    assert client.commands[-1] == ("SYSTEM START MERGES", None)
+    assert recorded == []
+
+
+def test_refresh_filtered_months_replaces_one_partition_per_month(monkeypatch) -> None:
+    client = FakeClient(query_results=[[("game_month",)], [(4,)], [(6,)]])
+    _patch(monkeypatch, client)
+
+    copied = filtered_db.refresh_filtered_months([202608, 202609])
+
+    assert copied == {"game_data_filtered.participant_stats": 10}
+    commands = [sql for sql, _ in client.commands]
+    assert commands[:2] == [
+        "DROP TABLE IF EXISTS game_data_filtered.participant_stats__month",
+        (
+            "CREATE TABLE game_data_filtered.participant_stats__month "
+            "AS game_data_filtered.participant_stats"
+        ),
+    ]
+    assert "WHERE t.game_month = 202608" in commands[2]
+    assert (
+        "AND (t.matchid, t.run_id) NOT IN ( SELECT matchid, run_id "
+        "FROM game_data.matchdata_tombstones "
+        "WHERE stream IN ('all', 'non_timeline') )"
+    ) in commands[2]
+    assert commands[3] == (
+        "ALTER TABLE game_data_filtered.participant_stats REPLACE PARTITION 202608 "
+        "FROM game_data_filtered.participant_stats__month"
+    )
+    assert "WHERE t.game_month = 202609" in commands[7]
+
+
+def test_refresh_filtered_months_requires_partitioned_target(monkeypatch) -> None:
+    client = FakeClient(query_results=[[("",)]])
+    _patch(monkeypatch, client)
+
+    with pytest.raises(ValueError, match="D14"):
+        filtered_db.refresh_filtered_months([202609])
+    assert client.commands == []
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from database.clickhouse.operations import staging
+
+RUN_A = UUID("11111111-1111-1111-1111-111111111111")
+TABLES = ("game_data.metadata", "game_data.info")
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class FakeClient:
+    def __init__(self, query_results=()):
+        self._query_results = iter(query_results)
+        self.queries = []
+        self.commands = []
+        self.inserts = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append((sql, parameters))
+        return FakeResult(next(self._query_results))
+
+    def command(self, sql, parameters=None, settings=None):
+        self.commands.append((" ".join(sql.split()), parameters, settings))
+
+    def insert(self, table, data, column_names):
+        self.inserts.append((table, data, column_names))
+
+
+def _patch(monkeypatch, client):
+    finished: list[list[str]] = []
+    source_deleted: list[list[str]] = []
+    monkeypatch.setattr(staging, "get_client", lambda: client)
+    monkeypatch.setattr(staging, "mark_matchids_finished", finished.append)
+    monkeypatch.setattr(
+        staging,
+        "delete_by_matchids",
+        lambda table, ids: source_deleted.append(list(ids)),
+    )
+    return finished, source_deleted
+
+
+def test_commit_records_promotes_in_order_then_drops_partitions(monkeypatch):
+    client = FakeClient()
+    finished, source_deleted = _patch(monkeypatch, client)
+
+    staging.commit_staged_batch(
+        RUN_A, promote=["NA1_1"], finish_only=["NA1_2"], tables=TABLES
+    )
+
+    assert client.inserts == [
+        (
+            staging.PROMOTIONS_TABLE,
+            [(RUN_A, "NA1_1", 1), (RUN_A, "NA1_2", 0)],
+            staging.PROMOTION_COLUMNS,
+        )
+    ]
+    promotions = [cmd for cmd in client.commands if cmd[0].startswith("INSERT INTO")]
+    assert [cmd[0].split()[2] for cmd in promotions] == list(TABLES)
+    assert "FROM game_data_staging.info" in promotions[1][0]
+    assert promotions[1][2] == {
+        **staging.PROMOTE_SETTINGS,
+        "insert_deduplication_token": f"matchdata:{RUN_A}:game_data.info",
+    }
+    assert promotions[1][2]["min_insert_block_size_bytes"] == 0
+    drops = [cmd[0] for cmd in client.commands if "DROP PARTITION" in cmd[0]]
+    assert [sql.split()[2] for sql in drops] == [
+        "game_data_staging.metadata",
+        "game_data_staging.info",
+        staging.PROMOTIONS_TABLE,
+    ]
+    assert source_deleted == [["NA1_2"]]
+    assert finished == [["NA1_1", "NA1_2"]]
+
+
+def test_discard_keeps_rows_once_commit_started(monkeypatch):
+    client = FakeClient([[(1,)]])
+    _patch(monkeypatch, client)
+
+    assert staging.discard_staged_batch(RUN_A, TABLES) is False
+    assert client.commands == []
+
+
+def test_discard_drops_uncommitted_partitions(monkeypatch):
+    client = FakeClient([[]])
+    _patch(monkeypatch, client)
+
+    assert staging.discard_staged_batch(RUN_A, TABLES) is True
+    assert len(client.commands) == len(TABLES)
+
+
+def test_recover_replays_manifests_with_same_tokens_then_drops_stale_runs(monkeypatch):
+    run_b = UUID("22222222-2222-2222-2222-222222222222")
+    run_live = UUID("33333333-3333-3333-3333-333333333333")
+    client = FakeClient(
+        [
+            [(RUN_A, "NA1_1", 1), (RUN_A, "NA1_2", 0), (run_live, "NA1_9", 1)],
+            [(run_b,), (run_live,)],
+        ]
+    )
+    finished, _ = _patch(monkeypatch, client)
+
+    assert staging.recover_staged_batches(TABLES, skip_run_ids={run_live}) == 1
+
+    tokens = [
+        cmd[2]["insert_deduplication_token"]
+        for cmd in client.commands
+        if cmd[0].startswith("INSERT INTO")
+    ]
+    assert tokens == [f"matchdata:{RUN_A}:{table}" for table in TABLES]
+    assert finished == [["NA1_1", "NA1_2"]]
+    assert "UNION DISTINCT" in client.queries[1][0]
+    assert client.commands[-2:] == [
+        (
+            "ALTER TABLE game_data_staging.metadata DROP PARTITION toUUID(%(run_id)s)",
+            {"run_id": str(run_b)},
+            None,
+        ),
+        (
+            "ALTER TABLE game_data_staging.info DROP PARTITION toUUID(%(run_id)s)",
+            {"run_id": str(run_b)},
+            None,
+        ),
+    ]
+
+
+def test_staging_schema_covers_every_promoted_table():
+    from pathlib import Path
+
+    from app.worker.pipelines.matchdata_orchestrator import STAGING_PROMOTION_ORDER
+
+    schema = (
+        Path(__file__).resolve().parents[4]
+        / "database/clickhouse/schema/3190_matchdata_staging_schema.sql"
+    ).read_text()
+    for table in STAGING_PROMOTION_ORDER:
+        assert f"{staging.staging_table(table)}\nAS {table}\n" in schema
+        assert f"ALTER TABLE {table} MODIFY SETTING" in schema
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from database.clickhouse.operations import matchdata
+
+RUN_A = UUID("11111111-1111-1111-1111-111111111111")
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class FakeClient:
+    def __init__(self, query_results):
+        self._query_results = iter(query_results)
+        self.queries = []
+        self.commands = []
+        self.inserts = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append((sql, parameters))
+        return FakeResult(next(self._query_results))
+
+    def command(self, sql, parameters=None):
+        self.commands.append((sql, parameters))
+
+    def insert(self, table, data, column_names):
+        self.inserts.append((table, data, column_names))
+
+
+def test_anchor_lookups_skip_tombstoned_writers(monkeypatch):
+    client = FakeClient([[("NA1_1",)], []])
+    monkeypatch.setattr(matchdata, "get_client", lambda: client)
+
+    assert matchdata.load_stream_anchor_matchids(["NA1_1"]) == ({"NA1_1"}, set())
+
+    info_sql, _ = client.queries[0]
+    timeline_sql, _ = client.queries[1]
+    assert "FROM game_data.info" in info_sql
+    assert "FROM game_data.matchdata_tombstones" in info_sql
+    assert "stream IN ('all', 'non_timeline')" in info_sql
+    assert "stream IN ('all', 'timeline')" in timeline_sql
+
+
+def test_stream_matchid_runs_search_every_table_in_one_query(monkeypatch):
+    client = FakeClient([[("NA1_1", RUN_A)]])
+    monkeypatch.setattr(matchdata, "get_client", lambda: client)
+
+    runs = matchdata.load_stream_matchid_runs(
+        ("game_data.metadata", "game_data.participant_stats"),
+        ["NA1_1"],
+        stream="non_timeline",
+    )
+
+    assert runs == [("NA1_1", RUN_A)]
+    [(sql, params)] = client.queries
+    assert "FROM game_data.metadata" in sql
+    assert "FROM game_data.participant_stats" in sql
+    assert "UNION DISTINCT" in sql
+    assert params == {"match_ids": ["NA1_1"]}
+
+
+def test_tombstone_matchid_runs_is_one_insert(monkeypatch):
+    client = FakeClient([])
+    monkeypatch.setattr(matchdata, "get_client", lambda: client)
+
+    count = matchdata.tombstone_matchid_runs(
+        [("NA1_1", RUN_A), ("NA1_2", RUN_A), ("NA1_1", RUN_A)], stream="all"
+    )
+
+    assert count == 2
+    assert client.commands == []
+    assert client.inserts == [
+        (
+            matchdata.TOMBSTONE_TABLE,
+            [("NA1_1", RUN_A, "all"), ("NA1_2", RUN_A, "all")],
+            matchdata.TOMBSTONE_COLUMNS,
+        )
+    ]
+
+
+def test_purge_dry_run_counts_per_stream_tables(monkeypatch):
+    client = FakeClient(
+        [
+            [(1_000,)],
+            [("timeline", 2)],
+            [(3,)],
+        ]
+    )
+    monkeypatch.setattr(matchdata, "get_client", lambda: client)
+
+    counts = matchdata.purge_tombstoned_rows(
+        {"non_timeline": ("game_data.info",), "timeline": ("game_data.tl_game_end",)},
+        apply=False,
+    )
+
+    assert counts == {"game_data.tl_game_end": 3}
+    assert client.commands == []
+    count_sql, params = client.queries[2]
+    assert "FROM game_data.tl_game_end" in count_sql
+    assert "SELECT matchid, run_id" in count_sql
+    assert "stream IN ('all', %(stream)s)" in count_sql
+    assert params == {"cutoff": 1_000, "stream": "timeline"}
+
+
+def test_purge_binds_tombstones_by_subquery_not_literals(monkeypatch):
+    client = FakeClient(
+        [
+            [(1_000,)],
+            [("all", 5_000), ("timeline", 1)],
+            [(10,)],
+            [(3,)],
+        ]
+    )
+    monkeypatch.setattr(matchdata, "get_client", lambda: client)
+
+    counts = matchdata.purge_tombstoned_rows(
+        {"non_timeline": ("game_data.info",), "timeline": ("game_data.tl_game_end",)},
+        apply=False,
+    )
+
+    assert counts == {"game_data.info": 10, "game_data.tl_game_end": 3}
+    for sql, params in client.queries[2:]:
+        assert len(sql) < 1_000
+        assert set(params) == {"cutoff", "stream"}
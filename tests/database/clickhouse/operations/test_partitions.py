@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import pytest
+
+from database.clickhouse.operations import partitions
+
+
+def test_game_month_is_utc_year_month_of_epoch_ms() -> None:
+    assert partitions.game_month(1_769_903_880_000) == 202601
+    assert partitions.game_month(1_769_904_000_000) == 202602
+    assert partitions.game_month(0) == partitions.UNKNOWN_GAME_MONTH
+
+
+@pytest.mark.parametrize("value", [2026, 202613, 202600, 100001])
+def test_validate_game_month_rejects_non_partition_ids(value) -> None:
+    with pytest.raises(ValueError, match="YYYYMM"):
+        partitions.validate_game_month(value)
+
+
+def test_validate_game_month_accepts_months_and_unknown() -> None:
+    assert partitions.validate_game_month(202609) == 202609
+    assert partitions.validate_game_month(0) == 0
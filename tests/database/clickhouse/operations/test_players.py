@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from database.clickhouse.operations import players
+from contextlib import nullcontext
 
+import pyarrow as pa
 
-class FakeResult:
-    def __init__(self, rows):
-        self.result_rows = rows
+from database.clickhouse.operations import players
 
 
 class FakeClient:
@@ -13,9 +12,16 @@ class FakeClient:
         self.rows = rows
         self.queries = []
 
-    def query(self, sql, parameters=None):
+    def query_arrow_stream(self, sql, parameters=None, settings=None, use_strings=None):
         self.queries.append((sql, parameters))
-        return FakeResult(self.rows)
+        columns = [
+            pa.array([v if isinstance(v, bytes) else v.encode() for v in col], pa.binary())
+            if any(isinstance(v, bytes) for v in col)
+            else pa.array(col)
+            for col in zip(*self.rows)
+        ]
+        names = list(players.PLAYER_KEY_SCHEMA)
+        return nullcontext(iter([pa.RecordBatch.from_arrays(columns, names=names)]))
 
 
 def test_load_players_reads_latest_published_snapshot(monkeypatch) -> None:
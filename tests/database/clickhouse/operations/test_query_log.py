@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+
+from database.clickhouse.operations import query_log
+from database.clickhouse.query_tags import QUERY_LOG_APP
+
+SINCE = datetime(2026, 10, 19, 12, 0, tzinfo=UTC)
+UNTIL = datetime(2026, 10, 19, 13, 0, tzinfo=UTC)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.commands: list[str] = []
+        self.queries: list[tuple[str, dict]] = []
+
+    def command(self, sql):
+        self.commands.append(sql)
+
+    def query(self, sql, parameters=None):
+        self.queries.append((" ".join(sql.split()), parameters))
+        return FakeResult(self.rows)
+
+
+def test_collect_query_stats_groups_tagged_queries_in_window() -> None:
+    client = FakeClient([("claim", "run-1", "", 3, 1, 300, 4000, 0, 2048, 1500)])
+
+    stats = query_log.collect_query_stats(SINCE, UNTIL, client=client)
+
+    assert client.commands == ["SYSTEM FLUSH LOGS"]
+    sql, params = client.queries[0]
+    assert "FROM system.query_log" in sql
+    assert "JSONExtractString(log_comment, 'app') = %(app)s" in sql
+    assert "GROUP BY stage, run_id, batch" in sql
+    assert params == {
+        "since": int(SINCE.timestamp()),
+        "until": int(UNTIL.timestamp()),
+        "app": QUERY_LOG_APP,
+    }
+    assert stats == [
+        query_log.StageQueryStats("claim", "run-1", "", 3, 1, 300, 4000, 0, 2048, 1500)
+    ]
+
+
+def test_export_and_report_per_stage(monkeypatch, tmp_path) -> None:
+    exported = []
+    monkeypatch.setattr(query_log, "export_query_stats", lambda **kw: exported.append(kw))
+    stats = [
+        query_log.StageQueryStats("claim", "run-1", "", 2, 0, 10, 100, 0, 50, 1000),
+        query_log.StageQueryStats("claim", "run-2", "", 1, 1, 5, 40, 0, 80, 500),
+        query_log.StageQueryStats("build", "", "train", 1, 0, 7, 70, 7, 10, 250),
+    ]
+    path = tmp_path / "reports" / "query_stats.jsonl"
+
+    query_log.export_stage_stats(stats)
+    query_log.write_report(path, stats, since=SINCE, until=UNTIL)
+
+    assert exported[0] == {
+        "stage": "claim",
+        "queries": 3,
+        "failed": 1,
+        "read_rows": 15,
+        "read_bytes": 140,
+        "peak_memory_bytes": 80,
+        "seconds": 1.5,
+    }
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 3
+    assert lines[2]["batch"] == "train" and lines[2]["since"] == SINCE.isoformat()
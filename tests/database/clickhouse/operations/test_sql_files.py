@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from database.clickhouse.operations import sql_files
+
+
+class FakeSummary:
+    def __init__(self, **summary) -> None:
+        self.summary = {key: str(value) for key, value in summary.items()}
+
+
+class FakeClient:
+    def __init__(self, fail_on: str | None = None):
+        self._fail_on = fail_on
+        self.commands: list[str] = []
+        self.settings: list[dict | None] = []
+
+    def command(self, sql, parameters=None, settings=None):
+        self.commands.append(" ".join(sql.split()))
+        self.settings.append(settings)
+        if self._fail_on and self._fail_on in sql:
+            raise RuntimeError("boom")
+        return FakeSummary(read_rows=10, read_bytes=1000, written_rows=5)
+
+
+def test_split_sql_statements_drops_comments_and_empty_statements() -> None:
+    text = "-- noqa: disable=PRS\n-- note; with semicolon\nSELECT 1;\n\nSELECT\n  'a;b';\n"
+
+    assert sql_files.split_sql_statements(text) == ["SELECT 1", "SELECT\n  'a;b'"]
+
+
+def test_run_sql_file_folds_set_statements_and_sums_summaries(tmp_path) -> None:
+    path = tmp_path / "x_build.sql"
+    path.write_text("SYSTEM STOP MERGES;\nSET max_threads = 2;\nINSERT INTO t\nSELECT 1;\n")
+    client = FakeClient()
+
+    stats = sql_files.run_sql_file(path, client=client)
+
+    assert client.commands == ["SYSTEM STOP MERGES", "INSERT INTO t SELECT 1"]
+    assert client.settings == [None, {"max_threads": "2"}]
+    assert stats == sql_files.SqlFileStats(read_rows=20, read_bytes=2000, written_rows=10)
+
+
+def test_run_sql_file_restarts_merges_when_a_statement_fails(tmp_path) -> None:
+    path = tmp_path / "x_build.sql"
+    path.write_text(
+        "SYSTEM STOP MERGES;\nINSERT INTO t SELECT 1;\nSYSTEM START MERGES;\n"
+    )
+    client = FakeClient(fail_on="INSERT INTO t")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        sql_files.run_sql_file(path, client=client)
+
+    assert client.commands == [
+        "SYSTEM STOP MERGES",
+        "INSERT INTO t SELECT 1",
+        "SYSTEM START MERGES",
+    ]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+from contextlib import nullcontext
+from uuid import UUID
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from database.clickhouse.operations import utils
+
+RUN_A = UUID("11111111-1111-1111-1111-111111111111")
+
+
+class FakeSummary:
+    def __init__(self, written: int) -> None:
+        self._written = written
+
+    def written_bytes(self) -> int:
+        return self._written
+
+
+class FakeContext:
+    def __init__(self, table, column_names, settings) -> None:
+        self.table = table
+        self.column_names = column_names
+        self.settings = settings
+        self.data = None
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.contexts: list[FakeContext] = []
+        self.inserts: list[tuple[str, list]] = []
+
+    def create_insert_context(self, table, column_names, column_oriented=False, settings=None):
+        assert column_oriented
+        context = FakeContext(table, column_names, settings)
+        self.contexts.append(context)
+        return context
+
+    def insert(self, context):
+        self.inserts.append((context.table, [list(column) for column in context.data]))
+        return FakeSummary(10 * len(context.data[0]))
+
+
+@pytest.fixture
+def client(monkeypatch) -> FakeClient:
+    fake = FakeClient()
+    monkeypatch.setattr(utils, "get_client", lambda: fake)
+    monkeypatch.setattr(utils, "_insert_contexts", threading.local())
+    return fake
+
+
+def test_persist_data_inserts_columns_with_run_id_first(client) -> None:
+    items = [{"matchId": "NA1_1", "kills": 3}, {"matchId": "NA1_2", "kills": 5}]
+
+    written = utils.persist_data("game_data.t", ("matchId", "kills"), items, RUN_A, 10)
+
+    assert written == 20
+    assert client.contexts[0].column_names == ("run_id", "matchid", "kills")
+    assert client.inserts == [
+        ("game_data.t", [[RUN_A, RUN_A], ["NA1_1", "NA1_2"], [3, 5]]),
+    ]
+
+
+def test_insert_columns_slices_every_column_per_batch(client) -> None:
+    data = [np.arange(5, dtype=np.int32), ["a", "b", "c", "d", "e"]]
+
+    written = utils.insert_columns_in_batches("game_data.t", ("x", "s"), data, 2)
+
+    assert written == 50
+    assert [columns for _, columns in client.inserts] == [
+        [[0, 1], ["a", "b"]],
+        [[2, 3], ["c", "d"]],
+        [[4], ["e"]],
+    ]
+
+
+def test_insert_columns_describes_each_table_once(client) -> None:
+    for _ in range(3):
+        utils.insert_columns_in_batches("game_data.t", ("x",), [[1, 2]], 10)
+    utils.insert_columns_in_batches("game_data.u", ("x",), [[1]], 10)
+
+    assert [context.table for context in client.contexts] == ["game_data.t", "game_data.u"]
+    assert len(client.inserts) == 4
+
+
+def test_insert_columns_keeps_a_context_per_settings(client) -> None:
+    async_settings = {"async_insert": 1, "wait_for_async_insert": 0}
+
+    utils.insert_columns_in_batches("game_data.t", ("x",), [[1]], 10)
+    utils.insert_columns_in_batches(
+        "game_data.t", ("x",), [[1]], 10, settings=async_settings
+    )
+    utils.insert_columns_in_batches(
+        "game_data.t", ("x",), [[2]], 10, settings=dict(async_settings)
+    )
+
+    assert [context.settings for context in client.contexts] == [None, async_settings]
+
+
+def test_insert_columns_rejects_mismatched_column_count(client) -> None:
+    with pytest.raises(ValueError):
+        utils.insert_columns_in_batches("game_data.t", ("x", "y"), [[1]], 10)
+
+    assert utils.insert_columns_in_batches("game_data.t", ("x",), [[]], 10) == 0
+    assert client.inserts == []
+
+
+class FakeArrowClient:
+    def __init__(self, batches) -> None:
+        self.batches = batches
+        self.calls: list[dict] = []
+
+    def query_arrow_stream(self, query, parameters=None, settings=None, use_strings=None):
+        self.calls.append({"parameters": parameters, "use_strings": use_strings})
+        return nullcontext(iter(self.batches))
+
+
+def test_arrow_block_to_numpy_types_strings_arrays_and_nulls() -> None:
+    batch = pa.RecordBatch.from_pydict(
+        {
+            "puuid": pa.array([b"ab\x00\x00", b"cd\x00\x00"], pa.binary(4)),
+            "region": pa.array(["na1", "kr"]).dictionary_encode(),
+            "slots": pa.array([[1.0, 2.0], [3.0, None]], pa.list_(pa.float32())),
+            "frames": pa.array([5, None], pa.uint32()),
+        }
+    )
+
+    block = utils.arrow_block_to_numpy(
+        batch,
+        {"frames": np.float64, "puuid": object, "region": object, "slots": np.float64},
+    )
+
+    assert list(block) == ["frames", "puuid", "region", "slots"]
+    assert block["frames"].tolist() == [5.0, 0.0]
+    assert block["puuid"].tolist() == ["ab", "cd"]
+    assert block["region"].dtype == object and block["region"].tolist() == ["na1", "kr"]
+    assert block["slots"].shape == (2, 2) and block["slots"][1].tolist() == [3.0, 0.0]
+
+
+def test_arrow_block_to_numpy_rejects_ragged_arrays() -> None:
+    batch = pa.RecordBatch.from_pydict({"slots": pa.array([[1], [2, 3]])})
+
+    with pytest.raises(ValueError, match="ragged"):
+        utils.arrow_block_to_numpy(batch, {"slots": np.int64})
+
+
+def test_read_columns_concatenates_blocks_and_skips_empty_ones() -> None:
+    batches = [
+        pa.RecordBatch.from_pydict({"x": pa.array([1, 2], pa.int32())}),
+        pa.RecordBatch.from_pydict({"x": pa.array([], pa.int32())}),
+        pa.RecordBatch.from_pydict({"x": pa.array([3], pa.int32())}),
+    ]
+    client = FakeArrowClient(batches)
+
+    blocks = list(utils.stream_column_blocks("SELECT x", {"x": np.int64}, client=client))
+    cols = utils.read_columns(
+        "SELECT x", {"x": np.int64}, parameters={"a": 1}, client=client
+    )
+
+    assert len(blocks) == 2
+    assert cols["x"].dtype == np.int64 and cols["x"].tolist() == [1, 2, 3]
+    assert client.calls[-1] == {"parameters": {"a": 1}, "use_strings": True}
+    assert utils.read_columns("SELECT x", {"x": np.int64}, client=FakeArrowClient([]))[
+        "x"
+    ].shape == (0,)
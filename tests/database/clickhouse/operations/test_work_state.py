@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from pathlib import Path
 from uuid import UUID
 
+import pytest
+
 from database.clickhouse.operations import utils as ops_utils
 from database.clickhouse.operations import work_state
 
@@ -24,13 +27,16 @@ class FakeClient:
         self.queries = []
         self.commands = []
         self.inserts = []
+        self.settings = []
 
-    def query(self, sql, parameters=None):
+    def query(self, sql, parameters=None, settings=None):
         self.queries.append((sql, parameters))
+        self.settings.append(settings)
         return FakeResult(next(self._query_results))
 
-    def command(self, sql, parameters=None):
+    def command(self, sql, parameters=None, settings=None):
         self.commands.append((sql, parameters))
+        self.settings.append(settings)
 
     def insert(self, table, data, column_names):
         self.inserts.append((table, data, column_names))
@@ -38,10 +44,12 @@ class FakeClient:
 
 def test_seed_from_matchids_uses_insert_select(monkeypatch):
     run_id = UUID("11111111-1111-1111-1111-111111111111")
+    old_run_id = UUID("00000000-0000-0000-0000-000000000001")
     client = FakeClient(
         [
             [(run_id,)],
-            [(None,)],
+            [(old_run_id,)],
+            [(old_run_id,), (run_id,)],
             [(2,)],
         ]
     )
@@ -56,16 +64,21 @@ def test_seed_from_matchids_uses_insert_select(monkeypatch):
         "INSERT INTO game_data.matchdata_matchids (run_id, matchid)" in command_sql
     )
     assert "FROM game_data.matchids" in command_sql
+    assert "WHERE run_id IN %(run_ids)s" in command_sql
     assert "GROUP BY matchid" in command_sql
-    assert "SELECT DISTINCT" in command_sql
-    assert "INNER JOIN timeline_matchids USING (matchid)" in command_sql
-    assert "m.run_id = %(run_id)s" not in command_sql
-    assert command_params is None
+    assert "NOT IN game_data.matchdata_known_matchids" in command_sql
+    assert "game_data.info" not in command_sql
+    assert "game_data.tl_game_end" not in command_sql
+    assert command_params == {"run_ids": (run_id,)}
 
-    count_sql, count_params = client.queries[2]
+    count_sql, count_params = client.queries[3]
     assert "SELECT count()" in count_sql
+    assert all(
+        '"stage":"work_state.seed_from_matchids"' in settings["log_comment"]
+        for settings in client.settings
+    )
     assert "FROM (" in count_sql
-    assert count_params is None
+    assert count_params == {"run_ids": (run_id,)}
 
     assert client.inserts == [
         (
@@ -76,12 +89,36 @@ def test_seed_from_matchids_uses_insert_select(monkeypatch):
     ]
 
 
+def test_seed_from_matchids_reads_every_unseeded_run(monkeypatch):
+    run_id = UUID("11111111-1111-1111-1111-111111111111")
+    skipped_run_id = UUID("00000000-0000-0000-0000-000000000002")
+    client = FakeClient(
+        [
+            [(run_id,)],
+            [],
+            [(skipped_run_id,), (run_id,)],
+            [(5,)],
+        ]
+    )
+    _patch_client(monkeypatch, client)
+    monkeypatch.setattr(work_state.time, "time", lambda: 123)
+
+    assert work_state.seed_from_matchids() == 5
+
+    unseeded_sql, unseeded_params = client.queries[2]
+    assert "FROM game_data.data_timestamps" in unseeded_sql
+    assert unseeded_params == {"name": work_state.PUUID_DATA_TIMESTAMP_NAME}
+    assert client.commands[0][1] == {"run_ids": (skipped_run_id, run_id)}
+    assert [insert[1][0][1] for insert in client.inserts] == [skipped_run_id, run_id]
+
+
 def test_seed_from_matchids_skips_already_seeded_inventory(monkeypatch):
     run_id = UUID("22222222-2222-2222-2222-222222222222")
     client = FakeClient(
         [
             [(run_id,)],
             [(run_id,)],
+            [(run_id,)],
         ]
     )
     _patch_client(monkeypatch, client)
@@ -91,12 +128,38 @@ def test_seed_from_matchids_skips_already_seeded_inventory(monkeypatch):
     assert client.inserts == []
 
 
+def test_seed_from_matchids_seeds_older_runs_when_latest_is_seeded(monkeypatch):
+    run_id = UUID("22222222-2222-2222-2222-222222222222")
+    skipped_run_id = UUID("00000000-0000-0000-0000-000000000003")
+    client = FakeClient(
+        [
+            [(run_id,)],
+            [(run_id,)],
+            [(skipped_run_id,), (run_id,)],
+            [(4,)],
+        ]
+    )
+    _patch_client(monkeypatch, client)
+    monkeypatch.setattr(work_state.time, "time", lambda: 789)
+
+    assert work_state.seed_from_matchids() == 4
+    assert client.commands[0][1] == {"run_ids": (skipped_run_id,)}
+    assert client.inserts == [
+        (
+            "game_data.data_timestamps",
+            [(work_state.MATCHDATA_AVAILABLE_SEEDED_NAME, skipped_run_id, 789)],
+            ("name", "run_id", "stored_at"),
+        )
+    ]
+
+
 def test_seed_from_matchids_marks_empty_seed(monkeypatch):
     run_id = UUID("33333333-3333-3333-3333-333333333333")
     client = FakeClient(
         [
             [(run_id,)],
-            [(None,)],
+            [],
+            [(run_id,)],
             [(0,)],
         ]
     )
@@ -117,23 +180,176 @@ def test_seed_from_matchids_marks_empty_seed(monkeypatch):
 def test_claim_pending_matchids_balances_by_continent(monkeypatch):
     client = FakeClient(
         [
-            [("NA1_1",), ("LA1_1",), ("EUW1_1",)],
+            [
+                ("NA1_1", "americas"),
+                ("BR1_1", "americas"),
+                ("EUW1_1", "europe"),
+                ("XX1_1", "unknown"),
+            ],
         ]
     )
     _patch_client(monkeypatch, client)
 
     assert work_state.claim_pending_matchids(batch_size=250) == [
         "NA1_1",
-        "LA1_1",
         "EUW1_1",
+        "XX1_1",
+        "BR1_1",
     ]
 
     claim_sql, claim_params = client.queries[0]
-    assert "AS continent" in claim_sql
-    assert "cityHash64('matchdata_claim', matchid) AS shuffle_key" in claim_sql
+    assert "SELECT matchid, continent" in claim_sql
+    assert "FROM game_data.matchdata_matchids FINAL" in claim_sql
+    assert "WHERE status = 'pending'" in claim_sql
+    assert "ORDER BY continent, shuffle_key, matchid" in claim_sql
     assert "LIMIT %(limit)s BY continent" in claim_sql
-    assert "PARTITION BY continent" in claim_sql
-    assert "continent_order" in claim_sql
+    assert "multiIf" not in claim_sql
+    assert "cityHash64" not in claim_sql
+    assert "PARTITION BY" not in claim_sql
+    assert '"stage":"work_state.claim_pending_matchids"' in client.settings[0]["log_comment"]
+    assert "row_number()" not in claim_sql
     assert "LIMIT %(limit)s BY region" not in claim_sql
-    assert "region_order" not in claim_sql
     assert claim_params == {"limit": 250}
+    assert "NOT has(%(exclude)s, matchid)" not in claim_sql
+
+
+def test_claim_pending_matchids_caps_interleaved_batch(monkeypatch):
+    client = FakeClient(
+        [
+            [
+                ("NA1_1", "americas"),
+                ("NA1_2", "americas"),
+                ("KR_1", "asia"),
+            ],
+        ]
+    )
+    _patch_client(monkeypatch, client)
+
+    assert work_state.claim_pending_matchids(batch_size=2) == ["NA1_1", "KR_1"]
+
+
+def test_claim_pending_matchids_skips_in_flight_ids(monkeypatch):
+    client = FakeClient([[("NA1_3", "americas")]])
+    _patch_client(monkeypatch, client)
+
+    assert work_state.claim_pending_matchids(
+        batch_size=2, exclude={"NA1_2", "NA1_1"}
+    ) == ["NA1_3"]
+
+    claim_sql, claim_params = client.queries[0]
+    assert "AND NOT has(%(exclude)s, matchid)" in claim_sql
+    assert claim_params == {"limit": 2, "exclude": ["NA1_1", "NA1_2"]}
+
+
+def test_queue_schema_materializes_claim_keys():
+    schema = (
+        Path(__file__).resolve().parents[4]
+        / "database/clickhouse/schema/3000_matchdata_matchids_schema.sql"
+    ).read_text()
+    normalized = " ".join(schema.split())
+
+    continent = " ".join(work_state._continent_expr().split())
+    assert f"continent LowCardinality (String) MATERIALIZED {continent}" in normalized
+    assert (
+        "shuffle_key UInt64 MATERIALIZED cityHash64('matchdata_claim', matchid)"
+        in normalized
+    )
+    assert "ORDER BY (continent, shuffle_key, matchid)" in normalized
+
+
+def test_mark_matchids_finished_inserts_status_rows(monkeypatch):
+    client = FakeClient([])
+    _patch_client(monkeypatch, client)
+
+    work_state.mark_matchids_finished(["NA1_2", "NA1_1", "NA1_2"])
+
+    assert len(client.commands) == 1
+    sql, params = client.commands[0]
+    assert "INSERT INTO game_data.matchdata_matchids (run_id, matchid, status)" in sql
+    assert "SELECT run_id, matchid, 'finished'" in sql
+    assert "shuffle_key IN" in sql
+    assert "ALTER TABLE" not in sql
+    assert "mutations_sync" not in sql
+    assert params == {"match_ids": ["NA1_2", "NA1_1"]}
+
+
+def test_mark_matchids_finished_skips_empty(monkeypatch):
+    client = FakeClient([])
+    _patch_client(monkeypatch, client)
+
+    work_state.mark_matchids_finished([])
+
+    assert client.commands == []
+
+
+def test_claim_pending_matchids_shards_and_skips_leased(monkeypatch):
+    client = FakeClient([[("NA1_3", "americas")]])
+    _patch_client(monkeypatch, client)
+
+    assert work_state.claim_pending_matchids(
+        batch_size=2, shard=(1, 4), skip_leased=True
+    ) == ["NA1_3"]
+
+    claim_sql, claim_params = client.queries[0]
+    assert "AND modulo(shuffle_key, %(shard_count)s) = %(shard_index)s" in claim_sql
+    assert "FROM game_data.matchdata_leases FINAL" in claim_sql
+    assert "WHERE expires_at > now64(3)" in claim_sql
+    assert claim_params == {"limit": 2, "shard_index": 1, "shard_count": 4}
+
+
+def test_claim_pending_matchids_rejects_bad_shard():
+    with pytest.raises(ValueError, match="shard index"):
+        work_state.claim_pending_matchids(batch_size=2, shard=(4, 4))
+
+
+def test_held_matchids_picks_earliest_live_lease(monkeypatch):
+    lease = UUID("11111111-1111-1111-1111-111111111111")
+    client = FakeClient([[("NA1_1",)]])
+    _patch_client(monkeypatch, client)
+
+    assert work_state.load_held_matchids(["NA1_1", "NA1_2"], lease_id=lease) == {"NA1_1"}
+
+    sql, params = client.queries[0]
+    assert "argMin(lease_id, (acquired, lease_id)) AS holder" in sql
+    assert "WHERE holder = %(lease_id)s" in sql
+    assert params == {"match_ids": ["NA1_1", "NA1_2"], "lease_id": lease}
+
+
+def test_lease_read_back_reports_own_rows_consistently(monkeypatch):
+    lease = UUID("11111111-1111-1111-1111-111111111111")
+    client = FakeClient([[("NA1_1", 1, 1), ("NA1_2", 0, 1), ("NA1_3", 0, 0)]])
+    _patch_client(monkeypatch, client)
+
+    held, visible = work_state.read_back_matchid_leases(
+        ["NA1_1", "NA1_2", "NA1_3"], lease_id=lease
+    )
+
+    assert held == {"NA1_1"}
+    assert visible == {"NA1_1", "NA1_2"}
+    sql, _ = client.queries[0]
+    assert "FINAL" in sql
+    assert "countIf(lease_id = %(lease_id)s) > 0 AS visible" in sql
+    assert client.settings[0] == {"select_sequential_consistency": 1}
+
+
+def test_lease_writes_use_the_server_clock(monkeypatch):
+    lease = UUID("11111111-1111-1111-1111-111111111111")
+    client = FakeClient([])
+    _patch_client(monkeypatch, client)
+
+    work_state.acquire_matchid_leases(["NA1_1"], lease_id=lease, owner="w1", ttl_s=60)
+    work_state.extend_matchid_leases([lease], ttl_s=60)
+    work_state.release_matchid_leases(lease, ["NA1_1"])
+
+    acquire_sql, acquire_params = client.commands[0]
+    assert "toUnixTimestamp64Nano(now64(9))" in acquire_sql
+    assert acquire_params["ttl_ms"] == 60_000
+    extend_sql, extend_params = client.commands[1]
+    assert "now64(3) + toIntervalMillisecond(%(ttl_ms)s)" in extend_sql
+    assert "WHERE expires_at > now64(3)" in extend_sql
+    assert "matchid IN %(match_ids)s" not in extend_sql
+    assert extend_params["lease_ids"] == [lease]
+    release_sql, release_params = client.commands[2]
+    assert "toDateTime64(0, 3)" in release_sql
+    assert "AND matchid IN %(match_ids)s" in release_sql
+    assert release_params["match_ids"] == ["NA1_1"]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import threading
+
+import pytest
+
+from database.clickhouse import client as ch
+from database.clickhouse.query_tags import query_context
+
+REQUEST = contextvars.ContextVar("request", default=None)
+
+
+def test_query_settings_drop_zero_limits(monkeypatch) -> None:
+    monkeypatch.setattr(ch.settings, "clickhouse_light_max_threads", 4)
+    monkeypatch.setattr(ch.settings, "clickhouse_light_max_memory_usage", 0)
+    monkeypatch.setattr(ch.settings, "clickhouse_light_max_execution_time_s", 30)
+
+    assert ch.query_settings("light") == {"max_threads": 4, "max_execution_time": 30}
+    with pytest.raises(ValueError, match="Unknown ClickHouse query profile"):
+        ch.query_settings("bulk")
+
+
+def test_run_clickhouse_uses_profile_executor_and_carries_context(monkeypatch) -> None:
+    monkeypatch.setattr(ch, "_executors", {})
+
+    def probe(value: int, *, scale: int) -> tuple[int, str, str | None, object]:
+        return (
+            value * scale,
+            threading.current_thread().name,
+            getattr(ch._local, "profile", None),
+            REQUEST.get(),
+        )
+
+    async def main():
+        REQUEST.set("req-1")
+        light = await ch.run_clickhouse(probe, 2, scale=3)
+        heavy = await ch.run_clickhouse(probe, 1, scale=1, profile="heavy")
+        return light, heavy
+
+    light, heavy = asyncio.run(main())
+
+    assert light[0] == 6 and light[1].startswith("clickhouse-light")
+    assert light[2:] == ("light", "req-1")
+    assert heavy[1].startswith("clickhouse-heavy") and heavy[2] == "heavy"
+    assert ch.clickhouse_executor("light") is ch._executors["light"]
+    for executor in ch._executors.values():
+        executor.shutdown()
+
+
+def test_light_queries_do_not_queue_behind_heavy_work(monkeypatch) -> None:
+    monkeypatch.setattr(ch, "_executors", {})
+    monkeypatch.setattr(ch.settings, "clickhouse_heavy_max_concurrency", 1)
+    release = threading.Event()
+
+    async def main():
+        heavy = asyncio.ensure_future(
+            ch.run_clickhouse(release.wait, 5, profile="heavy")
+        )
+        claimed = await asyncio.wait_for(ch.run_clickhouse(lambda: "claimed"), 2)
+        release.set()
+        return claimed, await heavy
+
+    assert asyncio.run(main()) == ("claimed", True)
+    for executor in ch._executors.values():
+        executor.shutdown()
+
+
+def test_bind_query_profile_drops_client_cached_under_another_profile() -> None:
+    def run() -> list[object]:
+        ch._local.client = "default-client"
+        ch.bind_query_profile("heavy")
+        seen = [ch._local.client]
+        ch._local.client = "heavy-client"
+        ch.bind_query_profile("heavy")
+        return [*seen, ch._local.client]
+
+    seen: list[object] = []
+    thread = threading.Thread(target=lambda: seen.extend(run()))
+    thread.start()
+    thread.join()
+
+    assert seen == [None, "heavy-client"]
+
+
+class FakeDriverClient:
+    def __init__(self) -> None:
+        self.params: dict[str, str] = {}
+
+    def command(self, sql):
+        return None
+
+    def set_client_setting(self, key, value) -> None:
+        self.params[key] = value
+
+
+def test_get_client_tags_queries_with_the_current_context(monkeypatch) -> None:
+    created: list[FakeDriverClient] = []
+    monkeypatch.setattr(
+        ch.clickhouse_connect,
+        "get_client",
+        lambda **kwargs: created.append(FakeDriverClient()) or created[-1],
+    )
+
+    def run() -> list[dict]:
+        ch._local.profile = None
+        ch._local.client = None
+        with query_context(stage="claim", run_id="run-1"):
+            tagged = json.loads(ch.get_client().params["log_comment"])
+        untagged = json.loads(ch.get_client().params["log_comment"])
+        return [tagged, untagged]
+
+    seen: list[dict] = []
+    thread = threading.Thread(target=lambda: seen.extend(run()))
+    thread.start()
+    thread.join()
+
+    assert len(created) == 1
+    assert seen[0]["stage"] == "claim" and seen[0]["run_id"] == "run-1"
+    assert "stage" not in seen[1] and "run_id" not in seen[1]
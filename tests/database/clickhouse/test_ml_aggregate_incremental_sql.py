@@ -0,0 +1,91 @@
+"""Contract checks for the incremental 6000/6004/6020-6023 refresh SQL."""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+SCHEMA_DIR = Path(__file__).resolve().parents[3] / "database" / "clickhouse" / "schema"
+STATE_SQL = (SCHEMA_DIR / "6901_ml_aggregate_state_schema.sql").read_text()
+BUILD_SQL = (SCHEMA_DIR / "6901_ml_aggregate_incremental_build.sql").read_text()
+
+FULL_BUILDS = {
+    "matchup_1v1": "6000_1v1_aggregations_build.sql",
+    "synergy_2vx": "6004_2vx_aggregations_build.sql",
+    "matchup_1v1_nobuild": "6020_1v1_nobuild_aggregations_build.sql",
+    "matchup_1v1_champ": "6021_1v1_champ_aggregations_build.sql",
+    "synergy_2vx_nobuild": "6022_2vx_nobuild_aggregations_build.sql",
+    "synergy_2vx_champ": "6023_2vx_champ_aggregations_build.sql",
+}
+
+
+def _schema_columns(table: str) -> list[str]:
+    schema = next(SCHEMA_DIR.glob(FULL_BUILDS[table].replace("_build", "_schema")))
+    body = re.search(
+        rf"CREATE TABLE IF NOT EXISTS game_data_filtered\.{table}\s*\((.*?)\)\s*ENGINE",
+        schema.read_text(),
+        re.DOTALL,
+    )
+    assert body is not None
+    return [line.split()[0] for line in body.group(1).strip().splitlines()]
+
+
+def _finalize_columns(table: str) -> list[str]:
+    select = re.search(
+        rf"INSERT INTO game_data_filtered\.{table}_next\s*SELECT(.*?)\nFROM \(",
+        BUILD_SQL,
+        re.DOTALL,
+    )
+    assert select is not None
+    # Top-level select items sit at four spaces; multi-line ones close with ") AS x".
+    items = re.findall(r"^    (?! )(.*?),?$", select.group(1), re.MULTILINE)
+    return [item.split()[-1] for item in items if not item.endswith("(")]
+
+
+def _pair_keys(sql: str) -> list[str]:
+    """Pair tuple expressions in the ARRAY JOIN list, minus the sign slot."""
+    return re.findall(r"\((\w+_players\[\d\], \w+_players\[\d\], [^,]+?)(?:, sign)?\),?\n", sql)
+
+
+@pytest.mark.parametrize("table", sorted(FULL_BUILDS))
+def test_every_aggregate_has_state_and_atomic_swap(table: str) -> None:
+    assert f"CREATE TABLE IF NOT EXISTS game_data_filtered.{table}_state" in STATE_SQL
+    assert f"INSERT INTO game_data_filtered.{table}_state" in BUILD_SQL
+    assert (
+        f"EXCHANGE TABLES game_data_filtered.{table} AND game_data_filtered.{table}_next"
+        in BUILD_SQL
+    )
+
+
+@pytest.mark.parametrize("table", sorted(FULL_BUILDS))
+def test_finalized_columns_match_full_build_schema(table: str) -> None:
+    assert _finalize_columns(table) == _schema_columns(table)
+
+
+def test_pair_fan_out_matches_full_builds() -> None:
+    full = (SCHEMA_DIR / FULL_BUILDS["synergy_2vx"]).read_text()
+
+    assert len(_pair_keys(full)) == 20
+    assert _pair_keys(BUILD_SQL) == _pair_keys(full) * 3
+    assert "(b, r, p.blue_win),\n            (r, b, toUInt8(1 - p.blue_win))" in BUILD_SQL
+
+
+def test_refresh_refuses_unfinished_delta_and_clears_it_last() -> None:
+    guard = BUILD_SQL.index("throwIf(")
+    delta_insert = BUILD_SQL.index("INSERT INTO game_data_filtered.ml_game_player_delta")
+    truncate = BUILD_SQL.index("TRUNCATE TABLE game_data_filtered.ml_game_player_delta")
+
+    assert guard < delta_insert < truncate
+    assert BUILD_SQL.rstrip().endswith(
+        "TRUNCATE TABLE game_data_filtered.ml_game_player_delta;"
+    )
+
+
+def test_delta_is_signed_and_limited_to_train() -> None:
+    assert "WHERE split = 'train'" in BUILD_SQL
+    assert "toInt8(1) AS sign" in BUILD_SQL
+    assert "toInt8(-1) AS sign" in BUILD_SQL
+    assert BUILD_SQL.count("HAVING total_matchups > 0") == len(FULL_BUILDS)
+    assert "ENGINE = SummingMergeTree" in STATE_SQL
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+
+from database.clickhouse import query_tags
+
+
+def test_tagged_settings_merge_context_tags_into_log_comment() -> None:
+    with (
+        query_tags.query_context(run_id="run-1"),
+        query_tags.query_context(stage="work_state.seed", batch=None),
+    ):
+        settings = query_tags.tagged_settings(settings={"max_threads": 2}, batch="train")
+    untagged = json.loads(query_tags.tagged_settings("x")["log_comment"])
+
+    assert settings["max_threads"] == 2
+    assert json.loads(settings["log_comment"]) == {
+        "app": query_tags.QUERY_LOG_APP,
+        "batch": "train",
+        "run_id": "run-1",
+        "stage": "work_state.seed",
+    }
+    assert untagged == {"app": query_tags.QUERY_LOG_APP, "stage": "x"}
+
+
+def test_tagged_stage_sets_stage_for_the_call_only() -> None:
+    @query_tags.tagged_stage("build")
+    def comment() -> str:
+        return query_tags.log_comment()
+
+    assert json.loads(comment())["stage"] == "build"
+    assert "stage" not in json.loads(query_tags.log_comment())
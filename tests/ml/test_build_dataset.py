@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import numpy as np
 import pytest
+from clickhouse_connect.driver.exceptions import StreamFailureError
 
+from app.ml import build_dataset
 from app.ml.build_dataset import _split_counts, _sql_str
 from app.ml.config import DatasetConfig
 
@@ -13,3 +16,48 @@ def test_cache_build_rejects_global_max_games_cap() -> None:
 
 def test_sql_string_literals_escape_quotes_and_backslashes() -> None:
     assert _sql_str("a'b\\c") == "'a\\'b\\\\c'"
+
+
+def test_stream_split_resumes_after_last_yielded_matchid_on_stream_failure(
+    monkeypatch,
+) -> None:
+    def block(*matchids: str) -> dict[str, np.ndarray]:
+        n = len(matchids)
+        return {
+            "blue_win": np.ones(n),
+            "p1_raw": np.full((n, 10), 0.5),
+            "p1_cnt": np.ones((n, 10)),
+            "champion_id": np.zeros((n, 10), dtype=np.int16),
+            "build_id": np.zeros((n, 10), dtype=np.int16),
+            "matchid": np.array(matchids, dtype=object),
+        }
+
+    queries: list[str] = []
+    comments: list[str] = []
+
+    def fake_stream(query, schema, settings=None):
+        queries.append(query)
+        comments.append(settings["log_comment"])
+        if len(queries) == 1:
+            yield block("NA1_1", "NA1_2")
+            raise StreamFailureError("boom")
+        yield block("NA1_3")
+
+    monkeypatch.setattr(build_dataset, "stream_column_blocks", fake_stream)
+
+    blocks = list(
+        build_dataset._stream_split(
+            DatasetConfig(),
+            "train",
+            5,
+            build_vocab_sql="['a']",
+            n_builds=1,
+            key_build_expr="p.3",
+        )
+    )
+
+    assert [len(b["blue_win"]) for b in blocks] == [2, 1]
+    assert "matchid" not in blocks[0]
+    assert "matchid > 'NA1_2'" in queries[1] and "LIMIT 3" in queries[1]
+    assert '"stage":"ml.build_dataset.chunk"' in comments[0]
+    assert '"batch":"train"' in comments[0]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+
+from app.worker.pipelines.batch_tuning import MIB, ClaimSizer, FlushTuner
+
+
+def test_claim_sizer_tracks_fetch_throughput_within_bounds() -> None:
+    sizer = ClaimSizer(initial=250, target_batch_s=600, minimum=25, maximum=1_000)
+
+    assert sizer.observe(250, 250.0) == 600
+    for _ in range(20):
+        sizer.observe(500, 100.0)
+    assert sizer.size == 1_000
+
+    sizer.observe(0, 10.0)
+    assert sizer.size == 1_000
+
+
+def test_claim_sizer_rejects_bad_bounds() -> None:
+    with pytest.raises(ValueError):
+        ClaimSizer(initial=10, target_batch_s=60, minimum=50, maximum=10)
+
+
+def test_flush_tuner_grows_thresholds_for_fast_inserts() -> None:
+    tuner = FlushTuner(memory_budget_bytes=512 * MIB, max_parts_per_s=1.0)
+    assert tuner.threshold_bytes("t") == MIB
+
+    for _ in range(10):
+        tuner.observe("t", rows=100_000, written_bytes=100 * MIB, elapsed_s=1.0, now=0.0)
+
+    assert tuner.estimated_bytes("t", 1_000) == pytest.approx(1_048_576, rel=0.05)
+    assert tuner.threshold_bytes("t") > 100 * MIB
+
+
+def test_flush_tuner_respects_parts_per_second_budget() -> None:
+    tuner = FlushTuner(memory_budget_bytes=512 * MIB, max_parts_per_s=0.5)
+    tuner.observe("a", rows=1, written_bytes=0, elapsed_s=0.0, now=100.0)
+    rows = MIB // 256 + 1
+
+    assert not tuner.should_flush("a", rows, now=101.0)
+    assert tuner.should_flush("a", rows, now=102.0)
+    assert not tuner.should_flush("a", 10, now=200.0)
+
+
+def test_flush_tuner_forces_largest_buffers_over_memory_budget() -> None:
+    tuner = FlushTuner(memory_budget_bytes=MIB, max_parts_per_s=1.0)
+
+    forced = tuner.over_budget({"small": 100, "big": 4_000, "mid": 1_000})
+
+    assert forced == ["big"]
+    assert tuner.over_budget({"small": 100}) == []
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from scripts import bench_matchid_lookups
+
+
+class FakeResult:
+    def __init__(self, summary):
+        self.summary = summary
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append(" ".join(sql.split()))
+        return FakeResult({"elapsed_ns": "2000000", "read_rows": "10", "read_bytes": "640"})
+
+
+def test_bench_queries_cover_anchor_probe_and_residue_reads() -> None:
+    queries = bench_matchid_lookups.bench_queries(["game_data.tl_participant_stats"])
+
+    assert set(queries) == {
+        "anchor.non_timeline",
+        "anchor.timeline",
+        "matchids.probe",
+        "matchids.probe.has",
+        "residue.runs.tl_participant_stats",
+    }
+    assert "matchid IN %(match_ids)s" in queries["matchids.probe"]
+    assert "has(%(match_ids)s, matchid)" in queries["matchids.probe.has"]
+    assert "'timeline'" in queries["residue.runs.tl_participant_stats"]
+    assert all("%(match_ids)s" in sql for sql in queries.values())
+
+
+def test_run_query_reports_median_and_last_summary() -> None:
+    client = FakeClient()
+
+    stats = bench_matchid_lookups.run_query(client, "SELECT 1", ["NA1_1"], rounds=3)
+
+    assert len(client.queries) == 3
+    assert stats == {"elapsed_ms_median": 2.0, "read_rows": 10, "read_bytes": 640}
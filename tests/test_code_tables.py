@@ -0,0 +1,64 @@
+"""Contract tests for the parser code tables.
+
+The raw ``Enum8`` columns are declared from the same code tables the parsers
+encode with; these pin that the 3xxx schema files agree and that existing codes
+never move (stored data would silently change meaning).
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from app.services.riot_api_client.parsers.models import codes
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "database" / "clickhouse" / "schema"
+
+
+def _column_type(table: str, column: str) -> str:
+    [path] = SCHEMA_DIR.glob(f"31[0-9][0-9]_{table}_schema.sql")
+    sql = path.read_text(encoding="utf-8")
+    match = re.search(rf"^\s+{column} (Enum8 \([^)]*\))", sql, re.MULTILINE)
+    assert match, f"{path.name}: {column} is not an Enum8 column"
+    return re.sub(r"\s+", "", match.group(1))
+
+
+@pytest.mark.parametrize(
+    ("table", "column"),
+    [(t, c) for t, columns in codes.CODED_COLUMNS.items() for c in columns],
+)
+def test_schema_enum8_matches_code_table(table: str, column: str) -> None:
+    expected = codes.CODED_COLUMNS[table][column].enum8_sql()
+    assert _column_type(table, column) == re.sub(r"\s+", "", expected)
+
+
+def test_existing_codes_are_pinned() -> None:
+    assert codes.CODE_TABLES_VERSION == 1
+    assert codes.TEAM_POSITION.codes == {
+        "UNKNOWN": 0,
+        "TOP": 1,
+        "JUNGLE": 2,
+        "MIDDLE": 3,
+        "BOTTOM": 4,
+        "UTILITY": 5,
+    }
+    assert codes.EVENT_TYPE.codes["BUILDING_KILL"] == 16
+    assert codes.LANE_TYPE.codes["BOT_LANE"] == 3
+    assert codes.WARD_TYPE.codes["CONTROL_WARD"] == 3
+    assert codes.KILL_TYPE.codes["KILL_ACE"] == 3
+    assert codes.MONSTER_TYPE.codes["ATAKHAN"] == 5
+    assert codes.BUILDING_TYPE.codes["INHIBITOR_BUILDING"] == 2
+
+
+def test_unknown_values_fall_back_to_zero() -> None:
+    assert codes.WARD_TYPE.encode("NEW_WARD") == codes.UNKNOWN_CODE
+    assert codes.TEAM_POSITION.encode("") == codes.UNKNOWN_CODE
+    assert codes.TEAM_POSITION.encode(None) == codes.UNKNOWN_CODE
+    assert codes.LANE_TYPE.decode(codes.LANE_TYPE.encode("MID_LANE")) == "MID_LANE"
+
+
+def test_code_table_rejects_missing_unknown_member() -> None:
+    with pytest.raises(ValueError, match="must start with 'UNKNOWN'"):
+        codes.CodeTable("bad", ("TOP", "UNKNOWN"))
@@ -5,15 +5,27 @@ from types import SimpleNamespace
 from uuid import UUID
 
 import pytest
+from clickhouse_connect.driver.exceptions import OperationalError
+from prometheus_client import REGISTRY
 
 from app.services.riot_api_client.match_data import MatchFetchResult
+from app.worker.pipelines.batch_tuning import ClaimSizer, FlushTuner
 from app.worker.pipelines.matchdata_orchestrator import (
+    ANCHOR_TABLES,
+    NON_TIMELINE_TABLE_SPECS,
+    STAGING_PROMOTION_ORDER,
+    STREAM_TABLE_SPECS,
+    TIMELINE_TABLE_SPECS,
     MatchDataCollectorState,
+    MatchDataLeases,
+    MatchDataLoader,
+    MatchDataOrchestrator,
     MatchDataSaver,
-    NON_TIMELINE_TABLE_SPECS,
     StreamItem,
-    TIMELINE_TABLE_SPECS,
+    enabled_table_attrs,
+    select_table_specs,
 )
+from app.worker.pipelines.matchdata_wal import MatchDataWal
 from app.worker.pipelines.orchestrator import OrchestrationContext
 
 
@@ -31,15 +43,18 @@ class RecordingSaver(MatchDataSaver):
         self.deleted: list[list[str]] = []
         self.finished: list[list[str]] = []
         self.source_deleted: list[list[str]] = []
-        self.stream_deleted: list[tuple[list[str], list[str]]] = []
+        self.tombstoned: list[tuple[list[tuple[str, UUID]], str]] = []
+
+    async def tombstone_failed_matchids(self, match_ids: list[str], run_id: UUID) -> None:
+        self.deleted.append(list(match_ids))
 
-    async def delete_failed_matchids(self, match_ids: list[str]) -> None:
+    async def tombstone_retired_matchids(self, match_ids: list[str], run_id: UUID) -> None:
         self.deleted.append(list(match_ids))
 
-    async def delete_stream_matchids(self, specs, match_ids: list[str]) -> None:
-        self.stream_deleted.append(([spec.table for spec in specs], list(match_ids)))
+    async def tombstone_rows(self, rows, stream: str) -> None:
+        self.tombstoned.append((list(rows), stream))
 
-    async def delete_unanchored_residue(self, state: MatchDataCollectorState) -> None:
+    async def tombstone_unanchored_residue(self, state: MatchDataCollectorState) -> None:
         return None
 
     async def delete_source_matchids(self, match_ids: list[str]) -> None:
@@ -61,8 +76,16 @@ class FailingSaver(RecordingSaver):
 
 
 class ResidueRecordingSaver(RecordingSaver):
-    async def delete_unanchored_residue(self, state: MatchDataCollectorState) -> None:
-        await MatchDataSaver.delete_unanchored_residue(self, state)
+    async def tombstone_unanchored_residue(self, state: MatchDataCollectorState) -> None:
+        await MatchDataSaver.tombstone_unanchored_residue(self, state)
+
+
+class TombstoneRecordingSaver(RecordingSaver):
+    async def tombstone_failed_matchids(self, match_ids: list[str], run_id: UUID) -> None:
+        await MatchDataSaver.tombstone_failed_matchids(self, match_ids, run_id)
+
+    async def tombstone_retired_matchids(self, match_ids: list[str], run_id: UUID) -> None:
+        await MatchDataSaver.tombstone_retired_matchids(self, match_ids, run_id)
 
 
 def _ctx() -> OrchestrationContext:
@@ -157,7 +180,7 @@ def test_matchdata_stream_anchors_flush_last() -> None:
     assert TIMELINE_TABLE_SPECS[-1].table == "game_data.tl_game_end"
 
 
-def test_matchdata_exception_deletes_partial_rows() -> None:
+def test_matchdata_exception_tombstones_partial_rows() -> None:
     saver = FailingSaver()
     state = MatchDataCollectorState(matchids=["NA1_1"])
 
@@ -179,13 +202,18 @@ def test_matchdata_exception_deletes_partial_rows() -> None:
     assert saver.finished == []
 
 
-def test_matchdata_deletes_unanchored_residue(monkeypatch) -> None:
-    def fake_load_table_matchids(table, match_ids):
-        return {"NA1_1"} if table == "game_data.metadata" else set()
+def test_matchdata_tombstones_unanchored_residue(monkeypatch) -> None:
+    residue_run = UUID("22222222-2222-2222-2222-222222222222")
+    lookups: list[tuple[list[str], str]] = []
+
+    def fake_load_stream_matchid_runs(tables, match_ids, *, stream):
+        lookups.append((list(tables), stream))
+        # Only a later table of the stream was flushed before the crash.
+        return [("NA1_1", residue_run)] if "game_data.participant_stats" in tables else []
 
     monkeypatch.setattr(
-        "app.worker.pipelines.matchdata_orchestrator.load_table_matchids",
-        fake_load_table_matchids,
+        "app.worker.pipelines.matchdata_orchestrator.load_stream_matchid_runs",
+        fake_load_stream_matchid_runs,
     )
     saver = ResidueRecordingSaver()
     state = MatchDataCollectorState(
@@ -194,8 +222,774 @@ def test_matchdata_deletes_unanchored_residue(monkeypatch) -> None:
         timeline_matchids=["NA1_1"],
     )
 
-    asyncio.run(saver.delete_unanchored_residue(state))
+    asyncio.run(saver.tombstone_unanchored_residue(state))
+
+    assert saver.tombstoned == [([("NA1_1", residue_run)], "non_timeline")]
+    assert [stream for _, stream in lookups] == ["non_timeline", "timeline"]
+    for tables, stream in lookups:
+        assert tables == [spec.table for spec in STREAM_TABLE_SPECS[stream]]
+
+
+def test_matchdata_failure_tombstones_only_this_run(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.worker.pipelines.matchdata_orchestrator.load_table_matchid_runs",
+        lambda *args, **kwargs: pytest.fail("failure path must not scan tables"),
+    )
+    saver = TombstoneRecordingSaver()
+    run_id = _ctx().run_id
+
+    asyncio.run(saver.tombstone_failed_matchids(["NA1_1", "NA1_2"], run_id))
+
+    assert saver.tombstoned == [([("NA1_1", run_id), ("NA1_2", run_id)], "all")]
+
+
+def test_matchdata_retire_tombstones_earlier_anchored_stream(monkeypatch) -> None:
+    earlier_run = UUID("33333333-3333-3333-3333-333333333333")
+    lookups: list[tuple[str, str]] = []
 
-    assert saver.stream_deleted == [
-        ([spec.table for spec in NON_TIMELINE_TABLE_SPECS], ["NA1_1"])
+    def fake_load_table_matchid_runs(table, match_ids, *, stream):
+        lookups.append((table, stream))
+        return [("NA1_1", earlier_run)] if stream == "non_timeline" else []
+
+    monkeypatch.setattr(
+        "app.worker.pipelines.matchdata_orchestrator.load_table_matchid_runs",
+        fake_load_table_matchid_runs,
+    )
+    saver = TombstoneRecordingSaver()
+    run_id = _ctx().run_id
+
+    asyncio.run(saver.tombstone_retired_matchids(["NA1_1"], run_id))
+
+    assert lookups == [
+        ("game_data.info", "non_timeline"),
+        ("game_data.tl_game_end", "timeline"),
     ]
+    assert saver.tombstoned == [
+        ([("NA1_1", run_id)], "all"),
+        ([("NA1_1", earlier_run)], "non_timeline"),
+    ]
+
+
+class StagingRecordingSaver(RecordingSaver):
+    def __init__(self) -> None:
+        super().__init__()
+        self.staging = True
+        self.committed: list[tuple[UUID, list[str], list[str]]] = []
+        self.discarded: list[UUID] = []
+
+    async def tombstone_unanchored_residue(self, state: MatchDataCollectorState) -> None:
+        pytest.fail("staging mode must not scan for residue")
+
+    async def commit_staged_batch(self, run_id, finished, retired) -> None:
+        self.committed.append((run_id, list(finished), list(retired)))
+
+    async def discard_staged_batch(self, run_id: UUID) -> None:
+        self.discarded.append(run_id)
+
+
+def test_matchdata_staging_commits_finished_and_retired_in_one_step() -> None:
+    saver = StagingRecordingSaver()
+    state = MatchDataCollectorState(matchids=["NA1_1", "NA1_2", "NA1_3"])
+
+    asyncio.run(
+        saver.save(
+            _items(
+                StreamItem("non_timeline", MatchFetchResult("NA1_1", {"metadata": {}}, 200)),
+                StreamItem("timeline", MatchFetchResult("NA1_1", {"frames": []}, 200)),
+                StreamItem("non_timeline", MatchFetchResult("NA1_2", {"metadata": {}}, 200)),
+                StreamItem("timeline", MatchFetchResult("NA1_2", None, 404)),
+                StreamItem("non_timeline", MatchFetchResult("NA1_3", {"metadata": {}}, 200)),
+            ),
+            state,
+            _ctx(),
+        )
+    )
+
+    assert saver.committed == [(_ctx().run_id, ["NA1_1"], ["NA1_2"])]
+    assert saver.deleted == []
+    assert saver.source_deleted == []
+    assert saver.finished == []
+
+
+def test_matchdata_staging_failure_discards_staged_batch() -> None:
+    class FailingStagingSaver(StagingRecordingSaver):
+        async def _buffer_inserts(self, specs, parsed, buffers, run_id) -> None:
+            raise RuntimeError("insert failed")
+
+    saver = FailingStagingSaver()
+
+    with pytest.raises(RuntimeError, match="insert failed"):
+        asyncio.run(
+            saver.save(
+                _items(
+                    StreamItem(
+                        "non_timeline",
+                        MatchFetchResult("NA1_1", {"metadata": {}}, 200),
+                    )
+                ),
+                MatchDataCollectorState(matchids=["NA1_1"]),
+                _ctx(),
+            )
+        )
+
+    assert saver.discarded == [_ctx().run_id]
+    assert saver.deleted == []
+
+
+def test_matchdata_staging_flushes_into_staging_tables(monkeypatch) -> None:
+    inserted: list[str] = []
+
+    async def fake_insert_one(self, table, cols, items, run_id) -> None:
+        inserted.append(table)
+
+    monkeypatch.setattr(MatchDataSaver, "_insert_one", fake_insert_one)
+    saver = MatchDataSaver(
+        non_timeline_parser=FakeParser(),
+        timeline_parser=FakeParser(),
+        staging=True,
+    )
+
+    asyncio.run(
+        saver._flush_all_buffers({"game_data.info": [{}]}, _ctx().run_id)
+    )
+
+    assert inserted == ["game_data_staging.info"]
+
+
+def test_matchdata_async_insert_settles_buffer_before_anchors(monkeypatch) -> None:
+    calls: list[tuple[str, int | None]] = []
+    module = "app.worker.pipelines.matchdata_orchestrator"
+
+    def fake_persist(table, cols, items, run_id, batch_size, *, settings=None):
+        calls.append((table, settings["wait_for_async_insert"] if settings else None))
+        return 0
+
+    monkeypatch.setattr(f"{module}.persist_data", fake_persist)
+    monkeypatch.setattr(
+        f"{module}.flush_async_insert_queue", lambda: calls.append(("flush", None))
+    )
+    saver = MatchDataSaver(
+        non_timeline_parser=FakeParser(),
+        timeline_parser=FakeParser(),
+        async_insert=True,
+        async_insert_wait=False,
+    )
+    buffers = {
+        "game_data.info": [{}],
+        "game_data.metadata": [{}],
+        "game_data.bans": [{}],
+    }
+
+    asyncio.run(saver._flush_all_buffers(buffers, _ctx().run_id))
+
+    assert sorted(calls[:2]) == [("game_data.bans", 0), ("game_data.metadata", 0)]
+    assert calls[2:] == [("flush", None), ("game_data.info", 1), ("flush", None)]
+
+
+def test_matchdata_sync_insert_flushes_anchors_after_other_tables(monkeypatch) -> None:
+    inserted: list[str] = []
+
+    async def fake_insert_one(self, table, cols, items, run_id) -> None:
+        inserted.append(table)
+
+    monkeypatch.setattr(MatchDataSaver, "_insert_one", fake_insert_one)
+    saver = MatchDataSaver(non_timeline_parser=FakeParser(), timeline_parser=FakeParser())
+    buffers = {"game_data.info": [{}], "game_data.tl_game_end": [{}], "game_data.bans": [{}]}
+
+    asyncio.run(saver._flush_all_buffers(buffers, _ctx().run_id))
+
+    assert inserted == ["game_data.bans", "game_data.info", "game_data.tl_game_end"]
+
+
+def test_matchdata_staging_promotes_anchors_last() -> None:
+    assert set(STAGING_PROMOTION_ORDER[-2:]) == ANCHOR_TABLES
+    assert sorted(STAGING_PROMOTION_ORDER) == sorted(
+        spec.table for spec in (*NON_TIMELINE_TABLE_SPECS, *TIMELINE_TABLE_SPECS)
+    )
+
+
+def test_matchdata_staging_loader_recovers_then_skips_anchor_lookups(monkeypatch) -> None:
+    calls: list[str] = []
+    module = "app.worker.pipelines.matchdata_orchestrator"
+    monkeypatch.setattr(
+        f"{module}.recover_staged_batches",
+        lambda tables, *, skip_run_ids: calls.append("recover") or 0,
+    )
+    monkeypatch.setattr(f"{module}.seed_from_matchids", lambda: calls.append("seed") or 0)
+    monkeypatch.setattr(
+        f"{module}.claim_pending_matchids",
+        lambda **kwargs: calls.append("claim") or ["NA1_1"],
+    )
+    monkeypatch.setattr(
+        f"{module}.load_stream_anchor_matchids",
+        lambda ids: pytest.fail("staging mode must not look up anchors"),
+    )
+    loader = MatchDataLoader(staging=True)
+
+    state = loader.load(_ctx())
+    loader.load(_ctx())
+
+    assert calls == ["recover", "seed", "claim", "claim"]
+    assert state.stream_matchids("non_timeline") == ["NA1_1"]
+    assert state.stream_matchids("timeline") == ["NA1_1"]
+
+
+class FakeLeases(MatchDataLeases):
+    def __init__(self, *, lost: set[str] = frozenset(), expired: set[str] = frozenset()) -> None:
+        super().__init__(owner="test", ttl_s=60, retry_s=0, confirm_s=0)
+        self.lost = set(lost)
+        self.expired = set(expired)
+        self.released: list[UUID] = []
+
+    def acquire(self, run_id: UUID, match_ids: list[str]) -> list[str]:
+        won = [mid for mid in match_ids if mid not in self.lost]
+        self.lost.clear()
+        if won:
+            self._held[run_id] = won
+        return won
+
+    def held(self, run_id: UUID, match_ids: list[str]) -> set[str]:
+        return {mid for mid in match_ids if mid not in self.expired}
+
+    def release(self, run_id: UUID) -> None:
+        self._held.pop(run_id, None)
+        self.released.append(run_id)
+
+
+def test_matchdata_leases_release_lost_candidates(monkeypatch) -> None:
+    module = "app.worker.pipelines.matchdata_orchestrator"
+    released: list[tuple[UUID, list[str]]] = []
+    monkeypatch.setattr(f"{module}.acquire_matchid_leases", lambda *a, **k: None)
+    monkeypatch.setattr(
+        f"{module}.read_back_matchid_leases",
+        lambda ids, *, lease_id: ({"NA1_1"}, {"NA1_1", "NA1_2"}),
+    )
+    monkeypatch.setattr(
+        f"{module}.release_matchid_leases",
+        lambda lease_id, match_ids=(): released.append((lease_id, list(match_ids))),
+    )
+    leases = MatchDataLeases(owner="w1", ttl_s=60, retry_s=0, confirm_s=0)
+    run_id = _ctx().run_id
+
+    assert leases.acquire(run_id, ["NA1_1", "NA1_2"]) == ["NA1_1"]
+    assert released == [(run_id, ["NA1_2"])]
+
+    leases.release(run_id)
+    leases.release(run_id)
+    assert released == [(run_id, ["NA1_2"]), (run_id, [])]
+
+
+def test_matchdata_leases_read_back_until_own_rows_are_visible(monkeypatch) -> None:
+    module = "app.worker.pipelines.matchdata_orchestrator"
+    reads = iter(
+        [
+            (set(), set()),
+            ({"NA1_1"}, {"NA1_1"}),
+            ({"NA1_1"}, {"NA1_1", "NA1_2"}),
+            # Confirmation read of the ids held so far.
+            ({"NA1_1"}, {"NA1_1"}),
+        ]
+    )
+    released: list[list[str]] = []
+    monkeypatch.setattr(f"{module}.acquire_matchid_leases", lambda *a, **k: None)
+    monkeypatch.setattr(
+        f"{module}.read_back_matchid_leases", lambda ids, *, lease_id: next(reads)
+    )
+    monkeypatch.setattr(
+        f"{module}.release_matchid_leases",
+        lambda lease_id, match_ids=(): released.append(list(match_ids)),
+    )
+    leases = MatchDataLeases(owner="w1", ttl_s=60, retry_s=0, confirm_s=0)
+
+    assert leases.acquire(_ctx().run_id, ["NA1_1", "NA1_2"]) == ["NA1_1"]
+    assert next(reads, None) is None
+    assert released == [["NA1_2"]]
+
+
+class FakeLeaseTable:
+    """Lease rows with a visibility flag, to interleave concurrent inserts."""
+
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+
+    def insert(self, match_ids, *, lease_id, acquired, visible=True) -> None:
+        self.rows.extend(
+            {"matchid": mid, "lease_id": lease_id, "acquired": acquired, "visible": visible}
+            for mid in match_ids
+        )
+
+    def read_back(self, match_ids, *, lease_id) -> tuple[set[str], set[str]]:
+        held, visible = set(), set()
+        for mid in match_ids:
+            rows = [r for r in self.rows if r["matchid"] == mid and r["visible"]]
+            if rows and min(rows, key=lambda r: r["acquired"])["lease_id"] == lease_id:
+                held.add(mid)
+            if any(r["lease_id"] == lease_id for r in rows):
+                visible.add(mid)
+        return held, visible
+
+
+def test_matchdata_leases_late_earlier_insert_wins_before_fetch(monkeypatch) -> None:
+    module = "app.worker.pipelines.matchdata_orchestrator"
+    table = FakeLeaseTable()
+    run_a = UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+    run_b = UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb")
+    # Drainer A stamped its lease first, but its insert has not landed yet.
+    table.insert(["NA1_1"], lease_id=run_a, acquired=1, visible=False)
+
+    def acquire(match_ids, *, lease_id, owner, ttl_s):
+        if lease_id == run_b:
+            table.insert(match_ids, lease_id=run_b, acquired=2)
+
+    def settle(seconds: float) -> None:
+        for row in table.rows:
+            row["visible"] = True
+
+    monkeypatch.setattr(f"{module}.acquire_matchid_leases", acquire)
+    reads: list[tuple[UUID, set[str]]] = []
+
+    def read_back(match_ids, *, lease_id):
+        held, visible = table.read_back(match_ids, lease_id=lease_id)
+        reads.append((lease_id, held))
+        return held, visible
+
+    monkeypatch.setattr(f"{module}.read_back_matchid_leases", read_back)
+    monkeypatch.setattr(f"{module}.release_matchid_leases", lambda *a, **k: None)
+    monkeypatch.setattr(f"{module}.time.sleep", settle)
+    drainer_a = MatchDataLeases(owner="a", ttl_s=60)
+    drainer_b = MatchDataLeases(owner="b", ttl_s=60)
+
+    assert drainer_b.acquire(run_b, ["NA1_1"]) == []
+    assert drainer_a.acquire(run_a, ["NA1_1"]) == ["NA1_1"]
+    # B's first read saw only its own row; the confirmation saw A's.
+    assert reads[:2] == [(run_b, {"NA1_1"}), (run_b, set())]
+
+
+def test_lease_keep_alive_survives_clickhouse_errors_only(monkeypatch) -> None:
+    module = "app.worker.pipelines.matchdata_orchestrator"
+    errors = iter([OperationalError("timeout"), OSError("reset"), TypeError("bug")])
+
+    def extend(lease_ids, *, ttl_s):
+        raise next(errors)
+
+    monkeypatch.setattr(f"{module}.extend_matchid_leases", extend)
+    monkeypatch.setattr(f"{module}.MATCHDATA_LEASE_HEARTBEATS_PER_TTL", 1e6)
+    leases = MatchDataLeases(owner="w1", ttl_s=1, retry_s=0, confirm_s=0)
+    leases._held[_ctx().run_id] = ["NA1_1"]
+
+    with pytest.raises(TypeError, match="bug"):
+        asyncio.run(leases.keep_alive())
+
+
+def test_matchdata_loader_reclaims_after_losing_every_lease(monkeypatch) -> None:
+    module = "app.worker.pipelines.matchdata_orchestrator"
+    claims: list[dict] = []
+    batches = iter([["NA1_1"], ["NA1_2"]])
+    monkeypatch.setattr(f"{module}.seed_from_matchids", lambda: 0)
+    monkeypatch.setattr(
+        f"{module}.claim_pending_matchids",
+        lambda **kwargs: claims.append(kwargs) or next(batches),
+    )
+    monkeypatch.setattr(f"{module}.load_stream_anchor_matchids", lambda ids: (set(), set()))
+    loader = MatchDataLoader(leases=FakeLeases(lost={"NA1_1"}), shard=(2, 3))
+
+    state = loader.load(_ctx())
+
+    assert state.matchids == ["NA1_2"]
+    assert [c["skip_leased"] for c in claims] == [True, True]
+    assert claims[0]["shard"] == (2, 3)
+
+
+def test_matchdata_saver_skips_commit_for_expired_leases() -> None:
+    leases = FakeLeases(expired={"NA1_2"})
+    saver = RecordingSaver()
+    saver.leases = leases
+    state = MatchDataCollectorState(matchids=["NA1_1", "NA1_2"])
+
+    asyncio.run(
+        saver.save(
+            _items(
+                *(
+                    StreamItem(stream, MatchFetchResult(mid, {"metadata": {}}, 200))
+                    for mid in ("NA1_1", "NA1_2")
+                    for stream in ("non_timeline", "timeline")
+                )
+            ),
+            state,
+            _ctx(),
+        )
+    )
+
+    assert saver.finished == [["NA1_1"]]
+    assert saver.deleted == [["NA1_2"]]
+    assert leases.released == [_ctx().run_id]
+
+
+def test_select_table_specs_drops_disabled_tables() -> None:
+    specs = select_table_specs(
+        TIMELINE_TABLE_SPECS,
+        {"game_data.tl_ward_placed", "game_data.tl_level_up"},
+    )
+
+    tables = [spec.table for spec in specs]
+    assert "game_data.tl_ward_placed" not in tables
+    assert "game_data.tl_level_up" not in tables
+    assert tables[-1] == "game_data.tl_game_end"
+    assert len(specs) == len(TIMELINE_TABLE_SPECS) - 2
+
+
+def test_select_table_specs_rejects_anchor_and_unknown_tables() -> None:
+    with pytest.raises(ValueError, match="anchor"):
+        select_table_specs(NON_TIMELINE_TABLE_SPECS, {"game_data.info"})
+    with pytest.raises(ValueError, match="Unknown"):
+        select_table_specs(TIMELINE_TABLE_SPECS, {"game_data.tl_nope"})
+
+
+def test_enabled_table_attrs_uses_parser_field_names() -> None:
+    attrs = enabled_table_attrs("timeline", {"game_data.tl_skill_level_up"})
+
+    assert "skillLevelUp" not in attrs
+    assert {"gameEnd", "participantStats"} <= attrs
+
+
+def test_matchdata_saver_never_buffers_disabled_tables() -> None:
+    saver = MatchDataSaver(
+        non_timeline_parser=FakeParser(),
+        timeline_parser=FakeParser(),
+        disabled_tables={"game_data.tl_ward_placed"},
+    )
+
+    timeline_tables = [spec.table for spec in saver.stream_specs["timeline"]]
+    assert "game_data.tl_ward_placed" not in timeline_tables
+    assert saver.stream_specs["non_timeline"] == NON_TIMELINE_TABLE_SPECS
+
+
+class QueueLoader:
+    def __init__(self, matchids: list[str], *, batch_size: int) -> None:
+        self.pending = list(matchids)
+        self.batch_size = batch_size
+        self.excludes: list[frozenset[str]] = []
+
+    def load(self, ctx, *, exclude=()) -> MatchDataCollectorState:
+        self.excludes.append(frozenset(exclude))
+        claimed = [mid for mid in self.pending if mid not in exclude]
+        return MatchDataCollectorState(matchids=claimed[: self.batch_size])
+
+
+class LoggingCollector:
+    def __init__(self, stream: str, log: list[str], *, fail_once: set[str] = frozenset()) -> None:
+        self.stream = stream
+        self.log = log
+        self.fail_once = set(fail_once)
+
+    async def collect(self, state, ctx):
+        for mid in state.stream_matchids(self.stream):
+            self.log.append(f"fetch {self.stream} {mid}")
+            if mid in self.fail_once:
+                self.fail_once.discard(mid)
+                yield MatchFetchResult(mid, None, 503)
+            else:
+                yield MatchFetchResult(mid, {"metadata": {}}, 200)
+
+
+class QueueSaver(RecordingSaver):
+    def __init__(self, loader: QueueLoader, log: list[str]) -> None:
+        super().__init__()
+        self.loader = loader
+        self.log = log
+
+    async def mark_finished_matchids(self, match_ids: list[str]) -> None:
+        # Give the fetcher a chance to run while "ClickHouse" is busy.
+        await asyncio.sleep(0.01)
+        await super().mark_finished_matchids(match_ids)
+        self.log.append(f"finished {sorted(match_ids)}")
+        self.loader.pending = [m for m in self.loader.pending if m not in match_ids]
+
+
+def _orchestrator(loader, saver, log, *, prefetch: int, fail_once=frozenset()):
+    return MatchDataOrchestrator(
+        pipeline="match_data",
+        loader=loader,
+        non_timeline_collector=LoggingCollector("non_timeline", log),
+        timeline_collector=LoggingCollector("timeline", log, fail_once=fail_once),
+        saver=saver,
+        prefetch_batches=prefetch,
+    )
+
+
+def test_matchdata_pipelined_overlaps_fetch_with_save() -> None:
+    log: list[str] = []
+    loader = QueueLoader(["NA1_1", "NA1_2", "NA1_3", "NA1_4"], batch_size=2)
+    saver = QueueSaver(loader, log)
+
+    asyncio.run(_orchestrator(loader, saver, log, prefetch=1).run())
+
+    assert saver.finished == [["NA1_1", "NA1_2"], ["NA1_3", "NA1_4"]]
+    assert log.index("fetch timeline NA1_3") < log.index("finished ['NA1_1', 'NA1_2']")
+    assert frozenset({"NA1_1", "NA1_2"}) in loader.excludes
+    assert loader.pending == []
+
+
+def test_matchdata_pipelined_reclaims_requeued_ids_exactly_once() -> None:
+    log: list[str] = []
+    loader = QueueLoader(["NA1_1", "NA1_2", "NA1_3"], batch_size=2)
+    saver = QueueSaver(loader, log)
+
+    asyncio.run(
+        _orchestrator(loader, saver, log, prefetch=2, fail_once={"NA1_2"}).run()
+    )
+
+    finished = [mid for batch in saver.finished for mid in batch]
+    assert sorted(finished) == ["NA1_1", "NA1_2", "NA1_3"]
+    assert saver.deleted == []
+
+
+def test_matchdata_pipelined_fetch_error_cleans_up_batch() -> None:
+    class ExplodingCollector(LoggingCollector):
+        async def collect(self, state, ctx):
+            raise RuntimeError("fetch failed")
+            yield
+
+    log: list[str] = []
+    loader = QueueLoader(["NA1_1", "NA1_2"], batch_size=2)
+    saver = QueueSaver(loader, log)
+    orchestrator = _orchestrator(loader, saver, log, prefetch=1)
+    orchestrator.timeline_collector = ExplodingCollector("timeline", log)
+
+    with pytest.raises(ExceptionGroup):
+        asyncio.run(orchestrator.run())
+
+    assert saver.deleted == [["NA1_1", "NA1_2"]]
+    assert saver.finished == []
+
+
+@pytest.mark.parametrize("prefetch", [0, 1])
+def test_matchdata_records_claim_to_resolution_per_batch(prefetch: int) -> None:
+    def resolved_batches() -> float:
+        return (
+            REGISTRY.get_sample_value(
+                "matchdata_claim_to_resolution_seconds_count", {"pipeline": "match_data"}
+            )
+            or 0.0
+        )
+
+    log: list[str] = []
+    loader = QueueLoader(["NA1_1", "NA1_2", "NA1_3"], batch_size=2)
+    saver = QueueSaver(loader, log)
+    before = resolved_batches()
+
+    asyncio.run(_orchestrator(loader, saver, log, prefetch=prefetch).run())
+
+    assert resolved_batches() == before + 2
+
+
+def test_matchdata_tuned_saver_never_size_flushes_anchors() -> None:
+    saver = MatchDataSaver(
+        non_timeline_parser=FakeParser(),
+        timeline_parser=FakeParser(),
+        flush_tuner=FlushTuner(memory_budget_bytes=1, max_parts_per_s=1.0),
+    )
+
+    assert not saver._buffer_full("game_data.info", 10_000_000)
+    assert saver._buffer_full("game_data.metadata", 10_000_000)
+
+
+def test_matchdata_claim_sizer_feeds_loader_batch_size() -> None:
+    class SizedLoader(QueueLoader):
+        def __init__(self, matchids, *, batch_size):
+            super().__init__(matchids, batch_size=batch_size)
+            self.sizes: list[int] = []
+
+        def load(self, ctx, *, exclude=(), batch_size=None):
+            self.sizes.append(batch_size)
+            self.batch_size = batch_size
+            return super().load(ctx, exclude=exclude)
+
+    log: list[str] = []
+    loader = SizedLoader([f"NA1_{i}" for i in range(4)], batch_size=2)
+    saver = QueueSaver(loader, log)
+    orchestrator = _orchestrator(loader, saver, log, prefetch=0)
+    orchestrator.claim_sizer = ClaimSizer(initial=2, target_batch_s=60, minimum=1, maximum=3)
+
+    asyncio.run(orchestrator.run())
+
+    assert loader.sizes[0] == 2
+    assert loader.sizes[1] == 3
+    assert loader.pending == []
+
+
+def test_matchdata_failed_batch_keeps_wal_for_replay(tmp_path) -> None:
+    saver = FailingSaver()
+    saver.wal = MatchDataWal(tmp_path, fsync=False)
+
+    with pytest.raises(RuntimeError, match="insert failed"):
+        asyncio.run(
+            saver.save(
+                _items(
+                    StreamItem(
+                        "non_timeline",
+                        MatchFetchResult("NA1_1", {"metadata": {}}, 200),
+                    )
+                ),
+                MatchDataCollectorState(matchids=["NA1_1"]),
+                _ctx(),
+            )
+        )
+
+    (logged,) = saver.wal.pending()
+    assert logged.run_id == _ctx().run_id
+    assert [f.match_id for f in logged.fetches] == ["NA1_1"]
+
+
+def test_matchdata_resolved_batch_discards_wal(tmp_path) -> None:
+    saver = RecordingSaver()
+    saver.wal = MatchDataWal(tmp_path, fsync=False)
+
+    asyncio.run(
+        saver.save(
+            _items(
+                StreamItem("non_timeline", MatchFetchResult("NA1_1", {"metadata": {}}, 200)),
+                StreamItem("timeline", MatchFetchResult("NA1_1", {"frames": []}, 200)),
+            ),
+            MatchDataCollectorState(matchids=["NA1_1"]),
+            _ctx(),
+        )
+    )
+
+    assert saver.finished == [["NA1_1"]]
+    assert saver.wal.pending() == []
+
+
+def test_matchdata_orchestrator_replays_wal_without_fetching(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.worker.pipelines.matchdata_orchestrator.load_pending_matchids",
+        lambda ids: {"NA1_1", "NA1_2"},
+    )
+    wal = MatchDataWal(tmp_path, fsync=False)
+    crashed_run = UUID("44444444-4444-4444-4444-444444444444")
+    log = wal.open(
+        crashed_run,
+        matchids=["NA1_1", "NA1_2", "NA1_3"],
+        non_timeline_matchids=None,
+        timeline_matchids=None,
+    )
+    for mid in ("NA1_1", "NA1_2"):
+        log.append("non_timeline", mid, 200, {"metadata": {}})
+    log.append("timeline", "NA1_1", 200, {"frames": []})
+    log.close()
+
+    class PreparedLoader(QueueLoader):
+        prepared = 0
+
+        def prepare(self) -> None:
+            self.prepared += 1
+
+    fetch_log: list[str] = []
+    loader = PreparedLoader([], batch_size=2)
+    saver = QueueSaver(loader, fetch_log)
+    saver.wal = wal
+    orchestrator = _orchestrator(loader, saver, fetch_log, prefetch=0)
+    orchestrator.wal = wal
+
+    asyncio.run(orchestrator.run())
+
+    assert loader.prepared == 1
+    assert [line for line in fetch_log if line.startswith("fetch")] == []
+    assert saver.deleted == [["NA1_1", "NA1_2"]]
+    assert saver.finished == [["NA1_1"]]
+    assert wal.pending() == []
+
+
+class MonthParser:
+    def __init__(self, field: str, key: str, epoch_ms: int) -> None:
+        self.field, self.key, self.epoch_ms = field, key, epoch_ms
+
+    def run(self, data):
+        return SimpleNamespace(**{self.field: [{self.key: self.epoch_ms}]})
+
+
+class EmptyInfoParser(MonthParser):
+    """Parses like SWARM: valid payload, no info rows."""
+
+    def run(self, data):
+        return SimpleNamespace(game_info=[])
+
+
+class PartitionedSaver(RecordingSaver):
+    def __init__(self, non_timeline_parser: MonthParser | None = None) -> None:
+        MatchDataSaver.__init__(
+            self,
+            # 2026-01-31T23:58Z created, 2026-02-01 ended: the months differ.
+            non_timeline_parser=non_timeline_parser
+            or MonthParser("game_info", "gameCreation", 1_769_903_880_000),
+            timeline_parser=MonthParser("gameEnd", "realTimestamp", 1_769_905_800_000),
+            partitioned=True,
+        )
+        self.deleted, self.finished, self.source_deleted, self.tombstoned = [], [], [], []
+        self.buffered: list[tuple[str, dict]] = []
+
+    async def _buffer_inserts(self, specs, parsed, buffers, run_id) -> None:
+        stream = "timeline" if hasattr(parsed, "gameEnd") else "non_timeline"
+        self.buffered.extend((stream, row) for rows in vars(parsed).values() for row in rows)
+
+
+def test_partitioned_saver_dates_timeline_rows_by_info_game_creation(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.worker.pipelines.matchdata_orchestrator.load_game_months",
+        lambda ids: {"NA1_3": 202512},
+    )
+    saver = PartitionedSaver()
+    state = MatchDataCollectorState(
+        matchids=["NA1_1", "NA1_2", "NA1_3"],
+        non_timeline_matchids=["NA1_1", "NA1_2"],
+    )
+
+    asyncio.run(
+        saver.save(
+            _items(
+                # Timeline first: held until the info row dates the match.
+                StreamItem("timeline", MatchFetchResult("NA1_1", {}, 200)),
+                StreamItem("non_timeline", MatchFetchResult("NA1_1", {}, 200)),
+                StreamItem("timeline", MatchFetchResult("NA1_2", {}, 200)),
+                StreamItem("timeline", MatchFetchResult("NA1_3", {}, 200)),
+            ),
+            state,
+            _ctx(),
+        )
+    )
+
+    months = {(row["matchId"], stream): row["game_month"] for stream, row in saver.buffered}
+    assert months == {
+        ("NA1_1", "non_timeline"): 202601,
+        ("NA1_1", "timeline"): 202601,
+        # Earlier run stored its info row.
+        ("NA1_3", "timeline"): 202512,
+        # No info in sight: dated by the timeline's own end.
+        ("NA1_2", "timeline"): 202602,
+    }
+    assert saver._table_columns["game_data.info"][-1] == "game_month"
+
+
+def test_partitioned_saver_dates_timeline_when_info_tables_are_empty(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "app.worker.pipelines.matchdata_orchestrator.load_game_months", lambda ids: {}
+    )
+    saver = PartitionedSaver(EmptyInfoParser("game_info", "gameCreation", 0))
+    state = MatchDataCollectorState(matchids=["NA1_1"], non_timeline_matchids=["NA1_1"])
+
+    asyncio.run(
+        saver.save(
+            _items(
+                StreamItem("timeline", MatchFetchResult("NA1_1", {}, 200)),
+                StreamItem("non_timeline", MatchFetchResult("NA1_1", {}, 200)),
+            ),
+            state,
+            _ctx(),
+        )
+    )
+
+    assert [(stream, row["game_month"]) for stream, row in saver.buffered] == [
+        ("timeline", 202602)
+    ]
+    assert saver.finished == [["NA1_1"]]
+    assert saver.tombstoned == []
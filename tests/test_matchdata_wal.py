@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from app.worker.pipelines.matchdata_wal import MatchDataWal
+
+RUN_A = UUID("11111111-1111-1111-1111-111111111111")
+
+
+def _open(wal: MatchDataWal):
+    return wal.open(
+        RUN_A,
+        matchids=["NA1_1", "NA1_2"],
+        non_timeline_matchids=None,
+        timeline_matchids=["NA1_2"],
+    )
+
+
+def test_wal_round_trips_every_payload_kind(tmp_path) -> None:
+    wal = MatchDataWal(tmp_path, fsync=False)
+    log = _open(wal)
+    log.append("non_timeline", "NA1_1", 200, {"metadata": {"matchId": "NA1_1"}})
+    log.append("timeline", "NA1_2", 200, b'{"info": {"frames": []}}')
+    log.append("non_timeline", "NA1_2", 404, None)
+    log.close()
+
+    (batch,) = wal.pending()
+
+    assert batch.run_id == RUN_A
+    assert batch.matchids == ["NA1_1", "NA1_2"]
+    assert batch.non_timeline_matchids is None
+    assert batch.timeline_matchids == ["NA1_2"]
+    assert [(f.stream, f.match_id, f.status, f.data) for f in batch.fetches] == [
+        ("non_timeline", "NA1_1", 200, {"metadata": {"matchId": "NA1_1"}}),
+        ("timeline", "NA1_2", 200, b'{"info": {"frames": []}}'),
+        ("non_timeline", "NA1_2", 404, None),
+    ]
+
+
+def test_wal_ignores_torn_trailing_record(tmp_path) -> None:
+    wal = MatchDataWal(tmp_path, fsync=False)
+    log = _open(wal)
+    log.append("non_timeline", "NA1_1", 200, {"metadata": {}})
+    log.close()
+    with log.path.open("ab") as fh:
+        fh.write(b"\x40\x00\x00\x00partial")
+
+    (batch,) = wal.pending()
+
+    assert [f.match_id for f in batch.fetches] == ["NA1_1"]
+
+
+def test_wal_discard_removes_resolved_batch(tmp_path) -> None:
+    wal = MatchDataWal(tmp_path, fsync=False)
+    _open(wal).discard()
+
+    assert wal.pending() == []
+    assert MatchDataWal(tmp_path / "missing").pending() == []
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from types import SimpleNamespace
 
+from app.services.riot_api_client.parsers.models import codes
 from app.services.riot_api_client.parsers.non_timeline import (
     ObjectivesParser,
     ParticipantStatsParser,
@@ -39,6 +40,7 @@ class _Participant:
             "teamId": 100,
             "puuid": "PUUID",
             "participantId": 1,
+            "teamPosition": "JUNGLE",
             "visionScore": 300,
             "wardsPlaced": 301,
             "wardsKilled": 302,
@@ -59,3 +61,9 @@ def test_participant_stats_parser_preserves_uint16_values_above_255() -> None:
     assert row["allInPings"] == 303
     assert row["retreatPings"] == 304
     assert row["unrealKills"] == 255
+
+
+def test_participant_stats_parser_emits_team_position_code() -> None:
+    rows = ParticipantStatsParser().parse([_Participant()], "NA1_1")
+
+    assert rows[0]["teamPosition"] == codes.TEAM_POSITION.codes["JUNGLE"] == 2
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import copy
+
+from app.services.riot_api_client.parsers.non_timeline import (
+    MatchDataNonTimelineParsingOrchestrator,
+)
+from app.services.riot_api_client.parsers.timeline import (
+    MatchDataTimelineParsingOrchestrator,
+)
+from scripts import bench_parsers
+from scripts.parser_bench_corpus import anonymize_payload, build_corpus
+
+
+def test_bench_corpus_covers_expected_cases_and_parses() -> None:
+    cases = {case.name: case for case in build_corpus()}
+    assert set(cases) == {"short", "long", "remake", "abort", "swarm"}
+
+    for name in ("short", "long", "remake"):
+        case = cases[name]
+        nt = MatchDataNonTimelineParsingOrchestrator().run(copy.deepcopy(case.non_timeline))
+        tl = MatchDataTimelineParsingOrchestrator().run(copy.deepcopy(case.timeline))
+        assert len(nt.participant_stats) == 10
+        assert len(tl.gameEnd) == 1
+        assert tl.participantStats
+
+    for name in ("abort", "swarm"):
+        case = cases[name]
+        tl = MatchDataTimelineParsingOrchestrator().run(copy.deepcopy(case.timeline))
+        assert tl.gameEnd == []
+
+    assert cases["long"].timeline_events > cases["short"].timeline_events
+
+
+def test_anonymize_payload_remaps_puuids_consistently() -> None:
+    raw = {
+        "metadata": {"matchId": "EUW1_1", "participants": ["real-a", "real-b"]},
+        "info": {
+            "participants": [
+                {"puuid": "real-b", "riotIdGameName": "Someone", "summonerName": "x"},
+                {"puuid": "real-a"},
+            ]
+        },
+    }
+
+    anonymize_payload(raw)
+
+    first, second = raw["metadata"]["participants"]
+    assert "real" not in first and "real" not in second
+    assert raw["info"]["participants"][0]["puuid"] == second
+    assert raw["info"]["participants"][1]["puuid"] == first
+    assert raw["info"]["participants"][0]["riotIdGameName"] == ""
+
+
+def test_compare_to_baseline_flags_only_regressions_beyond_tolerance() -> None:
+    baseline = {
+        "timeline.run/long": {"ns_per_event": 100, "alloc_peak_bytes": 1000},
+    }
+    results = [
+        {
+            "stage": "timeline.run",
+            "case": "long",
+            "ns_per_event": 130,
+            "alloc_peak_bytes": 1100,
+            "stage_rss_peak_kib": 5000,
+        },
+        {"stage": "timeline.run", "case": "new", "ns_per_event": 999},
+    ]
+
+    regressions = bench_parsers.compare_to_baseline(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("timeline.run/long ns_per_event")
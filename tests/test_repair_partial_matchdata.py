@@ -154,6 +154,7 @@ class _RepairClient:
         duplicate_participants: set[str] | None = None,
         bad_dataversions: list[int] | None = None,
         metadata_after_counts: dict[str, int] | None = None,
+        partition_key: str = "",
     ) -> None:
         self.info = info
         self.timeline = timeline
@@ -163,6 +164,7 @@ class _RepairClient:
         self.duplicate_participants = duplicate_participants or set()
         self.bad_dataversions = bad_dataversions or []
         self.metadata_after_counts = metadata_after_counts
+        self.partition_key = partition_key
         self.commands = []
         self.inserted = []
 
@@ -170,6 +172,8 @@ class _RepairClient:
         sql = " ".join(query.split())
         matchids = list((parameters or {}).get("matchids", []))
 
+        if "FROM system.tables" in sql:
+            return _rows([(self.partition_key,)])
         if "dataversion != 2" in sql:
             return _rows([(len(self.bad_dataversions), self.bad_dataversions)])
         if "unique_participant_ids" in sql:
@@ -264,13 +268,13 @@ def test_metadata_only_apply_backs_up_before_insert_and_clears_queue() -> None:
         for i, command in enumerate(commands)
         if command.startswith("CREATE TABLE game_data_repair.metadata_test_")
     ]
-    queue_delete = next(
+    queue_finish = next(
         i
         for i, command in enumerate(commands)
-        if command.startswith("ALTER TABLE game_data.matchdata_matchids")
+        if command.startswith("INSERT INTO game_data.matchdata_matchids")
     )
     assert len(backup_creates) == len(repair.METADATA_REPAIR_TABLES)
-    assert max(backup_creates) < metadata_insert < queue_delete
+    assert max(backup_creates) < metadata_insert < queue_finish
 
 
 def test_metadata_only_apply_refuses_non_2_dataversion() -> None:
@@ -346,6 +350,78 @@ def test_insert_missing_metadata_is_guarded_to_missing_rows() -> None:
     }
 
 
+def test_insert_missing_metadata_stamps_game_month_when_partitioned() -> None:
+    client = _RepairClient(info={"EUW1_1"}, timeline={"EUW1_1"}, partition_key="game_month")
+
+    repair._insert_missing_metadata(
+        client,
+        matchids=["EUW1_1"],
+        repair_run_id=UUID("11111111-1111-1111-1111-111111111111"),
+    )
+
+    command, _parameters = client.commands[0]
+    assert "(run_id, matchid, dataversion, participants, game_month)" in command
+    assert "AS participants, any(game_month) FROM" in command
+
+
+class _MonthClient:
+    def __init__(self, partition_key: str = "game_month") -> None:
+        self.partition_key = partition_key
+        self.commands: list[str] = []
+        self.inserted: list[tuple[UUID, str]] = []
+
+    def query(self, query: str, parameters: dict[str, object] | None = None):
+        sql = " ".join(query.split())
+        if "FROM system.tables" in sql:
+            return _rows([(self.partition_key,)])
+        if "UNION ALL" in sql:
+            assert parameters == {"month": 202609}
+            return _rows([("EUW1_1",), ("NA1_1",)])
+        if "SELECT count()" in sql:
+            return _rows([(3,)])
+        if repair.QUEUE_TABLE in sql:
+            return _rows([("NA1_1",)])
+        raise AssertionError(f"Unexpected query: {sql}")
+
+    def command(self, query: str, parameters: dict[str, object] | None = None) -> None:
+        self.commands.append(" ".join(query.split()))
+
+    def insert(self, table, data, column_names) -> None:
+        self.inserted.extend(data)
+
+
+def test_game_month_rebuild_backs_up_partition_before_dropping_and_requeues() -> None:
+    client = _MonthClient()
+
+    backups, matchids, queued = repair._apply_game_month_rebuild(
+        client, month=202609, backup_prefix="month_test", apply=True
+    )
+
+    assert matchids == ["EUW1_1", "NA1_1"]
+    assert [backup.source_table for backup in backups] == list(ALL_DELETE_TABLES)
+    assert queued == 1
+    assert [matchid for _run_id, matchid in client.inserted] == ["EUW1_1"]
+    attaches = [i for i, c in enumerate(client.commands) if "ATTACH PARTITION 202609" in c]
+    drops = [i for i, c in enumerate(client.commands) if "DROP PARTITION 202609" in c]
+    assert len(attaches) == len(drops) == len(ALL_DELETE_TABLES)
+    assert max(attaches) < min(drops)
+    assert (
+        "ALTER TABLE game_data_repair.month_test_info ATTACH PARTITION 202609 "
+        "FROM game_data.info"
+    ) in client.commands
+
+
+def test_game_month_rebuild_requires_partitioned_layout() -> None:
+    client = _MonthClient(partition_key="")
+
+    with pytest.raises(RuntimeError, match="D14 layout"):
+        repair._apply_game_month_rebuild(
+            client, month=202609, backup_prefix="month_test", apply=True
+        )
+
+    assert client.commands == []
+
+
 def test_metadata_only_apply_keeps_queue_if_post_validation_fails() -> None:
     client = _RepairClient(
         info={"EUW1_1"},
@@ -367,7 +443,7 @@ def test_metadata_only_apply_keeps_queue_if_post_validation_fails() -> None:
         command.startswith("INSERT INTO game_data.metadata") for command in commands
     )
     assert not any(
-        command.startswith("ALTER TABLE game_data.matchdata_matchids")
+        command.startswith("INSERT INTO game_data.matchdata_matchids")
         for command in commands
     )
 
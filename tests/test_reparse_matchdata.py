@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.worker.pipelines.payload_archive import (
+    archive_payload,
+    filter_streams,
+    read_payload,
+    scan_archive,
+)
+from scripts import reparse_matchdata as reparse
+from scripts.parser_bench_corpus import build_corpus
+
+
+def test_resolve_tables_expands_streams_in_spec_order() -> None:
+    tables = reparse.resolve_tables(["game_data.info"], ["timeline"])
+
+    assert tables[0] == "game_data.info"
+    assert "game_data.tl_ward_placed" in tables
+    assert "game_data.participant_stats" not in tables
+    with pytest.raises(ValueError, match="Unknown matchdata tables"):
+        reparse.resolve_tables(["game_data.nope"], [])
+    with pytest.raises(ValueError, match="at least one"):
+        reparse.resolve_tables([], [])
+
+
+def test_archive_round_trip_and_scan(tmp_path: Path) -> None:
+    archive_payload(tmp_path, "non_timeline", "EUW1_1", {"a": 1})
+    archive_payload(tmp_path, "timeline", "EUW1_1", b'{"b": 2}')
+    archive_payload(tmp_path, "timeline", "EUW1_2", {"c": 3})
+    (tmp_path / "notes.json").write_text("{}")
+
+    matches = scan_archive(tmp_path)
+
+    assert [m.match_id for m in matches] == ["EUW1_1", "EUW1_2"]
+    assert read_payload(matches[0].non_timeline) == {"a": 1}
+    assert read_payload(matches[0].timeline) == {"b": 2}
+    assert matches[1].non_timeline is None
+    assert [m.match_id for m in filter_streams(matches, ["non_timeline"])] == ["EUW1_1"]
+
+
+def test_reparse_chunk_parses_only_selected_tables(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(reparse, "_PARSERS", {})
+    for case in build_corpus():
+        archive_payload(tmp_path, "non_timeline", case.name, case.non_timeline)
+        archive_payload(tmp_path, "timeline", case.name, json.dumps(case.timeline).encode())
+    plan = reparse.ReparsePlan(
+        tables=("game_data.participant_stats", "game_data.tl_ward_placed"),
+        run_id="00000000-0000-0000-0000-000000000000",
+        apply=False,
+    )
+
+    stats = reparse.reparse_chunk(scan_archive(tmp_path), plan)
+
+    assert stats.matches == 5
+    assert not stats.failed
+    assert set(stats.rows) <= set(plan.tables)
+    assert stats.rows["game_data.participant_stats"] > 0
+    assert stats.rows["game_data.tl_ward_placed"] > 0
+    # The abort payload is retired like the live pipeline does, so its rows
+    # are carried over from the live table instead of being rebuilt.
+    assert "abort" not in stats.reparsed["non_timeline"]
+    assert "short" in stats.reparsed["timeline"]
+
+
+def test_reparse_chunk_counts_bad_payloads_and_stops_on_bugs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(reparse, "_PARSERS", {})
+    archive_payload(tmp_path, "non_timeline", "EUW1_1", b"{not json")
+    (tmp_path / "EUW1_2.non_timeline.json.zst").write_bytes(b"not a zstd frame")
+    plan = reparse.ReparsePlan(
+        tables=("game_data.participant_stats",),
+        run_id="00000000-0000-0000-0000-000000000000",
+        apply=False,
+    )
+
+    stats = reparse.reparse_chunk(scan_archive(tmp_path), plan)
+
+    assert stats.failed == ["EUW1_1:non_timeline", "EUW1_2:non_timeline"]
+
+    def broken(*args: object) -> None:
+        raise AttributeError("bug")
+
+    monkeypatch.setattr(reparse, "_parse_stream", broken)
+    with pytest.raises(AttributeError, match="bug"):
+        reparse.reparse_chunk(scan_archive(tmp_path), plan)
+
+
+def test_reparse_chunk_stamps_game_month_only_on_partitioned_tables(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(reparse, "_PARSERS", {})
+    written: dict[str, tuple[tuple[str, ...], list[dict]]] = {}
+    monkeypatch.setattr(
+        "database.clickhouse.operations.utils.persist_data",
+        lambda table, columns, items, run_id, batch_size: written.setdefault(
+            table, (tuple(columns), items)
+        ),
+    )
+    for case in build_corpus():
+        archive_payload(tmp_path, "non_timeline", case.name, case.non_timeline)
+        archive_payload(tmp_path, "timeline", case.name, json.dumps(case.timeline).encode())
+    plan = reparse.ReparsePlan(
+        tables=("game_data.participant_stats", "game_data.tl_ward_placed"),
+        run_id="00000000-0000-0000-0000-000000000000",
+        apply=True,
+        partitioned_tables=frozenset({"game_data.participant_stats"}),
+    )
+
+    reparse.reparse_chunk(scan_archive(tmp_path), plan)
+
+    stats_columns, stats_rows = written["game_data.participant_stats__reparse"]
+    ward_columns, ward_rows = written["game_data.tl_ward_placed__reparse"]
+    assert stats_columns[-1] == "game_month"
+    assert all(row["game_month"] > 0 for row in stats_rows)
+    assert "game_month" not in ward_columns
+    assert not any("game_month" in row for row in ward_rows)
+
+
+def test_live_matches_keeps_matches_anchored_in_every_stream(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for match_id in ("EUW1_1", "EUW1_2", "EUW1_3"):
+        archive_payload(tmp_path, "non_timeline", match_id, {"a": 1})
+        archive_payload(tmp_path, "timeline", match_id, {"b": 2})
+    anchored = {
+        "game_data.info": {"EUW1_1", "EUW1_2"},
+        "game_data.tl_game_end": {"EUW1_1", "EUW1_3"},
+    }
+    lookups = []
+
+    def load_table_matchids(table, match_ids, *, stream):
+        lookups.append((table, stream))
+        return anchored[table] & set(match_ids)
+
+    monkeypatch.setattr(reparse, "load_table_matchids", load_table_matchids)
+    matches = scan_archive(tmp_path)
+
+    both = reparse.live_matches(matches, ["non_timeline", "timeline"])
+    info_only = reparse.live_matches(matches, ["non_timeline"])
+
+    assert [m.match_id for m in both] == ["EUW1_1"]
+    assert [m.match_id for m in info_only] == ["EUW1_1", "EUW1_2"]
+    assert lookups[:2] == [
+        ("game_data.info", "non_timeline"),
+        ("game_data.tl_game_end", "timeline"),
+    ]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from prometheus_client import REGISTRY
+
+from app.api.v1.metrics.telemetry import (
+    BatchTrace,
+    export_parse_ns,
+    observe_stage,
+    timed_stage,
+)
+from database.clickhouse.operations import utils
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class FakeSummary:
+    def __init__(self, written: int) -> None:
+        self._written = written
+
+    def written_bytes(self) -> int:
+        return self._written
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.inserts: list[tuple[str, list[tuple]]] = []
+
+    def insert(self, table, rows, column_names):
+        self.inserts.append((table, list(rows)))
+        return FakeSummary(100 * len(rows))
+
+
+def test_observe_stage_records_latency_histogram() -> None:
+    labels = {"pipeline": "test", "stage": "observe"}
+    before = _sample("pipeline_stage_seconds_count", **labels)
+
+    with observe_stage("test", "observe", table="t"):
+        pass
+
+    assert _sample("pipeline_stage_seconds_count", **labels) == before + 1
+
+
+def test_observe_stage_records_latency_when_stage_fails() -> None:
+    labels = {"pipeline": "test", "stage": "failing"}
+    before = _sample("pipeline_stage_seconds_count", **labels)
+
+    try:
+        with observe_stage("test", "failing"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert _sample("pipeline_stage_seconds_count", **labels) == before + 1
+
+
+def test_timed_stage_wraps_sync_function() -> None:
+    labels = {"pipeline": "test", "stage": "decorated"}
+    before = _sample("pipeline_stage_seconds_count", **labels)
+
+    @timed_stage("test", "decorated")
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    assert add(1, 2) == 3
+    assert add.__name__ == "add"
+    assert _sample("pipeline_stage_seconds_count", **labels) == before + 1
+
+
+def test_batch_trace_observes_claim_to_resolution_once() -> None:
+    labels = {"pipeline": "test_batch"}
+    before = _sample("matchdata_claim_to_resolution_seconds_count", **labels)
+
+    trace = BatchTrace("test_batch", "run")
+    with trace.activate():
+        pass
+    trace.resolved(matches=3)
+    trace.end()
+
+    assert _sample("matchdata_claim_to_resolution_seconds_count", **labels) == before + 1
+
+
+def test_unresolved_batch_trace_records_no_latency() -> None:
+    labels = {"pipeline": "test_unresolved"}
+
+    BatchTrace("test_unresolved", "run").end()
+
+    assert _sample("matchdata_claim_to_resolution_seconds_count", **labels) == 0.0
+
+
+def test_export_parse_ns_records_seconds() -> None:
+    labels = {"stream": "test_stream"}
+    before = _sample("matchdata_parse_seconds_sum", **labels)
+
+    export_parse_ns(stream="test_stream", elapsed_ns=2_000_000)
+
+    assert _sample("matchdata_parse_seconds_sum", **labels) == before + 0.002
+
+
+def test_insert_rows_in_batches_counts_rows_and_bytes_per_table(monkeypatch) -> None:
+    client = FakeClient()
+    monkeypatch.setattr(utils, "get_client", lambda: client)
+    table = "test_db.telemetry"
+    rows_before = _sample("clickhouse_inserted_rows_total", table=table)
+    bytes_before = _sample("clickhouse_inserted_bytes_total", table=table)
+
+    written = utils.insert_rows_in_batches(
+        table, ("a",), [(1,), (2,), (3,)], batch_size=2
+    )
+
+    assert written == 300
+    assert len(client.inserts) == 2
+    assert _sample("clickhouse_inserted_rows_total", table=table) == rows_before + 3
+    assert _sample("clickhouse_inserted_bytes_total", table=table) == bytes_before + 300
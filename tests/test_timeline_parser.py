@@ -8,9 +8,14 @@ cannot silently change parsed shape — the raw ClickHouse columns depend on it.
 
 from __future__ import annotations
 
+import json
+from dataclasses import asdict
 from types import SimpleNamespace
 from typing import Any
 
+import pytest
+
+from app.services.riot_api_client.parsers.models import codes
 from app.services.riot_api_client.parsers.models.timeline import Position
 from app.services.riot_api_client.parsers.timeline import (
     BuildingKillParser,
@@ -20,9 +25,12 @@ from app.services.riot_api_client.parsers.timeline import (
     EliteMonsterKillParser,
     GameEndParser,
     LevelUpParser,
+    MatchDataTimelineParsingOrchestrator,
     TurretPlateDestroyedParser,
     VictimDamageDealtParser,
 )
+from app.services.riot_api_client.parsers.timeline_stream import TimelineFrameStream
+from scripts.parser_bench_corpus import build_corpus
 
 MATCH_ID = "EUW1_1"
 # frame.timestamp 60000 -> nearest_frame_timestamp == 60000
@@ -58,9 +66,9 @@ def test_champion_special_kill_multikill_present_and_absent() -> None:
     )
     assert rows == [
         {
-            "type": "CHAMPION_SPECIAL_KILL",
+            "type": codes.EVENT_TYPE.codes["CHAMPION_SPECIAL_KILL"],
             "timestamp": 1000,
-            "killType": "KILL_FIRST_BLOOD",
+            "killType": codes.KILL_TYPE.codes["KILL_FIRST_BLOOD"],
             "killerId": 2,
             "multiKillLength": 3,
             "frame_timestamp": FRAME_TS,
@@ -69,9 +77,9 @@ def test_champion_special_kill_multikill_present_and_absent() -> None:
             "position_y": 20,
         },
         {
-            "type": "CHAMPION_SPECIAL_KILL",
+            "type": codes.EVENT_TYPE.codes["CHAMPION_SPECIAL_KILL"],
             "timestamp": 1001,
-            "killType": "KILL_ACE",
+            "killType": codes.KILL_TYPE.codes["KILL_ACE"],
             "killerId": 4,
             "multiKillLength": None,
             "frame_timestamp": FRAME_TS,
@@ -118,11 +126,11 @@ def test_elite_monster_kill_assisting_and_subtype_variants() -> None:
     )
     assert rows == [
         {
-            "type": "ELITE_MONSTER_KILL",
+            "type": codes.EVENT_TYPE.codes["ELITE_MONSTER_KILL"],
             "timestamp": 2000,
             "killerId": 1,
             "killerTeamId": 100,
-            "monsterType": "DRAGON",
+            "monsterType": codes.MONSTER_TYPE.codes["DRAGON"],
             "monsterSubType": "FIRE_DRAGON",
             "bounty": 50,
             "assistingParticipantIds": [2, 3],
@@ -132,11 +140,11 @@ def test_elite_monster_kill_assisting_and_subtype_variants() -> None:
             "position_y": 4,
         },
         {
-            "type": "ELITE_MONSTER_KILL",
+            "type": codes.EVENT_TYPE.codes["ELITE_MONSTER_KILL"],
             "timestamp": 2001,
             "killerId": 1,
             "killerTeamId": 200,
-            "monsterType": "BARON_NASHOR",
+            "monsterType": codes.MONSTER_TYPE.codes["BARON_NASHOR"],
             "monsterSubType": None,
             "bounty": 0,
             "assistingParticipantIds": [],
@@ -146,11 +154,11 @@ def test_elite_monster_kill_assisting_and_subtype_variants() -> None:
             "position_y": 6,
         },
         {
-            "type": "ELITE_MONSTER_KILL",
+            "type": codes.EVENT_TYPE.codes["ELITE_MONSTER_KILL"],
             "timestamp": 2002,
             "killerId": 1,
             "killerTeamId": 200,
-            "monsterType": "RIFTHERALD",
+            "monsterType": codes.MONSTER_TYPE.codes["RIFTHERALD"],
             "monsterSubType": None,
             "bounty": 0,
             "assistingParticipantIds": [],
@@ -190,12 +198,12 @@ def test_building_kill_tower_and_assisting_variants() -> None:
     )
     assert rows == [
         {
-            "type": "BUILDING_KILL",
+            "type": codes.EVENT_TYPE.codes["BUILDING_KILL"],
             "timestamp": 3000,
             "bounty": 100,
-            "buildingType": "TOWER_BUILDING",
+            "buildingType": codes.BUILDING_TYPE.codes["TOWER_BUILDING"],
             "killerId": 5,
-            "laneType": "MID_LANE",
+            "laneType": codes.LANE_TYPE.codes["MID_LANE"],
             "teamId": 200,
             "towerType": "OUTER_TURRET",
             "assistingParticipantIds": [6],
@@ -205,12 +213,12 @@ def test_building_kill_tower_and_assisting_variants() -> None:
             "position_y": 8,
         },
         {
-            "type": "BUILDING_KILL",
+            "type": codes.EVENT_TYPE.codes["BUILDING_KILL"],
             "timestamp": 3001,
             "bounty": 0,
-            "buildingType": "INHIBITOR_BUILDING",
+            "buildingType": codes.BUILDING_TYPE.codes["INHIBITOR_BUILDING"],
             "killerId": 7,
-            "laneType": "TOP_LANE",
+            "laneType": codes.LANE_TYPE.codes["TOP_LANE"],
             "teamId": 100,
             "towerType": None,
             "assistingParticipantIds": [],
@@ -271,7 +279,7 @@ def test_dragon_soul_given_keeps_type_no_position() -> None:
     )
     assert rows == [
         {
-            "type": "DRAGON_SOUL_GIVEN",
+            "type": codes.EVENT_TYPE.codes["DRAGON_SOUL_GIVEN"],
             "timestamp": 5000,
             "name": "Infernal",
             "teamId": 100,
@@ -311,10 +319,10 @@ def test_turret_plate_destroyed_position_object_branch() -> None:
     )
     assert rows == [
         {
-            "type": "TURRET_PLATE_DESTROYED",
+            "type": codes.EVENT_TYPE.codes["TURRET_PLATE_DESTROYED"],
             "timestamp": 7000,
             "killerId": 1,
-            "laneType": "MID_LANE",
+            "laneType": codes.LANE_TYPE.codes["MID_LANE"],
             "teamId": 200,
             "frame_timestamp": FRAME_TS,
             "matchId": MATCH_ID,
@@ -355,7 +363,7 @@ def test_champion_kill_strips_damage_builds_event_id() -> None:
     )
     assert rows == [
         {
-            "type": "CHAMPION_KILL",
+            "type": codes.EVENT_TYPE.codes["CHAMPION_KILL"],
             "timestamp": 8000,
             "bounty": 300,
             "killStreakLength": 1,
@@ -370,7 +378,7 @@ def test_champion_kill_strips_damage_builds_event_id() -> None:
             "position_y": 14,
         },
         {
-            "type": "CHAMPION_KILL",
+            "type": codes.EVENT_TYPE.codes["CHAMPION_KILL"],
             "timestamp": 8001,
             "bounty": 0,
             "killStreakLength": 0,
@@ -458,3 +466,76 @@ def test_victim_damage_dealt_emits_one_row_per_instance() -> None:
             "idx": 1,
         },
     ]
+
+
+def test_timeline_orchestrator_table_selection_requires_anchor() -> None:
+    with pytest.raises(ValueError, match="anchor"):
+        MatchDataTimelineParsingOrchestrator(tables=frozenset({"participantStats"}))
+    with pytest.raises(ValueError, match="Unknown"):
+        MatchDataTimelineParsingOrchestrator(tables=frozenset({"gameEnd", "nope"}))
+
+
+def test_timeline_orchestrator_skips_disabled_tables(monkeypatch) -> None:
+    class _Recording:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def parse(self, frames: Any, matchId: str | int) -> list[dict[str, Any]]:
+            self.calls += 1
+            return [{"matchId": matchId}]
+
+    ward = _Recording()
+    game_end = _Recording()
+    orchestrator = MatchDataTimelineParsingOrchestrator(
+        wardPlaced=ward,
+        gameEnd=game_end,
+        tables=frozenset({"gameEnd"}),
+    )
+    monkeypatch.setattr(
+        "app.services.riot_api_client.parsers.timeline.timeline_drift",
+        lambda raw, **kwargs: None,
+    )
+    monkeypatch.setattr(
+        "app.services.riot_api_client.parsers.timeline.Timeline.model_validate",
+        lambda raw: SimpleNamespace(
+            metadata=SimpleNamespace(matchId=MATCH_ID),
+            info=SimpleNamespace(frames=[]),
+        ),
+    )
+
+    tables = orchestrator.run({"metadata": {"participants": list("abcdefghij")}})
+
+    assert ward.calls == 0
+    assert game_end.calls == 1
+    assert tables.wardPlaced == []
+    assert tables.gameEnd == [{"matchId": MATCH_ID}]
+
+
+@pytest.mark.parametrize("case", build_corpus(), ids=lambda case: case.name)
+def test_run_stream_matches_full_decode(case: Any) -> None:
+    orchestrator = MatchDataTimelineParsingOrchestrator()
+    payload = json.dumps(case.timeline).encode()
+
+    assert asdict(orchestrator.run(payload)) == asdict(orchestrator.run(case.timeline))
+
+
+def test_frame_stream_decodes_envelope_and_frames_lazily() -> None:
+    payload = (
+        '{"info": {"frames": [{"events": [], "note": "]}[{"}, {"events": [1]}],'
+        ' "gameId": 7}, "metadata": {"matchId": "EUW1_7"}}'
+    )
+    stream = TimelineFrameStream(payload)
+
+    assert stream.envelope == {
+        "info": {"frames": [], "gameId": 7},
+        "metadata": {"matchId": "EUW1_7"},
+    }
+    assert list(stream.frames()) == [
+        {"events": [], "note": "]}[{"},
+        {"events": [1]},
+    ]
+
+
+def test_frame_stream_rejects_truncated_payload() -> None:
+    with pytest.raises(json.JSONDecodeError):
+        TimelineFrameStream(b'{"metadata": {"matchId": "EUW1_7"}, "info": {"frames": [')